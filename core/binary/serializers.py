@@ -13,6 +13,58 @@ class BinaryNodeSerializer(serializers.ModelSerializer):
         read_only_fields = ('user', 'created_at', 'updated_at')
 
 
+# Nodes deeper than this (relative to the rendered root) omit the remaining_*_to_be_paired
+# counts, which need a subtree walk per node; expand a node to get them
+TREE_PAIRING_COUNTS_MAX_DEPTH = 1
+
+
+def get_tree_window_stats(root):
+    """
+    Per-node member figures for a tree window loaded by get_subtree_levels, computed
+    for the whole window by BinaryTreeNodeSerializer._batch_query_user_data (a fixed
+    number of grouped queries instead of ~15 queries per rendered node). Values match
+    the BinaryTreeNodeSerializer getters.
+
+    Args:
+        root: Window root; nodes below it are found through the attached
+              left_children_list / right_children_list
+
+    Returns:
+        dict: {node_id: {'wallet_balance', 'total_bookings', 'total_binary_pairs',
+              'total_earnings', 'total_referrals', 'total_amount', 'tds_current',
+              'net_amount_total', 'counts_for_activation', 'eligible_for_pairing'}}
+    """
+    # Window nodes, parents before children
+    nodes = [root]
+    for node in nodes:
+        nodes.extend(getattr(node, 'left_children_list', []))
+        nodes.extend(getattr(node, 'right_children_list', []))
+    batch_data = BinaryTreeNodeSerializer._batch_query_user_data(
+        [node.user_id for node in nodes], [node.id for node in nodes], window_nodes=nodes
+    )
+
+    stats = {}
+    for node in nodes:
+        user_id = node.user_id
+        # Like the getters: no wallet means a 0.00 balance and earnings from transactions
+        wallet = getattr(node.user, 'wallet', None)
+        stats[node.id] = {
+            'wallet_balance': batch_data['wallet_balances'].get(user_id, '0') if wallet is not None else "0.00",
+            'total_bookings': batch_data['bookings_count'].get(user_id, 0),
+            'total_binary_pairs': batch_data['binary_pairs_count'].get(user_id, 0),
+            'total_earnings': (
+                str(wallet.total_earned) if wallet is not None else batch_data['net_amount_total'][user_id]
+            ),
+            'total_referrals': batch_data['referrals_count'][user_id],
+            'total_amount': batch_data['total_amount'][user_id],
+            'tds_current': batch_data['tds_current'].get(user_id, "0.00"),
+            'net_amount_total': batch_data['net_amount_total'][user_id],
+            'counts_for_activation': batch_data['counts_for_activation'].get(node.id, False),
+            'eligible_for_pairing': batch_data['eligible_for_pairing'].get(node.id, False),
+        }
+    return stats
+
+
 class BinaryTreeNodeSerializer(serializers.ModelSerializer):
     """
     Recursive serializer for binary tree structure with child nodes
@@ -53,6 +105,7 @@ class BinaryTreeNodeSerializer(serializers.ModelSerializer):
     total_descendants = serializers.SerializerMethodField()
     remaining_left_members_to_be_paired = serializers.SerializerMethodField()
     remaining_right_members_to_be_paired = serializers.SerializerMethodField()
+    subtree_summary = serializers.SerializerMethodField()
     
     class Meta:
         model = BinaryNode
@@ -65,7 +118,8 @@ class BinaryTreeNodeSerializer(serializers.ModelSerializer):
             'parent', 'parent_name', 'side', 'level', 'left_count', 'right_count',
             'total_descendants', 'remaining_left_members_to_be_paired', 'remaining_right_members_to_be_paired',
             'binary_commission_activated', 'activation_timestamp', 'left_child', 'right_child', 'left_side_members', 'right_side_members',
-            'user_profile_picture_url', 'counts_for_activation', 'eligible_for_pairing', 'created_at', 'updated_at'
+            'user_profile_picture_url', 'counts_for_activation', 'eligible_for_pairing', 'subtree_summary',
+            'created_at', 'updated_at'
         ]
         read_only_fields = ('user', 'created_at', 'updated_at')
     
@@ -85,12 +139,18 @@ class BinaryTreeNodeSerializer(serializers.ModelSerializer):
     def to_representation(self, instance):
         """
         Override to exclude null fields from the response
-        Removes null values for: left_child, right_child, left_side_members, right_side_members, user_profile_picture_url
+        Removes null values for: left_child, right_child, left_side_members, right_side_members,
+        user_profile_picture_url, subtree_summary and the remaining_*_to_be_paired counts
+        (not computed below TREE_PAIRING_COUNTS_MAX_DEPTH of a tree window)
         """
         data = super().to_representation(instance)
         
         # Remove null fields to keep response clean
-        null_fields_to_remove = ['left_child', 'right_child', 'left_side_members', 'right_side_members', 'user_profile_picture_url']
+        null_fields_to_remove = [
+            'left_child', 'right_child', 'left_side_members', 'right_side_members',
+            'user_profile_picture_url', 'subtree_summary',
+            'remaining_left_members_to_be_paired', 'remaining_right_members_to_be_paired'
+        ]
         for field in null_fields_to_remove:
             if field in data and data[field] is None:
                 del data[field]
@@ -117,6 +177,9 @@ class BinaryTreeNodeSerializer(serializers.ModelSerializer):
         Indicates if this user counts toward binary activation calculation
         Only users with activation payment count toward activation
         """
+        stats = self._get_window_stats(obj)
+        if stats is not None:
+            return stats['counts_for_activation']
         if not obj.user:
             return False
         from core.binary.utils import has_activation_payment
@@ -127,6 +190,9 @@ class BinaryTreeNodeSerializer(serializers.ModelSerializer):
         Indicates if this user is eligible for binary pair matching
         User must have activation payment AND ancestor must have binary commission activated
         """
+        stats = self._get_window_stats(obj)
+        if stats is not None:
+            return stats['eligible_for_pairing']
         if not obj.user:
             return False
         
@@ -191,9 +257,15 @@ class BinaryTreeNodeSerializer(serializers.ModelSerializer):
         """Get total descendants count (left_count + right_count)"""
         return obj.left_count + obj.right_count
     
+    def _skip_pairing_counts(self):
+        """Deep nodes of a loaded tree window omit the (per-node subtree walk) remaining counts"""
+        return 'tree_window_stats' in self.context and self.current_depth > TREE_PAIRING_COUNTS_MAX_DEPTH
+    
     def get_remaining_left_members_to_be_paired(self, obj):
         """Count of eligible left-side members not yet matched; weak leg shows 0 from next day."""
         from core.binary.utils import get_remaining_unmatched_counts_for_display
+        if self._skip_pairing_counts():
+            return None
         result = get_remaining_unmatched_counts_for_display(obj)
         obj._remaining_display = result
         return result[0]
@@ -201,12 +273,29 @@ class BinaryTreeNodeSerializer(serializers.ModelSerializer):
     def get_remaining_right_members_to_be_paired(self, obj):
         """Count of eligible right-side members not yet matched; weak leg shows 0 from next day."""
         from core.binary.utils import get_remaining_unmatched_counts_for_display
+        if self._skip_pairing_counts():
+            return None
         if getattr(obj, '_remaining_display', None) is not None:
             return obj._remaining_display[1]
         result = get_remaining_unmatched_counts_for_display(obj)
         obj._remaining_display = result
         return result[1]
     
+    def get_subtree_summary(self, obj):
+        """
+        Aggregated subtree counts for frontier nodes of a multi-level tree window
+        (set by the view in context['subtree_summaries']); None for all other nodes
+        """
+        summaries = self.context.get('subtree_summaries') or {}
+        return summaries.get(obj.id)
+    
+    def _get_window_stats(self, obj):
+        """Bulk-computed member figures of a loaded tree window (context['tree_window_stats'])"""
+        window_stats = self.context.get('tree_window_stats')
+        if window_stats is None:
+            return None
+        return window_stats.get(obj.id)
+    
     def get_parent_name(self, obj):
         """Get the direct referrer's (referred_by) full name"""
         if obj.user and obj.user.referred_by:
@@ -215,6 +304,9 @@ class BinaryTreeNodeSerializer(serializers.ModelSerializer):
     
     def get_wallet_balance(self, obj):
         """Get user's wallet balance excluding referral bonuses and TDS/extra deductions (these are deducted from booking, not wallet)"""
+        stats = self._get_window_stats(obj)
+        if stats is not None:
+            return stats['wallet_balance']
         if obj.user and hasattr(obj.user, 'wallet'):
             from core.wallet.models import WalletTransaction
             from decimal import Decimal
@@ -236,6 +328,9 @@ class BinaryTreeNodeSerializer(serializers.ModelSerializer):
     
     def get_total_bookings(self, obj):
         """Get total number of bookings for user"""
+        stats = self._get_window_stats(obj)
+        if stats is not None:
+            return stats['total_bookings']
         if obj.user:
             from core.booking.models import Booking
             return Booking.objects.filter(user=obj.user).count()
@@ -243,6 +338,9 @@ class BinaryTreeNodeSerializer(serializers.ModelSerializer):
     
     def get_total_binary_pairs(self, obj):
         """Get total number of binary pairs for user"""
+        stats = self._get_window_stats(obj)
+        if stats is not None:
+            return stats['total_binary_pairs']
         if obj.user:
             from .models import BinaryPair
             return BinaryPair.objects.filter(user=obj.user).count()
@@ -250,12 +348,18 @@ class BinaryTreeNodeSerializer(serializers.ModelSerializer):
     
     def get_total_earnings(self, obj):
         """Get total earnings: use wallet.total_earned when available (reflects admin edits), else sum from transactions."""
+        stats = self._get_window_stats(obj)
+        if stats is not None:
+            return stats['total_earnings']
         if obj.user and getattr(obj.user, 'wallet', None) is not None:
             return str(obj.user.wallet.total_earned)
         return self.get_net_amount_total(obj)
     
     def get_total_referrals(self, obj):
         """Get total number of referrals (users who used this user's referral code)"""
+        stats = self._get_window_stats(obj)
+        if stats is not None:
+            return stats['total_referrals']
         if obj.user:
             # Count users who have referred_by = this user
             # Also count users who have bookings with this user as referrer
@@ -281,6 +385,9 @@ class BinaryTreeNodeSerializer(serializers.ModelSerializer):
     
     def get_total_amount(self, obj):
         """Get total amount (gross) from all binary earnings and direct user commissions"""
+        stats = self._get_window_stats(obj)
+        if stats is not None:
+            return stats['total_amount']
         if obj.user:
             from core.wallet.models import WalletTransaction
             from decimal import Decimal
@@ -318,6 +425,9 @@ class BinaryTreeNodeSerializer(serializers.ModelSerializer):
     
     def get_tds_current(self, obj):
         """Get total TDS deducted from wallet transactions (for both binary pairs and direct user commissions)"""
+        stats = self._get_window_stats(obj)
+        if stats is not None:
+            return stats['tds_current']
         if obj.user:
             from core.wallet.models import WalletTransaction
             # TDS_DEDUCTION transactions have negative amounts, so we sum absolute values
@@ -335,13 +445,16 @@ class BinaryTreeNodeSerializer(serializers.ModelSerializer):
     
     def get_net_amount_total(self, obj):
         """Get total net amount from all binary earnings and direct user commissions"""
+        stats = self._get_window_stats(obj)
+        if stats is not None:
+            return stats['net_amount_total']
         if obj.user:
             # Use the helper method which includes BINARY_INITIAL_BONUS
             return self._get_net_amount_total(obj.user)
         return "0.00"
     
     def get_left_child(self, obj):
-        """Get left child node - only direct child, no nested recursion"""
+        """Get left child node, recursing until max_depth levels below the root are rendered"""
         # Skip if filtering for right side only
         if self.side_filter == 'right':
             return None
@@ -350,10 +463,10 @@ class BinaryTreeNodeSerializer(serializers.ModelSerializer):
             return None
         
         try:
-            # Try to use prefetched data if available (from Prefetch in view)
+            # Try to use prefetched data if available (from Prefetch in view or get_subtree_levels)
             left_child = None
-            if hasattr(obj, 'left_children_list') and obj.left_children_list:
-                left_child = obj.left_children_list[0]
+            if hasattr(obj, 'left_children_list'):
+                left_child = obj.left_children_list[0] if obj.left_children_list else None
             else:
                 # Fallback to query if prefetch not available
                 left_child = BinaryNode.objects.select_related(
@@ -368,13 +481,9 @@ class BinaryTreeNodeSerializer(serializers.ModelSerializer):
             if self.context.get('direct_referrals_only') and left_child.user_id not in direct_referral_user_ids:
                 return None
             
-            # Always stop recursion at direct children (no nested structures)
-            # Set max_depth to current_depth + 1 to prevent further recursion
-            effective_max_depth = self.current_depth + 1
-            
             serializer = BinaryTreeNodeSerializer(
                 left_child,
-                max_depth=effective_max_depth,
+                max_depth=self.max_depth,
                 min_depth=self.min_depth,
                 current_depth=self.current_depth + 1,
                 side_filter=self.side_filter,
@@ -392,7 +501,7 @@ class BinaryTreeNodeSerializer(serializers.ModelSerializer):
             return None
     
     def get_right_child(self, obj):
-        """Get right child node - only direct child, no nested recursion"""
+        """Get right child node, recursing until max_depth levels below the root are rendered"""
         # Skip if filtering for left side only
         if self.side_filter == 'left':
             return None
@@ -401,10 +510,10 @@ class BinaryTreeNodeSerializer(serializers.ModelSerializer):
             return None
         
         try:
-            # Try to use prefetched data if available (from Prefetch in view)
+            # Try to use prefetched data if available (from Prefetch in view or get_subtree_levels)
             right_child = None
-            if hasattr(obj, 'right_children_list') and obj.right_children_list:
-                right_child = obj.right_children_list[0]
+            if hasattr(obj, 'right_children_list'):
+                right_child = obj.right_children_list[0] if obj.right_children_list else None
             else:
                 # Fallback to query if prefetch not available
                 right_child = BinaryNode.objects.select_related(
@@ -419,13 +528,9 @@ class BinaryTreeNodeSerializer(serializers.ModelSerializer):
             if self.context.get('direct_referrals_only') and right_child.user_id not in direct_referral_user_ids:
                 return None
             
-            # Always stop recursion at direct children (no nested structures)
-            # Set max_depth to current_depth + 1 to prevent further recursion
-            effective_max_depth = self.current_depth + 1
-            
             serializer = BinaryTreeNodeSerializer(
                 right_child,
-                max_depth=effective_max_depth,
+                max_depth=self.max_depth,
                 min_depth=self.min_depth,
                 current_depth=self.current_depth + 1,
                 side_filter=self.side_filter,
@@ -543,10 +648,18 @@ class BinaryTreeNodeSerializer(serializers.ModelSerializer):
         
         return nodes
     
-    def _batch_query_user_data(self, user_ids, node_ids):
+    @staticmethod
+    def _batch_query_user_data(user_ids, node_ids, window_nodes=None):
         """
         Batch query all user-related data in a few queries instead of N queries
         Returns a dictionary with all the data keyed by user_id or node_id
+
+        Args:
+            user_ids: Users to compute figures for
+            node_ids: Their nodes (for counts_for_activation / eligible_for_pairing)
+            window_nodes: Optional loaded tree window (root first, parents before
+                children, users loaded) instead of node_ids: nodes are not reloaded and
+                activated ancestors are resolved in memory below the window root
         """
         from django.db.models import Sum, Count, Q
         from decimal import Decimal
@@ -653,19 +766,29 @@ class BinaryTreeNodeSerializer(serializers.ModelSerializer):
             user_id__in=user_ids,
             transaction_type='TDS_DEDUCTION'
         ).values('user_id').annotate(total=Sum('amount'))
-        tds_current = {item['user_id']: str(abs(item['total'] or Decimal('0'))) for item in tds_data}
+        tds_current = {item['user_id']: str(abs(item['total'])) for item in tds_data if item['total']}
         
-        # Batch query counts_for_activation (check if user has activation payment)
-        from core.booking.models import Payment
-        activation_payments = Payment.objects.filter(
-            user_id__in=user_ids,
-            status='completed'
-        ).values('user_id').annotate(count=Count('id'))
-        has_activation = {item['user_id']: item['count'] > 0 for item in activation_payments}
+        # Batch query counts_for_activation (same rule as has_activation_payment)
+        from .utils import get_activation_payment_user_ids, has_activated_ancestor as any_ancestor_activated
+        activation_user_ids = get_activation_payment_user_ids(user_ids)
+        has_activation = {user_id: True for user_id in activation_user_ids}
         
         # For counts_for_activation and eligible_for_pairing, we need node data
-        # Get nodes with their users to check activation
-        nodes = BinaryNode.objects.filter(id__in=node_ids).select_related('user', 'parent')
+        window_activated_above = None
+        if window_nodes is None:
+            # Get nodes with their users to check activation
+            nodes = BinaryNode.objects.filter(id__in=node_ids).select_related('user', 'parent')
+        else:
+            # "Any ancestor activated" is pushed down the window in memory: one CTE for the
+            # window root instead of one per node
+            nodes = window_nodes
+            nodes_by_id = {node.id: node for node in nodes}
+            window_activated_above = {nodes[0].id: any_ancestor_activated(nodes[0].parent_id)}
+            for node in nodes[1:]:
+                parent = nodes_by_id[node.parent_id]
+                window_activated_above[node.id] = (
+                    parent.binary_commission_activated or window_activated_above[parent.id]
+                )
         counts_for_activation = {}
         eligible_for_pairing = {}
         
@@ -678,7 +801,9 @@ class BinaryTreeNodeSerializer(serializers.ModelSerializer):
                 if has_activation.get(user_id, False):
                     # Check if any ancestor has binary_commission_activated using efficient query
                     has_activated_ancestor = False
-                    if node.parent_id:
+                    if window_activated_above is not None:
+                        has_activated_ancestor = bool(node.parent_id) and window_activated_above[node.id]
+                    elif node.parent_id:
                         from django.db import connection
                         try:
                             with connection.cursor() as cursor:
@@ -1055,6 +1180,10 @@ class BinaryTreeNodeSerializer(serializers.ModelSerializer):
         if self.side_filter == 'right':
             return None
         
+        # A loaded tree window already nests these members as left_child/right_child
+        if 'tree_window_stats' in self.context:
+            return None
+        
         members = self._get_all_descendants(obj, 'left', self.max_depth, 0, exclude_direct_children=True, min_depth=self.min_depth)
         return self._paginate_side_members(members, 'left', node=obj)
     
@@ -1068,6 +1197,10 @@ class BinaryTreeNodeSerializer(serializers.ModelSerializer):
         if self.side_filter == 'left':
             return None
         
+        # A loaded tree window already nests these members as left_child/right_child
+        if 'tree_window_stats' in self.context:
+            return None
+        
         members = self._get_all_descendants(obj, 'right', self.max_depth, 0, exclude_direct_children=True, min_depth=self.min_depth)
         return self._paginate_side_members(members, 'right', node=obj)
 
@@ -0,0 +1,100 @@
+"""
+Tests for the single-query available positions lookup (get_available_slots, available_positions)
+"""
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from core.binary.models import BinaryNode
+from core.binary.utils import create_binary_node, get_available_slots
+from core.users.models import User
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class AvailablePositionsTest(TestCase):
+
+    def setUp(self):
+        """
+        owner
+        ├── a (left)
+        │   ├── c (left)
+        │   │   └── g (left)
+        │   └── d (right)
+        └── b (right)
+            ├── e (left)
+            └── f (right)
+
+        Free slots in level order: c (right), d, e, f, g
+        """
+        self.nodes = {'owner': create_binary_node(self._user('owner'))}
+        for name, parent, side in [
+            ('a', 'owner', 'left'), ('b', 'owner', 'right'),
+            ('c', 'a', 'left'), ('d', 'a', 'right'), ('e', 'b', 'left'), ('f', 'b', 'right'),
+            ('g', 'c', 'left'),
+        ]:
+            self.nodes[name] = create_binary_node(self._user(name), parent=self.nodes[parent], side=side)
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.nodes['owner'].user)
+
+    def _user(self, username):
+        return User.objects.create_user(username=username, email=f'{username}@example.com', password='testpass123')
+
+    def _slots_per_node(self, max_depth=None):
+        """Level-order walk checking each node's children, as available_positions used to"""
+        slots = []
+        level = [self.nodes['owner']]
+        depth = 0
+        while level and (max_depth is None or depth <= max_depth):
+            next_level = []
+            for node in sorted(level, key=lambda node: node.id):
+                children = {child.side: child for child in BinaryNode.objects.filter(parent=node)}
+                if 'left' not in children or 'right' not in children:
+                    slots.append((node.id, depth, 'left' not in children, 'right' not in children))
+                next_level.extend(children.values())
+            level = next_level
+            depth += 1
+        return slots
+
+    def _names(self, positions):
+        return [position['user_username'] for position in positions]
+
+    def _get(self, params):
+        response = self.client.get(f'/api/binary/nodes/available_positions/?{params}', secure=True)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_matches_per_node_walk(self):
+        owner = self.nodes['owner']
+        self.assertEqual(get_available_slots(owner, limit=100), self._slots_per_node())
+        for max_depth in (0, 1, 2):
+            self.assertEqual(
+                get_available_slots(owner, max_depth=max_depth, limit=100), self._slots_per_node(max_depth)
+            )
+        self.assertEqual(self._names(self._get('max_level=2')['available_positions']), ['c', 'd', 'e', 'f'])
+
+    def test_cursor_pages_stay_stable_when_the_tree_changes(self):
+        first = self._get('page_size=2')
+        self.assertEqual(self._names(first['available_positions']), ['c', 'd'])
+        self.assertEqual(first['next_cursor'], f"2-{self.nodes['d'].id}")
+
+        # c's last free slot is taken: an offset page would now skip e
+        create_binary_node(self._user('h'), parent=self.nodes['c'], side='right')
+
+        seen = self._names(first['available_positions'])
+        cursor = first['next_cursor']
+        while cursor:
+            page = self._get(f'page_size=2&cursor={cursor}')
+            seen.extend(self._names(page['available_positions']))
+            cursor = page['next_cursor']
+
+        self.assertEqual(seen, ['c', 'd', 'e', 'f', 'g', 'h'])
+
+    def test_invalid_cursor(self):
+        for cursor in ('abc', '2', '2-x', 'x-5', '-5', '1-2-3'):
+            response = self.client.get(f'/api/binary/nodes/available_positions/?cursor={cursor}', secure=True)
+            self.assertEqual(response.status_code, 400, cursor)
+            self.assertEqual(response.data['error'], 'Invalid cursor')
+
+        # A cursor past the last position is an empty last page
+        page = self._get(f"cursor=9-{self.nodes['g'].id}")
+        self.assertEqual(page['available_positions'], [])
+        self.assertIsNone(page['next_cursor'])
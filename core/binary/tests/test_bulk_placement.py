@@ -0,0 +1,259 @@
+"""
+Tests for bulk auto-placement (bulk_add_to_binary_tree)
+"""
+from decimal import Decimal
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from core.binary.models import BinaryNode
+from core.binary.utils import (
+    add_to_binary_tree, bulk_add_to_binary_tree, create_binary_node, process_direct_user_commission,
+)
+from core.booking.models import Booking, Payment
+from core.inventory.models import Vehicle
+from core.settings.models import PlatformSettings
+from core.users.models import User
+from core.wallet.models import WalletTransaction
+
+
+class BulkPlacementLayoutTest(TestCase):
+    """Bulk placement must produce exactly the same layout as sequential placement"""
+
+    def _user(self, username):
+        return User.objects.create_user(
+            username=username,
+            email=f'{username}@example.com',
+            password='testpass123'
+        )
+
+    def _build_scenario(self):
+        """
+        top
+        └── referrer (left)
+            ├── a (left)
+            │   └── c (left)
+            └── b (right)
+                └── d (left)
+        outsider
+        └── p (left)
+            └── q (left)
+        """
+        users = {name: self._user(name) for name in [
+            'top', 'referrer', 'a', 'b', 'c', 'd', 'outsider', 'p', 'q'
+        ]}
+        nodes = {'top': create_binary_node(users['top'])}
+        nodes['referrer'] = create_binary_node(users['referrer'], parent=nodes['top'], side='left')
+        nodes['a'] = create_binary_node(users['a'], parent=nodes['referrer'], side='left')
+        nodes['b'] = create_binary_node(users['b'], parent=nodes['referrer'], side='right')
+        nodes['c'] = create_binary_node(users['c'], parent=nodes['a'], side='left')
+        nodes['d'] = create_binary_node(users['d'], parent=nodes['b'], side='left')
+        nodes['outsider'] = create_binary_node(users['outsider'])
+        nodes['p'] = create_binary_node(users['p'], parent=nodes['outsider'], side='left')
+        create_binary_node(users['q'], parent=nodes['p'], side='left')
+
+        # (new username, username of referring user or None)
+        plan = [
+            ('n0', None),
+            ('n1', 'b'),         # b's right slot is free
+            ('n2', 'b'),         # b is full -> standard chain placement
+            ('n3', 'd'),
+            ('n4', 'd'),
+            ('n5', 'outsider'),  # outsider is not in referrer's tree -> standard
+            ('n6', 'n1'),        # referring user placed earlier in the same run
+            ('n7', 'n9'),        # referring user placed later -> standard
+            ('p', None),         # existing node with a subtree is re-parented
+            ('n8', None),        # continues down the chain through p -> q
+            ('n9', 'n0'),
+            ('n10', 'referrer'),
+        ]
+        for username, _ in plan:
+            if username not in users:
+                users[username] = self._user(username)
+        placements = [
+            (users[username], users[referring] if referring else None)
+            for username, referring in plan
+        ]
+        return users['referrer'], placements
+
+    def _snapshot(self):
+        return {
+            node.user.username: (
+                node.parent.user.username if node.parent else None,
+                node.side,
+                node.level,
+                node.left_count,
+                node.right_count,
+                node.direct_children_count,
+            )
+            for node in BinaryNode.objects.select_related('user', 'parent__user')
+        }
+
+    def _run(self, place):
+        with transaction.atomic():
+            referrer, placements = self._build_scenario()
+            placed = place(referrer, placements)
+            snapshot = self._snapshot()
+            transaction.set_rollback(True)
+        return placed, snapshot
+
+    def _place_sequentially(self, referrer, placements):
+        placed = []
+        for user, referring_user in placements:
+            node = add_to_binary_tree(user=user, referrer=referrer, side=None, referring_user=referring_user)
+            placed.append(user.username if node else None)
+        return placed
+
+    def _place_in_bulk(self, referrer, placements):
+        return [
+            user.username if node else None
+            for user, node in bulk_add_to_binary_tree(referrer, placements)
+        ]
+
+    def test_same_layout_as_sequential_left_preference(self):
+        sequential = self._run(self._place_sequentially)
+        bulk = self._run(self._place_in_bulk)
+        self.assertEqual(sequential, bulk)
+
+    def test_same_layout_as_sequential_right_preference(self):
+        platform_settings = PlatformSettings.get_settings()
+        platform_settings.binary_tree_default_placement_side = 'right'
+        platform_settings.save()
+
+        sequential = self._run(self._place_sequentially)
+        bulk = self._run(self._place_in_bulk)
+        self.assertEqual(sequential, bulk)
+
+    def test_query_count_independent_of_batch_size(self):
+        PlatformSettings.get_settings()
+
+        query_counts = []
+        for batch, size in (('small', 5), ('large', 40)):
+            referrer = self._user(f'{batch}_root')
+            create_binary_node(referrer)
+            placements = [(self._user(f'{batch}{i}'), None) for i in range(size)]
+            with CaptureQueriesContext(connection) as queries:
+                bulk_add_to_binary_tree(referrer, placements)
+            query_counts.append(len(queries))
+
+            root = BinaryNode.objects.get(user=referrer)
+            self.assertEqual(root.left_count + root.right_count, size)
+            self.assertEqual(root.direct_children_count, 2)
+
+        self.assertEqual(query_counts[0], query_counts[1])
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class AutoPlacePendingCommissionTest(TestCase):
+    """Auto-placement (sequential or bulk) pays each commission right after that user's placement"""
+
+    def _user(self, username, **extra):
+        return User.objects.create_user(
+            username=username,
+            email=f'{username}@example.com',
+            password='testpass123',
+            **extra
+        )
+
+    def _build_scenario(self, unpaid=()):
+        """referrer (placed) with five referred, unplaced users who paid the activation amount
+        (except the members numbered in unpaid)"""
+        referrer = self._user('referrer', is_distributor=True)
+        create_binary_node(referrer)
+        vehicle = Vehicle.objects.create(name='EV One', model_code='EV1', price=Decimal('100000'))
+        for i in range(5):
+            user = self._user(f'member{i}', referred_by=referrer)
+            booking = Booking.objects.create(
+                user=user, vehicle_model=vehicle, booking_amount=Decimal('5000'),
+                total_amount=Decimal('100000'), status='active', referred_by=referrer,
+            )
+            if i in unpaid:
+                continue
+            # bulk_create: no payment signals, commissions only come from placement
+            Payment.objects.bulk_create([Payment(
+                booking=booking, user=user, amount=Decimal('5000'), payment_method='online',
+                status='completed', transaction_id=f'pay_member{i}',
+            )])
+        return referrer
+
+    def _snapshot(self, referrer):
+        usernames = dict(User.objects.values_list('id', 'username'))
+        referrer_node = BinaryNode.objects.get(user=referrer)
+        activated_by = BinaryNode.objects.filter(
+            created_at=referrer_node.activation_timestamp
+        ).exclude(user=referrer).values_list('user__username', flat=True).first()
+        return {
+            'transactions': [
+                (usernames[user_id], transaction_type, amount, usernames.get(reference_id))
+                for user_id, transaction_type, amount, reference_id in WalletTransaction.objects.order_by('id').values_list(
+                    'user_id', 'transaction_type', 'amount', 'reference_id'
+                )
+            ],
+            'activated': referrer_node.binary_commission_activated,
+            'activated_by': activated_by,
+        }
+
+    def _run(self, place, unpaid=()):
+        with transaction.atomic():
+            referrer = self._build_scenario(unpaid)
+            place(referrer)
+            snapshot = self._snapshot(referrer)
+            transaction.set_rollback(True)
+        return snapshot
+
+    def _place_one_by_one(self, referrer):
+        """Placement followed by commission for each user, as auto_place_pending always did"""
+        for user in User.objects.filter(referred_by=referrer).order_by('id'):
+            add_to_binary_tree(user=user, referrer=referrer, side=None, referring_user=referrer)
+            process_direct_user_commission(user)
+
+    def _place_via_endpoint(self, referrer, bulk=False):
+        client = APIClient()
+        client.force_authenticate(referrer)
+        response = client.post(
+            '/api/binary/nodes/auto_place_pending/', {'bulk': True} if bulk else {}, format='json', secure=True
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['placed_count'], 5)
+        self.assertEqual(
+            [user['user_email'] for user in response.data['placed_users']],
+            [f'member{i}@example.com' for i in range(5)]
+        )
+        return response.data
+
+    def _place_via_bulk_endpoint(self, referrer):
+        return self._place_via_endpoint(referrer, bulk=True)
+
+    def test_sequential_path_pays_same_commissions(self):
+        PlatformSettings.get_settings()
+
+        expected = self._run(self._place_one_by_one)
+        self.assertTrue(expected['activated'])
+        self.assertEqual(
+            [row[:2] for row in expected['transactions'] if row[1] == 'DIRECT_USER_COMMISSION'],
+            [('referrer', 'DIRECT_USER_COMMISSION')] * 5
+        )
+        # Activation happens at the third active referral, not after everyone is placed
+        self.assertEqual(expected['activated_by'], 'member2')
+
+        self.assertEqual(self._run(self._place_via_endpoint), expected)
+
+    def test_bulk_path_pays_same_commissions(self):
+        PlatformSettings.get_settings()
+
+        expected = self._run(self._place_one_by_one)
+        self.assertEqual(expected['activated_by'], 'member2')
+
+        bulk = self._run(self._place_via_bulk_endpoint)
+        self.assertEqual(bulk['transactions'], expected['transactions'])
+        self.assertEqual(bulk['activated_by'], expected['activated_by'])
+        self.assertEqual(bulk, expected)
+
+    def test_bulk_path_with_unpaid_members(self):
+        """Members without an activation payment are batched with the next paying member"""
+        PlatformSettings.get_settings()
+
+        expected = self._run(self._place_one_by_one, unpaid=(1, 2))
+        self.assertEqual(expected['activated_by'], 'member4')
+
+        self.assertEqual(self._run(self._place_via_bulk_endpoint, unpaid=(1, 2)), expected)
@@ -0,0 +1,107 @@
+"""
+Tests for set-based subtree relocation (move_binary_node)
+"""
+from unittest.mock import patch
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from core.binary import utils
+from core.binary.models import BinaryNode
+from core.binary.utils import create_binary_node, move_binary_node, shift_descendant_levels
+from core.users.models import User
+
+
+class MoveBinaryNodeTest(TestCase):
+    """Counts and levels after a move must match a full recount"""
+
+    def setUp(self):
+        """
+        root
+        ├── a (left)
+        │   ├── c (left)
+        │   │   └── e (left)
+        │   │       └── f (right)
+        │   └── d (right)
+        └── b (right)
+            └── g (right)
+        """
+        self.nodes = {'root': create_binary_node(self._user('root'))}
+        for name, parent, side in [
+            ('a', 'root', 'left'), ('b', 'root', 'right'),
+            ('c', 'a', 'left'), ('d', 'a', 'right'),
+            ('e', 'c', 'left'), ('f', 'e', 'right'), ('g', 'b', 'right'),
+        ]:
+            self.nodes[name] = create_binary_node(
+                self._user(name), parent=self.nodes[parent], side=side
+            )
+
+    def _user(self, username):
+        return User.objects.create_user(
+            username=username,
+            email=f'{username}@example.com',
+            password='testpass123'
+        )
+
+    def _assert_consistent(self):
+        for node in BinaryNode.objects.select_related('parent'):
+            expected_level = node.parent.level + 1 if node.parent else 0
+            self.assertEqual(node.level, expected_level, node.user.username)
+            self.assertEqual(node.left_count, node.get_all_descendants_count('left'), node.user.username)
+            self.assertEqual(node.right_count, node.get_all_descendants_count('right'), node.user.username)
+            self.assertEqual(
+                node.direct_children_count,
+                BinaryNode.objects.filter(parent=node).count(),
+                node.user.username
+            )
+
+    def test_move_subtree_across_sides(self):
+        self._assert_consistent()
+        move_binary_node(self.nodes['c'], self.nodes['g'], 'left')
+        self._assert_consistent()
+        self.assertEqual(BinaryNode.objects.get(pk=self.nodes['f'].pk).level, 5)
+
+    def test_move_subtree_up_under_same_ancestor(self):
+        move_binary_node(self.nodes['e'], self.nodes['b'], 'left')
+        self._assert_consistent()
+
+    def test_move_to_descendant_rejected(self):
+        with self.assertRaises(ValueError):
+            move_binary_node(self.nodes['a'], self.nodes['e'], 'right')
+        self._assert_consistent()
+
+    def test_levels_shift_in_one_statement(self):
+        # Runs the statement for the configured backend (the JOIN form on MySQL)
+        with patch.object(utils, 'update_descendant_levels') as fallback, \
+                CaptureQueriesContext(connection) as queries:
+            shift_descendant_levels(self.nodes['a'], 2)
+        fallback.assert_not_called()
+        self.assertEqual(
+            len([query for query in queries.captured_queries if 'UPDATE' in query['sql'].upper()]), 1
+        )
+
+        levels = dict(BinaryNode.objects.values_list('user__username', 'level'))
+        self.assertEqual(
+            {name: levels[name] for name in 'acdef'}, {'a': 1, 'c': 4, 'd': 4, 'e': 5, 'f': 6}
+        )
+        self.assertEqual(levels['g'], 2)
+
+    def test_rejected_statement_falls_back_to_row_updates(self):
+        BinaryNode.objects.filter(pk=self.nodes['c'].pk).update(level=5)
+        self.nodes['c'].level = 5
+
+        with patch.object(utils, 'SHIFT_LEVELS_SQL', 'UPDATE no_such_table SET level = %s + %s'), \
+                patch.object(utils, 'SHIFT_LEVELS_SQL_MYSQL', 'UPDATE no_such_table SET level = %s + %s'), \
+                self.assertLogs('core.binary.utils', level='ERROR'):
+            shift_descendant_levels(self.nodes['c'], 3)
+
+        # The failed statement only rolled back its savepoint
+        self.assertEqual(BinaryNode.objects.get(pk=self.nodes['f'].pk).level, 7)
+
+    def test_unexpected_errors_are_not_swallowed(self):
+        # A bug (here: no statement at all) is raised, not hidden behind the row-by-row fallback
+        with patch.object(utils, 'update_descendant_levels') as fallback, \
+                patch.object(utils, 'SHIFT_LEVELS_SQL', None), \
+                patch.object(utils, 'SHIFT_LEVELS_SQL_MYSQL', None):
+            with self.assertRaises(TypeError):
+                shift_descendant_levels(self.nodes['a'], 1)
+        fallback.assert_not_called()
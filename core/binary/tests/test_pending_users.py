@@ -0,0 +1,135 @@
+"""
+Tests for the set-based pending users computation (get_pending_user_ids, pending_users)
+"""
+from decimal import Decimal
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from core.binary.models import BinaryNode
+from core.binary.utils import create_binary_node, get_pending_user_ids
+from core.binary.views import BinaryNodeViewSet
+from core.booking.models import Booking
+from core.inventory.models import Vehicle
+from core.users.models import User
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class PendingUsersTest(TestCase):
+    """The pending set must match the previous per-user checks"""
+
+    def setUp(self):
+        """
+        grand
+        └── top (left)
+            └── referrer (left)        referred by top
+                └── b (left)           referred by referrer
+                    └── c (left)       referred by referrer
+        outsider
+        └── d (left)                   referred by referrer, placed in another tree
+
+        Also referred by referrer: a (User.referred_by, no node), e and f (bookings only,
+        no node), g (User.referred_by and two bookings); grand and top booked with the
+        referrer's code but are above the referrer.
+        """
+        self.users = {}
+        self.vehicle = Vehicle.objects.create(name='EV One', model_code='EV1', price=Decimal('100000'))
+        grand = self._user('grand')
+        top = self._user('top')
+        self.referrer = self._user('referrer', referred_by=top)
+        nodes = {'grand': create_binary_node(grand)}
+        nodes['top'] = create_binary_node(top, parent=nodes['grand'], side='left')
+        nodes['referrer'] = create_binary_node(self.referrer, parent=nodes['top'], side='left')
+
+        for name in ('a', 'b', 'c', 'd', 'g'):
+            self._user(name, referred_by=self.referrer)
+        for name in ('e', 'f'):
+            self._user(name)
+        self._user('unrelated')
+
+        nodes['b'] = create_binary_node(self.users['b'], parent=nodes['referrer'], side='left')
+        create_binary_node(self.users['c'], parent=nodes['b'], side='left')
+        nodes['outsider'] = create_binary_node(self._user('outsider'))
+        create_binary_node(self.users['d'], parent=nodes['outsider'], side='left')
+
+        for name in ('grand', 'top', 'e', 'f', 'g', 'g'):
+            Booking.objects.create(
+                user=self.users[name], vehicle_model=self.vehicle, booking_amount=Decimal('5000'),
+                total_amount=Decimal('100000'), referred_by=self.referrer,
+            )
+
+    def _user(self, username, **extra):
+        user = User.objects.create_user(
+            username=username, email=f'{username}@example.com', password='testpass123', **extra
+        )
+        self.users[username] = user
+        return user
+
+    def _pending_per_user(self, referrer):
+        """The per-user checks pending_users made before the set-based computation"""
+        view = BinaryNodeViewSet()
+        referrer_node = BinaryNode.objects.filter(user=referrer).first()
+        referred = (
+            User.objects.filter(referred_by=referrer) | User.objects.filter(bookings__referred_by=referrer)
+        ).distinct()
+
+        pending = {}
+        for user in referred:
+            if user.id == referrer.id:
+                continue
+            if referrer.referred_by and referrer.referred_by.id == user.id:
+                continue
+            try:
+                user_node = BinaryNode.objects.select_related('parent').get(user=user)
+            except BinaryNode.DoesNotExist:
+                pending[user.id] = None
+                continue
+            if referrer_node and view._is_ancestor(user, referrer_node):
+                continue
+            if not view._is_tree_owner(referrer, user_node):
+                pending[user.id] = user_node.id
+        return pending
+
+    def test_matches_per_user_checks(self):
+        pending_ids, node_by_user = get_pending_user_ids(self.referrer)
+
+        expected = self._pending_per_user(self.referrer)
+        self.assertEqual(pending_ids, sorted(expected))
+        self.assertEqual(node_by_user, {user_id: node_id for user_id, node_id in expected.items() if node_id})
+        usernames = {user.id: username for username, user in self.users.items()}
+        self.assertEqual({usernames[user_id] for user_id in pending_ids}, {'a', 'd', 'e', 'f', 'g'})
+
+    def test_matches_per_user_checks_for_other_referrers(self):
+        # A referrer without a node, and one whose only referral is above them
+        for referrer in (self.users['g'], self.users['top'], self.users['grand']):
+            pending_ids, _ = get_pending_user_ids(referrer)
+            self.assertEqual(pending_ids, sorted(self._pending_per_user(referrer)), referrer.username)
+
+    def test_pages_cover_the_pending_set_once(self):
+        client = APIClient()
+        client.force_authenticate(self.referrer)
+
+        seen = []
+        url = '/api/binary/nodes/pending_users/?page_size=2'
+        while url:
+            response = client.get(url, secure=True)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['count'], 5)
+            seen.extend(user['user_id'] for user in response.data['pending_users'])
+            url = response.data['next']
+
+        self.assertEqual(seen, get_pending_user_ids(self.referrer)[0])
+        d = next(user for user in client.get(
+            '/api/binary/nodes/pending_users/?page=1&page_size=5', secure=True
+        ).data['pending_users'] if user['user_username'] == 'd')
+        self.assertTrue(d['has_node'])
+        self.assertFalse(d['in_tree'])
+
+    def test_invalid_page(self):
+        client = APIClient()
+        client.force_authenticate(self.referrer)
+        for params in ('page=x', 'page_size=x'):
+            response = client.get(f'/api/binary/nodes/pending_users/?{params}', secure=True)
+            self.assertEqual(response.status_code, 400, params)
+
+        response = client.get('/api/binary/nodes/pending_users/?page=9', secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['pending_users'], [])
@@ -0,0 +1,155 @@
+"""
+Tests for multi-level tree windows (node_children / tree_structure ?depth=N)
+"""
+from decimal import Decimal
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from core.binary.models import BinaryNode
+from core.binary.serializers import BinaryTreeNodeSerializer
+from core.binary.utils import create_binary_node
+from core.booking.models import Booking, Payment
+from core.inventory.models import Vehicle
+from core.users.models import User
+from core.wallet.models import Wallet, WalletTransaction
+
+
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tree-window-tests',
+    }
+}
+
+# Figures computed per node by the serializer getters, and in bulk for a tree window
+MEMBER_FIELDS = [
+    'wallet_balance', 'total_bookings', 'total_binary_pairs', 'total_earnings', 'total_referrals',
+    'total_amount', 'tds_current', 'net_amount_total', 'counts_for_activation', 'eligible_for_pairing',
+]
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TreeWindowTest(TestCase):
+    """A full binary tree 4 levels deep below root (30 members)"""
+
+    def setUp(self):
+        self.root_user = self._user('root')
+        self.root = create_binary_node(self.root_user)
+        BinaryNode.objects.filter(pk=self.root.pk).update(binary_commission_activated=True)
+
+        level = [self.root]
+        for depth in range(1, 5):
+            next_level = []
+            for parent in level:
+                for side in ('left', 'right'):
+                    user = self._user(f'{parent.user.username}-{side[0]}', referred_by=self.root_user)
+                    next_level.append(create_binary_node(user, parent=parent, side=side))
+            level = next_level
+
+        # Member figures for a few users: wallets, transactions, bookings and activation payments
+        vehicle = Vehicle.objects.create(name='EV One', model_code='EV1', price=Decimal('100000'))
+        for index, user in enumerate(User.objects.filter(username__in=['root-l', 'root-l-r', 'root-r-l-l'])):
+            wallet = Wallet.objects.create(user=user, total_earned=Decimal('2500') * index)
+            WalletTransaction.objects.bulk_create([
+                WalletTransaction(
+                    user=user, wallet=wallet, transaction_type=transaction_type, amount=Decimal(amount),
+                    balance_before=0, balance_after=0, description=description
+                )
+                for transaction_type, amount, description in [
+                    ('DIRECT_USER_COMMISSION', '900.00', ''),
+                    ('TDS_DEDUCTION', '-100.00', 'TDS on user commission'),
+                    ('BINARY_PAIR_COMMISSION', '1800.00', ''),
+                    ('TDS_DEDUCTION', '-200.00', 'TDS on binary pair'),
+                    ('REFERRAL_BONUS', '50.00', ''),
+                ]
+            ])
+            booking = Booking.objects.create(
+                user=user, vehicle_model=vehicle, booking_amount=Decimal('5000'),
+                total_amount=Decimal('100000'), status='active', referred_by=self.root_user,
+            )
+            Payment.objects.bulk_create([Payment(
+                booking=booking, user=user, amount=Decimal('5000'), payment_method='online',
+                status='completed', transaction_id=f'pay_{user.id}',
+            )])
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.root_user)
+
+    def _user(self, username, referred_by=None):
+        return User.objects.create_user(
+            username=username, email=f'{username}@example.com', password='testpass123', referred_by=referred_by
+        )
+
+    def _node_children(self, depth, node=None):
+        node = node or self.root
+        return self.client.get(
+            f'/api/binary/nodes/node_children/?node_id={node.id}&depth={depth}', secure=True
+        )
+
+    def _walk(self, data, depth=1):
+        """(depth, node data) for every node nested in a response"""
+        for key in ('left_child', 'right_child'):
+            child = data.get(key)
+            if child:
+                yield depth, child
+                yield from self._walk(child, depth + 1)
+
+    def test_returns_requested_levels_with_frontier_summaries(self):
+        response = self._node_children(3)
+        self.assertEqual(response.status_code, 200)
+
+        nodes = list(self._walk(response.data))
+        self.assertEqual(len(nodes), 14)  # 2 + 4 + 8
+        for depth, node in nodes:
+            self.assertNotIn('left_side_members', node)
+            self.assertNotIn('right_side_members', node)
+            if depth == 3:
+                self.assertEqual(
+                    node['subtree_summary'],
+                    {'left_total': 1, 'right_total': 1, 'left_active': 0, 'right_active': 0}
+                )
+            else:
+                self.assertNotIn('subtree_summary', node)
+            # Remaining-to-pair counts need a subtree walk each: direct children only
+            self.assertEqual('remaining_left_members_to_be_paired' in node, depth == 1)
+
+    def test_window_figures_match_per_node_getters(self):
+        response = self._node_children(4)
+
+        checked = 0
+        for _depth, data in self._walk(response.data):
+            node = BinaryNode.objects.select_related(
+                'user', 'user__wallet', 'user__referred_by', 'parent', 'parent__user'
+            ).get(id=data['node_id'])
+            expected = BinaryTreeNodeSerializer(node, max_depth=0, context={}).data
+            for field in MEMBER_FIELDS:
+                self.assertEqual(data[field], expected[field], f"{field} of {node.user.username}")
+            checked += 1
+        self.assertEqual(checked, 30)
+
+        figures = {data['user_username']: data for _depth, data in self._walk(response.data)}
+        self.assertEqual(Decimal(figures['root-l-r']['tds_current']), Decimal('300'))
+        self.assertTrue(figures['root-l-r']['eligible_for_pairing'])
+        self.assertFalse(figures['root-l-l']['counts_for_activation'])
+
+    def test_query_count_does_not_grow_with_depth(self):
+        with CaptureQueriesContext(connection) as two_levels:
+            self.assertEqual(self._node_children(2).status_code, 200)
+        with CaptureQueriesContext(connection) as four_levels:
+            self.assertEqual(self._node_children(4).status_code, 200)
+
+        self.assertEqual(len(four_levels), len(two_levels))
+        self.assertLess(len(four_levels), 60)
+
+    def test_tree_structure_depth(self):
+        response = self.client.get('/api/binary/nodes/tree_structure/?depth=2', secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['left_child']['left_child']['user_username'], 'root-l-l')
+        self.assertIn('subtree_summary', response.data['left_child']['left_child'])
+
+    def test_invalid_depth(self):
+        for depth in ('0', '7', 'abc'):
+            self.assertEqual(self._node_children(depth).status_code, 400, depth)
+        response = self.client.get('/api/binary/nodes/tree_structure/?depth=7', secure=True)
+        self.assertEqual(response.status_code, 400)
@@ -917,10 +917,304 @@ def find_next_available_position_by_side(user, start_node, preferred_side='left'
         
         # Continue down the chain
         current = child_on_side
-    
+
     return None
 
 
+def bulk_add_to_binary_tree(referrer, placements):
+    """
+    Place many users in referrer's tree in one pass.
+
+    Produces exactly the layout that calling
+    add_to_binary_tree(user, referrer, referring_user=referring_user) for each
+    placement in order would produce, but instead of a chain walk, an insert and a
+    full ancestor recount per user it:
+    1. Loads the placement frontier once (referrer's slots, the preferred-side chain,
+       the slots of referring users' nodes and the ancestor paths above them)
+    2. Computes every target slot in memory following the same placement rules
+    3. Inserts the new nodes with bulk_create
+    4. Applies aggregated left/right/direct-children count deltas to ancestors
+
+    Users who already have a node (re-parenting moves their whole subtree) are placed
+    with add_to_binary_tree between bulk runs so the layout stays identical. Ancestor
+    counts are adjusted by deltas, so they stay correct as long as they were correct
+    before (add_to_binary_tree recounts them from scratch instead).
+
+    Args:
+        referrer: User who owns the tree (root referrer)
+        placements: List of (user, referring_user) tuples in placement order.
+                    referring_user may be None or referrer for standard placement.
+
+    Returns:
+        list: (user, BinaryNode or None) for every placement attempted, in order.
+              Users with an existing node that is already in referrer's tree are
+              skipped and not included.
+    """
+    if not referrer or not placements:
+        return []
+
+    users_with_node = set(
+        BinaryNode.objects.filter(
+            user_id__in=[user.id for user, _ in placements]
+        ).values_list('user_id', flat=True)
+    )
+
+    results = []
+    batch = []
+    for user, referring_user in placements:
+        if user.id not in users_with_node:
+            batch.append((user, referring_user))
+            continue
+
+        # Existing node: flush the pending run, then re-parent it the sequential way
+        results.extend(_bulk_place_new_users(referrer, batch))
+        batch = []
+        existing_node = BinaryNode.objects.filter(user=user).first()
+        if existing_node and is_node_in_tree(existing_node, referrer):
+            continue
+        results.append((user, add_to_binary_tree(
+            user=user, referrer=referrer, side=None, referring_user=referring_user
+        )))
+
+    results.extend(_bulk_place_new_users(referrer, batch))
+    return results
+
+
+def _bulk_place_new_users(referrer, placements):
+    """
+    Place users that have no BinaryNode yet in bulk (see bulk_add_to_binary_tree).
+    Falls back to sequential placement if a slot was taken concurrently.
+    """
+    from django.db import IntegrityError
+
+    if not placements:
+        return []
+
+    try:
+        with transaction.atomic():
+            placed = _bulk_place_new_users_atomic(referrer, placements)
+    except IntegrityError as e:
+        import logging
+        logger = logging.getLogger(__name__)
+        logger.warning(
+            f"Bulk placement for {referrer.username} hit a concurrent placement, "
+            f"falling back to sequential placement: {str(e)}"
+        )
+        return [
+            (user, add_to_binary_tree(user=user, referrer=referrer, side=None, referring_user=referring_user))
+            for user, referring_user in placements
+        ]
+
+    # bulk_create/bulk_update skip post_save, so refresh distributor dashboards explicitly
+    from core.reports.distributor_dashboard import schedule_refresh_for_nodes
+    schedule_refresh_for_nodes({node.parent_id for _, node in placed})
+
+    return placed
+
+
+def _bulk_place_new_users_atomic(referrer, placements):
+    from django.db import connection
+    from django.db.models import F
+
+    referrer_node, _ = BinaryNode.objects.get_or_create(user=referrer)
+    # Serialize bulk placements into the same tree
+    referrer_node = BinaryNode.objects.select_for_update().get(id=referrer_node.id)
+    root_id = referrer_node.id
+
+    platform_settings = PlatformSettings.get_settings()
+    preferred_side = platform_settings.binary_tree_default_placement_side or 'left'
+    opposite_side = 'right' if preferred_side == 'left' else 'left'
+
+    # In-memory tree state. Existing nodes are keyed by id, new nodes by ('new', index).
+    parent_of = {}    # key -> (parent key, side)
+    level_of = {root_id: referrer_node.level}
+    depth_of = {root_id: 0}    # depth below referrer_node
+    occupied = set()  # (parent key, side)
+    node_key_of_user = {}
+
+    with connection.cursor() as cursor:
+        # Preferred-side chain below referrer_node (Rule 3 walks it to its end)
+        cursor.execute("""
+            WITH RECURSIVE chain AS (
+                SELECT id, parent_id, level, 0 AS depth FROM binary_nodes WHERE id = %s
+                UNION ALL
+                SELECT bn.id, bn.parent_id, bn.level, c.depth + 1 FROM binary_nodes bn
+                INNER JOIN chain c ON bn.parent_id = c.id AND bn.side = %s
+            )
+            SELECT id, parent_id, level, depth FROM chain ORDER BY depth
+        """, [root_id, preferred_side])
+        chain = cursor.fetchall()
+        for node_id, parent_id, level, depth in chain[1:]:
+            parent_of[node_id] = (parent_id, preferred_side)
+            occupied.add((parent_id, preferred_side))
+            level_of[node_id] = level
+            depth_of[node_id] = depth
+        chain_tail = chain[-1][0]
+
+        # Ancestors above referrer_node receive count deltas too
+        cursor.execute("""
+            WITH RECURSIVE ancestors AS (
+                SELECT id, parent_id, side, 0 as depth
+                FROM binary_nodes WHERE id = %s
+                UNION ALL
+                SELECT bn.id, bn.parent_id, bn.side, a.depth + 1
+                FROM binary_nodes bn
+                INNER JOIN ancestors a ON bn.id = a.parent_id
+                WHERE a.depth < 100 AND a.parent_id IS NOT NULL
+            )
+            SELECT id, parent_id, side FROM ancestors WHERE parent_id IS NOT NULL
+        """, [root_id])
+        for node_id, parent_id, side in cursor.fetchall():
+            parent_of[node_id] = (parent_id, side)
+
+        # Nodes of referring users and whether they are in referrer's tree
+        # (is_node_in_tree only looks 100 levels up, so deeper nodes count as outside)
+        referring_user_ids = {
+            referring_user.id for _, referring_user in placements
+            if referring_user and referring_user.id != referrer.id
+        }
+        referring_nodes = {}
+        if referring_user_ids:
+            placeholders = ', '.join(['%s'] * len(referring_user_ids))
+            cursor.execute(f"""
+                WITH RECURSIVE descendants AS (
+                    SELECT id, parent_id, user_id, side, level, 1 AS depth
+                    FROM binary_nodes WHERE parent_id = %s
+                    UNION ALL
+                    SELECT bn.id, bn.parent_id, bn.user_id, bn.side, bn.level, d.depth + 1
+                    FROM binary_nodes bn
+                    INNER JOIN descendants d ON bn.parent_id = d.id
+                    WHERE d.depth < 100
+                )
+                SELECT id, user_id, level, depth FROM descendants WHERE user_id IN ({placeholders})
+            """, [root_id, *referring_user_ids])
+            for node_id, user_id, level, depth in cursor.fetchall():
+                referring_nodes[node_id] = user_id
+                node_key_of_user[user_id] = node_id
+                level_of[node_id] = level
+                depth_of[node_id] = depth
+
+        if referring_nodes:
+            placeholders = ', '.join(['%s'] * len(referring_nodes))
+            # Paths from referring nodes up to referrer_node, for count deltas
+            cursor.execute(f"""
+                WITH RECURSIVE up AS (
+                    SELECT id, parent_id, side FROM binary_nodes WHERE id IN ({placeholders})
+                    UNION
+                    SELECT bn.id, bn.parent_id, bn.side FROM binary_nodes bn
+                    INNER JOIN up u ON bn.id = u.parent_id
+                    WHERE u.id != %s
+                )
+                SELECT id, parent_id, side FROM up WHERE id != %s
+            """, [*referring_nodes.keys(), root_id, root_id])
+            for node_id, parent_id, side in cursor.fetchall():
+                parent_of[node_id] = (parent_id, side)
+
+    # Occupied slots of every node a new user may be placed under directly
+    occupied.update(
+        BinaryNode.objects.filter(
+            parent_id__in=[root_id, *referring_nodes.keys()]
+        ).values_list('parent_id', 'side')
+    )
+
+    # Compute all target slots in memory, following add_to_binary_tree's rules
+    targets = []
+    for index, (user, referring_user) in enumerate(placements):
+        target = None
+
+        # Rule 3: Referral-based placement under the referring user's node
+        if referring_user and referring_user.id != referrer.id:
+            referring_key = node_key_of_user.get(referring_user.id)
+            if referring_key is not None and depth_of[referring_key] <= 100:
+                if (referring_key, 'left') not in occupied:
+                    target = (referring_key, 'left')
+                elif (referring_key, 'right') not in occupied:
+                    target = (referring_key, 'right')
+
+        # Standard placement: preferred side, opposite side, then preferred-side chain
+        if target is None:
+            if (root_id, preferred_side) not in occupied:
+                target = (root_id, preferred_side)
+            elif (root_id, opposite_side) not in occupied:
+                target = (root_id, opposite_side)
+            else:
+                target = (chain_tail, preferred_side)
+
+        parent_key, side = target
+        key = ('new', index)
+        occupied.add(target)
+        parent_of[key] = target
+        level_of[key] = level_of[parent_key] + 1
+        depth_of[key] = depth_of[parent_key] + 1
+        node_key_of_user[user.id] = key
+        if parent_key == chain_tail and side == preferred_side:
+            chain_tail = key
+        targets.append(target)
+
+    # Aggregate count deltas: every ancestor gains one node on the side of the path
+    new_counts = {('new', index): [0, 0, 0] for index in range(len(placements))}
+    deltas = {}
+    for index in range(len(placements)):
+        child_key = ('new', index)
+        parent_key, side = parent_of[child_key]
+        is_direct_parent = True
+        while True:
+            counts = new_counts.get(parent_key) or deltas.setdefault(parent_key, [0, 0, 0])
+            counts[0 if side == 'left' else 1] += 1
+            if is_direct_parent:
+                counts[2] += 1
+                is_direct_parent = False
+            if parent_key not in parent_of:
+                break
+            parent_key, side = parent_of[parent_key]
+
+    # Insert all nodes unattached, then attach them in one bulk update
+    # (MySQL does not return primary keys from bulk_create)
+    BinaryNode.objects.bulk_create([
+        BinaryNode(
+            user=user,
+            level=level_of[('new', index)],
+            left_count=new_counts[('new', index)][0],
+            right_count=new_counts[('new', index)][1],
+            direct_children_count=new_counts[('new', index)][2],
+        )
+        for index, (user, _) in enumerate(placements)
+    ])
+    id_by_user = dict(
+        BinaryNode.objects.filter(
+            user_id__in=[user.id for user, _ in placements]
+        ).values_list('user_id', 'id')
+    )
+    id_by_key = {('new', index): id_by_user[user.id] for index, (user, _) in enumerate(placements)}
+
+    new_nodes = []
+    for index, (user, _) in enumerate(placements):
+        parent_key, side = targets[index]
+        new_nodes.append(BinaryNode(
+            id=id_by_key[('new', index)],
+            parent_id=id_by_key.get(parent_key, parent_key),
+            side=side,
+        ))
+    BinaryNode.objects.bulk_update(new_nodes, ['parent', 'side'], batch_size=500)
+
+    # Apply deltas to existing ancestors, one UPDATE per distinct delta
+    ids_by_delta = {}
+    for node_id, counts in deltas.items():
+        ids_by_delta.setdefault(tuple(counts), []).append(node_id)
+    for (left_delta, right_delta, children_delta), node_ids in ids_by_delta.items():
+        BinaryNode.objects.filter(id__in=node_ids).update(
+            left_count=F('left_count') + left_delta,
+            right_count=F('right_count') + right_delta,
+            direct_children_count=F('direct_children_count') + children_delta,
+        )
+
+    nodes_by_id = BinaryNode.objects.select_related('parent', 'parent__user').in_bulk(id_by_key.values())
+    return [
+        (user, nodes_by_id.get(id_by_key[('new', index)]))
+        for index, (user, _) in enumerate(placements)
+    ]
+
+
 def get_binary_pairs_after_activation_count(user):
     """
     Count total binary pair commissions earned after binary commission activation
@@ -1191,6 +1485,176 @@ def get_all_descendant_nodes(node, side):
     return descendants
 
 
+def get_subtree_levels(node, depth):
+    """
+    Load up to `depth` levels below node in one recursive CTE query.
+
+    Every loaded node (and node itself) gets left_children_list / right_children_list
+    attached, the same attributes the tree views prefetch, so BinaryTreeNodeSerializer
+    can render the whole window without querying children per node.
+
+    Args:
+        node: BinaryNode to start from
+        depth: Number of levels to load below node (1 = direct children only)
+
+    Returns:
+        list: IDs of frontier nodes (exactly `depth` levels below node) whose own
+              children were not loaded
+    """
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            WITH RECURSIVE subtree AS (
+                SELECT id, 1 AS depth FROM binary_nodes WHERE parent_id = %s
+                UNION ALL
+                SELECT bn.id, s.depth + 1 FROM binary_nodes bn
+                INNER JOIN subtree s ON bn.parent_id = s.id
+                WHERE s.depth < %s
+            )
+            SELECT id, depth FROM subtree
+        """, [node.id, depth])
+        depth_by_id = dict(cursor.fetchall())
+
+    nodes = {node.id: node}
+    if depth_by_id:
+        nodes.update(
+            (n.id, n) for n in BinaryNode.objects.filter(id__in=depth_by_id.keys()).select_related(
+                'user', 'user__wallet', 'user__referred_by', 'parent', 'parent__user'
+            )
+        )
+
+    for loaded in nodes.values():
+        loaded.left_children_list = []
+        loaded.right_children_list = []
+
+    frontier_ids = []
+    for node_id, node_depth in depth_by_id.items():
+        child = nodes[node_id]
+        if child.side == 'left':
+            nodes[child.parent_id].left_children_list.append(child)
+        elif child.side == 'right':
+            nodes[child.parent_id].right_children_list.append(child)
+        if node_depth == depth:
+            frontier_ids.append(node_id)
+
+    return frontier_ids
+
+
+def get_subtree_summaries(node_ids):
+    """
+    Aggregate left/right subtree totals and Active Buyer counts for several nodes
+    in a single recursive CTE query.
+
+    Used for the frontier of a lazily loaded tree window so the client can tell
+    which nodes are worth expanding.
+
+    Args:
+        node_ids: Iterable of BinaryNode IDs
+
+    Returns:
+        dict: {node_id: {'left_total', 'right_total', 'left_active', 'right_active'}}
+    """
+    from django.db import connection
+
+    node_ids = list(node_ids)
+    summaries = {
+        node_id: {'left_total': 0, 'right_total': 0, 'left_active': 0, 'right_active': 0}
+        for node_id in node_ids
+    }
+    if not node_ids:
+        return summaries
+
+    placeholders = ', '.join(['%s'] * len(node_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            WITH RECURSIVE subtree AS (
+                SELECT id, parent_id AS root_id, side AS root_side
+                FROM binary_nodes WHERE parent_id IN ({placeholders})
+                UNION ALL
+                SELECT bn.id, s.root_id, s.root_side FROM binary_nodes bn
+                INNER JOIN subtree s ON bn.parent_id = s.id
+            )
+            SELECT s.root_id, s.root_side, COUNT(*),
+                   SUM(CASE WHEN u.is_active_buyer THEN 1 ELSE 0 END)
+            FROM subtree s
+            INNER JOIN binary_nodes bn ON bn.id = s.id
+            INNER JOIN users u ON u.id = bn.user_id
+            GROUP BY s.root_id, s.root_side
+        """, node_ids)
+        for root_id, root_side, total, active in cursor.fetchall():
+            if root_side not in ('left', 'right'):
+                continue
+            summaries[root_id][f'{root_side}_total'] = total
+            summaries[root_id][f'{root_side}_active'] = int(active or 0)
+
+    return summaries
+
+
+def get_activation_payment_user_ids(user_ids):
+    """
+    Bulk has_activation_payment(user) for several users in one query
+
+    Args:
+        user_ids: Iterable of User IDs
+
+    Returns:
+        set: IDs of the users with an activation payment
+    """
+    from core.booking.models import Payment
+    from django.db.models import Sum
+
+    user_ids = list(user_ids)
+    if not user_ids:
+        return set()
+
+    activation_amount = PlatformSettings.get_settings().activation_amount
+    if activation_amount == 0:
+        # Any completed payment qualifies (has_successful_payment)
+        return set(
+            Payment.objects.filter(user_id__in=user_ids, status='completed').values_list('user_id', flat=True)
+        )
+
+    totals = Payment.objects.filter(
+        booking__user_id__in=user_ids,
+        booking__status__in=['active', 'completed'],
+        status='completed'
+    ).values('booking__user_id').annotate(total=Sum('amount'))
+    return {
+        row['booking__user_id'] for row in totals
+        if (row['total'] or 0) >= activation_amount
+    }
+
+
+def has_activated_ancestor(node_id):
+    """
+    Whether the node or any of its ancestors has binary commission activated
+    (one recursive CTE, up to 100 levels)
+
+    Args:
+        node_id: BinaryNode ID to start from (pass a node's parent_id to check its ancestors)
+    """
+    from django.db import connection
+
+    if not node_id:
+        return False
+
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            WITH RECURSIVE ancestors AS (
+                SELECT id, parent_id, binary_commission_activated, 0 as depth
+                FROM binary_nodes WHERE id = %s
+                UNION ALL
+                SELECT bn.id, bn.parent_id, bn.binary_commission_activated, a.depth + 1
+                FROM binary_nodes bn
+                INNER JOIN ancestors a ON bn.id = a.parent_id
+                WHERE a.depth < 100 AND a.parent_id IS NOT NULL
+            )
+            SELECT id FROM ancestors WHERE binary_commission_activated = 1 LIMIT 1
+        """, [node_id])
+        return cursor.fetchone() is not None
+
+
 def get_unmatched_users_for_pairing(node, weak_side=None, weak_side_cutoff=None, active_buyer_cutoff=None):
     """
     Get one unmatched user from left side and one from right side.
@@ -1840,7 +2304,12 @@ def place_user_manually(user, parent_node, side, allow_replacement=False):
 
 def move_binary_node(node, new_parent, new_side):
     """
-    Move an existing binary node to a new position
+    Move an existing binary node (with its whole subtree) to a new position
+    
+    The move is set-based: descendant levels are shifted by a constant delta in a
+    single UPDATE over the descendant set, and the subtree size is subtracted from the
+    old ancestor chain and added to the new one as count deltas, instead of saving
+    every descendant and recounting both parents recursively.
     
     Args:
         node: BinaryNode to move
@@ -1853,6 +2322,8 @@ def move_binary_node(node, new_parent, new_side):
     Raises:
         ValueError: If move is invalid (cycle, position occupied, etc.)
     """
+    from django.db.models import F
+    
     if new_side not in ['left', 'right']:
         raise ValueError(f"Invalid side: {new_side}. Must be 'left' or 'right'")
     
@@ -1860,89 +2331,196 @@ def move_binary_node(node, new_parent, new_side):
     if node == new_parent:
         raise ValueError("Cannot move node to itself")
     
-    # Check for cycles: new_parent cannot be a descendant of node
-    # Use efficient recursive CTE query to avoid N+1 problem
+    # Check for cycles: new_parent cannot be a descendant of node.
+    # The same ancestor chain of new_parent is reused for the count deltas below.
+    new_path = get_ancestor_path(new_parent)
+    if any(ancestor_id == node.id for ancestor_id, _ in new_path):
+        raise ValueError("Cannot move node to its own descendant (would create cycle)")
+    
+    # Check if target position is available
+    existing_node = BinaryNode.objects.filter(parent=new_parent, side=new_side).first()
+    if existing_node and existing_node != node:
+        parent_info = _format_user_display_info(new_parent.user)
+        side_display = new_side.capitalize()
+        raise ValueError(
+            f"The {side_display} position under {parent_info} is already occupied. Please choose a different position."
+        )
+    
+    # Store old position for count updates
+    old_parent = node.parent
+    old_side = node.side
+    old_level = node.level
+    old_path = get_ancestor_path(old_parent) if old_parent else []
+    
+    with transaction.atomic():
+        subtree_size = 1 + count_descendants(node)
+        
+        # Update node position
+        node.parent = new_parent
+        node.side = new_side
+        node.level = new_parent.level + 1 if new_parent else 0
+        node.save(update_fields=['parent', 'side', 'level'])
+        
+        # Shift levels of all descendants by the same delta
+        level_delta = node.level - old_level
+        if level_delta:
+            shift_descendant_levels(node, level_delta)
+        
+        # Count deltas: remove subtree from old ancestor chain, add it to the new one.
+        # Each path entry is (ancestor_id, side of the ancestor the subtree hangs on).
+        deltas = {}
+        for path, side, sign in ((old_path, old_side, -1), (new_path, new_side, 1)):
+            for ancestor_id, ancestor_side in path:
+                counts = deltas.setdefault(ancestor_id, [0, 0, 0])
+                counts[0 if side == 'left' else 1] += sign * subtree_size
+                side = ancestor_side
+        if old_parent:
+            deltas.setdefault(old_parent.id, [0, 0, 0])[2] -= 1
+        if new_parent:
+            deltas.setdefault(new_parent.id, [0, 0, 0])[2] += 1
+        
+        ids_by_delta = {}
+        for ancestor_id, counts in deltas.items():
+            if any(counts):
+                ids_by_delta.setdefault(tuple(counts), []).append(ancestor_id)
+        for (left_delta, right_delta, children_delta), ancestor_ids in ids_by_delta.items():
+            BinaryNode.objects.filter(id__in=ancestor_ids).update(
+                left_count=F('left_count') + left_delta,
+                right_count=F('right_count') + right_delta,
+                direct_children_count=F('direct_children_count') + children_delta,
+            )
+        
+        for parent in (old_parent, new_parent):
+            if parent:
+                parent.refresh_from_db(fields=['left_count', 'right_count', 'direct_children_count'])
+        
+        # The node's post_save covers the new ancestors; the old ones lost the subtree
+        if old_parent:
+            from core.reports.distributor_dashboard import schedule_refresh_for_nodes
+            schedule_refresh_for_nodes([old_parent.id])
+    
+    return node
+
+
+def get_ancestor_path(node):
+    """
+    Get the ancestor chain of node, starting with node itself, in one recursive CTE query
+    
+    Args:
+        node: BinaryNode to start from
+    
+    Returns:
+        list: (node_id, side) tuples ordered from node upward, where side is the
+              node's own side under its parent (None for the root)
+    """
     from django.db import connection
     
     try:
         with connection.cursor() as cursor:
-            # Check if node is in the ancestor chain of new_parent
             cursor.execute("""
                 WITH RECURSIVE ancestors AS (
-                    SELECT id, parent_id, 0 as depth
+                    SELECT id, parent_id, side, 0 as depth
                     FROM binary_nodes WHERE id = %s
                     UNION ALL
-                    SELECT bn.id, bn.parent_id, a.depth + 1
+                    SELECT bn.id, bn.parent_id, bn.side, a.depth + 1
                     FROM binary_nodes bn
                     INNER JOIN ancestors a ON bn.id = a.parent_id
                     WHERE a.depth < 100 AND a.parent_id IS NOT NULL
                 )
-                SELECT id FROM ancestors WHERE id = %s
-            """, [new_parent.id, node.id])
-            
-            result = cursor.fetchone()
-            if result:
-                raise ValueError("Cannot move node to its own descendant (would create cycle)")
-    except ValueError:
-        raise
+                SELECT id, side FROM ancestors ORDER BY depth
+            """, [node.id])
+            return [(row[0], row[1]) for row in cursor.fetchall()]
     except Exception as e:
         # Fallback to simple traversal with depth limit if CTE fails
         import logging
         logger = logging.getLogger(__name__)
-        logger.warning(f"CTE query failed in move_binary_node cycle check, using fallback: {str(e)}")
+        logger.warning(f"CTE query failed in get_ancestor_path, using fallback: {str(e)}")
         
-        current = new_parent
+        path = []
+        current = node
         max_depth = 100
         depth = 0
         
-        while current and depth < max_depth:
-            if current.id == node.id:
-                raise ValueError("Cannot move node to its own descendant (would create cycle)")
+        while current and depth <= max_depth:
+            path.append((current.id, current.side))
             try:
                 if current.parent_id:
-                    current = BinaryNode.objects.select_related('parent').get(id=current.parent_id)
+                    current = BinaryNode.objects.get(id=current.parent_id)
                 else:
                     current = None
             except BinaryNode.DoesNotExist:
                 current = None
-            except Exception as e:
-                logger.error(f"Error accessing parent in move_binary_node: {str(e)}")
-                # If we can't verify, err on the side of caution
-                break
             depth += 1
+        
+        return path
+
+
+def count_descendants(node):
+    """
+    Count all descendants of node (entire subtree, both sides) in one recursive CTE query
+    """
+    from django.db import connection
     
-    # Check if target position is available
-    existing_node = BinaryNode.objects.filter(parent=new_parent, side=new_side).first()
-    if existing_node and existing_node != node:
-        parent_info = _format_user_display_info(new_parent.user)
-        side_display = new_side.capitalize()
-        raise ValueError(
-            f"The {side_display} position under {parent_info} is already occupied. Please choose a different position."
-        )
-    
-    # Store old parent for count updates
-    old_parent = node.parent
-    old_side = node.side
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            WITH RECURSIVE descendants AS (
+                SELECT id FROM binary_nodes WHERE parent_id = %s
+                UNION ALL
+                SELECT bn.id FROM binary_nodes bn
+                INNER JOIN descendants d ON bn.parent_id = d.id
+            )
+            SELECT COUNT(*) FROM descendants
+        """, [node.id])
+        return cursor.fetchone()[0]
+
+
+# Ids of every node below the node passed as the first parameter
+DESCENDANT_IDS_CTE = """
+    WITH RECURSIVE descendants AS (
+        SELECT id FROM binary_nodes WHERE parent_id = %s
+        UNION ALL
+        SELECT bn.id FROM binary_nodes bn
+        INNER JOIN descendants d ON bn.parent_id = d.id
+    )
+"""
+
+# MySQL rejects an UPDATE whose WHERE subquery reads the updated table (error 1093),
+# so it joins the materialized descendant set instead
+SHIFT_LEVELS_SQL_MYSQL = f"""
+    UPDATE binary_nodes bn
+    INNER JOIN ({DESCENDANT_IDS_CTE} SELECT id FROM descendants) d ON bn.id = d.id
+    SET bn.level = bn.level + %s
+"""
+
+SHIFT_LEVELS_SQL = f"""
+    {DESCENDANT_IDS_CTE}
+    UPDATE binary_nodes SET level = level + %s
+    WHERE id IN (SELECT id FROM descendants)
+"""
+
+
+def shift_descendant_levels(node, delta):
+    """
+    Add delta to the level of every descendant of node in a single UPDATE statement
+
+    Falls back to the row-by-row update_descendant_levels only if the database
+    rejects the statement (e.g. a server without recursive CTE support).
+    """
+    from django.db import DatabaseError, connection
     
-    with transaction.atomic():
-        # Update node position
-        node.parent = new_parent
-        node.side = new_side
-        node.level = new_parent.level + 1 if new_parent else 0
-        node.save()
-        
-        # Update old parent's counts
-        if old_parent:
-            old_parent.update_counts()
-        
-        # Update new parent's counts
-        if new_parent:
-            new_parent.update_counts()
-        
-        # Update levels of all descendants
+    sql = SHIFT_LEVELS_SQL_MYSQL if connection.vendor == 'mysql' else SHIFT_LEVELS_SQL
+    try:
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [node.id, delta])
+    except DatabaseError as e:
+        import logging
+        logger = logging.getLogger(__name__)
+        logger.error(
+            f"Recursive level update failed for node {node.id}, updating levels row by row: {str(e)}",
+            exc_info=True
+        )
         update_descendant_levels(node)
-    
-    return node
 
 
 def update_descendant_levels(node):
@@ -2021,6 +2599,138 @@ def is_node_in_tree(node, tree_owner):
         return False
 
 
+def get_available_slots(owner_node, max_depth=None, after=None, limit=20):
+    """
+    Find nodes in owner_node's tree with a free left or right slot in a single query.
+
+    One recursive descendant CTE is LEFT JOINed against the children of every node
+    and grouped by side, so the cost does not depend on per-node lookups. Results are
+    ordered by depth below owner_node (level order) and then by node id, which is
+    also the keyset used for pagination.
+
+    Args:
+        owner_node: BinaryNode whose tree to search
+        max_depth: Optional maximum depth below owner_node (0 = owner_node only)
+        after: Optional (depth, node_id) keyset; only slots after it are returned
+        limit: Maximum number of rows to return
+
+    Returns:
+        list: Tuples of (node_id, depth, left_available, right_available)
+    """
+    from django.db import connection
+
+    recursion_limit = ''
+    params = [owner_node.id]
+    if max_depth is not None:
+        recursion_limit = 'WHERE t.depth < %s'
+        params.append(max_depth)
+
+    keyset_filter = ''
+    if after is not None:
+        keyset_filter = 'WHERE t.depth > %s OR (t.depth = %s AND t.id > %s)'
+        params.extend([after[0], after[0], after[1]])
+    params.append(limit)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            WITH RECURSIVE tree AS (
+                SELECT id, 0 AS depth FROM binary_nodes WHERE id = %s
+                UNION ALL
+                SELECT bn.id, t.depth + 1 FROM binary_nodes bn
+                INNER JOIN tree t ON bn.parent_id = t.id
+                {recursion_limit}
+            )
+            SELECT t.id, t.depth,
+                   SUM(CASE WHEN c.side = 'left' THEN 1 ELSE 0 END) AS left_taken,
+                   SUM(CASE WHEN c.side = 'right' THEN 1 ELSE 0 END) AS right_taken
+            FROM tree t
+            LEFT JOIN binary_nodes c ON c.parent_id = t.id
+            {keyset_filter}
+            GROUP BY t.id, t.depth
+            HAVING SUM(CASE WHEN c.side = 'left' THEN 1 ELSE 0 END) = 0
+                OR SUM(CASE WHEN c.side = 'right' THEN 1 ELSE 0 END) = 0
+            ORDER BY t.depth, t.id
+            LIMIT %s
+        """, params)
+        return [
+            (node_id, depth, not left_taken, not right_taken)
+            for node_id, depth, left_taken, right_taken in cursor.fetchall()
+        ]
+
+
+def get_pending_user_ids(referrer):
+    """
+    Compute the users who used referrer's code but are not placed in referrer's tree,
+    using a fixed number of queries regardless of how many users were referred.
+
+    Referred users (User.referred_by or Booking.referred_by) are anti-joined against
+    referrer's descendant set (one recursive CTE) and referrer's ancestors are
+    excluded (one recursive CTE), since a parent cannot be placed below their child.
+
+    Args:
+        referrer: User who owns the tree
+
+    Returns:
+        tuple: (list of pending user IDs ordered by id,
+                dict {user_id: node_id} for pending users that already have a node)
+    """
+    from django.db import connection
+    from django.db.models import Q
+    from core.users.models import User
+
+    referred_ids = list(
+        User.objects.filter(
+            Q(referred_by=referrer) | Q(bookings__referred_by=referrer)
+        ).exclude(
+            id=referrer.id
+        ).exclude(
+            # A parent cannot be placed as a child of their own child
+            id=referrer.referred_by_id or 0
+        ).values_list('id', flat=True).distinct().order_by('id')
+    )
+    if not referred_ids:
+        return [], {}
+
+    node_by_user = dict(
+        BinaryNode.objects.filter(user_id__in=referred_ids).values_list('user_id', 'id')
+    )
+    referrer_node_id = BinaryNode.objects.filter(user=referrer).values_list('id', flat=True).first()
+
+    excluded_user_ids = set()
+    if referrer_node_id and node_by_user:
+        placeholders = ', '.join(['%s'] * len(node_by_user))
+        with connection.cursor() as cursor:
+            # Referred users already placed anywhere below referrer
+            cursor.execute(f"""
+                WITH RECURSIVE descendants AS (
+                    SELECT id, user_id FROM binary_nodes WHERE parent_id = %s
+                    UNION ALL
+                    SELECT bn.id, bn.user_id FROM binary_nodes bn
+                    INNER JOIN descendants d ON bn.parent_id = d.id
+                )
+                SELECT user_id FROM descendants WHERE user_id IN ({placeholders})
+            """, [referrer_node_id, *node_by_user.keys()])
+            excluded_user_ids.update(row[0] for row in cursor.fetchall())
+
+            # Referrer's ancestors (parent, grandparent, etc.)
+            cursor.execute("""
+                WITH RECURSIVE ancestors AS (
+                    SELECT id, parent_id, user_id, 0 as depth
+                    FROM binary_nodes WHERE id = %s
+                    UNION ALL
+                    SELECT bn.id, bn.parent_id, bn.user_id, a.depth + 1
+                    FROM binary_nodes bn
+                    INNER JOIN ancestors a ON bn.id = a.parent_id
+                    WHERE a.depth < 100 AND a.parent_id IS NOT NULL
+                )
+                SELECT user_id FROM ancestors WHERE id != %s
+            """, [referrer_node_id, referrer_node_id])
+            excluded_user_ids.update(row[0] for row in cursor.fetchall())
+
+    pending_ids = [user_id for user_id in referred_ids if user_id not in excluded_user_ids]
+    return pending_ids, {user_id: node_by_user[user_id] for user_id in pending_ids if user_id in node_by_user}
+
+
 def can_user_be_placed(referrer, target_user):
     """
     Check if a user can be placed in referrer's tree
@@ -11,12 +11,18 @@ from decimal import Decimal
 from .models import BinaryNode, BinaryPair, BinaryEarning
 from .serializers import (
     BinaryNodeSerializer, BinaryPairSerializer, BinaryEarningSerializer,
-    BinaryTreeNodeSerializer
+    BinaryTreeNodeSerializer, get_tree_window_stats
 )
 from .utils import check_and_create_pair, get_binary_pairs_after_activation_count
 from core.settings.models import PlatformSettings
 
 
+# Upper bound for the depth query parameter of tree_structure / node_children.
+# A full window is 2^(depth+1) - 2 nodes (126 at depth 6); deeper levels are fetched
+# by expanding a frontier node
+MAX_TREE_FETCH_DEPTH = 6
+
+
 class BinaryNodeViewSet(viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for Binary Node viewing and manual placement
@@ -223,6 +229,58 @@ class BinaryNodeViewSet(viewsets.ReadOnlyModelViewSet):
         
         return True
     
+    def _build_pending_users(self, user_ids, node_by_user):
+        """
+        Build pending user entries for the given user IDs (in order) with a single query
+        """
+        from core.users.models import User
+        users = User.objects.only(
+            'id', 'email', 'username', 'first_name', 'last_name'
+        ).in_bulk(user_ids)
+        pending_users = []
+        for user_id in user_ids:
+            user = users.get(user_id)
+            if not user:
+                continue
+            node_id = node_by_user.get(user_id)
+            pending_users.append({
+                'user_id': user.id,
+                'user_email': user.email,
+                'user_username': user.username,
+                'user_full_name': user.get_full_name(),
+                'has_node': node_id is not None,
+                'node_id': node_id,
+                'in_tree': False
+            })
+        return pending_users
+    
+    def _parse_tree_depth(self, request):
+        """
+        Parse the optional depth query parameter (levels to return below the node).
+        Returns (depth, explicit) where explicit is True if the client passed depth.
+        """
+        depth_param = request.query_params.get('depth')
+        if depth_param in (None, ''):
+            return 1, False
+        depth = int(depth_param)
+        if depth < 1 or depth > MAX_TREE_FETCH_DEPTH:
+            raise ValueError(f'depth must be between 1 and {MAX_TREE_FETCH_DEPTH}')
+        return depth, True
+    
+    def _load_tree_window(self, node, depth, include_summaries, serializer_context):
+        """
+        Load `depth` levels below node with a single descendant query, compute the member
+        figures of every loaded node in bulk (context['tree_window_stats'], a fixed number
+        of queries whatever the depth) and, if requested, attach aggregated subtree counts
+        for the frontier nodes to the serializer context.
+        """
+        from .utils import get_subtree_levels, get_subtree_summaries
+        
+        frontier_ids = get_subtree_levels(node, depth)
+        serializer_context['tree_window_stats'] = get_tree_window_stats(node)
+        if include_summaries:
+            serializer_context['subtree_summaries'] = get_subtree_summaries(frontier_ids)
+    
     @action(detail=False, methods=['get'])
     def my_tree(self, request):
         """Get current user's binary tree info"""
@@ -431,64 +489,18 @@ class BinaryNodeViewSet(viewsets.ReadOnlyModelViewSet):
     
     @action(detail=False, methods=['get'])
     def tree_structure(self, request):
-        """Get full binary tree structure with all children and pending users"""
+        """
+        Get full binary tree structure with all children and pending users
+        Optional depth query parameter (1-6, default 1) returns that many levels in one
+        response; frontier nodes then carry subtree_summary (see node_children)
+        """
         # Get pending users (this works even if referrer has no binary node)
         referrer = request.user
         
-        # Get users who have referred_by = referrer
         from core.users.models import User
-        referred_users = User.objects.filter(referred_by=referrer)
-        
-        # Also check bookings with referrer's code
-        from core.booking.models import Booking
-        booking_users = User.objects.filter(
-            bookings__referred_by=referrer
-        )
-        
-        # Combine both sets
-        all_referred_users = (referred_users | booking_users).distinct()
-        
-        pending_users = []
-        for user in all_referred_users:
-            # Skip if user is the referrer themselves
-            if user.id == referrer.id:
-                continue
-            
-            # Check if user is the referrer's parent (via User.referred_by)
-            # This check works regardless of whether BinaryNodes exist
-            # A parent cannot be placed as a child of their own child
-            if referrer.referred_by and referrer.referred_by.id == user.id:
-                continue
-            
-            try:
-                # Use select_related to prefetch parent relationship
-                # This helps with the fallback case in _is_tree_owner
-                user_node = BinaryNode.objects.select_related('parent').get(user=user)
-                # Check if user is in referrer's tree
-                is_in_tree = self._is_tree_owner(referrer, user_node)
-                if not is_in_tree:
-                    pending_users.append({
-                        'user_id': user.id,
-                        'user_email': user.email,
-                        'user_username': user.username,
-                        'user_full_name': user.get_full_name(),
-                        'has_node': True,
-                        'node_id': user_node.id,
-                        'in_tree': False
-                    })
-                # If in tree, don't include (already placed)
-            except BinaryNode.DoesNotExist:
-                # User doesn't have a node yet
-                # Parent check already done above, so safe to add to pending
-                pending_users.append({
-                    'user_id': user.id,
-                    'user_email': user.email,
-                    'user_username': user.username,
-                    'user_full_name': user.get_full_name(),
-                    'has_node': False,
-                    'node_id': None,
-                    'in_tree': False
-                })
+        from .utils import get_pending_user_ids
+        pending_user_ids, pending_node_by_user = get_pending_user_ids(referrer)
+        pending_users = self._build_pending_users(pending_user_ids, pending_node_by_user)
         
         # Check for search parameter
         search_query = request.query_params.get('search', '').strip()
@@ -498,7 +510,11 @@ class BinaryNodeViewSet(viewsets.ReadOnlyModelViewSet):
         direct_referrals_only = direct_referrals_only_param in ('true', '1', 'yes')
         direct_referral_user_ids = set()
         if direct_referrals_only:
-            direct_referral_user_ids = set(all_referred_users.values_list('id', flat=True))
+            direct_referral_user_ids = set(
+                User.objects.filter(
+                    Q(referred_by=referrer) | Q(bookings__referred_by=referrer)
+                ).values_list('id', flat=True)
+            )
         
         # Build serializer context (request + optional direct-referrals filter)
         serializer_context = {'request': request}
@@ -508,35 +524,15 @@ class BinaryNodeViewSet(viewsets.ReadOnlyModelViewSet):
         
         # Try to get binary node and tree structure
         try:
-            from django.db.models import Prefetch
-            
-            # Optimize query with select_related and prefetch_related for direct children
-            # Prefetch left and right children with their related data
-            left_children_prefetch = Prefetch(
-                'children',
-                queryset=BinaryNode.objects.select_related(
-                    'user', 'user__wallet', 'user__referred_by', 'parent', 'parent__user'
-                ).filter(side='left'),
-                to_attr='left_children_list'
-            )
-            right_children_prefetch = Prefetch(
-                'children',
-                queryset=BinaryNode.objects.select_related(
-                    'user', 'user__wallet', 'user__referred_by', 'parent', 'parent__user'
-                ).filter(side='right'),
-                to_attr='right_children_list'
-            )
-            
             node = BinaryNode.objects.select_related(
                 'user', 'user__wallet', 'user__referred_by', 'parent', 'parent__user'
-            ).prefetch_related(
-                left_children_prefetch,
-                right_children_prefetch
             ).get(user=request.user)
             
-            # For tree_structure endpoint, we only want direct children (no nested recursion)
-            # Set max_depth to 1 to only show direct children
-            max_depth = 1
+            # Levels to return below the root (default 1 = direct children only).
+            # All levels are loaded with one descendant query; frontier nodes carry
+            # aggregated subtree counts when depth is passed explicitly.
+            max_depth, depth_requested = self._parse_tree_depth(request)
+            self._load_tree_window(node, max_depth, depth_requested, serializer_context)
             
             # Parse side filter (left, right, both)
             side_filter = request.query_params.get('side', 'both').lower()
@@ -582,9 +578,12 @@ class BinaryNodeViewSet(viewsets.ReadOnlyModelViewSet):
     @action(detail=False, methods=['get'])
     def node_children(self, request):
         """
-        Get direct left and right children of a specific node (for lazy loading)
-        Query parameter: node_id (required)
-        Returns only direct children with no nested recursion
+        Get left and right children of a specific node (for lazy loading)
+        Query parameters:
+        - node_id (required)
+        - depth (optional, 1-6, default 1): levels to return in one response.
+          When passed, frontier nodes include subtree_summary with left/right
+          totals and Active Buyer counts so the client knows what to expand.
         """
         node_id = request.query_params.get('node_id')
         
@@ -603,8 +602,14 @@ class BinaryNodeViewSet(viewsets.ReadOnlyModelViewSet):
             )
         
         try:
-            from django.db.models import Prefetch
-            
+            max_depth, depth_requested = self._parse_tree_depth(request)
+        except (ValueError, TypeError) as e:
+            return Response(
+                {'error': f'Invalid depth: {str(e)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
             # Check if user has permission to view this node
             # User can view nodes in their own tree
             try:
@@ -646,38 +651,21 @@ class BinaryNodeViewSet(viewsets.ReadOnlyModelViewSet):
                 node_children_context['direct_referral_user_ids'] = set(all_referred_users.values_list('id', flat=True))
                 node_children_context['direct_referrals_only'] = True
             
-            # Optimize query with prefetch_related for direct children
-            left_children_prefetch = Prefetch(
-                'children',
-                queryset=BinaryNode.objects.select_related(
-                    'user', 'user__wallet', 'user__referred_by', 'parent', 'parent__user'
-                ).filter(side='left'),
-                to_attr='left_children_list'
-            )
-            right_children_prefetch = Prefetch(
-                'children',
-                queryset=BinaryNode.objects.select_related(
-                    'user', 'user__wallet', 'user__referred_by', 'parent', 'parent__user'
-                ).filter(side='right'),
-                to_attr='right_children_list'
-            )
-            
             node = BinaryNode.objects.select_related(
                 'user', 'user__wallet', 'user__referred_by', 'parent', 'parent__user'
-            ).prefetch_related(
-                left_children_prefetch,
-                right_children_prefetch
             ).get(id=node_id)
             
+            # Load all requested levels with a single descendant query
+            self._load_tree_window(node, max_depth, depth_requested, node_children_context)
+            
             # Parse side filter (left, right, both)
             side_filter = request.query_params.get('side', 'both').lower()
             if side_filter not in ['left', 'right', 'both']:
                 side_filter = 'both'
             
-            # Serialize with max_depth=1 to only show direct children
             serializer = BinaryTreeNodeSerializer(
                 node,
-                max_depth=1,
+                max_depth=max_depth,
                 min_depth=0,
                 current_depth=0,
                 side_filter=side_filter,
@@ -882,8 +870,14 @@ class BinaryNodeViewSet(viewsets.ReadOnlyModelViewSet):
     def available_positions(self, request):
         """
         List available positions in the current user's binary tree
-        Returns nodes that have available left or right slots
+        Returns nodes that have available left or right slots, in level order
+        Query parameters:
+        - max_level (optional): only search this many levels below the user's node
+        - page_size (optional, default 20, max 100)
+        - cursor (optional): next_cursor value from the previous page
         """
+        from .utils import get_available_slots
+        
         try:
             owner_node = BinaryNode.objects.get(user=request.user)
         except BinaryNode.DoesNotExist:
@@ -892,46 +886,93 @@ class BinaryNodeViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        # Get all nodes in the tree (descendants of owner)
-        all_nodes = [owner_node]
-        queue = [owner_node]
+        max_level = request.query_params.get('max_level')
+        if max_level not in (None, ''):
+            try:
+                max_level = int(max_level)
+                if max_level < 0:
+                    raise ValueError
+            except (ValueError, TypeError):
+                return Response(
+                    {'error': 'max_level must be a non-negative integer'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        else:
+            max_level = None
         
-        while queue:
-            current = queue.pop(0)
-            children = BinaryNode.objects.filter(parent=current)
-            for child in children:
-                all_nodes.append(child)
-                queue.append(child)
+        try:
+            page_size = int(request.query_params.get('page_size', '20'))
+            if page_size < 1:
+                page_size = 20
+            if page_size > 100:
+                page_size = 100
+        except (ValueError, TypeError):
+            return Response(
+                {'error': 'page_size must be a valid integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Keyset cursor "<depth>-<node_id>" of the last position on the previous page
+        cursor = request.query_params.get('cursor')
+        after = None
+        if cursor:
+            try:
+                depth, node_id = cursor.split('-', 1)
+                after = (int(depth), int(node_id))
+            except (ValueError, TypeError):
+                return Response(
+                    {'error': 'Invalid cursor'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        
+        # Fetch one extra row to know whether another page exists
+        slots = get_available_slots(owner_node, max_depth=max_level, after=after, limit=page_size + 1)
+        has_more = len(slots) > page_size
+        slots = slots[:page_size]
+        
+        nodes = BinaryNode.objects.select_related(
+            'user', 'user__referred_by'
+        ).in_bulk([node_id for node_id, _, _, _ in slots])
         
-        # Find nodes with available positions
         available_positions = []
-        for node in all_nodes:
-            left_available = not BinaryNode.objects.filter(parent=node, side='left').exists()
-            right_available = not BinaryNode.objects.filter(parent=node, side='right').exists()
+        for node_id, depth, left_available, right_available in slots:
+            node = nodes.get(node_id)
+            if not node:
+                continue
             
-            if left_available or right_available:
-                # Get referral code that was used by this user (if any)
-                referral_code_used = None
-                if node.user and node.user.referred_by:
-                    referral_code_used = node.user.referred_by.referral_code
-                
-                available_positions.append({
-                    'node_id': node.id,
-                    'user_id': node.user.id,
-                    'user_email': node.user.email,
-                    'user_username': node.user.username,
-                    'user_full_name': node.user.get_full_name() if node.user else None,
-                    'referral_code': node.user.referral_code if node.user else None,
-                    'referral_code_used': referral_code_used,
-                    'level': node.level,
-                    'left_available': left_available,
-                    'right_available': right_available,
-                    'left_count': node.left_count,
-                    'right_count': node.right_count,
-                })
+            # Get referral code that was used by this user (if any)
+            referral_code_used = None
+            if node.user and node.user.referred_by:
+                referral_code_used = node.user.referred_by.referral_code
+            
+            available_positions.append({
+                'node_id': node.id,
+                'user_id': node.user.id,
+                'user_email': node.user.email,
+                'user_username': node.user.username,
+                'user_full_name': node.user.get_full_name() if node.user else None,
+                'referral_code': node.user.referral_code if node.user else None,
+                'referral_code_used': referral_code_used,
+                'level': node.level,
+                'left_available': left_available,
+                'right_available': right_available,
+                'left_count': node.left_count,
+                'right_count': node.right_count,
+            })
+        
+        next_cursor = None
+        next_url = None
+        if has_more and slots:
+            last_node_id, last_depth = slots[-1][0], slots[-1][1]
+            next_cursor = f"{last_depth}-{last_node_id}"
+            query_params = request.GET.copy()
+            query_params['cursor'] = next_cursor
+            next_url = f"{request.build_absolute_uri(request.path)}?{query_params.urlencode()}"
         
         return Response({
             'count': len(available_positions),
+            'next_cursor': next_cursor,
+            'next': next_url,
             'available_positions': available_positions
         })
     
@@ -940,80 +981,63 @@ class BinaryNodeViewSet(viewsets.ReadOnlyModelViewSet):
         """
         List users who used referrer's code but are not yet placed in the tree
         or are placed but not in referrer's tree
+        Supports pagination via page and page_size (default 20, max 100)
         """
-        referrer = request.user
-        
-        # Get users who have referred_by = referrer
-        from core.users.models import User
-        referred_users = User.objects.filter(referred_by=referrer)
+        from .utils import get_pending_user_ids
         
-        # Also check bookings with referrer's code
-        from core.booking.models import Booking
-        booking_users = User.objects.filter(
-            bookings__referred_by=referrer
-        )
+        page = request.query_params.get('page', '1')
+        page_size = request.query_params.get('page_size', '20')
         
-        # Combine both sets
-        all_referred_users = (referred_users | booking_users).distinct()
+        try:
+            page = int(page)
+            if page < 1:
+                page = 1
+        except (ValueError, TypeError):
+            return Response(
+                {'error': 'page must be a valid integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        # Get referrer's node if it exists (to check for ancestors)
         try:
-            referrer_node = BinaryNode.objects.get(user=referrer)
-        except BinaryNode.DoesNotExist:
-            referrer_node = None
+            page_size = int(page_size)
+            if page_size < 1:
+                page_size = 20
+            if page_size > 100:
+                page_size = 100
+        except (ValueError, TypeError):
+            return Response(
+                {'error': 'page_size must be a valid integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        pending_users = []
-        for user in all_referred_users:
-            # Skip if user is the referrer themselves
-            if user.id == referrer.id:
-                continue
-            
-            # Check if user is the referrer's parent (via User.referred_by)
-            # This check works regardless of whether BinaryNodes exist
-            # A parent cannot be placed as a child of their own child
-            if referrer.referred_by and referrer.referred_by.id == user.id:
-                continue
-            
-            try:
-                # Use select_related to prefetch parent relationship
-                # This helps with the fallback case in _is_tree_owner
-                user_node = BinaryNode.objects.select_related('parent').get(user=user)
-                
-                # Check if user is an ancestor of the referrer (parent, grandparent, etc.)
-                # If so, exclude them - a parent cannot be placed as a child
-                # This check works when both users have BinaryNodes
-                if referrer_node and self._is_ancestor(user, referrer_node):
-                    continue
-                
-                # Check if user is in referrer's tree
-                is_in_tree = self._is_tree_owner(referrer, user_node)
-                if not is_in_tree:
-                    pending_users.append({
-                        'user_id': user.id,
-                        'user_email': user.email,
-                        'user_username': user.username,
-                        'user_full_name': user.get_full_name(),
-                        'has_node': True,
-                        'node_id': user_node.id,
-                        'in_tree': False
-                    })
-                # If in tree, don't include (already placed)
-            except BinaryNode.DoesNotExist:
-                # User doesn't have a node yet
-                # Parent check already done above, so safe to add to pending
-                pending_users.append({
-                    'user_id': user.id,
-                    'user_email': user.email,
-                    'user_username': user.username,
-                    'user_full_name': user.get_full_name(),
-                    'has_node': False,
-                    'node_id': None,
-                    'in_tree': False
-                })
+        # Pending set is computed on IDs only; user details are loaded for the current page
+        pending_user_ids, pending_node_by_user = get_pending_user_ids(request.user)
+        total_count = len(pending_user_ids)
+        total_pages = (total_count + page_size - 1) // page_size
+        start_index = (page - 1) * page_size
+        page_user_ids = pending_user_ids[start_index:start_index + page_size]
+        
+        # Build pagination URLs
+        base_url = request.build_absolute_uri(request.path)
+        query_params = request.GET.copy()
+        
+        next_url = None
+        if page < total_pages:
+            query_params['page'] = page + 1
+            next_url = f"{base_url}?{query_params.urlencode()}"
+        
+        previous_url = None
+        if page > 1:
+            query_params['page'] = page - 1
+            previous_url = f"{base_url}?{query_params.urlencode()}"
         
         return Response({
-            'count': len(pending_users),
-            'pending_users': pending_users
+            'count': total_count,
+            'next': next_url,
+            'previous': previous_url,
+            'page': page,
+            'page_size': page_size,
+            'pending_users': self._build_pending_users(page_user_ids, pending_node_by_user)
         })
     
     @action(detail=False, methods=['post'])
@@ -1021,6 +1045,12 @@ class BinaryNodeViewSet(viewsets.ReadOnlyModelViewSet):
         """
         Automatically place pending users in the binary tree using left-priority algorithm
         Can place all pending users or a specific user
+        Each user's direct commission is processed right after their placement.
+        Pass bulk=true (body or query parameter) to compute placements in memory and insert
+        them in bulk; users are placed in user id order and the layout, commissions and
+        activation are identical to sequential placement in that order (nodes are inserted
+        in runs ending at each user with an activation payment, whose commission is paid
+        before the next run)
         """
         referrer = request.user
         # Get target_user_id from request body first, then fall back to query parameter
@@ -1038,11 +1068,24 @@ class BinaryNodeViewSet(viewsets.ReadOnlyModelViewSet):
                     )
         
         referring_user_id = request.data.get('referring_user_id')
+        if referring_user_id:
+            try:
+                referring_user_id = int(referring_user_id)
+            except (ValueError, TypeError):
+                return Response(
+                    {'error': 'Invalid referring_user_id. Must be a valid integer.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        
+        bulk = request.data.get('bulk', request.query_params.get('bulk', False))
+        if isinstance(bulk, str):
+            bulk = bulk.strip().lower() in ('true', '1', 'yes')
         
         # Get users who have referred_by = referrer
         from core.users.models import User
-        from core.booking.models import Booking
-        from .utils import add_to_binary_tree
+        from .utils import (
+            add_to_binary_tree, bulk_add_to_binary_tree, get_activation_payment_user_ids, get_pending_user_ids,
+        )
         
         referred_users = User.objects.filter(referred_by=referrer)
         booking_users = User.objects.filter(
@@ -1084,96 +1127,118 @@ class BinaryNodeViewSet(viewsets.ReadOnlyModelViewSet):
         placed_users = []
         failed_users = []
         
-        for user in all_referred_users:
+        from .utils import process_direct_user_commission
+        
+        def record_placement(user, node):
+            """Process the placed user's commission and add them to the response lists"""
+            if not node:
+                failed_users.append({
+                    'user_id': user.id,
+                    'user_email': user.email,
+                    'user_full_name': user.get_full_name() or user.username,
+                    'error': 'Failed to place user in binary tree'
+                })
+                return
+            try:
+                # Process commission after placement (commission only paid if payment was completed)
+                commission_paid = process_direct_user_commission(user)
+            except Exception as e:
+                import logging
+                logger = logging.getLogger(__name__)
+                logger.error(f"Error processing commission for user {user.id} after placement: {str(e)}")
+                commission_paid = False
+            
+            placed_users.append({
+                'user_id': user.id,
+                'user_email': user.email,
+                'user_full_name': user.get_full_name() or user.username,
+                'node_id': node.id,
+                'parent_node_id': node.parent.id if node.parent else None,
+                'parent_email': node.parent.user.email if node.parent else None,
+                'side': node.side,
+                'level': node.level,
+                'commission_paid': commission_paid
+            })
+        
+        # Determine actual referrer: referring_user_id, else user.referred_by, else referrer
+        # (a booking with referrer's code resolves to referrer itself)
+        def get_actual_referrer(user, referring_users):
+            return referring_users.get(referring_user_id or user.referred_by_id) or referrer
+        
+        bulk_placed = False
+        if bulk:
+            # Pending users (not yet in referrer's tree), placed in user id order
+            pending_user_ids, _ = get_pending_user_ids(referrer)
+            if target_user_id:
+                pending_user_ids = [user_id for user_id in pending_user_ids if user_id == target_user_id]
+            pending = list(User.objects.filter(id__in=pending_user_ids).order_by('id'))
+            referring_users = User.objects.in_bulk(
+                {referring_user_id} if referring_user_id
+                else {user.referred_by_id for user in pending if user.referred_by_id}
+            )
+            placements = [(user, get_actual_referrer(user, referring_users)) for user in pending]
+            
+            # A commission sees the tree as it is when it runs (active referral count,
+            # left/right counts, pairs), so nodes are bulk-placed in runs that end at each
+            # user with an activation payment, and that user's commission is paid before
+            # the next run: every commission sees exactly the nodes sequential placement
+            # would have created by then. Users without an activation payment get no
+            # commission and change nothing but the tree, so they are batched freely.
+            paying_user_ids = get_activation_payment_user_ids([user.id for user, _ in placements])
             try:
-                # Check if user is already in referrer's tree
+                with transaction.atomic():
+                    run = []
+                    for index, placement in enumerate(placements):
+                        run.append(placement)
+                        if placement[0].id not in paying_user_ids and index < len(placements) - 1:
+                            continue
+                        for user, node in bulk_add_to_binary_tree(referrer, run):
+                            record_placement(user, node)
+                        run = []
+                bulk_placed = True
+            except Exception as e:
+                import logging
+                logger = logging.getLogger(__name__)
+                logger.error(f"Bulk placement failed for {referrer.username}, placing sequentially: {str(e)}")
+                # Nothing from the rolled back bulk run is reported
+                placed_users.clear()
+                failed_users.clear()
+        
+        if not bulk_placed:
+            referred_users_list = list(all_referred_users)
+            referring_users = User.objects.in_bulk(
+                {referring_user_id} if referring_user_id
+                else {user.referred_by_id for user in referred_users_list if user.referred_by_id}
+            )
+            for user in referred_users_list:
                 try:
-                    # Use select_related to prefetch parent relationship
-                    # This helps with the fallback case in _is_tree_owner
-                    user_node = BinaryNode.objects.select_related('parent').get(user=user)
-                    is_in_tree = self._is_tree_owner(referrer, user_node)
-                    if is_in_tree:
-                        # User already in tree, skip
+                    # Skip users whose existing node is already in referrer's tree
+                    user_node = BinaryNode.objects.select_related('parent').filter(user=user).first()
+                    if user_node and self._is_tree_owner(referrer, user_node):
                         continue
-                except BinaryNode.DoesNotExist:
-                    # User doesn't have a node, will create one
-                    pass
-                
-                # Determine actual referrer (from user.referred_by or booking.referred_by)
-                actual_referrer = referring_user_id
-                if not actual_referrer:
-                    # Try to get from user.referred_by first
-                    if user.referred_by:
-                        actual_referrer = user.referred_by.id
-                    else:
-                        # Get from first booking
-                        booking = Booking.objects.filter(user=user, referred_by=referrer).first()
-                        if booking and booking.referred_by:
-                            actual_referrer = booking.referred_by.id
                     
-                    # If still no referrer, use the main referrer (request.user)
-                    if not actual_referrer:
-                        actual_referrer = referrer.id
-                
-                # Convert to User object if needed
-                if isinstance(actual_referrer, int):
-                    actual_referrer_user = User.objects.get(id=actual_referrer)
-                else:
-                    actual_referrer_user = actual_referrer
-                
-                # If user already has a node but not in referrer's tree, we need to handle it
-                # For now, we'll try to place it - add_to_binary_tree will create if not exists
-                # or we can move it manually if needed
-                user_node = BinaryNode.objects.filter(user=user).first()
-                if user_node and not self._is_tree_owner(referrer, user_node):
-                    # User has a node but not in referrer's tree
-                    # We'll place them in referrer's tree (the node will be moved/re-parented)
-                    # Note: This might require additional logic for moving existing nodes
-                    # For now, we'll use add_to_binary_tree which should handle creation
-                    pass
-                
-                # Place user in binary tree using automatic placement algorithm
-                node = add_to_binary_tree(
-                    user=user,
-                    referrer=referrer,
-                    side=None,  # Let algorithm determine side automatically
-                    referring_user=actual_referrer_user if actual_referrer_user != referrer else referrer
-                )
-                
-                if node:
-                    # Process commission after placement (commission only paid if payment was completed)
-                    from .utils import process_direct_user_commission
-                    commission_paid = process_direct_user_commission(user)
-                    
-                    placed_users.append({
-                        'user_id': user.id,
-                        'user_email': user.email,
-                        'user_full_name': user.get_full_name() or user.username,
-                        'node_id': node.id,
-                        'parent_node_id': node.parent.id if node.parent else None,
-                        'parent_email': node.parent.user.email if node.parent else None,
-                        'side': node.side,
-                        'level': node.level,
-                        'commission_paid': commission_paid
-                    })
-                else:
+                    # Place user in binary tree using automatic placement algorithm
+                    node = add_to_binary_tree(
+                        user=user,
+                        referrer=referrer,
+                        side=None,  # Let algorithm determine side automatically
+                        referring_user=get_actual_referrer(user, referring_users)
+                    )
+                except Exception as e:
+                    # Log error and add to failed list
+                    import logging
+                    logger = logging.getLogger(__name__)
+                    logger.error(f"Error placing user {user.id} in binary tree: {str(e)}")
                     failed_users.append({
                         'user_id': user.id,
                         'user_email': user.email,
                         'user_full_name': user.get_full_name() or user.username,
-                        'error': 'Failed to place user in binary tree'
+                        'error': str(e)
                     })
-            except Exception as e:
-                # Log error and add to failed list
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.error(f"Error placing user {user.id} in binary tree: {str(e)}")
-                failed_users.append({
-                    'user_id': user.id,
-                    'user_email': user.email,
-                    'user_full_name': user.get_full_name() or user.username,
-                    'error': str(e)
-                })
+                    continue
+                
+                # Commission right after each placement, before the next user is placed
+                record_placement(user, node)
         
         response_data = {
             'placed_count': len(placed_users),
@@ -1384,6 +1449,10 @@ class BinaryNodeViewSet(viewsets.ReadOnlyModelViewSet):
         if side_filter:
             queryset = queryset.filter(side=side_filter)
         
+        # Count the plain node rows, before the per-user booking sums make the
+        # count a grouped subquery
+        total_count = queryset.count()
+        
         # Annotate with the total amount applied toward each user's booking:
         #   total_paid        – actual cash/online payments
         #   bonus_applied     – company bonus credit
@@ -1397,9 +1466,6 @@ class BinaryNodeViewSet(viewsets.ReadOnlyModelViewSet):
         # Order by side (left first) and then by user id for consistency
         queryset = queryset.order_by('side', 'user__id')
         
-        # Get total count before pagination
-        total_count = queryset.count()
-        
         # Calculate pagination
         start_index = (page - 1) * page_size
         end_index = start_index + page_size
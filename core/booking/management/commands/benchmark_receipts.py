@@ -0,0 +1,98 @@
+from django.core.management.base import BaseCommand
+from core.booking.receipts import (
+    RECEIPT_WORKERS,
+    get_receipt_pdf,
+    render_receipt,
+    render_receipts,
+    warm_renderer,
+)
+import time
+
+
+def sample_receipt_data(kind, index):
+    """Synthetic receipt data (unique per index, so nothing is served from the PDF cache)"""
+    if kind == 'booking':
+        return {
+            'company_name': 'Zuja Electrical Innovation Pvt Ltd',
+            'booking_number': f'BENCH{index:08d}',
+            'booking_date': '1/4/2026',
+            'full_name': f'Benchmark Customer {index}',
+            'mobile': '9876543210',
+            'email': f'customer{index}@example.com',
+            'vehicle_name': 'Zuja Flash',
+            'vehicle_color': 'Red',
+            'battery_variant': '60V 40Ah',
+            'total_amount': 120000.0,
+            'amount_paid': 5000.0,
+            'remaining': 115000.0,
+            'payment_method': 'Online',
+            'payment_date': '1/4/2026',
+            'transaction_id': f'order_BENCH{index:08d}',
+            'signature_hash': f'{index:064x}',
+            'signed_at': '01 April 2026 at 10:15:00 AM IST',
+            'ip_address': '127.0.0.1',
+        }
+    return {
+        'receipt_id': f'R-{index:08d}',
+        'date_issued': 'April 01, 2026',
+        'description': 'Payment for April 2026',
+        'customer_name': f'Benchmark Customer {index}',
+        'customer_address': 'MG Road, Kochi, Kerala 682001',
+        'customer_contact': '9876543210',
+        'subtotal': 5000.0,
+        'platform_fee': 120.85,
+        'base_fee': 102.42,
+        'gst_on_fee': 18.43,
+        'total_subtotal': 5102.42,
+        'total_amount': 5120.85,
+        'payment_method': 'Online Payment',
+        'transaction_id': f'order_BENCH{index:08d}',
+    }
+
+
+class Command(BaseCommand):
+    """
+    Measure receipt rendering throughput (receipts per second) with synthetic data:
+    - single: one receipt at a time in this process (as in the payment flow)
+    - bulk:   render_receipts() on a process pool (as in generate_missing_receipts)
+    - cached: get_receipt_pdf() for receipts already rendered
+    """
+
+    help = "Benchmark receipt PDF rendering (receipts per second, single and bulk)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=200, help='Receipts per measurement')
+        parser.add_argument('--workers', type=int, default=RECEIPT_WORKERS, help='Process pool size for bulk')
+        parser.add_argument('--kind', choices=['booking', 'payment'], default='booking')
+
+    def _report(self, label, count, seconds):
+        self.stdout.write(
+            f"  {label:<28} {count:>6} receipts  {seconds:8.2f}s  {count / seconds:8.1f} receipts/s"
+        )
+
+    def handle(self, *args, **options):
+        count = max(1, options['count'])
+        workers = options['workers']
+        kind = options['kind']
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"Receipt rendering benchmark ({kind})"))
+
+        started = time.perf_counter()
+        warm_renderer()
+        render_receipt(kind, sample_receipt_data(kind, 0))
+        self.stdout.write(f"  First receipt (cold, styles and logo built): {(time.perf_counter() - started) * 1000:.1f}ms")
+
+        started = time.perf_counter()
+        for index in range(1, count + 1):
+            render_receipt(kind, sample_receipt_data(kind, index))
+        self._report('single (in process)', count, time.perf_counter() - started)
+
+        jobs = [(kind, sample_receipt_data(kind, index)) for index in range(count + 1, 2 * count + 1)]
+        started = time.perf_counter()
+        render_receipts(jobs, workers=workers)
+        self._report(f'bulk ({workers} workers)', count, time.perf_counter() - started)
+
+        started = time.perf_counter()
+        for kind_, data in jobs:
+            get_receipt_pdf(kind_, data)
+        self._report('cached (content hash)', count, time.perf_counter() - started)
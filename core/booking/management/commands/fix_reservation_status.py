@@ -125,9 +125,8 @@ class Command(BaseCommand):
                     with transaction.atomic():
                         # Re-reserve the stock
                         vehicle_stock = reservation.vehicle_stock
-                        if vehicle_stock.available_quantity >= reservation.quantity:
-                            # Reserve the stock again
-                            vehicle_stock.reserve(quantity=reservation.quantity)
+                        # Reserve the stock again (conditional, fails if no longer available)
+                        if vehicle_stock.reserve(quantity=reservation.quantity):
                             # Mark reservation as completed
                             reservation.status = 'completed'
                             reservation.save(update_fields=['status', 'updated_at'])
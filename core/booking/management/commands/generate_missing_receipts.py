@@ -1,8 +1,8 @@
+from django.core.files.base import ContentFile
 from django.core.management.base import BaseCommand
-from django.db import transaction
 from django.utils import timezone
 from core.booking.models import Booking, Payment as BookingPayment
-from core.booking.utils import generate_booking_receipt_pdf
+from core.booking.receipts import RECEIPT_WORKERS, booking_receipt_data, render_receipts
 import logging
 
 logger = logging.getLogger(__name__)
@@ -18,7 +18,8 @@ class Command(BaseCommand):
     - total_paid >= booking_amount (booking has been paid)
     - payment_receipt is None (receipt not generated)
     
-    It will generate and save PDF receipts for these bookings.
+    It will generate and save PDF receipts for these bookings. Receipts are
+    rendered in batches on a pool of --workers processes (see core/booking/receipts.py).
     """
 
     help = "Generate payment receipts for existing bookings that don't have receipts yet."
@@ -39,11 +40,25 @@ class Command(BaseCommand):
             action='store_true',
             help='Regenerate receipts even if they already exist',
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=RECEIPT_WORKERS,
+            help=f'Processes rendering receipts in parallel (default: {RECEIPT_WORKERS}, 1 = in this process)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=200,
+            help='Receipts rendered per batch before they are saved (default: 200)',
+        )
 
     def handle(self, *args, **options):
         dry_run = options['dry_run']
         booking_id_filter = options.get('booking_id')
         force = options.get('force', False)
+        workers = options['workers']
+        batch_size = max(1, options['batch_size'])
 
         self.stdout.write(self.style.MIGRATE_HEADING("Generating missing payment receipts..."))
 
@@ -77,8 +92,9 @@ class Command(BaseCommand):
         generated_count = 0
         skipped_count = 0
         error_count = 0
+        batch = []
 
-        for booking in bookings:
+        for booking in bookings.iterator(chunk_size=batch_size):
             try:
                 # Skip if receipt exists and not forcing
                 if booking.payment_receipt and not force:
@@ -118,33 +134,13 @@ class Command(BaseCommand):
                     generated_count += 1
                     continue
                 
-                # Generate receipt
-                with transaction.atomic():
-                    try:
-                        receipt_file = generate_booking_receipt_pdf(booking, booking_payment)
-                        booking.payment_receipt = receipt_file
-                        booking.save(update_fields=['payment_receipt'])
-                        
-                        self.stdout.write(
-                            self.style.SUCCESS(
-                                f"  [OK] Generated receipt for booking {booking.id} "
-                                f"({booking.booking_number})"
-                            )
-                        )
-                        generated_count += 1
-                    except Exception as e:
-                        logger.error(
-                            f"Failed to generate receipt for booking {booking.id}: {e}",
-                            exc_info=True
-                        )
-                        self.stdout.write(
-                            self.style.ERROR(
-                                f"  [ERROR] Failed to generate receipt for booking {booking.id} "
-                                f"({booking.booking_number}): {str(e)}"
-                            )
-                        )
-                        error_count += 1
-                        
+                batch.append((booking, booking_receipt_data(booking, booking_payment)))
+                if len(batch) >= batch_size:
+                    generated, errors = self._render_and_save(batch, workers)
+                    generated_count += generated
+                    error_count += errors
+                    batch = []
+
             except Exception as e:
                 logger.error(
                     f"Error processing booking {booking.id}: {e}",
@@ -157,6 +153,11 @@ class Command(BaseCommand):
                 )
                 error_count += 1
 
+        if batch:
+            generated, errors = self._render_and_save(batch, workers)
+            generated_count += generated
+            error_count += errors
+
         # Summary
         self.stdout.write("")
         self.stdout.write(self.style.MIGRATE_HEADING("Summary:"))
@@ -169,3 +170,44 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING("\nThis was a dry run. No receipts were actually generated."))
             self.stdout.write("Run without --dry-run to generate receipts.")
 
+    def _render_and_save(self, batch, workers):
+        """
+        Render a batch of receipts on the process pool and save them
+
+        Returns:
+            tuple: (generated, errors)
+        """
+        generated = 0
+        errors = 0
+        try:
+            pdfs = render_receipts([('booking', data) for _, data in batch], workers=workers)
+        except Exception as e:
+            logger.error(f"Failed to render a batch of {len(batch)} receipts: {e}", exc_info=True)
+            self.stdout.write(self.style.ERROR(f"  [ERROR] Failed to render {len(batch)} receipt(s): {str(e)}"))
+            return 0, len(batch)
+
+        for (booking, _), pdf in zip(batch, pdfs):
+            try:
+                filename = f"receipt_{booking.booking_number}_{timezone.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+                booking.payment_receipt = ContentFile(pdf, name=filename)
+                booking.save(update_fields=['payment_receipt'])
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"  [OK] Generated receipt for booking {booking.id} "
+                        f"({booking.booking_number})"
+                    )
+                )
+                generated += 1
+            except Exception as e:
+                logger.error(
+                    f"Failed to generate receipt for booking {booking.id}: {e}",
+                    exc_info=True
+                )
+                self.stdout.write(
+                    self.style.ERROR(
+                        f"  [ERROR] Failed to generate receipt for booking {booking.id} "
+                        f"({booking.booking_number}): {str(e)}"
+                    )
+                )
+                errors += 1
+        return generated, errors
@@ -0,0 +1,792 @@
+"""
+Receipt PDF rendering
+
+Receipts are rendered in two steps:
+1. *_receipt_data() reads the models and returns a plain dict with everything printed
+   on the receipt (no ORM objects, so it can be hashed and sent to another process)
+2. render_receipt() lays the dict out with reportlab
+
+Styles, colours and the decoded company logo are built once per process. Rendered
+PDFs are cached by a SHA-256 of the receipt data, so regenerating an unchanged receipt
+is a cache hit, and render_receipts() renders bulk jobs on a process pool.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal, ROUND_HALF_UP
+from functools import lru_cache
+from io import BytesIO
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from reportlab import rl_config
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase import pdfmetrics
+from reportlab.platypus import Flowable, KeepTogether, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+import hashlib
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Bump when a layout changes, so cached PDFs of the old layout are not served
+RECEIPT_TEMPLATE_VERSION = 1
+
+RECEIPT_CACHE_KEY = 'receipts:pdf:{digest}'
+RECEIPT_CACHE_TIMEOUT = getattr(settings, 'RECEIPT_PDF_CACHE_TIMEOUT', 24 * 60 * 60)  # seconds
+RECEIPT_WORKERS = getattr(settings, 'RECEIPT_RENDER_WORKERS', 4)
+
+RECEIPT_LOGO_PATH = os.path.join(settings.BASE_DIR, 'Zuja_Logo-removebg-preview.png')
+RECEIPT_FONTS = ('Helvetica', 'Helvetica-Bold', 'Courier')
+
+# Embed images as binary streams: without the rl_accel extension reportlab's ASCII85
+# encoding is pure Python and took most of the render time of a receipt with the logo
+rl_config.useA85 = 0
+
+# Usable page width (A4 with 0.75" side margins)
+PAGE_WIDTH = A4[0] - 1.5*inch
+
+# ── Colour palette ──────────────────────────────────────────────────────────────
+GREEN = colors.HexColor('#28a745')
+LIGHT_GREEN = colors.HexColor('#d4edda')
+DARK_GREEN = colors.HexColor('#155724')
+AMBER = colors.HexColor('#C8A84B')
+DARK_HEADER = colors.HexColor('#1a1a2e')
+LIGHT_BG = colors.HexColor('#f0f4f8')
+BLUE_VALUE = colors.HexColor('#1a6fc4')
+TEXT = colors.HexColor('#1a1a1a')
+BODY_TEXT = colors.HexColor('#333333')
+BORDER = colors.HexColor('#c0c8d0')
+GRID = colors.HexColor('#d0d0d0')
+ROW_ALT = colors.HexColor('#f6f8fa')
+GRAY = colors.HexColor('#808080')
+LIGHT_GRAY = colors.HexColor('#f5f5f5')
+DARK_GRAY = colors.HexColor('#333333')
+BLACK = colors.HexColor('#000000')
+
+# Terms printed on payment receipts
+PAYMENT_RECEIPT_TERMS = (
+    'I confirm that I am booking a vehicle as an individual, distributor, or customer ("Booker") with ZUJA Electrical Innovation Private Limited.',
+    'I understand that booking a vehicle requires payment of a minimum booking / purchase order amount of ₹5,000, and a vehicle is considered booked only after the company receives this amount.',
+    'I acknowledge that all amounts paid towards vehicle booking including booking amount, instalments, full payment, incentive adjustments, or any other mode of payment are strictly non-refundable.',
+)
+
+PAYMENT_RECEIPT_COMPANY = {
+    'address': "KUTTIYIDAYIL,ARRATTUVAZHY, Alappuzha North, Ambalapuzha, Alappuzha- 688007",
+    'email': "zujaelectric@gmail.com",
+    'phone': "7356360777",
+}
+
+RAZORPAY_NET_TO_GROSS_DIVISOR = Decimal('0.9764')  # 1 - 0.0236
+
+
+@lru_cache(maxsize=None)
+def get_receipt_styles():
+    """Paragraph styles of both receipt layouts (built once per process)"""
+    base = getSampleStyleSheet()
+
+    def ps(name, parent='Normal', **kw):
+        return ParagraphStyle(name, parent=base[parent], **kw)
+
+    return {
+        # Booking receipt
+        'section': ps('SecHead', parent='Heading2', fontSize=13, textColor=TEXT,
+                      fontName='Helvetica-Bold', spaceBefore=0, spaceAfter=5),
+        'badge': ps('BadgeTxt', fontSize=9, textColor=colors.white, fontName='Helvetica-Bold', alignment=TA_CENTER),
+        'main_title': ps('MainTitle', parent='Heading1', fontSize=26, textColor=TEXT,
+                         fontName='Helvetica-Bold', alignment=TA_RIGHT, spaceAfter=0, spaceBefore=0),
+        'company_name': ps('CoName', fontSize=11, textColor=TEXT, fontName='Helvetica-Bold', alignment=TA_CENTER),
+        'document_id': ps('DocId', fontSize=9, textColor=TEXT, fontName='Helvetica', alignment=TA_CENTER),
+        'cell': ps('CellPara', fontSize=10, textColor=BODY_TEXT, fontName='Helvetica', leading=14),
+        'table_header': ps('TableHead', fontSize=10, textColor=colors.white,
+                           fontName='Helvetica-Bold', alignment=TA_LEFT),
+        'value': ps('Value', fontSize=10, textColor=BLUE_VALUE, fontName='Helvetica'),
+        'declaration': ps('Decl', fontSize=9, textColor=BODY_TEXT, fontName='Helvetica', leading=14),
+        'cert_heading': ps('CertHd', parent='Heading2', fontSize=12, textColor=DARK_GREEN,
+                           fontName='Helvetica-Bold', alignment=TA_CENTER, spaceBefore=0, spaceAfter=6),
+        'cert_item': ps('CertItem', fontSize=9, textColor=DARK_GREEN, fontName='Helvetica', leading=14),
+        'hash': ps('Hash', fontSize=8, textColor=DARK_GREEN, fontName='Courier', leading=11),
+        # Payment receipt
+        'logo_placeholder': ps('LogoPlaceholder', fontSize=14, textColor=BLACK, alignment=TA_CENTER,
+                               fontName='Helvetica-Bold'),
+        'address': ps('Address', fontSize=9, textColor=DARK_GRAY, alignment=TA_CENTER, fontName='Helvetica'),
+        'contact': ps('Contact', fontSize=9, textColor=GRAY, alignment=TA_CENTER),
+        'title': ps('Title', fontSize=24, textColor=BLACK, fontName='Helvetica-Bold', alignment=TA_CENTER,
+                    spaceAfter=15),
+        'detail': ps('Detail', fontSize=10),
+        'heading': ps('Section', fontSize=12, textColor=BLACK, fontName='Helvetica-Bold', spaceAfter=8),
+        'info': ps('Info', fontSize=10),
+        'bold': ps('BoldText', fontSize=10, textColor=BLACK, fontName='Helvetica-Bold'),
+        'bold_right': ps('BoldTextRight', fontSize=10, textColor=BLACK, fontName='Helvetica-Bold',
+                         alignment=TA_RIGHT),
+        'terms': ps('Terms', fontSize=9, textColor=DARK_GRAY, leading=14, alignment=TA_LEFT),
+        'closing': ps('Closing', fontSize=11, textColor=BLACK, fontName='Helvetica-Bold', alignment=TA_CENTER,
+                      spaceBefore=10),
+    }
+
+
+@lru_cache(maxsize=None)
+def get_logo():
+    """
+    The decoded company logo (once per process)
+
+    Returns:
+        ImageReader | None: None if the logo file is missing or unreadable
+    """
+    if not os.path.exists(RECEIPT_LOGO_PATH):
+        return None
+    try:
+        logo = ImageReader(RECEIPT_LOGO_PATH)
+        logo.getRGBData()  # decode now, not on the first receipt
+        return logo
+    except Exception as e:
+        logger.warning(f"Could not load logo image: {e}")
+        return None
+
+
+class _Logo(Flowable):
+    """Draws the shared, already decoded logo"""
+
+    def __init__(self, image, width, height):
+        super().__init__()
+        self.image = image
+        self.width = width
+        self.height = height
+
+    def wrap(self, availWidth, availHeight):
+        return self.width, self.height
+
+    def draw(self):
+        self.canv.drawImage(self.image, 0, 0, self.width, self.height, mask='auto')
+
+
+def warm_renderer():
+    """Build the per-process styles, fonts and logo (process pool initializer)"""
+    get_receipt_styles()
+    get_logo()
+    for font in RECEIPT_FONTS:
+        pdfmetrics.getFont(font)
+
+
+# ── Receipt data ────────────────────────────────────────────────────────────────
+
+def _date_str(value):
+    return f"{value.day}/{value.month}/{value.year}"
+
+
+def booking_receipt_data(booking, payment):
+    """
+    Everything printed on a booking receipt
+
+    Args:
+        booking: Booking instance
+        payment: Payment instance (booking payment)
+
+    Returns:
+        dict: Plain (JSON-serialisable) receipt data
+    """
+    from core.settings.models import PlatformSettings
+
+    platform_settings = PlatformSettings.get_settings()
+    booking_date = booking.confirmed_at or booking.created_at
+    user = booking.user
+    user_full_name = user.get_full_name() or user.username
+    mobile = getattr(user, 'mobile', None) or 'N/A'
+
+    # SHA-256 from key booking data
+    hash_input = (
+        f"{booking.booking_number}|{user_full_name}|"
+        f"{payment.transaction_id}|{payment.amount}|"
+        f"{booking_date.isoformat()}"
+    )
+
+    # Signed when the payment was made (not when the PDF is rendered), so
+    # regenerating a receipt gives the same document
+    signed_at = timezone.localtime(payment.completed_at or payment.payment_date or booking_date)
+
+    return {
+        'company_name': platform_settings.company_name,
+        'booking_number': booking.booking_number,
+        'booking_date': _date_str(booking_date),
+        'full_name': user_full_name,
+        'mobile': mobile,
+        'email': user.email or 'N/A',
+        'vehicle_name': booking.vehicle_model.name or 'Electric Vehicle',
+        'vehicle_color': booking.vehicle_color or 'N/A',
+        'battery_variant': booking.battery_variant or 'N/A',
+        'total_amount': float(booking.total_amount),
+        'amount_paid': float(payment.amount),
+        'remaining': float(booking.total_amount) - float(payment.amount),
+        'payment_method': payment.payment_method.title(),
+        'payment_date': _date_str(payment.payment_date) if payment.payment_date else 'N/A',
+        'transaction_id': payment.transaction_id or 'N/A',
+        'signature_hash': hashlib.sha256(hash_input.encode()).hexdigest(),
+        'signed_at': signed_at.strftime('%d %B %Y at %I:%M:%S %p IST'),
+        'ip_address': getattr(booking, 'ip_address', 'N/A') or 'N/A',
+    }
+
+
+def _find_razorpay_payment(payment):
+    from core.payments.models import Payment as RazorpayPayment
+
+    # transaction_id is usually the order id, otherwise the payment id
+    try:
+        return RazorpayPayment.objects.get(order_id=payment.transaction_id)
+    except RazorpayPayment.DoesNotExist:
+        try:
+            return RazorpayPayment.objects.get(payment_id=payment.transaction_id)
+        except RazorpayPayment.DoesNotExist:
+            return None
+
+
+def payment_receipt_data(payment, razorpay_payment=None):
+    """
+    Everything printed on a payment receipt
+
+    payment.amount is the net amount credited to the booking; the platform fee
+    (gateway charges) comes from the Razorpay payment when there is one.
+
+    Args:
+        payment: Payment instance (booking payment from core.booking.models)
+        razorpay_payment: Optional Razorpay Payment instance for gateway charges
+
+    Returns:
+        dict: Plain (JSON-serialisable) receipt data
+    """
+    user = payment.user
+    customer_address = f"{getattr(user, 'address_line1', '') or ''}, {getattr(user, 'city', '') or ''}, {getattr(user, 'state', '') or ''} {getattr(user, 'pincode', '') or ''}".strip(', ')
+    if not customer_address or customer_address == ', ':
+        customer_address = "N/A"
+
+    net_amount = Decimal(str(payment.amount))
+    platform_fee = Decimal('0.00')
+    gross_amount = None
+
+    if not razorpay_payment and payment.payment_method == 'online' and payment.transaction_id:
+        try:
+            razorpay_payment = _find_razorpay_payment(payment)
+        except Exception as e:
+            logger.warning(f"Could not find Razorpay payment for transaction_id {payment.transaction_id}: {e}")
+            razorpay_payment = None
+
+    if razorpay_payment:
+        # razorpay_payment.amount is the gross amount in paise (what user actually paid)
+        gross_amount = Decimal(str(razorpay_payment.amount / 100))
+        if razorpay_payment.gateway_charges is not None:
+            platform_fee = Decimal(str(razorpay_payment.gateway_charges / 100))
+        else:
+            platform_fee = max(gross_amount - net_amount, Decimal('0.00'))
+    elif payment.payment_method == 'online':
+        # gross = net / 0.9764, platform_fee = gross - net
+        gross_amount = (net_amount / RAZORPAY_NET_TO_GROSS_DIVISOR).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+        platform_fee = max(gross_amount - net_amount, Decimal('0.00'))
+
+    subtotal = net_amount
+    # The total is what the customer actually paid
+    total_amount = gross_amount if gross_amount is not None else net_amount + platform_fee
+
+    # GST is included in the platform fee (18% GST on the 2% fee)
+    gst_on_fee = platform_fee * Decimal('18') / Decimal('118') if platform_fee > 0 else Decimal('0.00')
+    base_fee = platform_fee - gst_on_fee if platform_fee > 0 else Decimal('0.00')
+
+    logger.debug(
+        f"Payment receipt calculation for payment {payment.id}: "
+        f"net_amount={net_amount}, platform_fee={platform_fee}, "
+        f"gross_amount={gross_amount}, total_amount={total_amount}, "
+        f"subtotal={subtotal}, base_fee={base_fee}, gst_on_fee={gst_on_fee}"
+    )
+
+    payment_date = payment.completed_at or payment.payment_date
+    if payment.transaction_id:
+        receipt_id = f"R-{str(payment.transaction_id)[-8:].zfill(8)}"
+    else:
+        receipt_id = f"R-{str(payment.id).zfill(8)}"
+
+    return {
+        'receipt_id': receipt_id,
+        'date_issued': (payment_date or timezone.now()).strftime('%B %d, %Y'),
+        'description': f'Payment for {payment_date.strftime("%B %Y") if payment_date else "Payment"}',
+        'customer_name': user.get_full_name() or user.username,
+        'customer_address': customer_address,
+        'customer_contact': getattr(user, 'mobile', '') or user.email or 'N/A',
+        'subtotal': float(subtotal),
+        'platform_fee': float(platform_fee),
+        'base_fee': float(base_fee),
+        'gst_on_fee': float(gst_on_fee),
+        'total_subtotal': float(subtotal + base_fee),
+        'total_amount': float(total_amount),
+        'payment_method': (
+            payment.get_payment_method_display() if hasattr(payment, 'get_payment_method_display') else 'Online'
+        ),
+        'transaction_id': payment.transaction_id or 'N/A',
+    }
+
+
+# ── Layouts ─────────────────────────────────────────────────────────────────────
+
+def _doc(buffer, top_margin, bottom_margin):
+    return SimpleDocTemplate(
+        buffer, pagesize=A4,
+        topMargin=top_margin, bottomMargin=bottom_margin,
+        leftMargin=0.75*inch, rightMargin=0.75*inch
+    )
+
+
+def render_booking_receipt(data):
+    """
+    Booking receipt styled like a signed agreement: DIGITALLY SIGNED badge, amber
+    company band, customer information, payment details, declaration and a digital
+    signature certificate with the SHA-256 hash
+
+    Returns:
+        bytes: The PDF
+    """
+    styles = get_receipt_styles()
+    pw = PAGE_WIDTH
+    elements = []
+
+    # ── 1. TOP HEADER ROW: "DIGITALLY SIGNED" badge  +  "PAYMENT RECEIPT" ──────
+    badge_cell = Table([[Paragraph('&#x2726; DIGITALLY SIGNED', styles['badge'])]], colWidths=[1.55*inch])
+    badge_cell.setStyle(TableStyle([
+        ('BACKGROUND',    (0,0), (-1,-1), GREEN),
+        ('TOPPADDING',    (0,0), (-1,-1), 5),
+        ('BOTTOMPADDING', (0,0), (-1,-1), 5),
+        ('LEFTPADDING',   (0,0), (-1,-1), 8),
+        ('RIGHTPADDING',  (0,0), (-1,-1), 8),
+        ('VALIGN',        (0,0), (-1,-1), 'MIDDLE'),
+    ]))
+
+    hdr_table = Table(
+        [[badge_cell, Paragraph('PAYMENT RECEIPT', styles['main_title'])]],
+        colWidths=[1.65*inch, pw - 1.65*inch]
+    )
+    hdr_table.setStyle(TableStyle([
+        ('VALIGN',        (0,0), (-1,-1), 'BOTTOM'),
+        ('LEFTPADDING',   (0,0), (-1,-1), 0),
+        ('RIGHTPADDING',  (0,0), (-1,-1), 0),
+        ('TOPPADDING',    (0,0), (-1,-1), 0),
+        ('BOTTOMPADDING', (0,0), (-1,-1), 0),
+    ]))
+    elements.append(hdr_table)
+    elements.append(Spacer(1, 0.07*inch))
+
+    # ── 2. AMBER COMPANY BAND ───────────────────────────────────────────────────
+    amber_band = Table([
+        [Paragraph(f"<b>{data['company_name']}</b>", styles['company_name'])],
+        [Paragraph(f"Document ID: {data['booking_number']}  |  Date: {data['booking_date']}", styles['document_id'])],
+    ], colWidths=[pw])
+    amber_band.setStyle(TableStyle([
+        ('BACKGROUND',    (0,0), (-1,-1), AMBER),
+        ('TOPPADDING',    (0,0), (-1,-1), 7),
+        ('BOTTOMPADDING', (0,0), (-1,-1), 7),
+        ('LEFTPADDING',   (0,0), (-1,-1), 10),
+        ('RIGHTPADDING',  (0,0), (-1,-1), 10),
+    ]))
+    elements.append(amber_band)
+    elements.append(Spacer(1, 0.18*inch))
+
+    # ── 3. CUSTOMER INFORMATION ─────────────────────────────────────────────────
+    elements.append(Paragraph('CUSTOMER INFORMATION', styles['section']))
+
+    def cell_para(label, value):
+        return Paragraph(f'<b>{label}:</b>  {value}', styles['cell'])
+
+    cust_table = Table(
+        [
+            [cell_para('Full Name', data['full_name']), cell_para('Booking No', data['booking_number'])],
+            [cell_para('Mobile', data['mobile']), cell_para('Email', data['email'])],
+        ],
+        colWidths=[pw/2, pw/2]
+    )
+    cust_table.setStyle(TableStyle([
+        ('BACKGROUND',    (0,0), (-1,-1), LIGHT_BG),
+        ('BOX',           (0,0), (-1,-1), 0.75, BORDER),
+        ('TOPPADDING',    (0,0), (-1,-1), 8),
+        ('BOTTOMPADDING', (0,0), (-1,-1), 8),
+        ('LEFTPADDING',   (0,0), (-1,-1), 10),
+        ('RIGHTPADDING',  (0,0), (-1,-1), 10),
+        ('VALIGN',        (0,0), (-1,-1), 'MIDDLE'),
+    ]))
+    elements.append(cust_table)
+    elements.append(Spacer(1, 0.18*inch))
+
+    # ── 4. PAYMENT DETAILS ──────────────────────────────────────────────────────
+    elements.append(Paragraph('PAYMENT DETAILS', styles['section']))
+
+    def th(text):
+        return Paragraph(f'<b>{text}</b>', styles['table_header'])
+
+    def amount(value):
+        return Paragraph(f'Rs. {value:,.2f}', styles['value'])
+
+    c1, c2, c3, c4 = pw*0.22, pw*0.28, pw*0.22, pw*0.28
+    details_table = Table(
+        [
+            [th('Parameter'), th('Value'), th('Parameter'), th('Value')],
+            ['Vehicle Model', data['vehicle_name'], 'Total Amount', amount(data['total_amount'])],
+            ['Vehicle Color', data['vehicle_color'], 'Amount Paid', amount(data['amount_paid'])],
+            ['Battery Variant', data['battery_variant'], 'Remaining Amt.', amount(data['remaining'])],
+            ['Booking Date', data['booking_date'], 'Payment Method', data['payment_method']],
+            ['Payment Date', data['payment_date'], 'Transaction ID', data['transaction_id']],
+        ],
+        colWidths=[c1, c2, c3, c4]
+    )
+    details_table.setStyle(TableStyle([
+        # Header row
+        ('BACKGROUND',    (0,0), (-1,0), DARK_HEADER),
+        ('TOPPADDING',    (0,0), (-1,0), 8),
+        ('BOTTOMPADDING', (0,0), (-1,0), 8),
+        # Data rows
+        ('BACKGROUND',    (0,1), (-1,-1), colors.white),
+        ('ROWBACKGROUNDS',(0,1), (-1,-1), [colors.white, ROW_ALT]),
+        ('TEXTCOLOR',     (0,1), (-1,-1), BODY_TEXT),
+        ('FONTNAME',      (0,1), (-1,-1), 'Helvetica'),
+        ('FONTSIZE',      (0,1), (-1,-1), 10),
+        ('GRID',          (0,0), (-1,-1), 0.4, GRID),
+        ('TOPPADDING',    (0,1), (-1,-1), 6),
+        ('BOTTOMPADDING', (0,1), (-1,-1), 6),
+        ('LEFTPADDING',   (0,0), (-1,-1), 7),
+        ('RIGHTPADDING',  (0,0), (-1,-1), 7),
+        ('VALIGN',        (0,0), (-1,-1), 'MIDDLE'),
+    ]))
+    elements.append(details_table)
+    elements.append(Spacer(1, 0.18*inch))
+
+    # ── 5. DECLARATION ──────────────────────────────────────────────────────────
+    elements.append(Paragraph('DECLARATION', styles['section']))
+    elements.append(Paragraph(
+        f"I, <b>{data['full_name']}</b>, hereby declare that I have read, understood, and agree to all "
+        f'terms and conditions of this Booking Receipt, Privacy Policy, and Payment Agreement. '
+        f'I confirm that all information provided is true and accurate. This receipt has been digitally '
+        f'confirmed via Razorpay Payment Gateway as per the Information Technology Act, 2000 and '
+        f'RBI Guidelines on Digital Payments.',
+        styles['declaration']
+    ))
+    elements.append(Spacer(1, 0.22*inch))
+
+    # ── 6. DIGITAL SIGNATURE CERTIFICATE ───────────────────────────────────────
+    def bullet(text):
+        return Paragraph(f'&#x2022; {text}', styles['cert_item'])
+
+    def right_item(text):
+        return Paragraph(text, styles['cert_item'])
+
+    cert_inner = Table(
+        [
+            [bullet(f"Signatory: {data['full_name']}"),
+             right_item(f"OTP Verified: &#x2726; (Mobile: {data['mobile']})")],
+            [bullet(f"Timestamp: {data['signed_at']}"),
+             right_item('Signing Method: OTP-Based eSign')],
+            [bullet(f"IP Address: {data['ip_address']}"),
+             right_item('Compliance: IT Act 2000, RBI DSC Guidelines')],
+        ],
+        colWidths=[pw/2, pw/2]
+    )
+    cert_inner.setStyle(TableStyle([
+        ('BACKGROUND',    (0,0), (-1,-1), LIGHT_GREEN),
+        ('TOPPADDING',    (0,0), (-1,-1), 5),
+        ('BOTTOMPADDING', (0,0), (-1,-1), 5),
+        ('LEFTPADDING',   (0,0), (-1,-1), 10),
+        ('RIGHTPADDING',  (0,0), (-1,-1), 10),
+        ('VALIGN',        (0,0), (-1,-1), 'TOP'),
+    ]))
+
+    cert_outer = Table(
+        [
+            [Paragraph('&#x2726;  DIGITAL SIGNATURE CERTIFICATE', styles['cert_heading'])],
+            [cert_inner],
+            [Paragraph(f"<b>SHA-256 Signature Hash:</b><br/>{data['signature_hash']}", styles['hash'])],
+        ],
+        colWidths=[pw]
+    )
+    cert_outer.setStyle(TableStyle([
+        ('BACKGROUND',    (0,0), (-1,-1), LIGHT_GREEN),
+        ('BOX',           (0,0), (-1,-1), 2, GREEN),
+        ('TOPPADDING',    (0,0), (-1,-1), 8),
+        ('BOTTOMPADDING', (0,0), (-1,-1), 8),
+        ('LEFTPADDING',   (0,0), (-1,-1), 10),
+        ('RIGHTPADDING',  (0,0), (-1,-1), 10),
+    ]))
+    elements.append(KeepTogether([cert_outer]))
+
+    buffer = BytesIO()
+    _doc(buffer, 0.55*inch, 0.55*inch).build(elements)
+    return buffer.getvalue()
+
+
+def render_payment_receipt(data):
+    """
+    Payment receipt: logo and company address, receipt details, customer, payment
+    table with the platform fee and GST split out, terms
+
+    Returns:
+        bytes: The PDF
+    """
+    styles = get_receipt_styles()
+    pw = PAGE_WIDTH
+    company = PAYMENT_RECEIPT_COMPANY
+    elements = []
+
+    # ── 1. HEADER WITH LOGO CENTERED AND ADDRESS BELOW ─────────────────────────────
+    logo = get_logo()
+    if logo:
+        logo_table = Table([[_Logo(logo, 1.2*inch, 1.2*inch)]], colWidths=[pw])
+        logo_table.setStyle(TableStyle([
+            ('ALIGN', (0,0), (-1,-1), 'CENTER'),
+            ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
+            ('LEFTPADDING', (0,0), (-1,-1), 0),
+            ('RIGHTPADDING', (0,0), (-1,-1), 0),
+            ('TOPPADDING', (0,0), (-1,-1), 5),
+            ('BOTTOMPADDING', (0,0), (-1,-1), 5),
+        ]))
+    else:
+        logo_table = Table(
+            [[Paragraph('<b>ZUJA ELECTRICAL INNOVATION (P) LTD</b>', styles['logo_placeholder'])]],
+            colWidths=[pw]
+        )
+        logo_table.setStyle(TableStyle([
+            ('ALIGN', (0,0), (-1,-1), 'CENTER'),
+            ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
+            ('TOPPADDING', (0,0), (-1,-1), 5),
+            ('BOTTOMPADDING', (0,0), (-1,-1), 5),
+        ]))
+    elements.append(logo_table)
+
+    address_table = Table([[Paragraph(company['address'], styles['address'])]], colWidths=[pw])
+    address_table.setStyle(TableStyle([
+        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
+        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
+        ('LEFTPADDING', (0,0), (-1,-1), 0),
+        ('RIGHTPADDING', (0,0), (-1,-1), 0),
+        ('TOPPADDING', (0,0), (-1,-1), 0),
+        ('BOTTOMPADDING', (0,0), (-1,-1), 10),
+    ]))
+    elements.append(address_table)
+
+    contact_table = Table([
+        [Paragraph(f"<b>Email:</b> {company['email']}", styles['contact'])],
+        [Paragraph(f"<b>Phone:</b> {company['phone']}", styles['contact'])],
+    ], colWidths=[pw])
+    contact_table.setStyle(TableStyle([
+        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
+        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
+        ('LEFTPADDING', (0,0), (-1,-1), 0),
+        ('RIGHTPADDING', (0,0), (-1,-1), 0),
+        ('TOPPADDING', (0,0), (-1,-1), 0),
+        ('BOTTOMPADDING', (0,0), (-1,-1), 10),
+    ]))
+    elements.append(contact_table)
+    elements.append(Spacer(1, 0.15*inch))
+
+    # ── 2. RECEIPT TITLE ──────────────────────────────────────────────────────────
+    elements.append(Paragraph('Payment Receipt', styles['title']))
+    elements.append(Spacer(1, 0.1*inch))
+
+    # ── 3. RECEIPT DETAILS ────────────────────────────────────────────────────────
+    receipt_details = Table([
+        [Paragraph(f"<b>Receipt ID:</b> {data['receipt_id']}", styles['detail']),
+         Paragraph(f"<b>Date Issued:</b> {data['date_issued']}", styles['detail'])],
+    ], colWidths=[pw/2, pw/2])
+    receipt_details.setStyle(TableStyle([
+        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
+        ('LEFTPADDING', (0,0), (-1,-1), 5),
+        ('RIGHTPADDING', (0,0), (-1,-1), 5),
+    ]))
+    elements.append(receipt_details)
+    elements.append(Spacer(1, 0.15*inch))
+
+    # ── 4. TENANT/CUSTOMER INFORMATION ──────────────────────────────────────────────
+    elements.append(Paragraph('Tenant Information:', styles['heading']))
+    tenant_info = Table([
+        [Paragraph(f"<b>Name:</b> {data['customer_name']}", styles['info'])],
+        [Paragraph(f"<b>Address:</b> {data['customer_address']}", styles['info'])],
+        [Paragraph(f"<b>Contact:</b> {data['customer_contact']}", styles['info'])],
+    ], colWidths=[pw])
+    tenant_info.setStyle(TableStyle([
+        ('LEFTPADDING', (0,0), (-1,-1), 5),
+        ('RIGHTPADDING', (0,0), (-1,-1), 5),
+        ('BOTTOMPADDING', (0,0), (-1,-1), 5),
+    ]))
+    elements.append(tenant_info)
+    elements.append(Spacer(1, 0.2*inch))
+
+    # ── 5. PAYMENT DETAILS TABLE ────────────────────────────────────────────────────
+    elements.append(Paragraph('Payment Details', styles['heading']))
+
+    def format_currency(value):
+        return f"{value:,.2f}"
+
+    payment_table_data = [
+        ['Description', 'Subtotal', 'Tax', 'Total Amount'],
+        [data['description'], format_currency(data['subtotal']), format_currency(0.00),
+         format_currency(data['subtotal'])],
+    ]
+    if data['platform_fee'] > 0:
+        payment_table_data.append([
+            'Platform Fee (Payment Gateway Charges)',
+            format_currency(data['base_fee']),
+            format_currency(data['gst_on_fee']),
+            format_currency(data['platform_fee']),
+        ])
+    # Total: what the customer actually paid (gross, platform fee included)
+    payment_table_data.append([
+        Paragraph('Total', styles['bold']),
+        format_currency(data['total_subtotal']),
+        format_currency(data['gst_on_fee']),
+        Paragraph(format_currency(data['total_amount']), styles['bold_right']),
+    ])
+
+    payment_table = Table(payment_table_data, colWidths=[pw*0.5, pw*0.15, pw*0.15, pw*0.2])
+    payment_table.setStyle(TableStyle([
+        ('BACKGROUND', (0,0), (-1,0), LIGHT_GRAY),
+        ('TEXTCOLOR', (0,0), (-1,0), BLACK),
+        ('ALIGN', (0,0), (-1,-1), 'LEFT'),
+        ('ALIGN', (1,0), (-1,-1), 'RIGHT'),
+        ('ALIGN', (2,0), (-1,-1), 'RIGHT'),
+        ('ALIGN', (3,0), (-1,-1), 'RIGHT'),
+        ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0,0), (-1,0), 10),
+        ('FONTSIZE', (0,1), (-1,-2), 9),
+        ('FONTSIZE', (0,-1), (-1,-1), 10),
+        ('FONTNAME', (0,-1), (-1,-1), 'Helvetica-Bold'),  # Make last row bold
+        ('BOTTOMPADDING', (0,0), (-1,0), 8),
+        ('TOPPADDING', (0,0), (-1,0), 8),
+        ('BOTTOMPADDING', (0,1), (-1,-1), 5),
+        ('TOPPADDING', (0,1), (-1,-1), 5),
+        ('LEFTPADDING', (0,0), (-1,-1), 8),
+        ('RIGHTPADDING', (0,0), (-1,-1), 8),
+        ('GRID', (0,0), (-1,-1), 0.5, GRAY),
+        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
+    ]))
+    elements.append(payment_table)
+    elements.append(Spacer(1, 0.2*inch))
+
+    # ── 6. PAYMENT INFORMATION ─────────────────────────────────────────────────────
+    elements.append(Paragraph('Payment Information:', styles['heading']))
+    payment_info = Table([
+        [Paragraph(f"<b>Payment Method:</b> {data['payment_method']}", styles['info'])],
+        [Paragraph(f"<b>Transaction ID:</b> {data['transaction_id']}", styles['info'])],
+    ], colWidths=[pw])
+    payment_info.setStyle(TableStyle([
+        ('LEFTPADDING', (0,0), (-1,-1), 5),
+        ('RIGHTPADDING', (0,0), (-1,-1), 5),
+        ('BOTTOMPADDING', (0,0), (-1,-1), 5),
+    ]))
+    elements.append(payment_info)
+    elements.append(Spacer(1, 0.2*inch))
+
+    # ── 7. TERMS AND CONDITIONS ───────────────────────────────────────────────────
+    elements.append(Paragraph('Terms and Conditions:', styles['heading']))
+    elements.append(Paragraph(
+        '<br/>'.join([f'{i+1}) {term}' for i, term in enumerate(PAYMENT_RECEIPT_TERMS)]),
+        styles['terms']
+    ))
+    elements.append(Spacer(1, 0.2*inch))
+
+    # ── 8. CLOSING MESSAGE ────────────────────────────────────────────────────────
+    elements.append(Paragraph('Thank you for your timely payment!', styles['closing']))
+
+    buffer = BytesIO()
+    _doc(buffer, 0.3*inch, 0.5*inch).build(elements)
+    return buffer.getvalue()
+
+
+RECEIPT_RENDERERS = {
+    'booking': render_booking_receipt,
+    'payment': render_payment_receipt,
+}
+
+
+# ── Rendering with cache and process pool ───────────────────────────────────────
+
+def receipt_digest(kind, data):
+    """SHA-256 of the receipt data and layout version (the PDF cache key)"""
+    canonical = json.dumps(
+        {'kind': kind, 'version': RECEIPT_TEMPLATE_VERSION, 'data': data},
+        sort_keys=True, separators=(',', ':'), default=str,
+    )
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def render_receipt(kind, data):
+    """Render a receipt ('booking' or 'payment') from its data, without the cache"""
+    return RECEIPT_RENDERERS[kind](data)
+
+
+def _cache_get_many(digests):
+    try:
+        found = cache.get_many([RECEIPT_CACHE_KEY.format(digest=digest) for digest in digests])
+    except Exception as e:
+        logger.warning(f"Receipt cache unavailable: {e}")
+        return {}
+    return {key.rsplit(':', 1)[1]: value for key, value in found.items()}
+
+
+def _cache_set_many(pdfs):
+    try:
+        cache.set_many(
+            {RECEIPT_CACHE_KEY.format(digest=digest): pdf for digest, pdf in pdfs.items()},
+            RECEIPT_CACHE_TIMEOUT,
+        )
+    except Exception as e:
+        logger.warning(f"Could not cache receipts: {e}")
+
+
+def get_receipt_pdf(kind, data):
+    """
+    Receipt PDF for the data, from the cache when an identical receipt was rendered
+
+    Returns:
+        bytes: The PDF
+    """
+    digest = receipt_digest(kind, data)
+    pdf = _cache_get_many([digest]).get(digest)
+    if pdf is None:
+        pdf = render_receipt(kind, data)
+        _cache_set_many({digest: pdf})
+    return pdf
+
+
+def _render_job(job):
+    kind, data = job
+    return render_receipt(kind, data)
+
+
+def render_receipts(jobs, workers=RECEIPT_WORKERS):
+    """
+    Render many receipts: cached ones are reused, the rest are rendered on a pool of
+    `workers` processes (in this process when workers <= 1 or there is only one)
+
+    Args:
+        jobs: List of (kind, data) pairs
+
+    Returns:
+        list: PDF bytes in the order of jobs
+    """
+    digests = [receipt_digest(kind, data) for kind, data in jobs]
+    pdfs = _cache_get_many(set(digests))
+
+    missing = {}
+    for digest, job in zip(digests, jobs):
+        if digest not in pdfs:
+            missing.setdefault(digest, job)
+
+    if missing:
+        pending = list(missing.items())
+        if workers <= 1 or len(pending) == 1:
+            rendered = [_render_job(job) for _, job in pending]
+        else:
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(pending)), initializer=warm_renderer,
+            ) as executor:
+                chunksize = max(1, len(pending) // (workers * 4))
+                rendered = list(executor.map(_render_job, [job for _, job in pending], chunksize=chunksize))
+        new = {digest: pdf for (digest, _), pdf in zip(pending, rendered)}
+        _cache_set_many(new)
+        pdfs.update(new)
+
+    return [pdfs[digest] for digest in digests]
@@ -0,0 +1,116 @@
+"""
+Tests for the write-behind media spool (core/storage.py)
+"""
+import os
+import shutil
+import tempfile
+import threading
+import time
+from io import StringIO
+from unittest.mock import patch
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from core.storage import SpooledStorage
+
+
+class BlockingStorage(FileSystemStorage):
+    """Filesystem backend whose uploads wait for a signal (and can fail a few times first)"""
+
+    def __init__(self, *args, failures=0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.release = threading.Event()
+        self.release.set()
+        self.failures = failures
+        self.attempts = 0
+
+    def _save(self, name, content):
+        self.release.wait(5)
+        self.attempts += 1
+        if self.attempts <= self.failures:
+            raise ConnectionError('blob endpoint unavailable')
+        return super()._save(name, content)
+
+
+class SpooledStorageTest(SimpleTestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.backend = BlockingStorage(location=os.path.join(self.root, 'blob'))
+        self.storage = SpooledStorage(
+            backend=self.backend, spool_dir=os.path.join(self.root, 'spool'), workers=2, retry_delay=0
+        )
+
+    def test_save_returns_before_upload_and_reads_from_spool(self):
+        self.backend.release.clear()
+        name = self.storage.save('kyc/doc.pdf', ContentFile(b'%PDF-1.4 kyc'))
+
+        self.assertEqual(name, 'kyc/doc.pdf')
+        self.assertTrue(self.storage.is_spooled(name))
+        self.assertFalse(self.backend.exists(name))
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(self.storage.size(name), 12)
+        with self.storage.open(name) as spooled:
+            self.assertEqual(spooled.read(), b'%PDF-1.4 kyc')
+
+        self.backend.release.set()
+        self.assertTrue(self.storage.flush(timeout=5))
+        self.assertFalse(self.storage.is_spooled(name))
+        with self.storage.open(name) as uploaded:
+            self.assertEqual(uploaded.read(), b'%PDF-1.4 kyc')
+
+    def test_spooled_names_are_not_reused(self):
+        self.backend.release.clear()
+        first = self.storage.save('receipts/receipt.pdf', ContentFile(b'one'))
+        second = self.storage.save('receipts/receipt.pdf', ContentFile(b'two'))
+        self.assertNotEqual(first, second)
+        self.backend.release.set()
+        self.storage.flush(timeout=5)
+
+    def test_upload_is_retried(self):
+        self.backend.failures = 2
+        name = self.storage.save('gallery/image.jpg', ContentFile(b'jpeg'))
+
+        self.assertTrue(self.storage.flush(timeout=5))
+        self.assertEqual(self.backend.attempts, 3)
+        self.assertFalse(self.storage.is_spooled(name))
+        self.assertTrue(self.backend.exists(name))
+
+    def test_failed_upload_stays_in_spool_and_is_recovered(self):
+        self.backend.failures = self.storage.max_attempts
+        with self.assertLogs('core.storage', level='ERROR'):
+            name = self.storage.save('profile/picture.png', ContentFile(b'png'))
+            self.storage.flush(timeout=5)
+        self.assertTrue(self.storage.is_spooled(name))
+
+        # A later run (new process) uploads what is left once it is old enough
+        restarted = SpooledStorage(backend=self.backend, spool_dir=self.storage.spool_dir, retry_delay=0)
+        self.assertEqual(restarted.recover(min_age=60), 0)
+        self.assertEqual(restarted.recover(min_age=0), 1)
+        self.assertTrue(restarted.flush(timeout=5))
+        self.assertTrue(self.backend.exists(name))
+        self.assertFalse(restarted.is_spooled(name))
+
+    def test_delete_cancels_pending_upload(self):
+        self.backend.release.clear()
+        name = self.storage.save('kyc/removed.pdf', ContentFile(b'x'))
+        self.storage.delete(name)
+        self.backend.release.set()
+        self.storage.flush(timeout=5)
+        self.assertFalse(self.storage.exists(name))
+
+    def test_flush_media_spool_command(self):
+        self.backend.failures = self.storage.max_attempts
+        with self.assertLogs('core.storage', level='ERROR'):
+            name = self.storage.save('receipts/left.pdf', ContentFile(b'left'))
+            self.storage.flush(timeout=5)
+        old = time.time() - 120
+        os.utime(self.storage.spool_path(name), (old, old))
+
+        out = StringIO()
+        with patch('core.settings.management.commands.flush_media_spool.default_storage', self.storage):
+            call_command('flush_media_spool', stdout=out)
+        self.assertIn('Uploaded: 1, failed: 0', out.getvalue())
+        self.assertTrue(self.backend.exists(name))
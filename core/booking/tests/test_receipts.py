@@ -0,0 +1,101 @@
+"""
+Tests for receipt rendering, the content-hash PDF cache and bulk rendering
+"""
+from decimal import Decimal
+from unittest.mock import patch
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from core.booking import receipts
+from core.booking.management.commands.benchmark_receipts import sample_receipt_data
+from core.booking.models import Booking, Payment
+from core.booking.utils import generate_booking_receipt_pdf, generate_payment_receipt_pdf
+from core.inventory.models import Vehicle
+from core.users.models import User
+
+LOCMEM_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'receipt-tests'}
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ReceiptRendererTest(SimpleTestCase):
+    """Rendering from plain receipt data"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_renders_both_layouts(self):
+        for kind in receipts.RECEIPT_RENDERERS:
+            pdf = receipts.render_receipt(kind, sample_receipt_data(kind, 1))
+            self.assertTrue(pdf.startswith(b'%PDF'))
+
+    def test_styles_and_logo_are_built_once(self):
+        self.assertIs(receipts.get_receipt_styles(), receipts.get_receipt_styles())
+        self.assertIs(receipts.get_logo(), receipts.get_logo())
+
+    def test_digest_depends_on_content_only(self):
+        data = sample_receipt_data('booking', 1)
+        reordered = dict(reversed(list(data.items())))
+        self.assertEqual(receipts.receipt_digest('booking', data), receipts.receipt_digest('booking', reordered))
+        self.assertNotEqual(
+            receipts.receipt_digest('booking', data),
+            receipts.receipt_digest('booking', sample_receipt_data('booking', 2)),
+        )
+
+    def test_identical_receipt_is_served_from_cache(self):
+        data = sample_receipt_data('payment', 1)
+        first = receipts.get_receipt_pdf('payment', data)
+        with patch.object(receipts, 'render_receipt') as render:
+            second = receipts.get_receipt_pdf('payment', data)
+        render.assert_not_called()
+        self.assertEqual(first, second)
+
+    def test_bulk_rendering_keeps_order_and_renders_duplicates_once(self):
+        jobs = [('booking', sample_receipt_data('booking', index)) for index in (1, 2, 1)]
+        with patch.object(receipts, '_render_job', wraps=receipts._render_job) as render:
+            pdfs = receipts.render_receipts(jobs, workers=1)
+        self.assertEqual(render.call_count, 2)
+        self.assertEqual(pdfs[0], pdfs[2])
+        self.assertNotEqual(pdfs[0], pdfs[1])
+
+    def test_bulk_rendering_on_process_pool(self):
+        jobs = [('payment', sample_receipt_data('payment', index)) for index in range(3)]
+        pdfs = receipts.render_receipts(jobs, workers=2)
+        self.assertEqual(len(pdfs), 3)
+        self.assertTrue(all(pdf.startswith(b'%PDF') for pdf in pdfs))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ReceiptGenerationTest(TestCase):
+    """generate_*_receipt_pdf build receipts from bookings and payments"""
+
+    def setUp(self):
+        cache.clear()
+        vehicle = Vehicle.objects.create(name='EV One', model_code='EV1', price=Decimal('100000'))
+        self.user = User.objects.create_user(username='receipt', email='receipt@example.com', password='x')
+        self.booking = Booking.objects.create(
+            user=self.user,
+            vehicle_model=vehicle,
+            booking_amount=Decimal('5000'),
+            total_amount=Decimal('100000'),
+        )
+        self.payment = Payment.objects.create(
+            booking=self.booking, user=self.user, amount=Decimal('5000'),
+            payment_method='online', transaction_id='order_RECEIPT1',
+        )
+
+    def test_booking_receipt_is_reproducible(self):
+        first = generate_booking_receipt_pdf(self.booking, self.payment)
+        second = generate_booking_receipt_pdf(self.booking, self.payment)
+        self.assertTrue(first.name.startswith(f'receipt_{self.booking.booking_number}_'))
+        self.assertEqual(first.read(), second.read())
+
+    def test_payment_receipt_fee_breakdown(self):
+        data = receipts.payment_receipt_data(self.payment)
+        self.assertEqual(data['receipt_id'], 'R-RECEIPT1')
+        self.assertEqual(data['total_amount'], 5120.85)
+        self.assertAlmostEqual(data['platform_fee'], data['base_fee'] + data['gst_on_fee'])
+
+        receipt = generate_payment_receipt_pdf(self.payment)
+        self.assertTrue(receipt.name.startswith('payment_receipt_R-RECEIPT1_'))
+        self.assertTrue(receipt.read().startswith(b'%PDF'))
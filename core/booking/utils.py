@@ -1,18 +1,8 @@
 """
 Utility functions for booking operations
 """
-import hashlib
-from io import BytesIO
-from decimal import Decimal, ROUND_HALF_UP
+from decimal import Decimal
 from datetime import timedelta
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import inch
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image, KeepTogether
-from reportlab.pdfgen import canvas
-from reportlab.lib.utils import ImageReader
 from django.conf import settings
 from django.core.files.base import ContentFile
 from django.utils import timezone
@@ -20,7 +10,7 @@ from django.db import transaction
 from django.db.models import Sum
 from core.settings.models import PlatformSettings
 from core.wallet.models import WalletTransaction
-import os
+from .receipts import booking_receipt_data, get_receipt_pdf, payment_receipt_data
 import requests
 import json
 import logging
@@ -39,6 +29,9 @@ def generate_booking_receipt_pdf(booking, payment):
     - Declaration paragraph
     - Digital Signature Certificate (green box) with SHA-256 hash
 
+    The layout lives in core.booking.receipts; an identical receipt rendered
+    before is served from the PDF cache.
+
     Args:
         booking: Booking instance
         payment: Payment instance (booking payment)
@@ -46,294 +39,7 @@ def generate_booking_receipt_pdf(booking, payment):
     Returns:
         ContentFile: PDF file content
     """
-    # Get company information
-    platform_settings = PlatformSettings.get_settings()
-    company_name = platform_settings.company_name
-    company_email = platform_settings.company_email
-    company_phone = platform_settings.company_phone
-    company_address = platform_settings.company_address
-
-    # Create PDF buffer
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(
-        buffer, pagesize=A4,
-        topMargin=0.55*inch, bottomMargin=0.55*inch,
-        leftMargin=0.75*inch, rightMargin=0.75*inch
-    )
-
-    elements = []
-    styles = getSampleStyleSheet()
-
-    # ── Colour palette ──────────────────────────────────────────────────────────
-    green_color  = colors.HexColor('#28a745')
-    light_green  = colors.HexColor('#d4edda')
-    dark_green   = colors.HexColor('#155724')
-    amber_color  = colors.HexColor('#C8A84B')
-    dark_header  = colors.HexColor('#1a1a2e')
-    light_bg     = colors.HexColor('#f0f4f8')
-    blue_val     = colors.HexColor('#1a6fc4')
-
-    # Usable page width
-    pw = A4[0] - 1.5*inch   # 6.77 inches
-
-    # ── Helper paragraph styles ─────────────────────────────────────────────────
-    def ps(name, **kw):
-        base = kw.pop('parent', styles['Normal'])
-        return ParagraphStyle(name, parent=base, **kw)
-
-    section_style = ps('SecHead', parent=styles['Heading2'],
-                       fontSize=13, textColor=colors.HexColor('#1a1a1a'),
-                       fontName='Helvetica-Bold', spaceBefore=0, spaceAfter=5)
-
-    # ── 1. TOP HEADER ROW: "DIGITALLY SIGNED" badge  +  "PAYMENT RECEIPT" ──────
-    badge_para = Paragraph(
-        '&#x2726; DIGITALLY SIGNED',
-        ps('BadgeTxt', fontSize=9, textColor=colors.white,
-           fontName='Helvetica-Bold', alignment=TA_CENTER)
-    )
-    badge_cell = Table([[badge_para]], colWidths=[1.55*inch])
-    badge_cell.setStyle(TableStyle([
-        ('BACKGROUND',    (0,0), (-1,-1), green_color),
-        ('TOPPADDING',    (0,0), (-1,-1), 5),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 5),
-        ('LEFTPADDING',   (0,0), (-1,-1), 8),
-        ('RIGHTPADDING',  (0,0), (-1,-1), 8),
-        ('VALIGN',        (0,0), (-1,-1), 'MIDDLE'),
-    ]))
-
-    title_para = Paragraph(
-        'PAYMENT RECEIPT',
-        ps('MainTitle', parent=styles['Heading1'],
-           fontSize=26, textColor=colors.HexColor('#1a1a1a'),
-           fontName='Helvetica-Bold', alignment=TA_RIGHT,
-           spaceAfter=0, spaceBefore=0)
-    )
-
-    hdr_table = Table(
-        [[badge_cell, title_para]],
-        colWidths=[1.65*inch, pw - 1.65*inch]
-    )
-    hdr_table.setStyle(TableStyle([
-        ('VALIGN',        (0,0), (-1,-1), 'BOTTOM'),
-        ('LEFTPADDING',   (0,0), (-1,-1), 0),
-        ('RIGHTPADDING',  (0,0), (-1,-1), 0),
-        ('TOPPADDING',    (0,0), (-1,-1), 0),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 0),
-    ]))
-    elements.append(hdr_table)
-    elements.append(Spacer(1, 0.07*inch))
-
-    # ── 2. AMBER COMPANY BAND ───────────────────────────────────────────────────
-    booking_date    = booking.confirmed_at or booking.created_at
-    booking_date_str = f"{booking_date.day}/{booking_date.month}/{booking_date.year}"
-
-    amber_data = [
-        [Paragraph(f'<b>{company_name}</b>',
-                   ps('CoName', fontSize=11, textColor=colors.HexColor('#1a1a1a'),
-                      fontName='Helvetica-Bold', alignment=TA_CENTER))],
-        [Paragraph(f'Document ID: {booking.booking_number}  |  Date: {booking_date_str}',
-                   ps('DocId', fontSize=9, textColor=colors.HexColor('#1a1a1a'),
-                      fontName='Helvetica', alignment=TA_CENTER))],
-    ]
-    amber_band = Table(amber_data, colWidths=[pw])
-    amber_band.setStyle(TableStyle([
-        ('BACKGROUND',    (0,0), (-1,-1), amber_color),
-        ('TOPPADDING',    (0,0), (-1,-1), 7),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 7),
-        ('LEFTPADDING',   (0,0), (-1,-1), 10),
-        ('RIGHTPADDING',  (0,0), (-1,-1), 10),
-    ]))
-    elements.append(amber_band)
-    elements.append(Spacer(1, 0.18*inch))
-
-    # ── 3. CUSTOMER INFORMATION ─────────────────────────────────────────────────
-    elements.append(Paragraph('CUSTOMER INFORMATION', section_style))
-
-    user           = booking.user
-    user_full_name = user.get_full_name() or user.username
-    mobile         = getattr(user, 'mobile', None) or 'N/A'
-    email          = user.email or 'N/A'
-
-    def cell_para(label, value):
-        return Paragraph(
-            f'<b>{label}:</b>  {value}',
-            ps(f'ci_{label}', fontSize=10, textColor=colors.HexColor('#333333'),
-               fontName='Helvetica', leading=14)
-        )
-
-    cust_table = Table(
-        [
-            [cell_para('Full Name', user_full_name), cell_para('Booking No', booking.booking_number)],
-            [cell_para('Mobile',    mobile),          cell_para('Email',      email)],
-        ],
-        colWidths=[pw/2, pw/2]
-    )
-    cust_table.setStyle(TableStyle([
-        ('BACKGROUND',    (0,0), (-1,-1), light_bg),
-        ('BOX',           (0,0), (-1,-1), 0.75, colors.HexColor('#c0c8d0')),
-        ('TOPPADDING',    (0,0), (-1,-1), 8),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 8),
-        ('LEFTPADDING',   (0,0), (-1,-1), 10),
-        ('RIGHTPADDING',  (0,0), (-1,-1), 10),
-        ('VALIGN',        (0,0), (-1,-1), 'MIDDLE'),
-    ]))
-    elements.append(cust_table)
-    elements.append(Spacer(1, 0.18*inch))
-
-    # ── 4. PAYMENT DETAILS ──────────────────────────────────────────────────────
-    elements.append(Paragraph('PAYMENT DETAILS', section_style))
-
-    vehicle          = booking.vehicle_model
-    vehicle_name     = vehicle.name or 'Electric Vehicle'
-    payment_date_str = (f"{payment.payment_date.day}/{payment.payment_date.month}/{payment.payment_date.year}"
-                        if payment.payment_date else 'N/A')
-    remaining        = float(booking.total_amount) - float(payment.amount)
-
-    def th(text):
-        return Paragraph(
-            f'<b>{text}</b>',
-            ps(f'th_{text}', fontSize=10, textColor=colors.white,
-               fontName='Helvetica-Bold', alignment=TA_LEFT)
-        )
-
-    c1, c2, c3, c4 = pw*0.22, pw*0.28, pw*0.22, pw*0.28
-
-    details_table = Table(
-        [
-            [th('Parameter'), th('Value'), th('Parameter'), th('Value')],
-            ['Vehicle Model',    vehicle_name,
-             'Total Amount',     Paragraph(f'Rs. {float(booking.total_amount):,.2f}',
-                                           ps('va1', fontSize=10, textColor=blue_val, fontName='Helvetica'))],
-            ['Vehicle Color',    booking.vehicle_color or 'N/A',
-             'Amount Paid',      Paragraph(f'Rs. {float(payment.amount):,.2f}',
-                                           ps('va2', fontSize=10, textColor=blue_val, fontName='Helvetica'))],
-            ['Battery Variant',  booking.battery_variant or 'N/A',
-             'Remaining Amt.',   Paragraph(f'Rs. {remaining:,.2f}',
-                                           ps('va3', fontSize=10, textColor=blue_val, fontName='Helvetica'))],
-            ['Booking Date',     booking_date_str,
-             'Payment Method',   payment.payment_method.title()],
-            ['Payment Date',     payment_date_str,
-             'Transaction ID',   payment.transaction_id or 'N/A'],
-        ],
-        colWidths=[c1, c2, c3, c4]
-    )
-    details_table.setStyle(TableStyle([
-        # Header row
-        ('BACKGROUND',    (0,0), (-1,0), dark_header),
-        ('TOPPADDING',    (0,0), (-1,0), 8),
-        ('BOTTOMPADDING', (0,0), (-1,0), 8),
-        # Data rows
-        ('BACKGROUND',    (0,1), (-1,-1), colors.white),
-        ('ROWBACKGROUNDS',(0,1), (-1,-1), [colors.white, colors.HexColor('#f6f8fa')]),
-        ('TEXTCOLOR',     (0,1), (-1,-1), colors.HexColor('#333333')),
-        ('FONTNAME',      (0,1), (-1,-1), 'Helvetica'),
-        ('FONTSIZE',      (0,1), (-1,-1), 10),
-        ('GRID',          (0,0), (-1,-1), 0.4, colors.HexColor('#d0d0d0')),
-        ('TOPPADDING',    (0,1), (-1,-1), 6),
-        ('BOTTOMPADDING', (0,1), (-1,-1), 6),
-        ('LEFTPADDING',   (0,0), (-1,-1), 7),
-        ('RIGHTPADDING',  (0,0), (-1,-1), 7),
-        ('VALIGN',        (0,0), (-1,-1), 'MIDDLE'),
-    ]))
-    elements.append(details_table)
-    elements.append(Spacer(1, 0.18*inch))
-
-    # ── 5. DECLARATION ──────────────────────────────────────────────────────────
-    elements.append(Paragraph('DECLARATION', section_style))
-
-    decl_text = (
-        f'I, <b>{user_full_name}</b>, hereby declare that I have read, understood, and agree to all '
-        f'terms and conditions of this Booking Receipt, Privacy Policy, and Payment Agreement. '
-        f'I confirm that all information provided is true and accurate. This receipt has been digitally '
-        f'confirmed via Razorpay Payment Gateway as per the Information Technology Act, 2000 and '
-        f'RBI Guidelines on Digital Payments.'
-    )
-    elements.append(Paragraph(decl_text,
-                               ps('Decl', fontSize=9, textColor=colors.HexColor('#333333'),
-                                  fontName='Helvetica', leading=14)))
-    elements.append(Spacer(1, 0.22*inch))
-
-    # ── 6. DIGITAL SIGNATURE CERTIFICATE ───────────────────────────────────────
-    # Compute SHA-256 from key booking data
-    hash_input = (
-        f"{booking.booking_number}|{user_full_name}|"
-        f"{payment.transaction_id}|{payment.amount}|"
-        f"{booking_date.isoformat()}"
-    )
-    pdf_hash = hashlib.sha256(hash_input.encode()).hexdigest()
-
-    timestamp_str = timezone.now().strftime('%d %B %Y at %I:%M:%S %p IST')
-
-    cert_heading_para = Paragraph(
-        '&#x2726;  DIGITAL SIGNATURE CERTIFICATE',
-        ps('CertHd', parent=styles['Heading2'],
-           fontSize=12, textColor=dark_green,
-           fontName='Helvetica-Bold', alignment=TA_CENTER,
-           spaceBefore=0, spaceAfter=6)
-    )
-
-    def bullet(text, bold=False):
-        fn = 'Helvetica-Bold' if bold else 'Helvetica'
-        return Paragraph(
-            f'&#x2022; {text}',
-            ps(f'bl_{text[:8]}', fontSize=9, textColor=dark_green,
-               fontName=fn, leading=14)
-        )
-
-    def right_item(text):
-        return Paragraph(
-            text,
-            ps(f'ri_{text[:8]}', fontSize=9, textColor=dark_green,
-               fontName='Helvetica', leading=14)
-        )
-
-    mobile_display = mobile if mobile != 'N/A' else 'N/A'
-    cert_inner = Table(
-        [
-            [bullet(f'Signatory: {user_full_name}'),
-             right_item(f'OTP Verified: &#x2726; (Mobile: {mobile_display})')],
-            [bullet(f'Timestamp: {timestamp_str}'),
-             right_item('Signing Method: OTP-Based eSign')],
-            [bullet(f'IP Address: {getattr(booking, "ip_address", "N/A") or "N/A"}'),
-             right_item('Compliance: IT Act 2000, RBI DSC Guidelines')],
-        ],
-        colWidths=[pw/2, pw/2]
-    )
-    cert_inner.setStyle(TableStyle([
-        ('BACKGROUND',    (0,0), (-1,-1), light_green),
-        ('TOPPADDING',    (0,0), (-1,-1), 5),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 5),
-        ('LEFTPADDING',   (0,0), (-1,-1), 10),
-        ('RIGHTPADDING',  (0,0), (-1,-1), 10),
-        ('VALIGN',        (0,0), (-1,-1), 'TOP'),
-    ]))
-
-    hash_para = Paragraph(
-        f'<b>SHA-256 Signature Hash:</b><br/>{pdf_hash}',
-        ps('Hash', fontSize=8, textColor=dark_green,
-           fontName='Courier', leading=11)
-    )
-
-    cert_outer = Table(
-        [[cert_heading_para], [cert_inner], [hash_para]],
-        colWidths=[pw]
-    )
-    cert_outer.setStyle(TableStyle([
-        ('BACKGROUND',    (0,0), (-1,-1), light_green),
-        ('BOX',           (0,0), (-1,-1), 2, green_color),
-        ('TOPPADDING',    (0,0), (-1,-1), 8),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 8),
-        ('LEFTPADDING',   (0,0), (-1,-1), 10),
-        ('RIGHTPADDING',  (0,0), (-1,-1), 10),
-    ]))
-
-    elements.append(KeepTogether([cert_outer]))
-
-    # ── Build PDF ────────────────────────────────────────────────────────────────
-    doc.build(elements)
-    pdf_content = buffer.getvalue()
-    buffer.close()
-
+    pdf_content = get_receipt_pdf('booking', booking_receipt_data(booking, payment))
     filename = f"receipt_{booking.booking_number}_{timezone.now().strftime('%Y%m%d_%H%M%S')}.pdf"
     return ContentFile(pdf_content, name=filename)
 
@@ -350,368 +56,9 @@ def generate_payment_receipt_pdf(payment, razorpay_payment=None):
     Returns:
         ContentFile: PDF file content
     """
-    from core.booking.models import Payment as BookingPayment
-    
-    # Get company information
-    company_address = "KUTTIYIDAYIL,ARRATTUVAZHY, Alappuzha North, Ambalapuzha, Alappuzha- 688007"
-    company_email = "zujaelectric@gmail.com"
-    company_phone = "7356360777"
-    
-    # Get customer information
-    user = payment.user
-    customer_name = user.get_full_name() or user.username
-    customer_address = f"{getattr(user, 'address_line1', '') or ''}, {getattr(user, 'city', '') or ''}, {getattr(user, 'state', '') or ''} {getattr(user, 'pincode', '') or ''}".strip(', ')
-    if not customer_address or customer_address == ', ':
-        customer_address = "N/A"
-    customer_contact = getattr(user, 'mobile', '') or user.email or 'N/A'
-    
-    # Calculate amounts
-    # payment.amount is the net amount (what gets credited to booking after gateway charges)
-    net_amount = Decimal(str(payment.amount))
-    
-    # Get platform fee (gateway charges) from razorpay_payment if available
-    platform_fee = Decimal('0.00')
-    gross_amount = None
-    
-    # If razorpay_payment not provided, try to find it from transaction_id
-    if not razorpay_payment and payment.payment_method == 'online' and payment.transaction_id:
-        try:
-            from core.payments.models import Payment as RazorpayPayment
-            # Try to find by order_id (transaction_id is usually order_id)
-            try:
-                razorpay_payment = RazorpayPayment.objects.get(order_id=payment.transaction_id)
-            except RazorpayPayment.DoesNotExist:
-                # Try by payment_id if order_id doesn't match
-                try:
-                    razorpay_payment = RazorpayPayment.objects.get(payment_id=payment.transaction_id)
-                except RazorpayPayment.DoesNotExist:
-                    razorpay_payment = None
-        except Exception as e:
-            logger.warning(f"Could not find Razorpay payment for transaction_id {payment.transaction_id}: {e}")
-            razorpay_payment = None
-    
-    if razorpay_payment:
-        # Get gross amount (what user actually paid) from razorpay_payment
-        # razorpay_payment.amount is the gross amount in paise (what user actually paid)
-        gross_amount = Decimal(str(razorpay_payment.amount / 100))
-        
-        if razorpay_payment.gateway_charges is not None:
-            # Use the gateway_charges from razorpay_payment (most accurate)
-            platform_fee = Decimal(str(razorpay_payment.gateway_charges / 100))
-        else:
-            # If gateway_charges not set, calculate it as the difference between gross and net
-            # Platform fee = gross_amount - net_amount (what user paid minus what gets credited)
-            platform_fee = gross_amount - net_amount
-            if platform_fee < 0:
-                platform_fee = Decimal('0.00')
-    elif payment.payment_method == 'online':
-        # For online payments without razorpay_payment, calculate platform fee
-        # Formula: gross = net / 0.9764, platform_fee = gross - net
-        # RAZORPAY_NET_TO_GROSS_DIVISOR = 0.9764 (1 - 0.0236)
-        RAZORPAY_NET_TO_GROSS_DIVISOR = Decimal('0.9764')
-        gross_amount = net_amount / RAZORPAY_NET_TO_GROSS_DIVISOR
-        # Round to 2 decimal places
-        gross_amount = gross_amount.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-        platform_fee = gross_amount - net_amount
-        if platform_fee < 0:
-            platform_fee = Decimal('0.00')
-    
-    # Subtotal (net amount, what goes to booking)
-    subtotal = net_amount
-    
-    # Total amount (what customer actually paid)
-    # Always use gross_amount if available (most accurate - this is what user actually paid)
-    # If gross_amount is not available, calculate as net_amount + platform_fee
-    if gross_amount is not None:
-        # Use gross_amount directly - this is the exact amount the user paid
-        total_amount = gross_amount
-    else:
-        # For direct payments without razorpay, calculate total
-        # If platform_fee exists, add it; otherwise total is just net_amount
-        total_amount = net_amount + platform_fee
-    
-    # Calculate GST breakdown from platform_fee
-    # Tax is included in platform fee (18% GST on 2% fee = 2.36% total)
-    # GST on platform fee = platform_fee * (18/118) if we want to break it down
-    gst_on_fee = platform_fee * Decimal('18') / Decimal('118') if platform_fee > 0 else Decimal('0.00')
-    base_fee = platform_fee - gst_on_fee if platform_fee > 0 else Decimal('0.00')
-    
-    # Log for debugging
-    logger.debug(
-        f"Payment receipt calculation for payment {payment.id}: "
-        f"net_amount={net_amount}, platform_fee={platform_fee}, "
-        f"gross_amount={gross_amount}, total_amount={total_amount}, "
-        f"subtotal={subtotal}, base_fee={base_fee}, gst_on_fee={gst_on_fee}"
-    )
-    
-    # Payment date
-    payment_date = payment.completed_at or payment.payment_date
-    payment_date_str = payment_date.strftime('%B %d, %Y') if payment_date else timezone.now().strftime('%B %d, %Y')
-    
-    # Receipt ID
-    if payment.transaction_id:
-        # Use transaction_id if available, format as R-XXXXXXXX
-        receipt_id = f"R-{str(payment.transaction_id)[-8:].zfill(8)}"
-    else:
-        # Use payment ID with zero padding
-        receipt_id = f"R-{str(payment.id).zfill(8)}"
-    
-    # Create PDF buffer
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(
-        buffer, pagesize=A4,
-        topMargin=0.3*inch, bottomMargin=0.5*inch,
-        leftMargin=0.75*inch, rightMargin=0.75*inch
-    )
-    
-    elements = []
-    styles = getSampleStyleSheet()
-    
-    # Color palette
-    gray_color = colors.HexColor('#808080')
-    light_gray = colors.HexColor('#f5f5f5')
-    dark_gray = colors.HexColor('#333333')
-    black = colors.HexColor('#000000')
-    
-    # Usable page width
-    pw = A4[0] - 1.5*inch
-    
-    # Helper function for paragraph styles
-    def ps(name, **kw):
-        base = kw.pop('parent', styles['Normal'])
-        return ParagraphStyle(name, parent=base, **kw)
-    
-    # ── 1. HEADER WITH LOGO CENTERED AND ADDRESS BELOW ─────────────────────────────
-    # Try to load logo
-    logo_path = os.path.join(settings.BASE_DIR, 'Zuja_Logo-removebg-preview.png')
-    logo_img = None
-    if os.path.exists(logo_path):
-        try:
-            logo_img = Image(logo_path, width=1.2*inch, height=1.2*inch)
-        except Exception as e:
-            logger.warning(f"Could not load logo image: {e}")
-    
-    # Logo centered at top
-    if logo_img:
-        logo_table = Table([[logo_img]], colWidths=[pw])
-        logo_table.setStyle(TableStyle([
-            ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-            ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-            ('LEFTPADDING', (0,0), (-1,-1), 0),
-            ('RIGHTPADDING', (0,0), (-1,-1), 0),
-            ('TOPPADDING', (0,0), (-1,-1), 5),
-            ('BOTTOMPADDING', (0,0), (-1,-1), 5),
-        ]))
-        elements.append(logo_table)
-    else:
-        # If no logo, create a placeholder
-        logo_placeholder = Paragraph(
-            '<b>ZUJA ELECTRICAL INNOVATION (P) LTD</b>',
-            ps('LogoPlaceholder', fontSize=14, textColor=black, alignment=TA_CENTER,
-               fontName='Helvetica-Bold')
-        )
-        logo_table = Table([[logo_placeholder]], colWidths=[pw])
-        logo_table.setStyle(TableStyle([
-            ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-            ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-            ('TOPPADDING', (0,0), (-1,-1), 5),
-            ('BOTTOMPADDING', (0,0), (-1,-1), 5),
-        ]))
-        elements.append(logo_table)
-    
-    # Address below logo, centered
-    address_para = Paragraph(
-        company_address,
-        ps('Address', fontSize=9, textColor=dark_gray, alignment=TA_CENTER,
-           fontName='Helvetica')
-    )
-    address_table = Table([[address_para]], colWidths=[pw])
-    address_table.setStyle(TableStyle([
-        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-        ('LEFTPADDING', (0,0), (-1,-1), 0),
-        ('RIGHTPADDING', (0,0), (-1,-1), 0),
-        ('TOPPADDING', (0,0), (-1,-1), 0),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 10),
-    ]))
-    elements.append(address_table)
-    
-    # Contact info (Email and Phone) - centered below address
-    contact_info = [
-        Paragraph(f'<b>Email:</b> {company_email}', ps('Contact', fontSize=9, textColor=gray_color, alignment=TA_CENTER)),
-        Paragraph(f'<b>Phone:</b> {company_phone}', ps('Contact', fontSize=9, textColor=gray_color, alignment=TA_CENTER)),
-    ]
-    contact_table = Table([[para] for para in contact_info], colWidths=[pw])
-    contact_table.setStyle(TableStyle([
-        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-        ('LEFTPADDING', (0,0), (-1,-1), 0),
-        ('RIGHTPADDING', (0,0), (-1,-1), 0),
-        ('TOPPADDING', (0,0), (-1,-1), 0),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 10),
-    ]))
-    elements.append(contact_table)
-    elements.append(Spacer(1, 0.15*inch))
-    
-    # ── 2. RECEIPT TITLE ──────────────────────────────────────────────────────────
-    title = Paragraph(
-        'Payment Receipt',
-        ps('Title', fontSize=24, textColor=black, fontName='Helvetica-Bold',
-           alignment=TA_CENTER, spaceAfter=15)
-    )
-    elements.append(title)
-    elements.append(Spacer(1, 0.1*inch))
-    
-    # ── 3. RECEIPT DETAILS ────────────────────────────────────────────────────────
-    receipt_details = Table([
-        [Paragraph(f'<b>Receipt ID:</b> {receipt_id}', ps('Detail', fontSize=10)),
-         Paragraph(f'<b>Date Issued:</b> {payment_date_str}', ps('Detail', fontSize=10))],
-    ], colWidths=[pw/2, pw/2])
-    receipt_details.setStyle(TableStyle([
-        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-        ('LEFTPADDING', (0,0), (-1,-1), 5),
-        ('RIGHTPADDING', (0,0), (-1,-1), 5),
-    ]))
-    elements.append(receipt_details)
-    elements.append(Spacer(1, 0.15*inch))
-    
-    # ── 4. TENANT/CUSTOMER INFORMATION ──────────────────────────────────────────────
-    elements.append(Paragraph('Tenant Information:', ps('Section', fontSize=12, textColor=black,
-                                                         fontName='Helvetica-Bold', spaceAfter=8)))
-    
-    tenant_info = Table([
-        [Paragraph(f'<b>Name:</b> {customer_name}', ps('Info', fontSize=10))],
-        [Paragraph(f'<b>Address:</b> {customer_address}', ps('Info', fontSize=10))],
-        [Paragraph(f'<b>Contact:</b> {customer_contact}', ps('Info', fontSize=10))],
-    ], colWidths=[pw])
-    tenant_info.setStyle(TableStyle([
-        ('LEFTPADDING', (0,0), (-1,-1), 5),
-        ('RIGHTPADDING', (0,0), (-1,-1), 5),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 5),
-    ]))
-    elements.append(tenant_info)
-    elements.append(Spacer(1, 0.2*inch))
-    
-    # ── 5. PAYMENT DETAILS TABLE ────────────────────────────────────────────────────
-    elements.append(Paragraph('Payment Details', ps('Section', fontSize=12, textColor=black,
-                                                    fontName='Helvetica-Bold', spaceAfter=8)))
-    
-    # Format currency (without symbol, just numbers)
-    def format_currency(amount):
-        return f"{amount:,.2f}"
-    
-    # Build payment table
-    # Row 1: Payment amount (subtotal)
-    payment_table_data = [
-        ['Description', 'Subtotal', 'Tax', 'Total Amount'],
-        [
-            f'Payment for {payment_date.strftime("%B %Y") if payment_date else "Payment"}',
-            format_currency(float(subtotal)),
-            format_currency(0.00),
-            format_currency(float(subtotal))
-        ],
-    ]
-    
-    # Row 2: Platform fee (if applicable)
-    if platform_fee > 0:
-        payment_table_data.append([
-            'Platform Fee (Payment Gateway Charges)',
-            format_currency(float(base_fee)),
-            format_currency(float(gst_on_fee)),
-            format_currency(float(platform_fee))
-        ])
-    
-    # Row 3: Total - this should be the exact amount user paid (gross amount including platform fees)
-    # The total should always be gross_amount (what user actually paid)
-    # Use Paragraph objects for bold text instead of HTML tags
-    total_desc = Paragraph('Total', ps('BoldText', fontSize=10, textColor=black, fontName='Helvetica-Bold'))
-    total_amount_text = Paragraph(
-        format_currency(float(total_amount)),
-        ps('BoldText', fontSize=10, textColor=black, fontName='Helvetica-Bold', alignment=TA_RIGHT)
-    )
-    # Total row: subtotal + base_fee in subtotal column, gst_on_fee in tax column, total_amount in total column
-    payment_table_data.append([
-        total_desc,
-        format_currency(float(subtotal + base_fee)),
-        format_currency(float(gst_on_fee)),
-        total_amount_text
-    ])
-    
-    payment_table = Table(payment_table_data, colWidths=[pw*0.5, pw*0.15, pw*0.15, pw*0.2])
-    payment_table.setStyle(TableStyle([
-        ('BACKGROUND', (0,0), (-1,0), light_gray),
-        ('TEXTCOLOR', (0,0), (-1,0), black),
-        ('ALIGN', (0,0), (-1,-1), 'LEFT'),
-        ('ALIGN', (1,0), (-1,-1), 'RIGHT'),
-        ('ALIGN', (2,0), (-1,-1), 'RIGHT'),
-        ('ALIGN', (3,0), (-1,-1), 'RIGHT'),
-        ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0,0), (-1,0), 10),
-        ('FONTSIZE', (0,1), (-1,-2), 9),
-        ('FONTSIZE', (0,-1), (-1,-1), 10),
-        ('FONTNAME', (0,-1), (-1,-1), 'Helvetica-Bold'),  # Make last row bold
-        ('BOTTOMPADDING', (0,0), (-1,0), 8),
-        ('TOPPADDING', (0,0), (-1,0), 8),
-        ('BOTTOMPADDING', (0,1), (-1,-1), 5),
-        ('TOPPADDING', (0,1), (-1,-1), 5),
-        ('LEFTPADDING', (0,0), (-1,-1), 8),
-        ('RIGHTPADDING', (0,0), (-1,-1), 8),
-        ('GRID', (0,0), (-1,-1), 0.5, gray_color),
-        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-    ]))
-    elements.append(payment_table)
-    elements.append(Spacer(1, 0.2*inch))
-    
-    # ── 6. PAYMENT INFORMATION ─────────────────────────────────────────────────────
-    elements.append(Paragraph('Payment Information:', ps('Section', fontSize=12, textColor=black,
-                                                           fontName='Helvetica-Bold', spaceAfter=8)))
-    
-    payment_method = payment.get_payment_method_display() if hasattr(payment, 'get_payment_method_display') else 'Online'
-    transaction_id = payment.transaction_id or 'N/A'
-    
-    payment_info = Table([
-        [Paragraph(f'<b>Payment Method:</b> {payment_method}', ps('Info', fontSize=10))],
-        [Paragraph(f'<b>Transaction ID:</b> {transaction_id}', ps('Info', fontSize=10))],
-    ], colWidths=[pw])
-    payment_info.setStyle(TableStyle([
-        ('LEFTPADDING', (0,0), (-1,-1), 5),
-        ('RIGHTPADDING', (0,0), (-1,-1), 5),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 5),
-    ]))
-    elements.append(payment_info)
-    elements.append(Spacer(1, 0.2*inch))
-    
-    # ── 7. TERMS AND CONDITIONS ───────────────────────────────────────────────────
-    elements.append(Paragraph('Terms and Conditions:', ps('Section', fontSize=12, textColor=black,
-                                                           fontName='Helvetica-Bold', spaceAfter=8)))
-    
-    terms = [
-        'I confirm that I am booking a vehicle as an individual, distributor, or customer ("Booker") with ZUJA Electrical Innovation Private Limited.',
-        'I understand that booking a vehicle requires payment of a minimum booking / purchase order amount of ₹5,000, and a vehicle is considered booked only after the company receives this amount.',
-        'I acknowledge that all amounts paid towards vehicle booking including booking amount, instalments, full payment, incentive adjustments, or any other mode of payment are strictly non-refundable.'
-    ]
-    
-    terms_para = Paragraph(
-        '<br/>'.join([f'{i+1}) {term}' for i, term in enumerate(terms)]),
-        ps('Terms', fontSize=9, textColor=dark_gray, leading=14, alignment=TA_LEFT)
-    )
-    elements.append(terms_para)
-    elements.append(Spacer(1, 0.2*inch))
-    
-    # ── 8. CLOSING MESSAGE ────────────────────────────────────────────────────────
-    closing = Paragraph(
-        'Thank you for your timely payment!',
-        ps('Closing', fontSize=11, textColor=black, fontName='Helvetica-Bold',
-           alignment=TA_CENTER, spaceBefore=10)
-    )
-    elements.append(closing)
-    
-    # ── BUILD PDF ─────────────────────────────────────────────────────────────────
-    doc.build(elements)
-    pdf_content = buffer.getvalue()
-    buffer.close()
-    
-    filename = f"payment_receipt_{receipt_id}_{timezone.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+    data = payment_receipt_data(payment, razorpay_payment)
+    pdf_content = get_receipt_pdf('payment', data)
+    filename = f"payment_receipt_{data['receipt_id']}_{timezone.now().strftime('%Y%m%d_%H%M%S')}.pdf"
     return ContentFile(pdf_content, name=filename)
 
 
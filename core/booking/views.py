@@ -3,7 +3,6 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import PermissionDenied
-from rest_framework.pagination import PageNumberPagination
 from django.conf import settings
 from django.utils import timezone
 from django.db.models import Q
@@ -15,6 +14,7 @@ from core.settings.models import PlatformSettings
 from core.inventory.utils import create_reservation
 from .models import Booking, Payment
 from .serializers import BookingSerializer, PaymentSerializer
+from core.pagination import EstimatedCountPagination
 
 logger = logging.getLogger(__name__)
 
@@ -62,7 +62,7 @@ def ensure_company_referral_user(company_referral_code):
         return company_user
 
 
-class BookingPagination(PageNumberPagination):
+class BookingPagination(EstimatedCountPagination):
     """Custom pagination for booking list with page_size support"""
     page_size = 20
     page_size_query_param = 'page_size'
@@ -337,17 +337,11 @@ class BookingViewSet(viewsets.ModelViewSet):
             if reservation and reservation.status == 'released':
                 # Reservation was released (likely expired), but payment is now complete
                 # Re-reserve the stock and mark as completed
-                vehicle_stock = reservation.vehicle_stock
-                if vehicle_stock.available_quantity >= reservation.quantity:
-                    # Re-reserve the stock
-                    vehicle_stock.reserve(quantity=reservation.quantity)
-                    # Mark reservation as completed
-                    reservation.status = 'completed'
-                    reservation.save(update_fields=['status', 'updated_at'])
-                else:
-                    # Stock not available, but mark as completed anyway (booking is confirmed)
-                    reservation.status = 'completed'
-                    reservation.save(update_fields=['status', 'updated_at'])
+                # (reserve() is a no-op if stock is no longer available)
+                reservation.vehicle_stock.reserve(quantity=reservation.quantity)
+                # Mark reservation as completed either way (booking is confirmed)
+                reservation.status = 'completed'
+                reservation.save(update_fields=['status', 'updated_at'])
         except Exception as e:
             # No reservation exists or error accessing it, skip
             import logging
@@ -132,13 +132,13 @@ class UserAsaAcceptanceAdmin(admin.ModelAdmin):
     list_filter = ('otp_verified', 'accepted_at', 'terms_version')
     search_fields = ('user__username', 'user__email', 'terms_version', 'ip_address', 'pdf_hash')
     readonly_fields = (
-        'user', 'terms_version', 'accepted_at', 'ip_address', 'user_agent',
+        'user', 'terms_version', 'terms_text_sha256', 'accepted_at', 'ip_address', 'user_agent',
         'otp_verified', 'otp_identifier', 'agreement_pdf_url', 'pdf_hash',
         'created_at'
     )
     fieldsets = (
         ('Acceptance Information', {
-            'fields': ('user', 'terms_version', 'accepted_at')
+            'fields': ('user', 'terms_version', 'terms_text_sha256', 'accepted_at')
         }),
         ('Verification', {
             'fields': ('otp_verified', 'otp_identifier')
@@ -169,12 +169,12 @@ class UserPaymentAcceptanceAdmin(admin.ModelAdmin):
     list_filter = ('otp_verified', 'accepted_at', 'payment_terms_version')
     search_fields = ('user__username', 'user__email', 'payment_terms_version', 'ip_address')
     readonly_fields = (
-        'user', 'payment_terms_version', 'accepted_at', 'ip_address', 'user_agent',
+        'user', 'payment_terms_version', 'terms_text_sha256', 'accepted_at', 'ip_address', 'user_agent',
         'otp_verified', 'otp_identifier', 'receipt_pdf_url', 'created_at'
     )
     fieldsets = (
         ('Acceptance Information', {
-            'fields': ('user', 'payment_terms_version', 'accepted_at')
+            'fields': ('user', 'payment_terms_version', 'terms_text_sha256', 'accepted_at')
         }),
         ('Verification', {
             'fields': ('otp_verified', 'otp_identifier')
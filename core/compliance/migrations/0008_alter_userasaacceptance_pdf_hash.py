@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compliance', '0007_remove_asa_unique_acceptance_constraint'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='userasaacceptance',
+            name='pdf_hash',
+            field=models.CharField(help_text='SHA256 signature hash of the acceptance data, printed on the agreement PDF', max_length=64),
+        ),
+    ]
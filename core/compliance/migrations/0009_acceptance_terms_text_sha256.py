@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-19 00:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compliance', '0008_alter_userasaacceptance_pdf_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userasaacceptance',
+            name='terms_text_sha256',
+            field=models.CharField(blank=True, help_text='SHA256 digest of the full text of the accepted terms, stored at acceptance', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='userpaymentacceptance',
+            name='terms_text_sha256',
+            field=models.CharField(blank=True, help_text='SHA256 digest of the full text of the accepted terms, stored at acceptance', max_length=64),
+        ),
+    ]
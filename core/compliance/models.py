@@ -209,6 +209,11 @@ class UserAsaAcceptance(models.Model):
     """
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='asa_acceptances')
     terms_version = models.CharField(max_length=20, help_text="ASA Terms version that was accepted")
+    terms_text_sha256 = models.CharField(
+        max_length=64,
+        blank=True,
+        help_text="SHA256 digest of the full text of the accepted terms, stored at acceptance"
+    )
     
     accepted_at = models.DateTimeField(auto_now_add=True, help_text="Server timestamp in IST when accepted")
     ip_address = models.CharField(max_length=45, help_text="User's IP address at acceptance")
@@ -223,7 +228,7 @@ class UserAsaAcceptance(models.Model):
     )
     pdf_hash = models.CharField(
         max_length=64,
-        help_text="SHA256 hash of the PDF for integrity verification"
+        help_text="SHA256 signature hash of the acceptance data, printed on the agreement PDF"
     )
     
     created_at = models.DateTimeField(auto_now_add=True)
@@ -252,6 +257,11 @@ class UserPaymentAcceptance(models.Model):
     """
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='payment_acceptances')
     payment_terms_version = models.CharField(max_length=20, help_text="Payment Terms version that was accepted")
+    terms_text_sha256 = models.CharField(
+        max_length=64,
+        blank=True,
+        help_text="SHA256 digest of the full text of the accepted terms, stored at acceptance"
+    )
     
     accepted_at = models.DateTimeField(auto_now_add=True, help_text="Server timestamp in IST when accepted")
     ip_address = models.CharField(max_length=45, help_text="User's IP address at acceptance")
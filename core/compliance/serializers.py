@@ -355,7 +355,7 @@ class UserAsaAcceptanceSerializer(serializers.ModelSerializer):
         model = UserAsaAcceptance
         fields = '__all__'
         read_only_fields = (
-            'id', 'user', 'terms_version', 'accepted_at', 'ip_address', 'user_agent',
+            'id', 'user', 'terms_version', 'terms_text_sha256', 'accepted_at', 'ip_address', 'user_agent',
             'otp_verified', 'otp_identifier', 'agreement_pdf_url', 'pdf_hash',
             'created_at', 'user_username', 'user_email', 'terms_title'
         )
@@ -555,7 +555,7 @@ class UserPaymentAcceptanceSerializer(serializers.ModelSerializer):
         model = UserPaymentAcceptance
         fields = '__all__'
         read_only_fields = (
-            'id', 'user', 'payment_terms_version', 'accepted_at', 'ip_address', 'user_agent',
+            'id', 'user', 'payment_terms_version', 'terms_text_sha256', 'accepted_at', 'ip_address', 'user_agent',
             'otp_verified', 'otp_identifier', 'receipt_pdf_url', 'created_at',
             'user_username', 'user_email', 'terms_title'
         )
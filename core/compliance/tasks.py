@@ -0,0 +1,83 @@
+from celery import shared_task
+from .models import AsaTerms, PaymentTerms, UserAsaAcceptance, UserPaymentAcceptance
+from .utils import (
+    compute_acceptance_hash, compute_terms_text_hash, generate_asa_agreement_pdf,
+    generate_payment_terms_receipt_pdf,
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def generate_asa_agreement_pdf_task(self, acceptance_id, terms_id):
+    """
+    Celery task to render and store the agreement PDF of an ASA acceptance.
+    Queued by the ASA verify-acceptance endpoint once the acceptance is committed;
+    the signature hash is already stored on the acceptance at that point and is
+    printed as stored. A stored hash is never overwritten: if it no longer matches
+    the acceptance data the mismatch is logged as an error for investigation.
+
+    Args:
+        acceptance_id: ID of the UserAsaAcceptance instance
+        terms_id: ID of the accepted AsaTerms instance
+    """
+    try:
+        acceptance = UserAsaAcceptance.objects.select_related('user').get(id=acceptance_id)
+        if acceptance.agreement_pdf_url:
+            return
+        asa_terms = AsaTerms.objects.get(id=terms_id)
+
+        update_fields = ['agreement_pdf_url']
+        computed_hash = compute_acceptance_hash(acceptance)
+        if not acceptance.pdf_hash:
+            acceptance.pdf_hash = computed_hash
+            update_fields.append('pdf_hash')
+        elif acceptance.pdf_hash != computed_hash:
+            logger.error(
+                f"Signature hash of ASA acceptance {acceptance_id} does not match its acceptance data, "
+                f"printing the stored hash"
+            )
+        if acceptance.terms_text_sha256 and acceptance.terms_text_sha256 != compute_terms_text_hash(asa_terms):
+            logger.error(
+                f"Text of ASA Terms {asa_terms.version} changed since acceptance {acceptance_id} was recorded"
+            )
+
+        pdf_file, _ = generate_asa_agreement_pdf(acceptance.user, asa_terms, acceptance, acceptance.pdf_hash)
+        acceptance.agreement_pdf_url = pdf_file
+        acceptance.save(update_fields=update_fields)
+    except (UserAsaAcceptance.DoesNotExist, AsaTerms.DoesNotExist) as e:
+        logger.error(f"Cannot generate ASA agreement PDF for acceptance {acceptance_id}: {e}")
+    except Exception as e:
+        logger.error(f"Error generating ASA agreement PDF for acceptance {acceptance_id}: {e}", exc_info=True)
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=e)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def generate_payment_terms_receipt_pdf_task(self, acceptance_id, terms_id):
+    """
+    Celery task to render and store the receipt PDF of a Payment Terms acceptance.
+    Queued by the Payment Terms verify-acceptance endpoint when a PDF is requested.
+
+    Args:
+        acceptance_id: ID of the UserPaymentAcceptance instance
+        terms_id: ID of the accepted PaymentTerms instance
+    """
+    try:
+        acceptance = UserPaymentAcceptance.objects.select_related('user').get(id=acceptance_id)
+        if acceptance.receipt_pdf_url:
+            return
+        payment_terms = PaymentTerms.objects.get(id=terms_id)
+
+        acceptance.receipt_pdf_url = generate_payment_terms_receipt_pdf(acceptance.user, payment_terms, acceptance)
+        acceptance.save(update_fields=['receipt_pdf_url'])
+    except (UserPaymentAcceptance.DoesNotExist, PaymentTerms.DoesNotExist) as e:
+        logger.error(f"Cannot generate Payment Terms receipt PDF for acceptance {acceptance_id}: {e}")
+    except Exception as e:
+        logger.error(
+            f"Error generating Payment Terms receipt PDF for acceptance {acceptance_id}: {e}",
+            exc_info=True
+        )
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=e)
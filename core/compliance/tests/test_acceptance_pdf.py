@@ -0,0 +1,191 @@
+"""
+Tests for the single-pass acceptance PDFs and their background generation
+"""
+import shutil
+import tempfile
+from unittest.mock import patch
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from core.compliance import tasks, utils, views
+from core.compliance.models import AsaTerms, PaymentTerms, UserAsaAcceptance, UserPaymentAcceptance
+from core.users.models import User
+
+LOCMEM_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'compliance-pdf-tests'}
+}
+
+
+class AcceptancePdfTestMixin:
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        storage = override_settings(
+            DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage', MEDIA_ROOT=self.media_root
+        )
+        storage.enable()
+        self.addCleanup(storage.disable)
+
+        self.user = User.objects.create_user(username='asa', email='asa@example.com', password='x')
+        self.asa_terms = AsaTerms.objects.create(version='v1.0', title='ASA Terms', full_text='ASA terms text')
+        self.payment_terms = PaymentTerms.objects.create(version='v1.0', title='Payment Terms', full_text='Terms text')
+
+    def _asa_acceptance(self, **kwargs):
+        return UserAsaAcceptance.objects.create(
+            user=self.user, terms_version='v1.0', terms_text_sha256=utils.compute_terms_text_hash(self.asa_terms),
+            ip_address='127.0.0.1', otp_verified=True, otp_identifier='asa@example.com', **kwargs
+        )
+
+
+class AcceptanceHashTest(AcceptancePdfTestMixin, TestCase):
+    """Signature hash of the acceptance data"""
+
+    def test_hash_is_deterministic_and_survives_reload(self):
+        acceptance = self._asa_acceptance()
+        signature_hash = utils.compute_acceptance_hash(acceptance)
+        reloaded = UserAsaAcceptance.objects.get(id=acceptance.id)
+
+        self.assertEqual(len(signature_hash), 64)
+        self.assertEqual(utils.compute_acceptance_hash(reloaded), signature_hash)
+
+    def test_hash_binds_stored_terms_digest_and_acceptance(self):
+        acceptance = self._asa_acceptance()
+        signature_hash = utils.compute_acceptance_hash(acceptance)
+
+        acceptance.terms_text_sha256 = utils.compute_terms_text_hash(
+            AsaTerms(version='v1.0', title='ASA Terms', full_text='Changed terms text')
+        )
+        self.assertNotEqual(utils.compute_acceptance_hash(acceptance), signature_hash)
+        self.assertNotEqual(utils.compute_acceptance_hash(self._asa_acceptance()), signature_hash)
+
+    def test_hash_ignores_later_profile_and_terms_edits(self):
+        acceptance = self._asa_acceptance()
+        signature_hash = utils.compute_acceptance_hash(acceptance)
+
+        User.objects.filter(id=self.user.id).update(first_name='Renamed', email='new@example.com')
+        AsaTerms.objects.filter(id=self.asa_terms.id).update(title='Renamed', full_text='Edited terms text')
+        reloaded = UserAsaAcceptance.objects.select_related('user').get(id=acceptance.id)
+        self.assertEqual(utils.compute_acceptance_hash(reloaded), signature_hash)
+
+    def test_pdf_is_rendered_once_with_the_hash(self):
+        acceptance = self._asa_acceptance()
+        with patch.object(utils.SimpleDocTemplate, 'build', autospec=True,
+                          side_effect=utils.SimpleDocTemplate.build) as build:
+            pdf_file, pdf_hash = utils.generate_asa_agreement_pdf(self.user, self.asa_terms, acceptance)
+
+        self.assertEqual(build.call_count, 1)
+        self.assertEqual(pdf_hash, utils.compute_acceptance_hash(acceptance))
+        self.assertTrue(pdf_file.read().startswith(b'%PDF'))
+        self.assertTrue(pdf_file.name.startswith(f'asa_agreement_{self.user.id}_{acceptance.id}_'))
+
+
+class AcceptancePdfTaskTest(AcceptancePdfTestMixin, TestCase):
+    """PDFs are stored by the Celery tasks"""
+
+    def test_asa_task_stores_pdf(self):
+        acceptance = self._asa_acceptance()
+        acceptance.pdf_hash = utils.compute_acceptance_hash(acceptance)
+        acceptance.save(update_fields=['pdf_hash'])
+
+        tasks.generate_asa_agreement_pdf_task.apply(args=(acceptance.id, self.asa_terms.id))
+
+        acceptance.refresh_from_db()
+        self.assertTrue(acceptance.agreement_pdf_url.name.endswith('.pdf'))
+        with patch.object(tasks, 'generate_asa_agreement_pdf') as generate:
+            tasks.generate_asa_agreement_pdf_task.apply(args=(acceptance.id, self.asa_terms.id))
+        generate.assert_not_called()
+
+    def test_asa_task_keeps_a_mismatched_stored_hash(self):
+        acceptance = self._asa_acceptance(pdf_hash='0' * 64)
+
+        with patch.object(tasks, 'generate_asa_agreement_pdf', wraps=tasks.generate_asa_agreement_pdf) as generate, \
+                self.assertLogs(tasks.logger, 'ERROR'):
+            tasks.generate_asa_agreement_pdf_task.apply(args=(acceptance.id, self.asa_terms.id))
+
+        acceptance.refresh_from_db()
+        self.assertEqual(acceptance.pdf_hash, '0' * 64)
+        self.assertEqual(generate.call_args.args[3], '0' * 64)
+        self.assertTrue(acceptance.agreement_pdf_url.name.endswith('.pdf'))
+
+    def test_payment_task_stores_pdf(self):
+        acceptance = UserPaymentAcceptance.objects.create(
+            user=self.user, payment_terms_version='v1.0', ip_address='127.0.0.1', otp_verified=True
+        )
+        tasks.generate_payment_terms_receipt_pdf_task.apply(args=(acceptance.id, self.payment_terms.id))
+
+        acceptance.refresh_from_db()
+        self.assertTrue(acceptance.receipt_pdf_url.name.endswith('.pdf'))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+@patch('core.auth.utils.verify_otp', return_value=True)
+class VerifyAcceptanceTest(AcceptancePdfTestMixin, TestCase):
+    """The verify endpoints store the acceptance and queue the PDF after commit"""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _verify(self, url, **extra):
+        data = {'identifier': 'asa@example.com', 'otp_code': '123456', 'otp_type': 'email', **extra}
+        return self.client.post(url, data, format='json', secure=True)
+
+    def test_asa_acceptance_stores_hash_and_queues_pdf(self, verify_otp):
+        with patch.object(views.generate_asa_agreement_pdf_task, 'delay') as delay, \
+                patch.object(utils.SimpleDocTemplate, 'build') as build, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self._verify(f'/api/compliance/terms/asa/{self.asa_terms.id}/accept/verify/')
+
+        self.assertEqual(response.status_code, 201, response.data)
+        build.assert_not_called()
+        acceptance = UserAsaAcceptance.objects.get()
+        delay.assert_called_once_with(acceptance.id, self.asa_terms.id)
+        self.assertEqual(acceptance.terms_text_sha256, utils.compute_terms_text_hash(self.asa_terms))
+        self.assertEqual(acceptance.pdf_hash, utils.compute_acceptance_hash(acceptance))
+        self.assertEqual(response.data['acceptance']['pdf_hash'], acceptance.pdf_hash)
+
+    def test_payment_acceptance_queues_pdf_only_when_requested(self, verify_otp):
+        url = f'/api/compliance/terms/payment/{self.payment_terms.id}/accept/verify/'
+        with patch.object(views.generate_payment_terms_receipt_pdf_task, 'delay') as delay, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self._verify(url).status_code, 201)
+            delay.assert_not_called()
+            self.assertEqual(self._verify(url, generate_pdf=True).status_code, 201)
+
+        acceptance = UserPaymentAcceptance.objects.latest('id')
+        delay.assert_called_once_with(acceptance.id, self.payment_terms.id)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class AcceptancePdfDownloadTest(AcceptancePdfTestMixin, TestCase):
+    """Downloads of a PDF the media storage does not have (yet) answer 404 with Retry-After"""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_agreement_download(self):
+        acceptance = self._asa_acceptance()
+        tasks.generate_asa_agreement_pdf_task.apply(args=(acceptance.id, self.asa_terms.id))
+        url = f'/api/compliance/terms/asa/agreement/{acceptance.id}/download/'
+
+        response = self.client.get(url, secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+
+        acceptance.refresh_from_db()
+        acceptance.agreement_pdf_url.storage.delete(acceptance.agreement_pdf_url.name)
+        response = self.client.get(url, secure=True)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response['Retry-After'], str(views.PDF_RETRY_AFTER))
+
+    def test_receipt_not_stored_yet(self):
+        acceptance = UserPaymentAcceptance.objects.create(
+            user=self.user, payment_terms_version='v1.0', ip_address='127.0.0.1', otp_verified=True,
+            receipt_pdf_url='compliance/receipts/not_uploaded.pdf'
+        )
+        response = self.client.get(f'/api/compliance/terms/payment/receipt/{acceptance.id}/', secure=True)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response['Retry-After'], str(views.PDF_RETRY_AFTER))
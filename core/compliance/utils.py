@@ -2,7 +2,9 @@
 Utility functions for compliance module
 """
 import hashlib
+import json
 import re
+from functools import lru_cache
 from io import BytesIO
 from django.core.files.base import ContentFile
 from django.utils import timezone
@@ -15,6 +17,7 @@ from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, KeepTogether
 from core.users.models import User
 from core.settings.models import PlatformSettings
+from .models import UserAsaAcceptance
 
 
 def get_client_ip(request):
@@ -111,11 +114,116 @@ def compute_pdf_hash(pdf_content):
     return hashlib.sha256(pdf_content).hexdigest()
 
 
-def generate_asa_agreement_pdf(user, asa_terms, acceptance):
+
+
+def compute_terms_text_hash(terms):
+    """
+    SHA256 digest of the full text of ASA or Payment Terms, stored on an acceptance
+    (terms_text_sha256) when the terms are accepted
+
+    Returns:
+        str: SHA256 hash in hexadecimal format (64 characters)
+    """
+    return hashlib.sha256((terms.full_text or '').encode('utf-8')).hexdigest()
+
+
+def acceptance_signature_data(acceptance):
+    """
+    Canonical record of an acceptance, the input of its signature hash
+
+    Binds who accepted which terms (by version and the digest of their text stored
+    at acceptance), when, from where and how the OTP was verified. Only values
+    frozen on the acceptance row are used (never the user profile or the terms
+    record, which can be edited later), so the hash can be recomputed at any time
+    to verify an acceptance.
+
+    Args:
+        acceptance: UserAsaAcceptance or UserPaymentAcceptance instance
+
+    Returns:
+        dict: JSON-serialisable acceptance data
+    """
+    if isinstance(acceptance, UserAsaAcceptance):
+        terms_version = acceptance.terms_version
+    else:
+        terms_version = acceptance.payment_terms_version
+    return {
+        'document_type': acceptance._meta.db_table,
+        'acceptance_id': acceptance.id,
+        'user_id': acceptance.user_id,
+        'terms_version': terms_version,
+        'terms_text_sha256': acceptance.terms_text_sha256,
+        'accepted_at': acceptance.accepted_at.isoformat(),
+        'ip_address': acceptance.ip_address or '',
+        'otp_verified': acceptance.otp_verified,
+        'otp_identifier': acceptance.otp_identifier or '',
+    }
+
+
+def compute_acceptance_hash(acceptance):
+    """
+    SHA-256 signature hash of an acceptance (see acceptance_signature_data)
+
+    Computed from the canonical acceptance data rather than the PDF bytes, so the
+    PDF is rendered once with the hash on it, and the hash is known as soon as the
+    acceptance is stored.
+
+    Returns:
+        str: SHA256 hash in hexadecimal format (64 characters)
+    """
+    canonical = json.dumps(
+        acceptance_signature_data(acceptance), sort_keys=True, separators=(',', ':')
+    )
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def _acceptance_styles():
+    """Paragraph styles of the acceptance PDFs (built once per process)"""
+    styles = getSampleStyleSheet()
+
+    def ps(name, **kw):
+        base = kw.pop('parent', styles['Normal'])
+        return ParagraphStyle(name, parent=base, **kw)
+
+    return {
+        'section': ps('SecHead', parent=styles['Heading2'],
+                      fontSize=13, textColor=colors.HexColor('#1a1a1a'),
+                      fontName='Helvetica-Bold', spaceBefore=0, spaceAfter=5),
+        'title': ps('MainTitle', parent=styles['Heading1'],
+                    fontSize=18, textColor=colors.HexColor('#1a1a1a'),
+                    fontName='Helvetica-Bold', alignment=TA_CENTER,
+                    spaceAfter=8, spaceBefore=0),
+        'company_name': ps('CoName', fontSize=11, textColor=colors.HexColor('#1a1a1a'),
+                           fontName='Helvetica-Bold', alignment=TA_CENTER),
+        'document_id': ps('DocId', fontSize=9, textColor=colors.HexColor('#1a1a1a'),
+                          fontName='Helvetica', alignment=TA_CENTER),
+        'cell': ps('CellPara', fontSize=10, textColor=colors.HexColor('#333333'),
+                   fontName='Helvetica', leading=14),
+        'th': ps('TableHead', fontSize=10, textColor=colors.white,
+                 fontName='Helvetica-Bold', alignment=TA_LEFT),
+        'td': ps('TableCell', fontSize=10, textColor=colors.HexColor('#333333'),
+                 fontName='Helvetica', alignment=TA_LEFT),
+        'td_value': ps('TableValue', fontSize=10, textColor=colors.HexColor('#1a6fc4'),
+                       fontName='Helvetica', alignment=TA_LEFT),
+        'declaration': ps('Decl', fontSize=9, textColor=colors.HexColor('#333333'),
+                          fontName='Helvetica', leading=14),
+        'cert_heading': ps('CertHd', parent=styles['Heading2'],
+                           fontSize=12, textColor=colors.HexColor('#155724'),
+                           fontName='Helvetica-Bold', alignment=TA_CENTER,
+                           spaceBefore=0, spaceAfter=6),
+        'cert_item': ps('CertItem', fontSize=9, textColor=colors.HexColor('#155724'),
+                        fontName='Helvetica', leading=14),
+        'hash': ps('Hash', fontSize=8, textColor=colors.HexColor('#155724'),
+                   fontName='Courier', leading=11),
+    }
+
+
+def _render_acceptance_pdf(user, terms, acceptance, signature_hash, heading, company_name, terms_name):
     """
-    Generate ASA Agreement PDF document.
+    Render an acceptance PDF in a single pass, with the signature hash on it.
     Styled like a professional loan agreement document with:
-    - DIGITALLY SIGNED badge + large title header
+    - Large title header
     - Amber/golden company info band
     - Signatory Information section
     - Acceptance Details 4-column table
@@ -123,318 +231,258 @@ def generate_asa_agreement_pdf(user, asa_terms, acceptance):
     - Digital Signature Certificate (green box) with SHA-256 hash
 
     Args:
-        user: User instance
-        asa_terms: AsaTerms instance
-        acceptance: UserAsaAcceptance instance
+        heading: Document title, e.g. 'ASA TERMS ACCEPTANCE'
+        company_name: Company shown in the amber band
+        terms_name: Terms name used in the declaration, e.g. 'ASA'
 
     Returns:
-        tuple: (ContentFile, str) - PDF file and SHA256 hash
+        bytes: PDF content
     """
-    # Get company information
-    platform_settings = PlatformSettings.get_settings()
-    company_name = platform_settings.company_name
-    company_email = platform_settings.company_email
-    company_phone = platform_settings.company_phone
-    company_address = platform_settings.company_address
+    styles = _acceptance_styles()
 
     # ── Colour palette ───────────────────────────────────────────────────────────
     green_color = colors.HexColor('#28a745')
     light_green = colors.HexColor('#d4edda')
-    dark_green  = colors.HexColor('#155724')
     amber_color = colors.HexColor('#C8A84B')
     dark_header = colors.HexColor('#1a1a2e')
     light_bg    = colors.HexColor('#f0f4f8')
-    blue_val    = colors.HexColor('#1a6fc4')
-
-    # Build initial elements (for hash computation)
-    def _build_elements(pdf_hash=None):
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(
-            buffer, pagesize=A4,
-            topMargin=0.55*inch, bottomMargin=0.55*inch,
-            leftMargin=0.75*inch, rightMargin=0.75*inch
-        )
-        elements = []
-        styles = getSampleStyleSheet()
-
-        # Usable page width
-        pw = A4[0] - 1.5*inch  # ~6.77 inches
-
-        # Helper: create a ParagraphStyle on the fly
-        def ps(name, **kw):
-            base = kw.pop('parent', styles['Normal'])
-            return ParagraphStyle(name, parent=base, **kw)
-
-        section_style = ps('SecHead', parent=styles['Heading2'],
-                           fontSize=13, textColor=colors.HexColor('#1a1a1a'),
-                           fontName='Helvetica-Bold', spaceBefore=0, spaceAfter=5)
-
-        # ── 1. TOP HEADER ────────────────────────────────────────────────────────
-        title_para = Paragraph(
-            'ASA TERMS ACCEPTANCE',
-            ps('MainTitle', parent=styles['Heading1'],
-               fontSize=18, textColor=colors.HexColor('#1a1a1a'),
-               fontName='Helvetica-Bold', alignment=TA_CENTER,
-               spaceAfter=8, spaceBefore=0)
-        )
-        elements.append(title_para)
-        elements.append(Spacer(1, 0.12*inch))
-
-        # ── 2. AMBER COMPANY BAND ────────────────────────────────────────────────
-        accepted_at = acceptance.accepted_at
-        accepted_date_str = f"{accepted_at.day}/{accepted_at.month}/{accepted_at.year}"
-
-        amber_data = [
-            [Paragraph(f'<b>{company_name}</b>',
-                       ps('CoName', fontSize=11, textColor=colors.HexColor('#1a1a1a'),
-                          fontName='Helvetica-Bold', alignment=TA_CENTER))],
-            [Paragraph(
-                f'Document ID: {asa_terms.version}  |  Date: {accepted_date_str}',
-                ps('DocId', fontSize=9, textColor=colors.HexColor('#1a1a1a'),
-                   fontName='Helvetica', alignment=TA_CENTER))],
-        ]
-        amber_band = Table(amber_data, colWidths=[pw])
-        amber_band.setStyle(TableStyle([
-            ('BACKGROUND',    (0,0), (-1,-1), amber_color),
-            ('TOPPADDING',    (0,0), (-1,-1), 7),
-            ('BOTTOMPADDING', (0,0), (-1,-1), 7),
-            ('LEFTPADDING',   (0,0), (-1,-1), 10),
-            ('RIGHTPADDING',  (0,0), (-1,-1), 10),
-        ]))
-        elements.append(amber_band)
-        elements.append(Spacer(1, 0.18*inch))
-
-        # ── 3. SIGNATORY INFORMATION ─────────────────────────────────────────────
-        elements.append(Paragraph('SIGNATORY INFORMATION', section_style))
-
-        user_full_name = user.get_full_name() or user.username
-        mobile = getattr(user, 'mobile', None) or 'N/A'
-        email  = user.email or 'N/A'
-
-        def cell_para(label, value):
-            return Paragraph(
-                f'<b>{label}:</b>  {value}',
-                ps(f'ci_{label}', fontSize=10, textColor=colors.HexColor('#333333'),
-                   fontName='Helvetica', leading=14)
-            )
-
-        cust_table = Table(
-            [
-                [cell_para('Full Name', user_full_name), cell_para('Mobile', mobile)],
-                [cell_para('Email', email), ''],
-            ],
-            colWidths=[pw/2, pw/2]
-        )
-        cust_table.setStyle(TableStyle([
-            ('BACKGROUND',    (0,0), (-1,-1), light_bg),
-            ('BOX',           (0,0), (-1,-1), 0.75, colors.HexColor('#c0c8d0')),
-            ('TOPPADDING',    (0,0), (-1,-1), 8),
-            ('BOTTOMPADDING', (0,0), (-1,-1), 8),
-            ('LEFTPADDING',   (0,0), (-1,-1), 10),
-            ('RIGHTPADDING',  (0,0), (-1,-1), 10),
-            ('VALIGN',        (0,0), (-1,-1), 'MIDDLE'),
-        ]))
-        elements.append(cust_table)
-        elements.append(Spacer(1, 0.18*inch))
-
-        # ── 4. ACCEPTANCE DETAILS TABLE ──────────────────────────────────────────
-        elements.append(Paragraph('ACCEPTANCE DETAILS', section_style))
-
-        accepted_at_str = accepted_at.strftime('%d %B %Y')
-
-        # OTP info
-        otp_info = 'Yes'
-        if acceptance.otp_verified and acceptance.otp_identifier:
-            otp_info = (f'Yes (Email: {acceptance.otp_identifier})'
-                        if '@' in acceptance.otp_identifier
-                        else f'Yes (Mobile: {acceptance.otp_identifier})')
-        elif not acceptance.otp_verified:
-            otp_info = 'No'
-
-        def th(text):
-            return Paragraph(
-                f'<b>{text}</b>',
-                ps(f'th_{text[:6]}', fontSize=10, textColor=colors.white,
-                   fontName='Helvetica-Bold', alignment=TA_LEFT)
-            )
-
-        c1, c2, c3, c4 = pw*0.22, pw*0.28, pw*0.22, pw*0.28
-
-        def td(text, color=None):
-            return Paragraph(
-                str(text),
-                ps(f'td_{str(text)[:6]}', fontSize=10, 
-                   textColor=color or colors.HexColor('#333333'),
-                   fontName='Helvetica', alignment=TA_LEFT)
-            )
-
-        details_table = Table(
-            [
-                [th('Parameter'), th('Value'), th('Parameter'), th('Value')],
-                [td('Terms Title'),   td(asa_terms.title),
-                 td('Version'),       td(asa_terms.version)],
-                [td('Accepted At'),   td(accepted_at_str),
-                 td('IP Address'),    td(acceptance.ip_address or 'N/A')],
-                [td('OTP Verified'),  td(otp_info, blue_val),
-                 td('Signing Method'), td('OTP-Based eSign')],
-                [td('Compliance'),    td('IT Act 2000'),
-                 td('RBI Guidelines'), td('DSC Guidelines')],
-            ],
-            colWidths=[c1, c2, c3, c4]
-        )
-        details_table.setStyle(TableStyle([
-            ('BACKGROUND',     (0,0), (-1,0), dark_header),
-            ('TOPPADDING',     (0,0), (-1,0), 8),
-            ('BOTTOMPADDING',  (0,0), (-1,0), 8),
-            ('BACKGROUND',     (0,1), (-1,-1), colors.white),
-            ('ROWBACKGROUNDS', (0,1), (-1,-1), [colors.white, colors.HexColor('#f6f8fa')]),
-            ('TEXTCOLOR',      (0,1), (-1,-1), colors.HexColor('#333333')),
-            ('FONTNAME',       (0,1), (-1,-1), 'Helvetica'),
-            ('FONTSIZE',       (0,1), (-1,-1), 10),
-            ('GRID',           (0,0), (-1,-1), 0.4, colors.HexColor('#d0d0d0')),
-            ('TOPPADDING',     (0,1), (-1,-1), 6),
-            ('BOTTOMPADDING',  (0,1), (-1,-1), 6),
-            ('LEFTPADDING',    (0,0), (-1,-1), 7),
-            ('RIGHTPADDING',   (0,0), (-1,-1), 7),
-            ('VALIGN',         (0,0), (-1,-1), 'MIDDLE'),
-            ('VALIGN',         (0,1), (-1,-1), 'MIDDLE'),
-            ('ALIGN',          (0,0), (-1,-1), 'LEFT'),
-        ]))
-        elements.append(details_table)
-        elements.append(Spacer(1, 0.18*inch))
-
-        # ── 5. DECLARATION ───────────────────────────────────────────────────────
-        elements.append(Paragraph('DECLARATION', section_style))
-
-        decl_text = (
-            f'I, <b>{user_full_name}</b>, hereby declare that I have read, understood, and agree to all '
-            f'terms and conditions of this ASA Terms and Conditions (version {asa_terms.version}), '
-            f'Privacy Policy, and ASA terms. I confirm that all informations are correct. This agreement '
-            f'has been digitally signed using OTP and confirmed by me.'
-        )
-        elements.append(Paragraph(
-            decl_text,
-            ps('Decl', fontSize=9, textColor=colors.HexColor('#333333'),
-               fontName='Helvetica', leading=14)
-        ))
-        elements.append(Spacer(1, 0.22*inch))
-
-        # ── 6. DIGITAL SIGNATURE CERTIFICATE (only in final pass) ───────────────
-        if pdf_hash is not None:
-            timestamp_str = accepted_at.strftime('%d %B %Y')
-
-            cert_heading_para = Paragraph(
-                '&#x2726;  DIGITAL SIGNATURE CERTIFICATE',
-                ps('CertHd', parent=styles['Heading2'],
-                   fontSize=12, textColor=dark_green,
-                   fontName='Helvetica-Bold', alignment=TA_CENTER,
-                   spaceBefore=0, spaceAfter=6)
-            )
-
-            def bullet(text):
-                return Paragraph(
-                    f'&#x2022; {text}',
-                    ps(f'bl_{text[:8]}', fontSize=9, textColor=dark_green,
-                       fontName='Helvetica', leading=14)
-                )
-
-            def right_item(text):
-                return Paragraph(
-                    text,
-                    ps(f'ri_{text[:8]}', fontSize=9, textColor=dark_green,
-                       fontName='Helvetica', leading=14)
-                )
-
-            cert_inner = Table(
-                [
-                    [bullet(f'Signatory: {user_full_name}'),
-                     right_item(f'OTP Verified: &#x2726; ({otp_info})')],
-                    [bullet(f'Timestamp: {timestamp_str}'),
-                     right_item('Signing Method: OTP-Based eSign')],
-                    [bullet(f'IP Address: {acceptance.ip_address or "N/A"}'),
-                     right_item('Compliance: IT Act 2000, RBI DSC Guidelines')],
-                ],
-                colWidths=[pw/2, pw/2]
-            )
-            cert_inner.setStyle(TableStyle([
-                ('BACKGROUND',    (0,0), (-1,-1), light_green),
-                ('TOPPADDING',    (0,0), (-1,-1), 5),
-                ('BOTTOMPADDING', (0,0), (-1,-1), 5),
-                ('LEFTPADDING',   (0,0), (-1,-1), 10),
-                ('RIGHTPADDING',  (0,0), (-1,-1), 10),
-                ('VALIGN',        (0,0), (-1,-1), 'MIDDLE'),
-                ('ALIGN',         (0,0), (0,-1), 'LEFT'),
-                ('ALIGN',         (1,0), (1,-1), 'LEFT'),
-            ]))
-
-            hash_para = Paragraph(
-                f'<b>SHA-256 Signature Hash:</b><br/>{pdf_hash}',
-                ps('Hash', fontSize=8, textColor=dark_green,
-                   fontName='Courier', leading=11)
-            )
-
-            # Wrap heading in a table cell to ensure proper background
-            heading_cell = Table([[cert_heading_para]], colWidths=[pw])
-            heading_cell.setStyle(TableStyle([
-                ('BACKGROUND',    (0,0), (-1,-1), light_green),
-                ('TOPPADDING',    (0,0), (-1,-1), 8),
-                ('BOTTOMPADDING', (0,0), (-1,-1), 4),
-                ('LEFTPADDING',   (0,0), (-1,-1), 10),
-                ('RIGHTPADDING',  (0,0), (-1,-1), 10),
-            ]))
-            
-            # Wrap hash in a table cell
-            hash_cell = Table([[hash_para]], colWidths=[pw])
-            hash_cell.setStyle(TableStyle([
-                ('BACKGROUND',    (0,0), (-1,-1), light_green),
-                ('TOPPADDING',    (0,0), (-1,-1), 4),
-                ('BOTTOMPADDING', (0,0), (-1,-1), 8),
-                ('LEFTPADDING',   (0,0), (-1,-1), 10),
-                ('RIGHTPADDING',  (0,0), (-1,-1), 10),
-            ]))
-            
-            cert_outer = Table(
-                [[heading_cell], [cert_inner], [hash_cell]],
-                colWidths=[pw]
-            )
-            cert_outer.setStyle(TableStyle([
-                ('BACKGROUND',    (0,0), (-1,-1), light_green),
-                ('BOX',           (0,0), (-1,-1), 2, green_color),
-                ('TOPPADDING',    (0,0), (-1,-1), 0),
-                ('BOTTOMPADDING', (0,0), (-1,-1), 0),
-                ('LEFTPADDING',   (0,0), (-1,-1), 0),
-                ('RIGHTPADDING',  (0,0), (-1,-1), 0),
-                ('VALIGN',        (0,0), (-1,-1), 'TOP'),
-            ]))
-            elements.append(KeepTogether([cert_outer]))
-
-        doc.build(elements)
-        return buffer
-
-    # ── Pass 1: build without DSC to compute hash ───────────────────────────────
-    buf1 = _build_elements(pdf_hash=None)
-    pdf_hash = compute_pdf_hash(buf1.getvalue())
-    buf1.close()
-
-    # ── Pass 2: rebuild with DSC + hash ─────────────────────────────────────────
-    buf2 = _build_elements(pdf_hash=pdf_hash)
-    pdf_content = buf2.getvalue()
-    buf2.close()
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(
+        buffer, pagesize=A4,
+        topMargin=0.55*inch, bottomMargin=0.55*inch,
+        leftMargin=0.75*inch, rightMargin=0.75*inch
+    )
+    elements = []
+
+    # Usable page width
+    pw = A4[0] - 1.5*inch  # ~6.77 inches
+
+    # ── 1. TOP HEADER ────────────────────────────────────────────────────────────
+    elements.append(Paragraph(heading, styles['title']))
+    elements.append(Spacer(1, 0.12*inch))
+
+    # ── 2. AMBER COMPANY BAND ────────────────────────────────────────────────────
+    accepted_at = acceptance.accepted_at
+    accepted_date_str = f"{accepted_at.day}/{accepted_at.month}/{accepted_at.year}"
+
+    amber_band = Table([
+        [Paragraph(f'<b>{company_name}</b>', styles['company_name'])],
+        [Paragraph(f'Document ID: {terms.version}  |  Date: {accepted_date_str}', styles['document_id'])],
+    ], colWidths=[pw])
+    amber_band.setStyle(TableStyle([
+        ('BACKGROUND',    (0,0), (-1,-1), amber_color),
+        ('TOPPADDING',    (0,0), (-1,-1), 7),
+        ('BOTTOMPADDING', (0,0), (-1,-1), 7),
+        ('LEFTPADDING',   (0,0), (-1,-1), 10),
+        ('RIGHTPADDING',  (0,0), (-1,-1), 10),
+    ]))
+    elements.append(amber_band)
+    elements.append(Spacer(1, 0.18*inch))
+
+    # ── 3. SIGNATORY INFORMATION ─────────────────────────────────────────────────
+    elements.append(Paragraph('SIGNATORY INFORMATION', styles['section']))
+
+    user_full_name = user.get_full_name() or user.username
+    mobile = getattr(user, 'mobile', None) or 'N/A'
+    email  = user.email or 'N/A'
+
+    def cell_para(label, value):
+        return Paragraph(f'<b>{label}:</b>  {value}', styles['cell'])
+
+    cust_table = Table(
+        [
+            [cell_para('Full Name', user_full_name), cell_para('Mobile', mobile)],
+            [cell_para('Email', email), ''],
+        ],
+        colWidths=[pw/2, pw/2]
+    )
+    cust_table.setStyle(TableStyle([
+        ('BACKGROUND',    (0,0), (-1,-1), light_bg),
+        ('BOX',           (0,0), (-1,-1), 0.75, colors.HexColor('#c0c8d0')),
+        ('TOPPADDING',    (0,0), (-1,-1), 8),
+        ('BOTTOMPADDING', (0,0), (-1,-1), 8),
+        ('LEFTPADDING',   (0,0), (-1,-1), 10),
+        ('RIGHTPADDING',  (0,0), (-1,-1), 10),
+        ('VALIGN',        (0,0), (-1,-1), 'MIDDLE'),
+    ]))
+    elements.append(cust_table)
+    elements.append(Spacer(1, 0.18*inch))
+
+    # ── 4. ACCEPTANCE DETAILS TABLE ──────────────────────────────────────────────
+    elements.append(Paragraph('ACCEPTANCE DETAILS', styles['section']))
+
+    accepted_at_str = accepted_at.strftime('%d %B %Y')
+
+    # OTP info
+    otp_info = 'Yes'
+    if acceptance.otp_verified and acceptance.otp_identifier:
+        otp_info = (f'Yes (Email: {acceptance.otp_identifier})'
+                    if '@' in acceptance.otp_identifier
+                    else f'Yes (Mobile: {acceptance.otp_identifier})')
+    elif not acceptance.otp_verified:
+        otp_info = 'No'
+
+    def th(text):
+        return Paragraph(f'<b>{text}</b>', styles['th'])
+
+    def td(text, style='td'):
+        return Paragraph(str(text), styles[style])
+
+    c1, c2, c3, c4 = pw*0.22, pw*0.28, pw*0.22, pw*0.28
+
+    details_table = Table(
+        [
+            [th('Parameter'), th('Value'), th('Parameter'), th('Value')],
+            [td('Terms Title'),   td(terms.title),
+             td('Version'),       td(terms.version)],
+            [td('Accepted At'),   td(accepted_at_str),
+             td('IP Address'),    td(acceptance.ip_address or 'N/A')],
+            [td('OTP Verified'),  td(otp_info, 'td_value'),
+             td('Signing Method'), td('OTP-Based eSign')],
+            [td('Compliance'),    td('IT Act 2000'),
+             td('RBI Guidelines'), td('DSC Guidelines')],
+        ],
+        colWidths=[c1, c2, c3, c4]
+    )
+    details_table.setStyle(TableStyle([
+        ('BACKGROUND',     (0,0), (-1,0), dark_header),
+        ('TOPPADDING',     (0,0), (-1,0), 8),
+        ('BOTTOMPADDING',  (0,0), (-1,0), 8),
+        ('BACKGROUND',     (0,1), (-1,-1), colors.white),
+        ('ROWBACKGROUNDS', (0,1), (-1,-1), [colors.white, colors.HexColor('#f6f8fa')]),
+        ('TEXTCOLOR',      (0,1), (-1,-1), colors.HexColor('#333333')),
+        ('FONTNAME',       (0,1), (-1,-1), 'Helvetica'),
+        ('FONTSIZE',       (0,1), (-1,-1), 10),
+        ('GRID',           (0,0), (-1,-1), 0.4, colors.HexColor('#d0d0d0')),
+        ('TOPPADDING',     (0,1), (-1,-1), 6),
+        ('BOTTOMPADDING',  (0,1), (-1,-1), 6),
+        ('LEFTPADDING',    (0,0), (-1,-1), 7),
+        ('RIGHTPADDING',   (0,0), (-1,-1), 7),
+        ('VALIGN',         (0,0), (-1,-1), 'MIDDLE'),
+        ('VALIGN',         (0,1), (-1,-1), 'MIDDLE'),
+        ('ALIGN',          (0,0), (-1,-1), 'LEFT'),
+    ]))
+    elements.append(details_table)
+    elements.append(Spacer(1, 0.18*inch))
+
+    # ── 5. DECLARATION ───────────────────────────────────────────────────────────
+    elements.append(Paragraph('DECLARATION', styles['section']))
+
+    decl_text = (
+        f'I, <b>{user_full_name}</b>, hereby declare that I have read, understood, and agree to all '
+        f'terms and conditions of this {terms_name} Terms and Conditions (version {terms.version}), '
+        f'Privacy Policy, and {terms_name} terms. I confirm that all informations are correct. This agreement '
+        f'has been digitally signed using OTP and confirmed by me.'
+    )
+    elements.append(Paragraph(decl_text, styles['declaration']))
+    elements.append(Spacer(1, 0.22*inch))
+
+    # ── 6. DIGITAL SIGNATURE CERTIFICATE ─────────────────────────────────────────
+    timestamp_str = accepted_at.strftime('%d %B %Y')
+
+    def bullet(text):
+        return Paragraph(f'&#x2022; {text}', styles['cert_item'])
+
+    def right_item(text):
+        return Paragraph(text, styles['cert_item'])
+
+    cert_inner = Table(
+        [
+            [bullet(f'Signatory: {user_full_name}'),
+             right_item(f'OTP Verified: &#x2726; ({otp_info})')],
+            [bullet(f'Timestamp: {timestamp_str}'),
+             right_item('Signing Method: OTP-Based eSign')],
+            [bullet(f'IP Address: {acceptance.ip_address or "N/A"}'),
+             right_item('Compliance: IT Act 2000, RBI DSC Guidelines')],
+        ],
+        colWidths=[pw/2, pw/2]
+    )
+    cert_inner.setStyle(TableStyle([
+        ('BACKGROUND',    (0,0), (-1,-1), light_green),
+        ('TOPPADDING',    (0,0), (-1,-1), 5),
+        ('BOTTOMPADDING', (0,0), (-1,-1), 5),
+        ('LEFTPADDING',   (0,0), (-1,-1), 10),
+        ('RIGHTPADDING',  (0,0), (-1,-1), 10),
+        ('VALIGN',        (0,0), (-1,-1), 'MIDDLE'),
+        ('ALIGN',         (0,0), (0,-1), 'LEFT'),
+        ('ALIGN',         (1,0), (1,-1), 'LEFT'),
+    ]))
+
+    # Wrap heading in a table cell to ensure proper background
+    heading_cell = Table(
+        [[Paragraph('&#x2726;  DIGITAL SIGNATURE CERTIFICATE', styles['cert_heading'])]], colWidths=[pw]
+    )
+    heading_cell.setStyle(TableStyle([
+        ('BACKGROUND',    (0,0), (-1,-1), light_green),
+        ('TOPPADDING',    (0,0), (-1,-1), 8),
+        ('BOTTOMPADDING', (0,0), (-1,-1), 4),
+        ('LEFTPADDING',   (0,0), (-1,-1), 10),
+        ('RIGHTPADDING',  (0,0), (-1,-1), 10),
+    ]))
+
+    # Wrap hash in a table cell
+    hash_cell = Table(
+        [[Paragraph(f'<b>SHA-256 Signature Hash:</b><br/>{signature_hash}', styles['hash'])]], colWidths=[pw]
+    )
+    hash_cell.setStyle(TableStyle([
+        ('BACKGROUND',    (0,0), (-1,-1), light_green),
+        ('TOPPADDING',    (0,0), (-1,-1), 4),
+        ('BOTTOMPADDING', (0,0), (-1,-1), 8),
+        ('LEFTPADDING',   (0,0), (-1,-1), 10),
+        ('RIGHTPADDING',  (0,0), (-1,-1), 10),
+    ]))
+
+    cert_outer = Table(
+        [[heading_cell], [cert_inner], [hash_cell]],
+        colWidths=[pw]
+    )
+    cert_outer.setStyle(TableStyle([
+        ('BACKGROUND',    (0,0), (-1,-1), light_green),
+        ('BOX',           (0,0), (-1,-1), 2, green_color),
+        ('TOPPADDING',    (0,0), (-1,-1), 0),
+        ('BOTTOMPADDING', (0,0), (-1,-1), 0),
+        ('LEFTPADDING',   (0,0), (-1,-1), 0),
+        ('RIGHTPADDING',  (0,0), (-1,-1), 0),
+        ('VALIGN',        (0,0), (-1,-1), 'TOP'),
+    ]))
+    elements.append(KeepTogether([cert_outer]))
+
+    doc.build(elements)
+    return buffer.getvalue()
+
+
+def generate_asa_agreement_pdf(user, asa_terms, acceptance, signature_hash=None):
+    """
+    Generate ASA Agreement PDF document (rendered once; the signature hash is
+    computed from the acceptance data, see compute_acceptance_hash).
+
+    Args:
+        user: User instance
+        asa_terms: AsaTerms instance
+        acceptance: UserAsaAcceptance instance
+        signature_hash: Hash to print (default: computed from the acceptance)
+
+    Returns:
+        tuple: (ContentFile, str) - PDF file and SHA256 signature hash
+    """
+    platform_settings = PlatformSettings.get_settings()
+    signature_hash = signature_hash or compute_acceptance_hash(acceptance)
+    pdf_content = _render_acceptance_pdf(
+        user, asa_terms, acceptance, signature_hash,
+        heading='ASA TERMS ACCEPTANCE',
+        company_name=platform_settings.company_name,
+        terms_name='ASA',
+    )
 
     filename = f"asa_agreement_{user.id}_{acceptance.id}_{timezone.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-    return ContentFile(pdf_content, name=filename), pdf_hash
+    return ContentFile(pdf_content, name=filename), signature_hash
 
 
 def generate_payment_terms_receipt_pdf(user, payment_terms, acceptance):
     """
-    Generate Payment Terms Acceptance PDF document.
-    Styled like a professional loan agreement document with:
-    - DIGITALLY SIGNED badge + large title header
-    - Amber/golden company info band
-    - Signatory Information section
-    - Acceptance Details 4-column table
-    - Declaration paragraph
-    - Digital Signature Certificate (green box) with SHA-256 hash
+    Generate Payment Terms Acceptance PDF document (rendered once, with the
+    signature hash of the acceptance data, see compute_acceptance_hash).
 
     Args:
         user: User instance
@@ -444,297 +492,12 @@ def generate_payment_terms_receipt_pdf(user, payment_terms, acceptance):
     Returns:
         ContentFile: PDF file content
     """
-    # Get company information
-    platform_settings = PlatformSettings.get_settings()
-    company_name = "ZUJA INNOVATION PVT LTD"  # Override for this document
-    company_email = platform_settings.company_email
-    company_phone = platform_settings.company_phone
-    company_address = platform_settings.company_address
-
-    # ── Colour palette ───────────────────────────────────────────────────────────
-    green_color = colors.HexColor('#28a745')
-    light_green = colors.HexColor('#d4edda')
-    dark_green  = colors.HexColor('#155724')
-    amber_color = colors.HexColor('#C8A84B')
-    dark_header = colors.HexColor('#1a1a2e')
-    light_bg    = colors.HexColor('#f0f4f8')
-    blue_val    = colors.HexColor('#1a6fc4')
-
-    # Build initial elements (for hash computation)
-    def _build_elements(pdf_hash=None):
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(
-            buffer, pagesize=A4,
-            topMargin=0.55*inch, bottomMargin=0.55*inch,
-            leftMargin=0.75*inch, rightMargin=0.75*inch
-        )
-        elements = []
-        styles = getSampleStyleSheet()
-
-        # Usable page width
-        pw = A4[0] - 1.5*inch  # ~6.77 inches
-
-        # Helper: create a ParagraphStyle on the fly
-        def ps(name, **kw):
-            base = kw.pop('parent', styles['Normal'])
-            return ParagraphStyle(name, parent=base, **kw)
-
-        section_style = ps('SecHead', parent=styles['Heading2'],
-                           fontSize=13, textColor=colors.HexColor('#1a1a1a'),
-                           fontName='Helvetica-Bold', spaceBefore=0, spaceAfter=5)
-
-        # ── 1. TOP HEADER ────────────────────────────────────────────────────────
-        title_para = Paragraph(
-            'PAYMENT TERMS ACCEPTANCE',
-            ps('MainTitle', parent=styles['Heading1'],
-               fontSize=18, textColor=colors.HexColor('#1a1a1a'),
-               fontName='Helvetica-Bold', alignment=TA_CENTER,
-               spaceAfter=8, spaceBefore=0)
-        )
-        elements.append(title_para)
-        elements.append(Spacer(1, 0.12*inch))
-
-        # ── 2. AMBER COMPANY BAND ────────────────────────────────────────────────
-        accepted_at = acceptance.accepted_at
-        accepted_date_str = f"{accepted_at.day}/{accepted_at.month}/{accepted_at.year}"
-
-        amber_data = [
-            [Paragraph(f'<b>{company_name}</b>',
-                       ps('CoName', fontSize=11, textColor=colors.HexColor('#1a1a1a'),
-                          fontName='Helvetica-Bold', alignment=TA_CENTER))],
-            [Paragraph(
-                f'Document ID: {payment_terms.version}  |  Date: {accepted_date_str}',
-                ps('DocId', fontSize=9, textColor=colors.HexColor('#1a1a1a'),
-                   fontName='Helvetica', alignment=TA_CENTER))],
-        ]
-        amber_band = Table(amber_data, colWidths=[pw])
-        amber_band.setStyle(TableStyle([
-            ('BACKGROUND',    (0,0), (-1,-1), amber_color),
-            ('TOPPADDING',    (0,0), (-1,-1), 7),
-            ('BOTTOMPADDING', (0,0), (-1,-1), 7),
-            ('LEFTPADDING',   (0,0), (-1,-1), 10),
-            ('RIGHTPADDING',  (0,0), (-1,-1), 10),
-        ]))
-        elements.append(amber_band)
-        elements.append(Spacer(1, 0.18*inch))
-
-        # ── 3. SIGNATORY INFORMATION ─────────────────────────────────────────────
-        elements.append(Paragraph('SIGNATORY INFORMATION', section_style))
-
-        user_full_name = user.get_full_name() or user.username
-        mobile = getattr(user, 'mobile', None) or 'N/A'
-        email  = user.email or 'N/A'
-
-        def cell_para(label, value):
-            return Paragraph(
-                f'<b>{label}:</b>  {value}',
-                ps(f'ci_{label}', fontSize=10, textColor=colors.HexColor('#333333'),
-                   fontName='Helvetica', leading=14)
-            )
-
-        cust_table = Table(
-            [
-                [cell_para('Full Name', user_full_name), cell_para('Mobile', mobile)],
-                [cell_para('Email', email), ''],
-            ],
-            colWidths=[pw/2, pw/2]
-        )
-        cust_table.setStyle(TableStyle([
-            ('BACKGROUND',    (0,0), (-1,-1), light_bg),
-            ('BOX',           (0,0), (-1,-1), 0.75, colors.HexColor('#c0c8d0')),
-            ('TOPPADDING',    (0,0), (-1,-1), 8),
-            ('BOTTOMPADDING', (0,0), (-1,-1), 8),
-            ('LEFTPADDING',   (0,0), (-1,-1), 10),
-            ('RIGHTPADDING',  (0,0), (-1,-1), 10),
-            ('VALIGN',        (0,0), (-1,-1), 'MIDDLE'),
-        ]))
-        elements.append(cust_table)
-        elements.append(Spacer(1, 0.18*inch))
-
-        # ── 4. ACCEPTANCE DETAILS TABLE ──────────────────────────────────────────
-        elements.append(Paragraph('ACCEPTANCE DETAILS', section_style))
-
-        accepted_at_str = accepted_at.strftime('%d %B %Y')
-
-        # OTP info
-        otp_info = 'Yes'
-        if acceptance.otp_verified and acceptance.otp_identifier:
-            otp_info = (f'Yes (Email: {acceptance.otp_identifier})'
-                        if '@' in acceptance.otp_identifier
-                        else f'Yes (Mobile: {acceptance.otp_identifier})')
-        elif not acceptance.otp_verified:
-            otp_info = 'No'
-
-        def th(text):
-            return Paragraph(
-                f'<b>{text}</b>',
-                ps(f'th_{text[:6]}', fontSize=10, textColor=colors.white,
-                   fontName='Helvetica-Bold', alignment=TA_LEFT)
-            )
-
-        c1, c2, c3, c4 = pw*0.22, pw*0.28, pw*0.22, pw*0.28
-
-        def td(text, color=None):
-            return Paragraph(
-                str(text),
-                ps(f'td_{str(text)[:6]}', fontSize=10, 
-                   textColor=color or colors.HexColor('#333333'),
-                   fontName='Helvetica', alignment=TA_LEFT)
-            )
-
-        details_table = Table(
-            [
-                [th('Parameter'), th('Value'), th('Parameter'), th('Value')],
-                [td('Terms Title'),   td(payment_terms.title),
-                 td('Version'),       td(payment_terms.version)],
-                [td('Accepted At'),   td(accepted_at_str),
-                 td('IP Address'),    td(acceptance.ip_address or 'N/A')],
-                [td('OTP Verified'),  td(otp_info, blue_val),
-                 td('Signing Method'), td('OTP-Based eSign')],
-                [td('Compliance'),    td('IT Act 2000'),
-                 td('RBI Guidelines'), td('DSC Guidelines')],
-            ],
-            colWidths=[c1, c2, c3, c4]
-        )
-        details_table.setStyle(TableStyle([
-            ('BACKGROUND',     (0,0), (-1,0), dark_header),
-            ('TOPPADDING',     (0,0), (-1,0), 8),
-            ('BOTTOMPADDING',  (0,0), (-1,0), 8),
-            ('BACKGROUND',     (0,1), (-1,-1), colors.white),
-            ('ROWBACKGROUNDS', (0,1), (-1,-1), [colors.white, colors.HexColor('#f6f8fa')]),
-            ('TEXTCOLOR',      (0,1), (-1,-1), colors.HexColor('#333333')),
-            ('FONTNAME',       (0,1), (-1,-1), 'Helvetica'),
-            ('FONTSIZE',       (0,1), (-1,-1), 10),
-            ('GRID',           (0,0), (-1,-1), 0.4, colors.HexColor('#d0d0d0')),
-            ('TOPPADDING',     (0,1), (-1,-1), 6),
-            ('BOTTOMPADDING',  (0,1), (-1,-1), 6),
-            ('LEFTPADDING',    (0,0), (-1,-1), 7),
-            ('RIGHTPADDING',   (0,0), (-1,-1), 7),
-            ('VALIGN',         (0,0), (-1,-1), 'MIDDLE'),
-            ('VALIGN',         (0,1), (-1,-1), 'MIDDLE'),
-            ('ALIGN',          (0,0), (-1,-1), 'LEFT'),
-        ]))
-        elements.append(details_table)
-        elements.append(Spacer(1, 0.18*inch))
-
-        # ── 5. DECLARATION ───────────────────────────────────────────────────────
-        elements.append(Paragraph('DECLARATION', section_style))
-
-        decl_text = (
-            f'I, <b>{user_full_name}</b>, hereby declare that I have read, understood, and agree to all '
-            f'terms and conditions of this Payment Terms and Conditions (version {payment_terms.version}), '
-            f'Privacy Policy, and payment terms. I confirm that all informations are correct. This agreement '
-            f'has been digitally signed using OTP and confirmed by me.'
-        )
-        elements.append(Paragraph(
-            decl_text,
-            ps('Decl', fontSize=9, textColor=colors.HexColor('#333333'),
-               fontName='Helvetica', leading=14)
-        ))
-        elements.append(Spacer(1, 0.22*inch))
-
-        # ── 6. DIGITAL SIGNATURE CERTIFICATE (only in final pass) ───────────────
-        if pdf_hash is not None:
-            timestamp_str = accepted_at.strftime('%d %B %Y')
-
-            cert_heading_para = Paragraph(
-                '&#x2726;  DIGITAL SIGNATURE CERTIFICATE',
-                ps('CertHd', parent=styles['Heading2'],
-                   fontSize=12, textColor=dark_green,
-                   fontName='Helvetica-Bold', alignment=TA_CENTER,
-                   spaceBefore=0, spaceAfter=6)
-            )
-
-            def bullet(text):
-                return Paragraph(
-                    f'&#x2022; {text}',
-                    ps(f'bl_{text[:8]}', fontSize=9, textColor=dark_green,
-                       fontName='Helvetica', leading=14)
-                )
-
-            def right_item(text):
-                return Paragraph(
-                    text,
-                    ps(f'ri_{text[:8]}', fontSize=9, textColor=dark_green,
-                       fontName='Helvetica', leading=14)
-                )
-
-            cert_inner = Table(
-                [
-                    [bullet(f'Signatory: {user_full_name}'),
-                     right_item(f'OTP Verified: &#x2726; ({otp_info})')],
-                    [bullet(f'Timestamp: {timestamp_str}'),
-                     right_item('Signing Method: OTP-Based eSign')],
-                    [bullet(f'IP Address: {acceptance.ip_address or "N/A"}'),
-                     right_item('Compliance: IT Act 2000, RBI DSC Guidelines')],
-                ],
-                colWidths=[pw/2, pw/2]
-            )
-            cert_inner.setStyle(TableStyle([
-                ('BACKGROUND',    (0,0), (-1,-1), light_green),
-                ('TOPPADDING',    (0,0), (-1,-1), 5),
-                ('BOTTOMPADDING', (0,0), (-1,-1), 5),
-                ('LEFTPADDING',   (0,0), (-1,-1), 10),
-                ('RIGHTPADDING',  (0,0), (-1,-1), 10),
-                ('VALIGN',        (0,0), (-1,-1), 'MIDDLE'),
-                ('ALIGN',         (0,0), (0,-1), 'LEFT'),
-                ('ALIGN',         (1,0), (1,-1), 'LEFT'),
-            ]))
-
-            hash_para = Paragraph(
-                f'<b>SHA-256 Signature Hash:</b><br/>{pdf_hash}',
-                ps('Hash', fontSize=8, textColor=dark_green,
-                   fontName='Courier', leading=11)
-            )
-
-            # Wrap heading in a table cell to ensure proper background
-            heading_cell = Table([[cert_heading_para]], colWidths=[pw])
-            heading_cell.setStyle(TableStyle([
-                ('BACKGROUND',    (0,0), (-1,-1), light_green),
-                ('TOPPADDING',    (0,0), (-1,-1), 8),
-                ('BOTTOMPADDING', (0,0), (-1,-1), 4),
-                ('LEFTPADDING',   (0,0), (-1,-1), 10),
-                ('RIGHTPADDING',  (0,0), (-1,-1), 10),
-            ]))
-            
-            # Wrap hash in a table cell
-            hash_cell = Table([[hash_para]], colWidths=[pw])
-            hash_cell.setStyle(TableStyle([
-                ('BACKGROUND',    (0,0), (-1,-1), light_green),
-                ('TOPPADDING',    (0,0), (-1,-1), 4),
-                ('BOTTOMPADDING', (0,0), (-1,-1), 8),
-                ('LEFTPADDING',   (0,0), (-1,-1), 10),
-                ('RIGHTPADDING',  (0,0), (-1,-1), 10),
-            ]))
-            
-            cert_outer = Table(
-                [[heading_cell], [cert_inner], [hash_cell]],
-                colWidths=[pw]
-            )
-            cert_outer.setStyle(TableStyle([
-                ('BACKGROUND',    (0,0), (-1,-1), light_green),
-                ('BOX',           (0,0), (-1,-1), 2, green_color),
-                ('TOPPADDING',    (0,0), (-1,-1), 0),
-                ('BOTTOMPADDING', (0,0), (-1,-1), 0),
-                ('LEFTPADDING',   (0,0), (-1,-1), 0),
-                ('RIGHTPADDING',  (0,0), (-1,-1), 0),
-                ('VALIGN',        (0,0), (-1,-1), 'TOP'),
-            ]))
-            elements.append(KeepTogether([cert_outer]))
-
-        doc.build(elements)
-        return buffer
-
-    # ── Pass 1: build without DSC to compute hash ───────────────────────────────
-    buf1 = _build_elements(pdf_hash=None)
-    pdf_hash = compute_pdf_hash(buf1.getvalue())
-    buf1.close()
-
-    # ── Pass 2: rebuild with DSC + hash ─────────────────────────────────────────
-    buf2 = _build_elements(pdf_hash=pdf_hash)
-    pdf_content = buf2.getvalue()
-    buf2.close()
+    pdf_content = _render_acceptance_pdf(
+        user, payment_terms, acceptance, compute_acceptance_hash(acceptance),
+        heading='PAYMENT TERMS ACCEPTANCE',
+        company_name="ZUJA INNOVATION PVT LTD",  # Override for this document
+        terms_name='Payment',
+    )
 
     filename = f"payment_terms_receipt_{user.id}_{acceptance.id}_{timezone.now().strftime('%Y%m%d_%H%M%S')}.pdf"
     return ContentFile(pdf_content, name=filename)
-
@@ -24,8 +24,9 @@ from .serializers import (
 )
 from .utils import (
     get_client_ip, create_user_info_snapshot, create_timeline_data,
-    generate_asa_agreement_pdf, generate_payment_terms_receipt_pdf
+    compute_acceptance_hash, compute_terms_text_hash
 )
+from .tasks import generate_asa_agreement_pdf_task, generate_payment_terms_receipt_pdf_task
 from core.auth.utils import send_otp_dual_channel
 from django.http import FileResponse
 import logging
@@ -33,6 +34,54 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+def _enqueue_pdf_task(task, acceptance_id, terms_id):
+    """
+    Queue an acceptance PDF task once the acceptance is committed
+    A broker failure is logged and does not fail the acceptance; the PDF can be
+    regenerated from the stored acceptance.
+    """
+    def _enqueue():
+        try:
+            task.delay(acceptance_id, terms_id)
+        except Exception as e:
+            logger.error(f"Could not enqueue {task.name} for acceptance {acceptance_id}: {e}", exc_info=True)
+    
+    transaction.on_commit(_enqueue)
+
+
+# Seconds a client should wait before retrying the download of a PDF that is not stored yet
+PDF_RETRY_AFTER = 30
+
+
+def _open_stored_pdf(field_file):
+    """
+    Open a stored acceptance PDF for download
+
+    The file name is saved on the acceptance as soon as the PDF is written, but the
+    media storage may not have the file yet (a media upload still in flight, or a
+    spool directory that is not shared with this server).
+
+    Returns:
+        File: The opened PDF, or None if the storage does not have it (yet)
+    """
+    try:
+        if not field_file.storage.exists(field_file.name):
+            return None
+        return field_file.open('rb')
+    except (FileNotFoundError, OSError) as e:
+        logger.warning(f"Could not open stored PDF {field_file.name}: {e}")
+        return None
+
+
+def _pdf_not_available_response(document):
+    """404 telling the client to retry a PDF download shortly"""
+    return Response(
+        {'error': f'{document} is not available yet. Please try again shortly.'},
+        status=status.HTTP_404_NOT_FOUND,
+        headers={'Retry-After': str(PDF_RETRY_AFTER)}
+    )
+
+
 class ComplianceDocumentViewSet(viewsets.ModelViewSet):
     """
     ViewSet for Compliance Document management
@@ -389,27 +438,23 @@ class AsaTermsViewSet(viewsets.ModelViewSet):
             ip_address = get_client_ip(request)
             user_agent = request.META.get('HTTP_USER_AGENT', '')
             
-            # Create acceptance record and generate PDF
+            # Create acceptance record with its signature hash; the agreement PDF
+            # (which carries the same hash) is rendered by a Celery task after commit
             try:
                 with transaction.atomic():
-                    # Create acceptance record first (without PDF)
                     acceptance = UserAsaAcceptance.objects.create(
                         user=user,
                         terms_version=verified_terms.version,
+                        terms_text_sha256=compute_terms_text_hash(verified_terms),
                         ip_address=ip_address,
                         user_agent=user_agent,
                         otp_verified=True,
                         otp_identifier=otp_identifier,
-                        pdf_hash=''  # Temporary, will be updated
+                        pdf_hash=''  # Set below, the hash covers the acceptance id and timestamp
                     )
-                    
-                    # Generate PDF
-                    pdf_file, pdf_hash = generate_asa_agreement_pdf(user, verified_terms, acceptance)
-                    
-                    # Update acceptance with PDF and hash
-                    acceptance.agreement_pdf_url = pdf_file
-                    acceptance.pdf_hash = pdf_hash
-                    acceptance.save()
+                    acceptance.pdf_hash = compute_acceptance_hash(acceptance)
+                    acceptance.save(update_fields=['pdf_hash'])
+                    _enqueue_pdf_task(generate_asa_agreement_pdf_task, acceptance.id, verified_terms.id)
                 
                 # Return acceptance details
                 acceptance_serializer = UserAsaAcceptanceSerializer(acceptance)
@@ -449,9 +494,13 @@ class AsaTermsViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_404_NOT_FOUND
                 )
             
+            pdf_file = _open_stored_pdf(acceptance.agreement_pdf_url)
+            if pdf_file is None:
+                return _pdf_not_available_response('Agreement PDF')
+            
             # Return PDF file
             return FileResponse(
-                acceptance.agreement_pdf_url.open('rb'),
+                pdf_file,
                 content_type='application/pdf',
                 filename=f"asa_agreement_{acceptance.id}.pdf"
             )
@@ -631,24 +680,16 @@ class PaymentTermsViewSet(viewsets.ModelViewSet):
                     acceptance = UserPaymentAcceptance.objects.create(
                         user=user,
                         payment_terms_version=verified_terms.version,
+                        terms_text_sha256=compute_terms_text_hash(verified_terms),
                         ip_address=ip_address,
                         user_agent=user_agent,
                         otp_verified=True,
                         otp_identifier=otp_identifier
                     )
                     
-                    # Generate PDF if requested
+                    # Generate PDF if requested (in the background, after commit)
                     if generate_pdf:
-                        try:
-                            pdf_file = generate_payment_terms_receipt_pdf(user, verified_terms, acceptance)
-                            acceptance.receipt_pdf_url = pdf_file
-                            acceptance.save()
-                            # Verify file was saved
-                            if not acceptance.receipt_pdf_url:
-                                logger.error(f"PDF file was not saved for acceptance {acceptance.id}")
-                        except Exception as pdf_error:
-                            logger.error(f"Failed to generate payment terms PDF: {str(pdf_error)}", exc_info=True)
-                            # Don't fail the acceptance if PDF generation fails, but log the error
+                        _enqueue_pdf_task(generate_payment_terms_receipt_pdf_task, acceptance.id, verified_terms.id)
                 
                 # Return acceptance details
                 acceptance_serializer = UserPaymentAcceptanceSerializer(acceptance, context={'request': request})
@@ -688,9 +729,13 @@ class PaymentTermsViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_404_NOT_FOUND
                 )
             
+            pdf_file = _open_stored_pdf(acceptance.receipt_pdf_url)
+            if pdf_file is None:
+                return _pdf_not_available_response('Receipt PDF')
+            
             # Return PDF file
             return FileResponse(
-                acceptance.receipt_pdf_url.open('rb'),
+                pdf_file,
                 content_type='application/pdf',
                 filename=f"payment_terms_receipt_{acceptance.id}.pdf"
             )
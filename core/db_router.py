@@ -0,0 +1,157 @@
+"""
+Read-replica routing
+
+Writes always go to the primary ('default'). Reads go to the replica only inside
+use_replica() (report views, dashboards, exports, admin listings) and only while the
+replica is reachable and within REPLICA_MAX_LAG_SECONDS of the primary; otherwise they
+fall back to the primary. Everything else keeps reading from the primary, so the payment
+and commission paths never see replica lag.
+"""
+from contextlib import ContextDecorator
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+REPLICA_DB_ALIAS = 'replica'
+
+# How long a replica health/lag check result is reused before checking again
+REPLICA_CHECK_INTERVAL = 10  # seconds
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+_replica_state = {'checked_at': None, 'usable': False}
+_replica_state_lock = threading.Lock()
+
+
+def replica_configured():
+    """True if a 'replica' database is defined in settings.DATABASES"""
+    return REPLICA_DB_ALIAS in settings.DATABASES
+
+
+def get_replica_lag():
+    """
+    Replication lag of the replica in seconds
+
+    Returns:
+        int | None: Seconds behind the primary; 0 when the database is not a
+        replication replica (e.g. a second local SQLite/MySQL database); None when
+        replication is stopped or broken
+    """
+    connection = connections[REPLICA_DB_ALIAS]
+    with connection.cursor() as cursor:
+        if connection.vendor != 'mysql':
+            cursor.execute('SELECT 1')
+            return 0
+
+        try:
+            cursor.execute('SHOW REPLICA STATUS')
+            lag_column = 'Seconds_Behind_Source'
+        except Exception:
+            # MySQL < 8.0.22
+            cursor.execute('SHOW SLAVE STATUS')
+            lag_column = 'Seconds_Behind_Master'
+
+        row = cursor.fetchone()
+        if row is None:
+            return 0
+        columns = [column[0] for column in cursor.description]
+        return dict(zip(columns, row)).get(lag_column)
+
+
+def replica_is_usable():
+    """
+    True if reads may be served by the replica right now
+    The check result is cached per process for REPLICA_CHECK_INTERVAL seconds.
+    """
+    if not replica_configured():
+        return False
+
+    now = time.monotonic()
+    checked_at = _replica_state['checked_at']
+    if checked_at is not None and now - checked_at < REPLICA_CHECK_INTERVAL:
+        return _replica_state['usable']
+
+    with _replica_state_lock:
+        checked_at = _replica_state['checked_at']
+        if checked_at is not None and now - checked_at < REPLICA_CHECK_INTERVAL:
+            return _replica_state['usable']
+
+        max_lag = getattr(settings, 'REPLICA_MAX_LAG_SECONDS', 30)
+        try:
+            lag = get_replica_lag()
+            usable = lag is not None and lag <= max_lag
+            if not usable:
+                logger.warning(f"Replica lag is {lag}s (max {max_lag}s), reading from primary")
+        except Exception as e:
+            usable = False
+            logger.warning(f"Replica unavailable, reading from primary: {e}")
+
+        _replica_state['checked_at'] = time.monotonic()
+        _replica_state['usable'] = usable
+        return usable
+
+
+def reset_replica_state():
+    """Forget the cached replica check (next read re-checks lag)"""
+    with _replica_state_lock:
+        _replica_state['checked_at'] = None
+        _replica_state['usable'] = False
+
+
+class use_replica(ContextDecorator):
+    """
+    Route reads to the replica for the duration of the block or decorated function
+
+    Only use it around read-only code: anything read here may lag the primary by up to
+    REPLICA_MAX_LAG_SECONDS. Writes inside the block still go to the primary.
+    """
+
+    def _recreate_cm(self):
+        # Fresh instance per decorated call, so concurrent calls don't share a token
+        return use_replica()
+
+    def __enter__(self):
+        self._token = _replica_reads.set(True)
+        return self
+
+    def __exit__(self, *exc):
+        _replica_reads.reset(self._token)
+        return False
+
+
+class ReplicaRouter:
+    """
+    Database router for the primary/replica setup (settings.DATABASE_ROUTERS)
+    """
+
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get() and replica_is_usable():
+            return REPLICA_DB_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        databases = {DEFAULT_DB_ALIAS, REPLICA_DB_ALIAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaReadMixin:
+    """
+    APIView mixin serving safe (GET/HEAD/OPTIONS) requests from the replica
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method in ('GET', 'HEAD', 'OPTIONS'):
+            with use_replica():
+                return super().dispatch(request, *args, **kwargs)
+        return super().dispatch(request, *args, **kwargs)
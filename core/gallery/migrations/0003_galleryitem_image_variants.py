@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gallery', '0002_alter_galleryitem_level'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='galleryitem',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, help_text='Resized WebP/JPEG variants of the image (generated in the background)'),
+        ),
+    ]
@@ -9,6 +9,7 @@ class GalleryItem(models.Model):
     """
     title = models.CharField(max_length=200, help_text='Member name or title')
     image = models.ImageField(upload_to='gallery/images/', help_text='Member photo')
+    image_variants = models.JSONField(default=dict, blank=True, help_text='Resized WebP/JPEG variants of the image (generated in the background)')
     caption = models.TextField(blank=True, help_text='Description or bio')
     level = models.CharField(
         max_length=100,
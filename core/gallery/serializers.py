@@ -1,16 +1,18 @@
 from rest_framework import serializers
+from core.images import image_variant_urls
 from .models import GalleryItem
 
 
 class GalleryItemSerializer(serializers.ModelSerializer):
     """Serializer for Gallery Items with image URL handling"""
     image_url = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
     created_by_username = serializers.SerializerMethodField()
     
     class Meta:
         model = GalleryItem
         fields = (
-            'id', 'title', 'image', 'image_url', 'caption', 'level',
+            'id', 'title', 'image', 'image_url', 'image_variants', 'caption', 'level',
             'order', 'status', 'created_by', 'created_by_username',
             'created_at', 'updated_at'
         )
@@ -25,6 +27,10 @@ class GalleryItemSerializer(serializers.ModelSerializer):
             return obj.image.url
         return None
     
+    def get_image_variants(self, obj):
+        """Return resized image URLs per width and format (None until generated)"""
+        return image_variant_urls(obj, 'image', 'image_variants', self.context.get('request'))
+    
     def get_created_by_username(self, obj):
         """Return username of the user who created this item"""
         if obj.created_by:
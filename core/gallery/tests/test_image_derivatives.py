@@ -0,0 +1,167 @@
+"""
+Tests for the resized image derivatives (core/images.py)
+"""
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest.mock import patch
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from PIL import Image
+from core import images
+from core.gallery.models import GalleryItem
+from core.gallery.serializers import GalleryItemSerializer
+from core.settings import signals
+from core.settings.tasks import generate_image_derivatives_task
+from core.users.models import User
+
+
+def image_bytes(size=(2000, 1000), mode='RGB', fmt='PNG'):
+    buffer = BytesIO()
+    Image.new(mode, size, (200, 30, 30, 128) if mode == 'RGBA' else (200, 30, 30)).save(buffer, fmt)
+    return buffer.getvalue()
+
+
+def upload(name='photo.png', **kwargs):
+    return SimpleUploadedFile(name, image_bytes(**kwargs), content_type='image/png')
+
+
+class RenderDerivativesTest(SimpleTestCase):
+
+    def test_renders_every_width_and_format(self):
+        original_width, rendered = images.render_derivatives(image_bytes(mode='RGBA'))
+
+        self.assertEqual(original_width, 2000)
+        self.assertEqual(set(rendered), {(w, f) for w in (320, 640, 1280) for f in ('webp', 'jpeg')})
+        with Image.open(BytesIO(rendered[(640, 'webp')])) as webp:
+            self.assertEqual((webp.format, webp.size, webp.mode), ('WEBP', (640, 320), 'RGBA'))
+        with Image.open(BytesIO(rendered[(320, 'jpeg')])) as jpeg:
+            self.assertEqual((jpeg.format, jpeg.size, jpeg.mode), ('JPEG', (320, 160), 'RGB'))
+
+    def test_small_images_are_not_upscaled(self):
+        _width, rendered = images.render_derivatives(image_bytes(size=(200, 100)))
+        for content in rendered.values():
+            with Image.open(BytesIO(content)) as variant:
+                self.assertEqual(variant.size, (200, 100))
+
+    def test_batch_on_process_pool_keeps_order_and_reports_bad_images(self):
+        results = images.render_derivatives_batch(
+            [image_bytes(size=(900, 300)), b'not an image', image_bytes(size=(400, 400))], workers=2
+        )
+        self.assertEqual(results[0][0], 900)
+        self.assertIsInstance(results[1], Exception)
+        self.assertEqual(results[2][0], 400)
+
+
+class ImageDerivativesTest(TestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        storage = override_settings(
+            DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage', MEDIA_ROOT=media_root
+        )
+        storage.enable()
+        self.addCleanup(storage.disable)
+
+    def test_upload_queues_derivatives_after_commit(self):
+        with patch.object(signals.generate_image_derivatives_task, 'delay') as delay, \
+                self.captureOnCommitCallbacks(execute=True):
+            item = GalleryItem.objects.create(title='Member', level='Director', image=upload())
+        delay.assert_called_once_with('gallery.GalleryItem', item.pk)
+
+        # Saving without a new image does not queue again
+        item.image_variants = {'source': item.image.name}
+        with patch.object(signals.generate_image_derivatives_task, 'delay') as delay, \
+                self.captureOnCommitCallbacks(execute=True):
+            item.save()
+        delay.assert_not_called()
+
+    def test_task_stores_variants_and_serializer_exposes_urls(self):
+        item = GalleryItem.objects.create(title='Member', level='Director', image=upload())
+        self.assertIsNone(GalleryItemSerializer(item).data['image_variants'])
+
+        generate_image_derivatives_task.apply(args=('gallery.GalleryItem', item.pk))
+        item.refresh_from_db()
+
+        variants = GalleryItemSerializer(item).data['image_variants']
+        self.assertEqual(set(variants), {'320', '640', '1280'})
+        self.assertTrue(variants['640']['webp'].endswith('_w640.webp'))
+        for formats in item.image_variants['sizes'].values():
+            for name in formats.values():
+                self.assertTrue(default_storage.exists(name))
+
+    def test_replaced_image_drops_old_variants(self):
+        item = GalleryItem.objects.create(title='Member', level='Director', image=upload('first.png'))
+        generate_image_derivatives_task.apply(args=('gallery.GalleryItem', item.pk))
+        item.refresh_from_db()
+        old_name = item.image_variants['sizes']['320']['webp']
+
+        item.image = upload('second.png', size=(800, 800))
+        item.save()
+        self.assertIsNone(GalleryItemSerializer(item).data['image_variants'])
+        generate_image_derivatives_task.apply(args=('gallery.GalleryItem', item.pk))
+        item.refresh_from_db()
+
+        self.assertEqual(item.image_variants['width'], 800)
+        self.assertFalse(default_storage.exists(old_name))
+
+    def test_unrenderable_image_is_recorded_and_not_queued_again(self):
+        item = GalleryItem.objects.create(
+            title='Member', level='Director',
+            image=SimpleUploadedFile('broken.png', b'not an image', content_type='image/png'),
+        )
+        generate_image_derivatives_task.apply(args=('gallery.GalleryItem', item.pk))
+        item.refresh_from_db()
+
+        self.assertEqual(item.image_variants['source'], item.image.name)
+        self.assertIn('error', item.image_variants)
+        self.assertIsNone(GalleryItemSerializer(item).data['image_variants'])
+
+        with patch.object(signals.generate_image_derivatives_task, 'delay') as delay, \
+                self.captureOnCommitCallbacks(execute=True):
+            item.save()
+        delay.assert_not_called()
+
+        out = StringIO()
+        call_command('generate_image_derivatives', '--dry-run', '--model', 'gallery.GalleryItem', stdout=out)
+        self.assertIn('gallery.GalleryItem: 0 image(s) to process', out.getvalue())
+
+    def test_backfill_command_records_failures(self):
+        item = GalleryItem.objects.create(
+            title='Member', level='Director',
+            image=SimpleUploadedFile('broken.png', b'not an image', content_type='image/png'),
+        )
+        out = StringIO()
+        call_command('generate_image_derivatives', '--workers', '1', '--model', 'gallery.GalleryItem', stdout=out)
+        self.assertIn('0 image(s), 1 failed', out.getvalue())
+
+        item.refresh_from_db()
+        self.assertIn('error', item.image_variants)
+
+        # Only --force retries it
+        out = StringIO()
+        call_command('generate_image_derivatives', '--dry-run', '--force', '--model', 'gallery.GalleryItem', stdout=out)
+        self.assertIn('gallery.GalleryItem: 1 image(s) to process', out.getvalue())
+
+    def test_backfill_command(self):
+        item = GalleryItem.objects.create(title='Member', level='Director', image=upload())
+        user = User.objects.create_user(username='pic', email='pic@example.com', password='x')
+        user.profile_picture = upload('me.png', size=(600, 600))
+        user.save()
+        User.objects.create_user(username='nopic', email='nopic@example.com', password='x')
+
+        out = StringIO()
+        call_command('generate_image_derivatives', '--workers', '2', stdout=out)
+
+        item.refresh_from_db()
+        user.refresh_from_db()
+        self.assertEqual(item.image_variants['source'], item.image.name)
+        self.assertEqual(user.profile_picture_variants['width'], 600)
+        self.assertIn('Generated derivatives for 2 image(s), 0 failed', out.getvalue())
+
+        out = StringIO()
+        call_command('generate_image_derivatives', '--dry-run', stdout=out)
+        self.assertIn('gallery.GalleryItem: 0 image(s) to process', out.getvalue())
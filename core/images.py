@@ -0,0 +1,238 @@
+"""
+Resized image derivatives
+
+Vehicle images, gallery photos and profile pictures were served at their full upload
+size, so every catalog or gallery card downloaded a multi-megabyte original. When one of
+these images is uploaded, a Celery task (core.settings.tasks.generate_image_derivatives_task)
+renders WebP and JPEG variants at fixed widths (IMAGE_DERIVATIVE_WIDTHS) and stores them
+next to the original under derivatives/. The stored names are recorded on the model
+(IMAGE_SOURCES: image field -> variants field); serializers expose per-size URLs through
+image_variant_urls() and keep the original URL as the fallback while variants are pending.
+
+Existing images are backfilled with `python manage.py generate_image_derivatives`.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+IMAGE_DERIVATIVE_WIDTHS = tuple(getattr(settings, 'IMAGE_DERIVATIVE_WIDTHS', (320, 640, 1280)))
+IMAGE_DERIVATIVE_FORMATS = tuple(getattr(settings, 'IMAGE_DERIVATIVE_FORMATS', ('webp', 'jpeg')))
+IMAGE_DERIVATIVE_QUALITY = getattr(settings, 'IMAGE_DERIVATIVE_QUALITY', 80)
+IMAGE_DERIVATIVE_WORKERS = getattr(settings, 'IMAGE_DERIVATIVE_WORKERS', 4)
+
+# Models with derivatives: model label -> (image field, variants JSON field)
+IMAGE_SOURCES = {
+    'inventory.VehicleImage': ('image', 'image_variants'),
+    'gallery.GalleryItem': ('image', 'image_variants'),
+    'users.User': ('profile_picture', 'profile_picture_variants'),
+}
+
+DERIVATIVE_DIR = 'derivatives'
+
+FORMAT_EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+
+
+def get_image_source(model_label):
+    """
+    Returns:
+        tuple: (model class, image field name, variants field name)
+    """
+    image_field, variants_field = IMAGE_SOURCES[model_label]
+    return apps.get_model(model_label), image_field, variants_field
+
+
+def derivative_name(source_name, width, fmt):
+    """
+    Storage name of a derivative, e.g. vehicles/images/a.png ->
+    derivatives/vehicles/images/a_w640.webp
+    """
+    stem = os.path.splitext(source_name)[0]
+    return f"{DERIVATIVE_DIR}/{stem}_w{width}.{FORMAT_EXTENSIONS[fmt]}"
+
+
+def render_derivatives(data, widths=None, formats=None, quality=None):
+    """
+    Render resized variants of an image (pure function, safe to run in a process pool)
+
+    Images are never upscaled: a width larger than the original is rendered at the
+    original width, so every width is always available.
+
+    Args:
+        data (bytes): Original image file content
+        widths: Target widths (default: IMAGE_DERIVATIVE_WIDTHS)
+        formats: Output formats, 'webp' and/or 'jpeg' (default: IMAGE_DERIVATIVE_FORMATS)
+        quality (int): Encoder quality (default: IMAGE_DERIVATIVE_QUALITY)
+
+    Returns:
+        tuple: (original width, {(width, format): bytes})
+    """
+    widths = widths or IMAGE_DERIVATIVE_WIDTHS
+    formats = formats or IMAGE_DERIVATIVE_FORMATS
+    quality = quality or IMAGE_DERIVATIVE_QUALITY
+
+    with Image.open(BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original)
+        image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+
+    # JPEG has no alpha channel: flatten onto white
+    if image.mode == 'RGBA':
+        flat = Image.new('RGB', image.size, (255, 255, 255))
+        flat.paste(image, mask=image.getchannel('A'))
+    else:
+        flat = image
+
+    rendered = {}
+    for width in sorted(set(widths)):
+        target = min(width, image.width)
+        height = max(1, round(image.height * target / image.width))
+        for fmt in formats:
+            source = image if fmt == 'webp' else flat
+            resized = source if target == image.width else source.resize((target, height), Image.LANCZOS)
+            buffer = BytesIO()
+            if fmt == 'webp':
+                resized.save(buffer, 'WEBP', quality=quality, method=4)
+            else:
+                resized.save(buffer, 'JPEG', quality=quality, optimize=True, progressive=True)
+            rendered[(width, fmt)] = buffer.getvalue()
+    return image.width, rendered
+
+
+def _render_job(data):
+    try:
+        return render_derivatives(data)
+    except Exception as e:
+        return e
+
+
+def render_derivatives_batch(images, workers=None):
+    """
+    Render derivatives for several images on a process pool
+
+    Args:
+        images (list): Original image contents (bytes)
+        workers (int): Pool size (default: IMAGE_DERIVATIVE_WORKERS, 1 = in this process)
+
+    Returns:
+        list: render_derivatives() result per image, in order (the exception for an
+        image that could not be decoded)
+    """
+    workers = IMAGE_DERIVATIVE_WORKERS if workers is None else workers
+    if workers <= 1 or len(images) <= 1:
+        return [_render_job(data) for data in images]
+    with ProcessPoolExecutor(max_workers=min(workers, len(images))) as executor:
+        return list(executor.map(_render_job, images))
+
+
+def needs_derivatives(instance, image_field, variants_field):
+    """
+    Whether the instance has an image whose derivatives are missing or stale
+    (an image whose derivatives failed is not retried until it is replaced)
+    """
+    image = getattr(instance, image_field)
+    if not image:
+        return False
+    variants = getattr(instance, variants_field) or {}
+    return variants.get('source') != image.name
+
+
+def store_derivatives(instance, image_field, variants_field, original_width, rendered):
+    """
+    Save rendered derivatives and record them on the instance
+
+    Derivatives of a previous image are deleted. The variants field is written with
+    an update(), so recording it does not trigger post_save (and another task).
+
+    Returns:
+        dict: Stored variants, {'source', 'width', 'sizes': {width: {format: name}}}
+    """
+    source_name = getattr(instance, image_field).name
+    storage = getattr(instance, image_field).storage
+    previous = getattr(instance, variants_field) or {}
+
+    sizes = {}
+    for (width, fmt), content in rendered.items():
+        name = derivative_name(source_name, width, fmt)
+        if storage.exists(name):
+            storage.delete(name)
+        sizes.setdefault(str(width), {})[fmt] = storage.save(name, ContentFile(content))
+
+    variants = {'source': source_name, 'width': original_width, 'sizes': sizes}
+    # No-op if the image was replaced meanwhile; its own task records its variants
+    type(instance).objects.filter(pk=instance.pk, **{image_field: source_name}).update(**{variants_field: variants})
+    setattr(instance, variants_field, variants)
+
+    stored = {name for formats in sizes.values() for name in formats.values()}
+    for formats in (previous.get('sizes') or {}).values():
+        for name in formats.values():
+            if name not in stored:
+                try:
+                    storage.delete(name)
+                except Exception as e:
+                    logger.warning(f"Could not delete old image derivative {name}: {e}")
+    return variants
+
+
+def record_derivative_failure(instance, image_field, variants_field, error):
+    """
+    Record that the derivatives of the instance's current image could not be generated
+
+    Stored as {'source', 'error'} so needs_derivatives() is False for this image and
+    later saves of the instance do not queue it again; replacing the image (or
+    generate_image_derivatives --force) retries. Written with an update(), like
+    store_derivatives.
+
+    Returns:
+        dict: The recorded variants value
+    """
+    source_name = getattr(instance, image_field).name
+    variants = {'source': source_name, 'error': str(error)[:500] or type(error).__name__}
+    type(instance).objects.filter(pk=instance.pk, **{image_field: source_name}).update(**{variants_field: variants})
+    setattr(instance, variants_field, variants)
+    return variants
+
+
+def generate_derivatives(instance, image_field, variants_field):
+    """
+    Render and store the derivatives of one instance's image
+
+    Returns:
+        dict: Stored variants (see store_derivatives)
+    """
+    image = getattr(instance, image_field)
+    with image.open('rb') as source:
+        data = source.read()
+    original_width, rendered = render_derivatives(data)
+    return store_derivatives(instance, image_field, variants_field, original_width, rendered)
+
+
+def image_variant_urls(instance, image_field, variants_field, request=None):
+    """
+    Per-size URLs of an instance's image derivatives, for serializers
+
+    Returns:
+        dict or None: {width: {format: url}}, e.g. {'320': {'webp': ..., 'jpeg': ...}};
+        None while the derivatives of the current image have not been generated, or
+        could not be (clients then use the original image URL)
+    """
+    image = getattr(instance, image_field)
+    variants = getattr(instance, variants_field) or {}
+    if not image or variants.get('source') != image.name or 'error' in variants:
+        return None
+
+    storage = image.storage
+    urls = {}
+    for width, formats in variants.get('sizes', {}).items():
+        urls[width] = {}
+        for fmt, name in formats.items():
+            url = storage.url(name)
+            urls[width][fmt] = request.build_absolute_uri(url) if request else url
+    return urls
@@ -0,0 +1,191 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+from core.booking.models import Booking
+from core.inventory.models import StockReservation, Vehicle, VehicleStock
+from core.inventory.utils import create_reservation
+from core.users.models import User
+import queue
+import threading
+import time
+import uuid
+
+
+def legacy_create_reservation(booking, vehicle, quantity=1):
+    """
+    The previous read-check-save reservation path, kept here for comparison:
+    the stock is read, checked in Python and saved back with the decremented value
+    """
+    vehicle_stock = VehicleStock.objects.get(vehicle=vehicle)
+    if vehicle_stock.available_quantity < quantity:
+        raise ValueError(f"Insufficient stock. Available: {vehicle_stock.available_quantity}, Required: {quantity}")
+    vehicle_stock.available_quantity -= quantity
+    vehicle_stock.save(update_fields=['available_quantity', 'updated_at'])
+    return StockReservation.objects.create(
+        booking=booking,
+        vehicle=vehicle,
+        vehicle_stock=vehicle_stock,
+        quantity=quantity,
+        status='reserved',
+    )
+
+
+RESERVATION_MODES = {
+    'atomic': create_reservation,
+    'legacy': legacy_create_reservation,
+}
+
+
+class Command(BaseCommand):
+    """
+    Fire many simultaneous bookings at one vehicle variant and check the stock
+    afterwards (launch-day contention):
+    - atomic: create_reservation() (conditional UPDATE, see VehicleStock.reserve)
+    - legacy: the previous read-check-save path, which can oversell
+
+    A throwaway vehicle, stock row and bookings are created for the run and deleted
+    afterwards. Run it against the production database engine (MySQL); SQLite
+    serializes writers, so its timings are not representative.
+    """
+
+    help = "Benchmark concurrent stock reservations on a single vehicle variant."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bookings', type=int, default=500, help='Simultaneous bookings (default: 500)')
+        parser.add_argument('--stock', type=int, default=100, help='Units in stock (default: 100)')
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=100,
+            help='Threads (database connections) booking at once (default: 100, 1 = in this thread)',
+        )
+        parser.add_argument('--mode', choices=['atomic', 'legacy', 'both'], default='atomic')
+
+    def handle(self, *args, **options):
+        bookings_count = max(1, options['bookings'])
+        stock = max(0, options['stock'])
+        concurrency = max(1, options['concurrency'])
+        modes = ['legacy', 'atomic'] if options['mode'] == 'both' else [options['mode']]
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"Stock reservation benchmark: {bookings_count} bookings, {stock} in stock, "
+            f"{concurrency} concurrent ({connection.vendor})"
+        ))
+
+        user, vehicle, vehicle_stock, bookings = self._setup(bookings_count, stock)
+        try:
+            oversold = False
+            for mode in modes:
+                StockReservation.objects.filter(vehicle=vehicle).delete()
+                VehicleStock.objects.filter(pk=vehicle_stock.pk).update(
+                    total_quantity=stock, available_quantity=stock
+                )
+                oversold |= self._run(mode, vehicle, bookings, stock, concurrency)
+        finally:
+            StockReservation.objects.filter(vehicle=vehicle).delete()
+            Booking.objects.filter(vehicle_model=vehicle).delete()
+            vehicle.delete()
+            user.delete()
+
+        if oversold:
+            self.stdout.write(self.style.WARNING("Stock was oversold in at least one run"))
+
+    def _setup(self, bookings_count, stock):
+        """Create the throwaway user, vehicle, stock row and pending bookings"""
+        tag = uuid.uuid4().hex[:8].upper()
+        with transaction.atomic():
+            user = User.objects.create_user(
+                username=f'stock-benchmark-{tag}', email=f'stock-benchmark-{tag}@example.com', password=None
+            )
+            vehicle = Vehicle.objects.create(
+                name=f'Stock Benchmark {tag}', model_code=f'BENCH{tag}', price=Decimal('100000')
+            )
+            vehicle_stock = VehicleStock.objects.create(
+                vehicle=vehicle, total_quantity=stock, available_quantity=stock
+            )
+            # bulk_create skips Booking.save(), so set what it would fill in
+            expires_at = timezone.now() + timedelta(days=30)
+            bookings = Booking.objects.bulk_create([
+                Booking(
+                    user=user,
+                    vehicle_model=vehicle,
+                    booking_number=f'BENCH{tag}{index:06d}',
+                    booking_amount=Decimal('5000'),
+                    total_amount=Decimal('100000'),
+                    remaining_amount=Decimal('100000'),
+                    expires_at=expires_at,
+                )
+                for index in range(bookings_count)
+            ])
+        if not all(booking.pk for booking in bookings):
+            # Backends without RETURNING on bulk inserts (MySQL)
+            bookings = list(Booking.objects.filter(vehicle_model=vehicle).order_by('pk'))
+        return user, vehicle, vehicle_stock, bookings
+
+    def _run(self, mode, vehicle, bookings, stock, concurrency):
+        """Book every booking at once; returns True if the stock was oversold"""
+        reserve = RESERVATION_MODES[mode]
+        jobs = queue.Queue()
+        for booking in bookings:
+            jobs.put(booking)
+
+        results = {'reserved': 0, 'rejected': 0, 'errors': 0}
+        latencies = []
+        lock = threading.Lock()
+        start = threading.Event()
+
+        def worker(own_connection):
+            start.wait()
+            try:
+                while True:
+                    try:
+                        booking = jobs.get_nowait()
+                    except queue.Empty:
+                        return
+                    started = time.perf_counter()
+                    try:
+                        reserve(booking, vehicle)
+                        outcome = 'reserved'
+                    except ValueError:
+                        outcome = 'rejected'
+                    except Exception:
+                        outcome = 'errors'
+                    elapsed = time.perf_counter() - started
+                    with lock:
+                        results[outcome] += 1
+                        latencies.append(elapsed)
+            finally:
+                if own_connection:
+                    connection.close()
+
+        threads = []
+        if concurrency > 1:
+            threads = [threading.Thread(target=worker, args=(True,)) for _ in range(min(concurrency, len(bookings)))]
+            for thread in threads:
+                thread.start()
+        started = time.perf_counter()
+        start.set()
+        if not threads:
+            worker(False)
+        for thread in threads:
+            thread.join()
+        seconds = time.perf_counter() - started
+
+        available = VehicleStock.objects.get(vehicle=vehicle).available_quantity
+        reservations = StockReservation.objects.filter(vehicle=vehicle, status='reserved').count()
+        oversold = reservations > stock or available < 0 or available + reservations != stock
+
+        latencies.sort()
+        p50 = latencies[len(latencies) // 2] * 1000
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000
+
+        self.stdout.write(
+            f"  {mode:<7} reserved: {results['reserved']}, rejected: {results['rejected']}, "
+            f"errors: {results['errors']}  {seconds:7.2f}s  {len(bookings) / seconds:8.1f} bookings/s  "
+            f"p50 {p50:.1f}ms  p95 {p95:.1f}ms"
+        )
+        summary = f"          reservations: {reservations}, available after: {available} (stock {stock})"
+        self.stdout.write(self.style.ERROR(summary + "  OVERSOLD") if oversold else self.style.SUCCESS(summary))
+        return oversold
@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Least
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 import random
@@ -193,6 +194,7 @@ class VehicleImage(models.Model):
     """
     vehicle = models.ForeignKey(Vehicle, on_delete=models.CASCADE, null=True, blank=True, related_name='images')
     image = models.ImageField(upload_to='vehicles/images/')
+    image_variants = models.JSONField(default=dict, blank=True, help_text='Resized WebP/JPEG variants of the image (generated in the background)')
     is_primary = models.BooleanField(default=False, help_text='Set as primary/featured image')
     alt_text = models.CharField(max_length=200, blank=True, help_text='Alternative text for image')
     order = models.IntegerField(default=0, help_text='Display order')
@@ -248,25 +250,35 @@ class VehicleStock(models.Model):
         """
         Reserve quantity from available stock
         Returns True if successful, False if insufficient stock
+
+        The check and the decrement are one conditional UPDATE
+        (available_quantity >= quantity), so concurrent bookings cannot oversell
+        and no row lock is held while the caller decides. Success is the affected
+        row count, not this instance's (possibly stale) available_quantity.
         """
-        if self.available_quantity < quantity:
-            return False
-        
-        self.available_quantity -= quantity
-        self.save(update_fields=['available_quantity', 'updated_at'])
-        return True
+        reserved = VehicleStock.objects.filter(
+            pk=self.pk, available_quantity__gte=quantity
+        ).update(
+            available_quantity=models.F('available_quantity') - quantity,
+            updated_at=timezone.now(),
+        )
+        self.refresh_from_db(fields=['available_quantity', 'updated_at'])
+        return reserved == 1
     
     def release(self, quantity=1):
         """
         Release quantity back to available stock
+
+        One UPDATE, capped at total_quantity in the database so concurrent
+        releases cannot push available stock above the total.
         """
-        if self.available_quantity + quantity > self.total_quantity:
-            # Don't exceed total_quantity
-            self.available_quantity = self.total_quantity
-        else:
-            self.available_quantity += quantity
-        
-        self.save(update_fields=['available_quantity', 'updated_at'])
+        VehicleStock.objects.filter(pk=self.pk).update(
+            available_quantity=Least(
+                models.F('available_quantity') + quantity, models.F('total_quantity')
+            ),
+            updated_at=timezone.now(),
+        )
+        self.refresh_from_db(fields=['available_quantity', 'updated_at'])
     
     def complete(self, quantity=1):
         """
@@ -342,13 +354,21 @@ class StockReservation(models.Model):
     def release(self):
         """
         Release the reserved stock back to available inventory
+
+        The status change is claimed with a conditional UPDATE first, so when the
+        expiry task and a cancellation release the same reservation concurrently
+        the stock is only given back once.
         """
         if self.status == 'released':
             return  # Already released
         
-        self.vehicle_stock.release(quantity=self.quantity)
+        with transaction.atomic():
+            claimed = StockReservation.objects.filter(pk=self.pk).exclude(status='released').update(
+                status='released', updated_at=timezone.now()
+            )
+            if claimed:
+                self.vehicle_stock.release(quantity=self.quantity)
         self.status = 'released'
-        self.save(update_fields=['status', 'updated_at'])
     
     def complete(self):
         """
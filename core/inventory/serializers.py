@@ -3,18 +3,51 @@ import json
 import logging
 import traceback
 from django.db import models as django_models
+from core.images import image_variant_urls
 from .models import Vehicle, VehicleImage, VehicleStock
 
 logger = logging.getLogger(__name__)
 
 
+def get_primary_image(vehicle):
+    """
+    A vehicle's primary (or first) image, picked once from vehicle.images.all() so a
+    prefetch_related('images') is used and the URL and variants getters share it
+    """
+    if not hasattr(vehicle, '_primary_image'):
+        images = list(vehicle.images.all())
+        vehicle._primary_image = next(
+            (image for image in images if image.is_primary), images[0] if images else None
+        )
+    return vehicle._primary_image
+
+
+def get_primary_image_url(vehicle, request=None):
+    """URL of a vehicle's primary (or first) image"""
+    image = get_primary_image(vehicle)
+    if image and image.image:
+        if request:
+            return request.build_absolute_uri(image.image.url)
+        return image.image.url
+    return None
+
+
+def get_primary_image_variants(vehicle, request=None):
+    """Resized URLs of a vehicle's primary (or first) image, for catalog cards"""
+    image = get_primary_image(vehicle)
+    if image:
+        return image_variant_urls(image, 'image', 'image_variants', request)
+    return None
+
+
 class VehicleImageSerializer(serializers.ModelSerializer):
     """Serializer for vehicle images"""
     image_url = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
     
     class Meta:
         model = VehicleImage
-        fields = ('id', 'image', 'image_url', 'is_primary', 'alt_text', 'order', 'vehicle', 'created_at')
+        fields = ('id', 'image', 'image_url', 'image_variants', 'is_primary', 'alt_text', 'order', 'vehicle', 'created_at')
         read_only_fields = ('created_at', 'updated_at', 'vehicle')
     
     def get_image_url(self, obj):
@@ -25,15 +58,20 @@ class VehicleImageSerializer(serializers.ModelSerializer):
                 return request.build_absolute_uri(obj.image.url)
             return obj.image.url
         return None
+    
+    def get_image_variants(self, obj):
+        """Return resized image URLs per width and format (None until generated)"""
+        return image_variant_urls(obj, 'image', 'image_variants', self.context.get('request'))
 
 
 class ImageUploadSerializer(serializers.ModelSerializer):
     """Serializer for independent image uploads (without vehicle association)"""
     image_url = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
     
     class Meta:
         model = VehicleImage
-        fields = ('id', 'image_url', 'created_at')
+        fields = ('id', 'image_url', 'image_variants', 'created_at')
         read_only_fields = ('id', 'created_at')
     
     def get_image_url(self, obj):
@@ -44,6 +82,10 @@ class ImageUploadSerializer(serializers.ModelSerializer):
                 return request.build_absolute_uri(obj.image.url)
             return obj.image.url
         return None
+    
+    def get_image_variants(self, obj):
+        """Return resized image URLs per width and format (None until generated)"""
+        return image_variant_urls(obj, 'image', 'image_variants', self.context.get('request'))
 
 
 class CustomFileField(serializers.FileField):
@@ -66,6 +108,7 @@ class VehicleSerializer(serializers.ModelSerializer):
     """Serializer for Vehicle with image support via image IDs"""
     images = VehicleImageSerializer(many=True, read_only=True)
     primary_image_url = serializers.SerializerMethodField()
+    primary_image_variants = serializers.SerializerMethodField()
     image_ids = serializers.ListField(
         child=serializers.IntegerField(),
         required=False,
@@ -114,7 +157,7 @@ class VehicleSerializer(serializers.ModelSerializer):
         fields = (
             'id', 'name', 'model_code', 'vehicle_color', 'battery_variant',
             'price', 'status', 'description', 'features', 'specifications',
-            'images', 'image_ids', 'color_images', 'primary_image_url', 'initial_quantity', 'battery_pricing', 'stock_quantity',
+            'images', 'image_ids', 'color_images', 'primary_image_url', 'primary_image_variants', 'initial_quantity', 'battery_pricing', 'stock_quantity',
             'stock_total_quantity', 'stock_available_quantity', 'stock_reserved_quantity',
             'is_already_booked', 'created_at', 'updated_at'
         )
@@ -125,21 +168,12 @@ class VehicleSerializer(serializers.ModelSerializer):
         }
     
     def get_primary_image_url(self, obj):
-        """Return URL of primary image if exists"""
-        primary_image = obj.images.filter(is_primary=True).first()
-        if primary_image:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(primary_image.image.url)
-            return primary_image.image.url
-        # If no primary, return first image
-        first_image = obj.images.first()
-        if first_image:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(first_image.image.url)
-            return first_image.image.url
-        return None
+        """Return URL of primary image if exists (first image otherwise)"""
+        return get_primary_image_url(obj, self.context.get('request'))
+    
+    def get_primary_image_variants(self, obj):
+        """Return resized URLs of the primary image (None until generated)"""
+        return get_primary_image_variants(obj, self.context.get('request'))
     
     def get_stock_total_quantity(self, obj):
         """Return total stock quantity"""
@@ -856,6 +890,7 @@ class VehicleSerializer(serializers.ModelSerializer):
 class VehicleListSerializer(serializers.ModelSerializer):
     """Lightweight serializer for vehicle listing"""
     primary_image_url = serializers.SerializerMethodField()
+    primary_image_variants = serializers.SerializerMethodField()
     image_count = serializers.SerializerMethodField()
     stock_total_quantity = serializers.SerializerMethodField()
     stock_available_quantity = serializers.SerializerMethodField()
@@ -866,27 +901,19 @@ class VehicleListSerializer(serializers.ModelSerializer):
         fields = (
             'id', 'name', 'model_code', 'vehicle_color', 'battery_variant',
             'price', 'status', 'features', 'specifications',
-            'primary_image_url', 'image_count',
+            'primary_image_url', 'primary_image_variants', 'image_count',
             'stock_total_quantity', 'stock_available_quantity', 'stock_reserved_quantity',
             'created_at'
         )
         read_only_fields = ('model_code',)
     
     def get_primary_image_url(self, obj):
-        """Return URL of primary image if exists"""
-        primary_image = obj.images.filter(is_primary=True).first()
-        if primary_image:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(primary_image.image.url)
-            return primary_image.image.url
-        first_image = obj.images.first()
-        if first_image:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(first_image.image.url)
-            return first_image.image.url
-        return None
+        """Return URL of primary image if exists (first image otherwise)"""
+        return get_primary_image_url(obj, self.context.get('request'))
+    
+    def get_primary_image_variants(self, obj):
+        """Return resized URLs of the primary image (None until generated)"""
+        return get_primary_image_variants(obj, self.context.get('request'))
     
     def get_image_count(self, obj):
         """Return total number of images"""
@@ -920,6 +947,7 @@ class VehicleListSerializer(serializers.ModelSerializer):
 class VehicleVariantSerializer(serializers.ModelSerializer):
     """Serializer for individual vehicle variant in grouped response"""
     primary_image_url = serializers.SerializerMethodField()
+    primary_image_variants = serializers.SerializerMethodField()
     image_count = serializers.SerializerMethodField()
     images = serializers.SerializerMethodField()
     stock_total_quantity = serializers.SerializerMethodField()
@@ -931,27 +959,19 @@ class VehicleVariantSerializer(serializers.ModelSerializer):
         model = Vehicle
         fields = (
             'id', 'model_code', 'vehicle_color', 'battery_variant',
-            'price', 'status', 'primary_image_url', 'image_count', 'images',
+            'price', 'status', 'primary_image_url', 'primary_image_variants', 'image_count', 'images',
             'stock_total_quantity', 'stock_available_quantity', 'stock_reserved_quantity',
             'is_already_booked', 'created_at'
         )
         read_only_fields = ('model_code',)
     
     def get_primary_image_url(self, obj):
-        """Return URL of primary image if exists"""
-        primary_image = obj.images.filter(is_primary=True).first()
-        if primary_image:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(primary_image.image.url)
-            return primary_image.image.url
-        first_image = obj.images.first()
-        if first_image:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(first_image.image.url)
-            return first_image.image.url
-        return None
+        """Return URL of primary image if exists (first image otherwise)"""
+        return get_primary_image_url(obj, self.context.get('request'))
+    
+    def get_primary_image_variants(self, obj):
+        """Return resized URLs of the primary image (None until generated)"""
+        return get_primary_image_variants(obj, self.context.get('request'))
     
     def get_image_count(self, obj):
         """Return total number of images"""
@@ -1006,6 +1026,7 @@ class VehicleVariantSerializer(serializers.ModelSerializer):
                     result.append({
                         'id': img.id,
                         'image_url': image_url,
+                        'image_variants': image_variant_urls(img, 'image', 'image_variants', request),
                         'is_primary': img.is_primary,
                         'alt_text': img.alt_text or '',
                         'order': img.order
@@ -1231,21 +1252,9 @@ class VehicleStockSerializer(serializers.ModelSerializer):
         return {}
     
     def get_primary_image_url(self, obj):
-        """Return URL of primary image if exists"""
+        """Return URL of primary image if exists (first image otherwise)"""
         if hasattr(obj, 'vehicle') and obj.vehicle:
-            primary_image = obj.vehicle.images.filter(is_primary=True).first()
-            if primary_image:
-                request = self.context.get('request')
-                if request:
-                    return request.build_absolute_uri(primary_image.image.url)
-                return primary_image.image.url
-            # If no primary, return first image
-            first_image = obj.vehicle.images.first()
-            if first_image:
-                request = self.context.get('request')
-                if request:
-                    return request.build_absolute_uri(first_image.image.url)
-                return first_image.image.url
+            return get_primary_image_url(obj.vehicle, self.context.get('request'))
         return None
     
     def get_images(self, obj):
@@ -1275,6 +1284,7 @@ class VehicleStockSerializer(serializers.ModelSerializer):
                     result.append({
                         'id': img.id,
                         'image_url': image_url,
+                        'image_variants': image_variant_urls(img, 'image', 'image_variants', request),
                         'is_primary': img.is_primary,
                         'alt_text': img.alt_text or '',
                         'order': img.order
@@ -0,0 +1,54 @@
+"""
+Tests for the vehicle primary image helpers used by the catalog serializers
+"""
+import shutil
+import tempfile
+from decimal import Decimal
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from core.inventory.models import Vehicle, VehicleImage
+from core.inventory.serializers import get_primary_image_url, get_primary_image_variants
+
+
+class PrimaryImageTest(TestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        storage = override_settings(
+            DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage', MEDIA_ROOT=media_root
+        )
+        storage.enable()
+        self.addCleanup(storage.disable)
+
+        self.vehicle = Vehicle.objects.create(name='EV One', model_code='EV1', price=Decimal('100000'))
+        VehicleImage.objects.create(vehicle=self.vehicle, image=self._file('side.png'), order=0)
+        self.primary = VehicleImage.objects.create(
+            vehicle=self.vehicle, image=self._file('front.png'), is_primary=True, order=1,
+            image_variants={'source': '', 'width': 640, 'sizes': {'640': {'webp': 'derivatives/front_w640.webp'}}},
+        )
+        VehicleImage.objects.filter(pk=self.primary.pk).update(
+            image_variants={**self.primary.image_variants, 'source': self.primary.image.name}
+        )
+
+    def _file(self, name):
+        return SimpleUploadedFile(name, b'image', content_type='image/png')
+
+    def test_uses_prefetched_images(self):
+        vehicle = Vehicle.objects.prefetch_related('images').get(pk=self.vehicle.pk)
+
+        with self.assertNumQueries(0):
+            url = get_primary_image_url(vehicle)
+            variants = get_primary_image_variants(vehicle)
+
+        self.assertEqual(url, VehicleImage.objects.get(pk=self.primary.pk).image.url)
+        self.assertEqual(list(variants), ['640'])
+
+    def test_first_image_without_primary(self):
+        VehicleImage.objects.filter(pk=self.primary.pk).update(is_primary=False)
+        vehicle = Vehicle.objects.get(pk=self.vehicle.pk)
+
+        with self.assertNumQueries(1):
+            self.assertTrue(get_primary_image_url(vehicle).endswith('.png'))
+            self.assertIsNone(get_primary_image_variants(vehicle))
+        self.assertIn('side', get_primary_image_url(vehicle))
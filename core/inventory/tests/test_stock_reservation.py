@@ -0,0 +1,119 @@
+"""
+Tests for conditional stock reservation (VehicleStock.reserve/release, create_reservation)
+"""
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.test import TestCase, override_settings
+from core.booking.models import Booking
+from core.inventory.models import StockReservation, Vehicle, VehicleStock
+from core.inventory.utils import create_reservation
+from core.users.models import User
+
+
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'stock-reservation-tests',
+    }
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class StockReservationTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='buyer', email='buyer@example.com', password='x')
+        self.vehicle = Vehicle.objects.create(name='EV One', model_code='EV1', price=Decimal('100000'))
+        self.stock = VehicleStock.objects.create(vehicle=self.vehicle, total_quantity=2, available_quantity=2)
+
+    def book(self):
+        return Booking.objects.create(
+            user=self.user,
+            vehicle_model=self.vehicle,
+            booking_amount=Decimal('5000'),
+            total_amount=Decimal('100000'),
+        )
+
+    def test_reserve_stops_at_zero(self):
+        self.assertTrue(self.stock.reserve())
+        self.assertTrue(self.stock.reserve())
+        self.assertFalse(self.stock.reserve())
+        self.assertEqual(self.stock.available_quantity, 0)
+
+        self.stock.refresh_from_db()
+        self.assertEqual(self.stock.available_quantity, 0)
+
+    def test_stale_instance_cannot_oversell(self):
+        stale = VehicleStock.objects.get(pk=self.stock.pk)
+        # Another booking takes the last units after `stale` was read
+        VehicleStock.objects.filter(pk=self.stock.pk).update(available_quantity=0)
+
+        self.assertEqual(stale.available_quantity, 2)
+        self.assertFalse(stale.reserve())
+        self.assertEqual(stale.available_quantity, 0)
+
+    def test_stale_instance_does_not_lose_updates(self):
+        first = VehicleStock.objects.get(pk=self.stock.pk)
+        second = VehicleStock.objects.get(pk=self.stock.pk)
+
+        self.assertTrue(first.reserve())
+        self.assertTrue(second.reserve())
+        self.stock.refresh_from_db()
+        self.assertEqual(self.stock.available_quantity, 0)
+
+    def test_release_is_capped_at_total(self):
+        self.stock.reserve()
+        stale = VehicleStock.objects.get(pk=self.stock.pk)
+        self.stock.release()
+
+        stale.release()
+        self.assertEqual(stale.available_quantity, 2)
+
+    def test_create_reservation_raises_when_out_of_stock(self):
+        create_reservation(self.book(), self.vehicle)
+        create_reservation(self.book(), self.vehicle)
+
+        with self.assertRaisesMessage(ValueError, 'Insufficient stock. Available: 0, Required: 1'):
+            create_reservation(self.book(), self.vehicle)
+        self.assertEqual(StockReservation.objects.count(), 2)
+
+    def test_failed_reservation_insert_gives_stock_back(self):
+        booking = self.book()
+        create_reservation(booking, self.vehicle)
+
+        # Second reservation for the same booking violates the one-to-one
+        with self.assertRaises(IntegrityError):
+            create_reservation(booking, self.vehicle)
+        self.stock.refresh_from_db()
+        self.assertEqual(self.stock.available_quantity, 1)
+
+    def test_reservation_is_released_once(self):
+        reservation = create_reservation(self.book(), self.vehicle)
+        stale = StockReservation.objects.get(pk=reservation.pk)
+
+        reservation.release()
+        # e.g. the expiry task releasing a reservation that was just cancelled
+        stale.release()
+
+        self.stock.refresh_from_db()
+        self.assertEqual(self.stock.available_quantity, 2)
+        self.assertEqual(StockReservation.objects.get(pk=reservation.pk).status, 'released')
+
+        # Stock given back by a release can be booked again, never more than the total
+        create_reservation(self.book(), self.vehicle)
+        create_reservation(self.book(), self.vehicle)
+        with self.assertRaises(ValueError):
+            create_reservation(self.book(), self.vehicle)
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command(
+            'benchmark_stock_reservations', '--bookings', '5', '--stock', '3', '--concurrency', '1',
+            '--mode', 'both', stdout=out,
+        )
+
+        self.assertIn('atomic  reserved: 3, rejected: 2, errors: 0', out.getvalue())
+        self.assertNotIn('OVERSOLD', out.getvalue())
+        self.assertFalse(Vehicle.objects.filter(name__startswith='Stock Benchmark').exists())
@@ -1,6 +1,7 @@
 """
 Utility functions for inventory reservation management
 """
+from django.db import transaction
 from django.utils import timezone
 from django.conf import settings
 from datetime import timedelta
@@ -63,29 +64,28 @@ def create_reservation(booking, vehicle, quantity=1):
     # Get or create vehicle stock
     vehicle_stock = get_or_create_vehicle_stock(vehicle)
     
-    # Check if sufficient stock is available
-    if vehicle_stock.available_quantity < quantity:
-        raise ValueError(f"Insufficient stock. Available: {vehicle_stock.available_quantity}, Required: {quantity}")
-    
     # Calculate expires_at based on settings (from database, fallback to env var)
     expires_at = None
     timeout_hours = get_booking_reservation_timeout_hours()
     if timeout_hours is not None:
         expires_at = timezone.now() + timedelta(hours=timeout_hours)
     
-    # Reserve stock
-    if not vehicle_stock.reserve(quantity=quantity):
-        raise ValueError(f"Failed to reserve stock. Available: {vehicle_stock.available_quantity}, Required: {quantity}")
-    
-    # Create reservation
-    reservation = StockReservation.objects.create(
-        booking=booking,
-        vehicle=vehicle,
-        vehicle_stock=vehicle_stock,
-        quantity=quantity,
-        status='reserved',
-        expires_at=expires_at
-    )
+    # Reserve stock: the availability check is the conditional UPDATE itself
+    # (VehicleStock.reserve), there is no separate read that concurrent bookings
+    # could all pass. The reservation row is created in the same transaction, so
+    # a failed insert gives the stock back.
+    with transaction.atomic():
+        if not vehicle_stock.reserve(quantity=quantity):
+            raise ValueError(f"Insufficient stock. Available: {vehicle_stock.available_quantity}, Required: {quantity}")
+        
+        reservation = StockReservation.objects.create(
+            booking=booking,
+            vehicle=vehicle,
+            vehicle_stock=vehicle_stock,
+            quantity=quantity,
+            status='reserved',
+            expires_at=expires_at
+        )
     
     return reservation
 
@@ -0,0 +1,139 @@
+"""
+Pagination with cheap counts for large tables
+
+Filtered listings (a user's bookings, a status, a search) keep exact counts. An
+unfiltered listing of a large table (admins paging through the whole ledger) would
+otherwise run a full COUNT(*) on every page; there the count is computed at most once
+per ESTIMATED_COUNT_CACHE_TIMEOUT and reused, and reported as an estimate.
+"""
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Tables with at least this many rows (per table statistics) get cached counts
+LARGE_TABLE_ROWS = 50000
+
+ESTIMATED_COUNT_CACHE_TIMEOUT = 300  # seconds
+
+ESTIMATED_COUNT_CACHE_KEY = 'pagination:count:{table}'
+
+
+def is_unfiltered(queryset):
+    """True if counting queryset counts every row of its table"""
+    query = queryset.query
+    return (
+        not query.where
+        and not query.distinct
+        and not query.combinator
+        and query.group_by is None
+        and query.low_mark == 0
+        and query.high_mark is None
+    )
+
+
+def get_table_row_estimate(model, using):
+    """
+    Row count of a model's table from the database statistics (no table scan)
+
+    Returns:
+        int | None: Estimated rows, or None where statistics are not available (SQLite)
+    """
+    connection = connections[using]
+    if connection.vendor != 'mysql':
+        return None
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT TABLE_ROWS FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            [model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    return row[0] if row and row[0] is not None else None
+
+
+def get_estimated_count(queryset):
+    """
+    Count for paginating queryset
+
+    Returns:
+        tuple: (count, is_estimate). Exact unless queryset is an unfiltered
+        listing of a large table, in which case the count may be up to
+        ESTIMATED_COUNT_CACHE_TIMEOUT seconds old
+    """
+    if not is_unfiltered(queryset):
+        return queryset.count(), False
+
+    try:
+        estimate = get_table_row_estimate(queryset.model, queryset.db)
+    except Exception as e:
+        logger.warning(f"Could not read table statistics for {queryset.model._meta.db_table}: {e}")
+        estimate = None
+
+    if estimate is None or estimate < LARGE_TABLE_ROWS:
+        return queryset.count(), False
+
+    key = ESTIMATED_COUNT_CACHE_KEY.format(table=queryset.model._meta.db_table)
+    try:
+        count = cache.get(key)
+    except Exception:
+        count = None
+
+    if count is None:
+        count = queryset.count()
+        try:
+            cache.set(key, count, ESTIMATED_COUNT_CACHE_TIMEOUT)
+        except Exception:
+            pass
+
+    return count, True
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator whose count comes from get_estimated_count"""
+
+    @cached_property
+    def count_and_estimate(self):
+        if hasattr(self.object_list, 'query'):
+            return get_estimated_count(self.object_list)
+        return len(self.object_list), False
+
+    @cached_property
+    def count(self):
+        return self.count_and_estimate[0]
+
+    @property
+    def count_is_estimate(self):
+        return self.count_and_estimate[1]
+
+
+class EstimatedCountPagination(PageNumberPagination):
+    """
+    Page number pagination with page_size support and cheap counts on large tables
+    Adds count_is_estimate to the paginated response.
+    """
+    django_paginator_class = EstimatedCountPaginator
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    page_query_param = 'page'
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.page.paginator.count,
+            'count_is_estimate': self.page.paginator.count_is_estimate,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        schema = super().get_paginated_response_schema(schema)
+        schema['properties']['count_is_estimate'] = {'type': 'boolean', 'example': False}
+        return schema
@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
+from django.utils import timezone
 from .models import Payment, WebhookEvent
 
 
@@ -204,16 +205,17 @@ class PaymentAdmin(admin.ModelAdmin):
 
 @admin.register(WebhookEvent)
 class WebhookEventAdmin(admin.ModelAdmin):
-    list_display = ('event_id', 'event_type', 'processed_display', 'processed_at', 'created_at')
+    list_display = ('event_id', 'event_type', 'processed_display', 'attempts', 'next_attempt_at', 'processed_at', 'created_at')
     list_filter = ('event_type', 'processed', 'created_at', 'processed_at')
     search_fields = ('event_id', 'event_type', 'error_message')
-    readonly_fields = ('event_id', 'event_type', 'payload_display', 'processed', 'processed_at', 'error_message', 'created_at', 'updated_at')
+    readonly_fields = ('event_id', 'event_type', 'payload_display', 'processed', 'processed_at', 'attempts', 'next_attempt_at', 'error_message', 'created_at', 'updated_at')
     date_hierarchy = 'created_at'
     list_per_page = 50
+    actions = ['reprocess_events']
     
     fieldsets = (
         ('Event Information', {
-            'fields': ('event_id', 'event_type', 'processed', 'processed_at')
+            'fields': ('event_id', 'event_type', 'processed', 'processed_at', 'attempts', 'next_attempt_at')
         }),
         ('Payload', {
             'fields': ('payload_display',),
@@ -258,6 +260,17 @@ class WebhookEventAdmin(admin.ModelAdmin):
             return f'Error formatting payload: {str(e)}'
     payload_display.short_description = 'Payload (JSON)'
     
+    def reprocess_events(self, request, queryset):
+        """Queue unprocessed events for another processing attempt"""
+        from .tasks import enqueue_webhook_event
+        
+        pending = list(queryset.filter(processed=False).only('id', 'payload'))
+        queryset.filter(id__in=[event.id for event in pending]).update(next_attempt_at=timezone.now())
+        for webhook_event in pending:
+            enqueue_webhook_event(webhook_event)
+        self.message_user(request, f"{len(pending)} webhook event(s) queued for processing.")
+    reprocess_events.short_description = 'Reprocess selected unprocessed events'
+    
     def has_add_permission(self, request):
         """Prevent manual creation of webhook events"""
         return False
@@ -1,19 +1,26 @@
-from django.core.management.base import BaseCommand
-from django.db import transaction
-from core.payments.models import Payment as RazorpayPayment
-from core.payments.views import _process_booking_payment
+from datetime import datetime, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from core.payments.reconciliation import (
+    RECONCILE_CHUNK_SIZE,
+    RECONCILE_PAGE_SIZE,
+    RECONCILE_WINDOW,
+    RECONCILE_WORKERS,
+    reconcile_payments,
+)
 
 
 class Command(BaseCommand):
     """
-    Process existing successful Razorpay payments that haven't been processed yet.
+    Reconcile local Razorpay payments with the Razorpay API.
     
-    This command retroactively creates booking Payment records and updates booking
-    status for Razorpay payments that were verified but didn't trigger the booking
-    payment processing (due to the bug that was fixed).
+    Lists the Razorpay payments of a time range (windows paged concurrently), matches
+    them to local Payment rows by order_id in bulk, corrects local statuses (e.g. a
+    capture whose webhook and verify call were both lost) and creates missing booking
+    payments for successful booking orders, in chunked transactions.
     """
 
-    help = "Process existing successful Razorpay payments that haven't been processed yet."
+    help = "Reconcile Razorpay payments with local payments and process missing booking payments."
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -26,129 +33,104 @@ class Command(BaseCommand):
             type=str,
             help='Process a specific order_id only',
         )
+        parser.add_argument(
+            '--from',
+            dest='start',
+            type=str,
+            help='Start date (YYYY-MM-DD), default: 7 days ago',
+        )
+        parser.add_argument(
+            '--to',
+            dest='end',
+            type=str,
+            help='End date (YYYY-MM-DD, inclusive), default: now',
+        )
+        parser.add_argument(
+            '--window-hours',
+            type=int,
+            default=int(RECONCILE_WINDOW.total_seconds() // 3600),
+            help='Size of the time windows fetched in parallel',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=RECONCILE_WORKERS,
+            help='Concurrent Razorpay list requests',
+        )
+        parser.add_argument(
+            '--page-size',
+            type=int,
+            default=RECONCILE_PAGE_SIZE,
+            help='Payments per Razorpay list request (max 100)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=RECONCILE_CHUNK_SIZE,
+            help='Orders matched and fixed per query/transaction',
+        )
+
+    def _parse_date(self, value, name):
+        try:
+            return timezone.make_aware(datetime.strptime(value, '%Y-%m-%d'))
+        except ValueError:
+            raise CommandError(f"Invalid --{name} date '{value}', expected YYYY-MM-DD")
 
     def handle(self, *args, **options):
         dry_run = options['dry_run']
-        order_id_filter = options.get('order_id')
-
-        self.stdout.write(self.style.MIGRATE_HEADING("Processing Razorpay payments..."))
-
-        # Find all successful Razorpay payments
-        queryset = RazorpayPayment.objects.filter(status='SUCCESS')
-        
-        if order_id_filter:
-            queryset = queryset.filter(order_id=order_id_filter)
-        
-        payments = queryset.select_related('content_type', 'user').all()
-        total_count = payments.count()
-        
-        if total_count == 0:
-            self.stdout.write(self.style.WARNING("No successful Razorpay payments found."))
-            return
-
-        self.stdout.write(f"Found {total_count} successful Razorpay payment(s)")
+        start = self._parse_date(options['start'], 'from') if options['start'] else None
+        end = self._parse_date(options['end'], 'to') + timedelta(days=1) if options['end'] else None
+        if start and end and start >= end:
+            raise CommandError("--from must be before --to")
 
-        processed_count = 0
-        skipped_count = 0
-        error_count = 0
+        self.stdout.write(self.style.MIGRATE_HEADING("Reconciling Razorpay payments..."))
 
-        for razorpay_payment in payments:
-            try:
-                if dry_run:
-                    # Check if booking payment already exists
-                    from core.booking.models import Booking, Payment as BookingPayment
-                    
-                    if razorpay_payment.content_type is None or razorpay_payment.object_id is None:
-                        self.stdout.write(
-                            self.style.WARNING(
-                                f"  SKIP: {razorpay_payment.order_id} - No content_object"
-                            )
-                        )
-                        skipped_count += 1
-                        continue
-                    
-                    try:
-                        booking = razorpay_payment.content_object
-                        if not isinstance(booking, Booking):
-                            self.stdout.write(
-                                self.style.WARNING(
-                                    f"  SKIP: {razorpay_payment.order_id} - Not a booking payment"
-                                )
-                            )
-                            skipped_count += 1
-                            continue
-                    except Exception as e:
-                        self.stdout.write(
-                            self.style.ERROR(
-                                f"  ERROR: {razorpay_payment.order_id} - Could not get content_object: {e}"
-                            )
-                        )
-                        error_count += 1
-                        continue
-                    
-                    # Check if already processed
-                    existing = BookingPayment.objects.filter(
-                        booking=booking,
-                        transaction_id=razorpay_payment.payment_id or razorpay_payment.order_id
-                    ).first()
-                    
-                    if existing:
-                        self.stdout.write(
-                            self.style.WARNING(
-                                f"  SKIP: {razorpay_payment.order_id} - Already processed (Booking Payment ID: {existing.id})"
-                            )
-                        )
-                        skipped_count += 1
-                    else:
-                        amount_rupees = razorpay_payment.amount / 100
-                        self.stdout.write(
-                            self.style.SUCCESS(
-                                f"  WOULD PROCESS: {razorpay_payment.order_id} - "
-                                f"Booking {booking.id} ({booking.booking_number}) - "
-                                f"Amount: Rs.{amount_rupees:.2f}"
-                            )
-                        )
-                        processed_count += 1
-                else:
-                    # Actually process the payment
-                    booking_payment, booking = _process_booking_payment(razorpay_payment)
-                    
-                    if booking_payment and booking:
-                        amount_rupees = razorpay_payment.amount / 100
-                        self.stdout.write(
-                            self.style.SUCCESS(
-                                f"  PROCESSED: {razorpay_payment.order_id} - "
-                                f"Booking {booking.id} ({booking.booking_number}) - "
-                                f"Amount: Rs.{amount_rupees:.2f} - "
-                                f"Booking Payment ID: {booking_payment.id}"
-                            )
-                        )
-                        processed_count += 1
-                    else:
-                        self.stdout.write(
-                            self.style.WARNING(
-                                f"  SKIP: {razorpay_payment.order_id} - Not a booking payment or already processed"
-                            )
-                        )
-                        skipped_count += 1
+        report = reconcile_payments(
+            start=start,
+            end=end,
+            order_id=options.get('order_id'),
+            dry_run=dry_run,
+            window=timedelta(hours=max(1, options['window_hours'])),
+            workers=options['workers'],
+            page_size=min(max(1, options['page_size']), RECONCILE_PAGE_SIZE),
+            chunk_size=max(1, options['chunk_size']),
+        )
+        plan = report['plan']
+        result = report['result']
 
-            except Exception as e:
-                self.stdout.write(
-                    self.style.ERROR(
-                        f"  ERROR processing {razorpay_payment.order_id}: {e}"
-                    )
+        for order_id, new_status, entity in plan['status']:
+            prefix = "WOULD FIX" if dry_run else "FIX"
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"  {prefix}: {order_id} -> {new_status} (Razorpay {entity.get('id')} is {entity.get('status')})"
                 )
-                error_count += 1
+            )
+        for order_id in plan['booking']:
+            prefix = "WOULD PROCESS" if dry_run else "PROCESS"
+            self.stdout.write(self.style.SUCCESS(f"  {prefix}: {order_id} - missing booking payment"))
+        for order_id in plan['unknown']:
+            self.stdout.write(self.style.WARNING(f"  SKIP: {order_id} - no local payment for this order"))
+        if result:
+            for order_id, error in result['errors']:
+                self.stdout.write(self.style.ERROR(f"  ERROR processing {order_id}: {error}"))
 
         # Summary
         self.stdout.write("")
         self.stdout.write(self.style.MIGRATE_HEADING("Summary:"))
-        self.stdout.write(f"  Total found: {total_count}")
-        self.stdout.write(f"  Processed: {processed_count}")
-        self.stdout.write(f"  Skipped: {skipped_count}")
-        self.stdout.write(f"  Errors: {error_count}")
-        
+        self.stdout.write(f"  Razorpay orders found: {report['remote']}")
+        self.stdout.write(f"  Status fixes: {len(plan['status'])}")
+        self.stdout.write(f"  Missing booking payments: {len(plan['booking'])}")
+        self.stdout.write(f"  Unknown orders: {len(plan['unknown'])}")
+        if result:
+            self.stdout.write(f"  Statuses fixed: {result['status_fixed']}")
+            self.stdout.write(f"  Booking payments processed: {result['booking_processed']}")
+            self.stdout.write(f"  Errors: {len(result['errors'])}")
+
+        self.stdout.write("")
+        self.stdout.write(self.style.MIGRATE_HEADING("Timings:"))
+        for phase, seconds in report['timings'].items():
+            self.stdout.write(f"  {phase}: {seconds:.2f}s")
+
         if dry_run:
             self.stdout.write("")
             self.stdout.write(self.style.WARNING("DRY RUN - No changes were made. Run without --dry-run to process."))
-
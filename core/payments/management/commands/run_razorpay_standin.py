@@ -0,0 +1,71 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from core.payments.standin import StandInConfig, make_standin_server
+
+
+class Command(BaseCommand):
+    """
+    Run a local stand-in for the Razorpay and RazorpayX APIs (see core/payments/standin.py).
+
+    Start the app with RAZORPAY_API_BASE_URL=http://<host>:<port> and the same
+    RAZORPAY_KEY_SECRET / RAZORPAY_WEBHOOK_SECRET / RAZORPAY_PAYOUT_WEBHOOK_SECRET, and
+    create_order, verify_payment, the webhooks, refunds and payouts run against it.
+    """
+
+    help = "Run a local Razorpay/RazorpayX API stand-in for load tests and benchmarks."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', type=str, default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument(
+            '--webhook-url',
+            type=str,
+            default='http://127.0.0.1:8000/api/payments/webhook/',
+            help='Where payment webhooks are delivered (empty to disable)',
+        )
+        parser.add_argument(
+            '--payout-webhook-url',
+            type=str,
+            default='http://127.0.0.1:8000/api/payout/webhook/',
+            help='Where payout webhooks are delivered (empty to disable)',
+        )
+        parser.add_argument('--latency-ms', type=float, default=0.0, help='Added latency per API call')
+        parser.add_argument('--latency-jitter-ms', type=float, default=0.0, help='Random +/- latency per API call')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of API calls failing with 500')
+        parser.add_argument('--webhook-delay', type=float, default=0.0, help='Seconds from payment to webhooks')
+        parser.add_argument('--payout-delay', type=float, default=1.0, help='Seconds until payouts settle')
+        parser.add_argument('--payout-failure-rate', type=float, default=0.0, help='Fraction of payouts that fail')
+
+    def handle(self, *args, **options):
+        config = StandInConfig(
+            key_secret=settings.RAZORPAY_KEY_SECRET,
+            webhook_url=options['webhook_url'],
+            webhook_secret=settings.RAZORPAY_WEBHOOK_SECRET,
+            payout_webhook_url=options['payout_webhook_url'],
+            payout_webhook_secret=settings.RAZORPAY_PAYOUT_WEBHOOK_SECRET,
+            latency_ms=options['latency_ms'],
+            latency_jitter_ms=options['latency_jitter_ms'],
+            error_rate=options['error_rate'],
+            webhook_delay=options['webhook_delay'],
+            payout_delay=options['payout_delay'],
+            payout_failure_rate=options['payout_failure_rate'],
+        )
+        server = make_standin_server(options['host'], options['port'], config)
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"Razorpay stand-in listening on http://{options['host']}:{server.server_port}"
+        ))
+        self.stdout.write(f"  Set RAZORPAY_API_BASE_URL=http://{options['host']}:{server.server_port} for the app")
+        self.stdout.write(f"  Latency: {config.latency_ms}ms (+/- {config.latency_jitter_ms}ms), error rate: {config.error_rate}")
+        if not config.key_secret or not config.webhook_secret:
+            self.stdout.write(self.style.WARNING(
+                "  RAZORPAY_KEY_SECRET / RAZORPAY_WEBHOOK_SECRET not set: signatures will not verify"
+            ))
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write("Stand-in stopped.")
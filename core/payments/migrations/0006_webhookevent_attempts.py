@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-18 22:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0005_payment_payment_order_reuse_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='webhookevent',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0, help_text='Processing attempts so far'),
+        ),
+        migrations.AddField(
+            model_name='webhookevent',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, help_text='When the event is due for (re)processing; empty once processed or given up', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='webhookevent',
+            index=models.Index(fields=['processed', 'next_attempt_at'], name='webhook_event_pending_idx'),
+        ),
+    ]
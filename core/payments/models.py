@@ -106,6 +106,11 @@ class WebhookEvent(models.Model):
     processed = models.BooleanField(default=False, db_index=True, help_text="Whether event was successfully processed")
     processed_at = models.DateTimeField(null=True, blank=True, help_text="When event was processed")
     error_message = models.TextField(null=True, blank=True, help_text="Error message if processing failed")
+    attempts = models.PositiveIntegerField(default=0, help_text="Processing attempts so far")
+    next_attempt_at = models.DateTimeField(
+        null=True, blank=True,
+        help_text="When the event is due for (re)processing; empty once processed or given up"
+    )
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -119,6 +124,7 @@ class WebhookEvent(models.Model):
             models.Index(fields=['event_id']),
             models.Index(fields=['event_type', 'processed']),
             models.Index(fields=['created_at']),
+            models.Index(fields=['processed', 'next_attempt_at'], name='webhook_event_pending_idx'),
         ]
     
     def __str__(self):
@@ -0,0 +1,252 @@
+"""
+Reconciliation of local Razorpay payments against the Razorpay API
+
+Phases:
+1. fetch  - list Razorpay payments for a time range, split into windows that are paged
+            concurrently on a bounded thread pool sharing the pooled get_razorpay_client()
+2. match  - load the local Payment rows for the fetched orders in bulk (by order_id)
+3. apply  - correct local statuses and create missing booking payments, one
+            transaction per chunk of orders
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.db import transaction
+from django.utils import timezone
+from .models import Payment
+from .utils.razorpay_client import get_razorpay_client
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+RECONCILE_WINDOW = timedelta(hours=6)
+RECONCILE_PAGE_SIZE = 100  # Razorpay maximum per list call
+RECONCILE_WORKERS = 4
+RECONCILE_MAX_WORKERS = 20  # pool_maxsize of the Razorpay client session
+RECONCILE_CHUNK_SIZE = 100
+
+# When an order has several payment attempts, the most advanced one decides its status
+REMOTE_STATUS_PRIORITY = {'refunded': 4, 'captured': 3, 'authorized': 2, 'failed': 1, 'created': 0}
+
+# Local status each Razorpay payment status reconciles to, and the local statuses it may replace
+STATUS_FIXES = {
+    'captured': ('SUCCESS', ('CREATED', 'FAILED')),
+    'failed': ('FAILED', ('CREATED',)),
+    'refunded': ('REFUNDED', ('CREATED', 'SUCCESS', 'FAILED')),
+}
+
+
+def split_windows(start, end, window=RECONCILE_WINDOW):
+    """
+    Split [start, end) into consecutive windows
+
+    Returns:
+        list: (from_timestamp, to_timestamp) pairs in Unix seconds, as the Razorpay
+        list endpoints expect (both inclusive, so windows do not overlap)
+    """
+    windows = []
+    current = start
+    while current < end:
+        window_end = min(current + window, end)
+        windows.append((int(current.timestamp()), int(window_end.timestamp()) - 1))
+        current = window_end
+    return windows
+
+
+def fetch_window(client, from_ts, to_ts, page_size=RECONCILE_PAGE_SIZE):
+    """All Razorpay payments created in one window (pages fetched in sequence)"""
+    items = []
+    skip = 0
+    while True:
+        response = client.payment.all({'from': from_ts, 'to': to_ts, 'count': page_size, 'skip': skip})
+        page = response.get('items', [])
+        items.extend(page)
+        if len(page) < page_size:
+            return items
+        skip += page_size
+
+
+def _latest_by_order(items):
+    """{order_id: payment entity} keeping the most advanced attempt of each order"""
+    by_order = {}
+    for item in items:
+        order_id = item.get('order_id')
+        if not order_id:
+            continue
+        current = by_order.get(order_id)
+        if current is None or (
+            REMOTE_STATUS_PRIORITY.get(item.get('status'), -1)
+            > REMOTE_STATUS_PRIORITY.get(current.get('status'), -1)
+        ):
+            by_order[order_id] = item
+    return by_order
+
+
+def fetch_remote_payments(start, end, window=RECONCILE_WINDOW, workers=RECONCILE_WORKERS,
+                          page_size=RECONCILE_PAGE_SIZE):
+    """
+    Razorpay payments created between start and end, by order
+
+    Returns:
+        dict: {order_id: payment entity}
+    """
+    client = get_razorpay_client()
+    windows = split_windows(start, end, window)
+    workers = max(1, min(workers, RECONCILE_MAX_WORKERS, len(windows) or 1))
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='razorpay-reconcile') as executor:
+        pages = executor.map(lambda bounds: fetch_window(client, *bounds, page_size=page_size), windows)
+        items = [item for page in pages for item in page]
+
+    return _latest_by_order(items)
+
+
+def fetch_order_payments(order_id):
+    """Razorpay payments of a single order, as {order_id: payment entity}"""
+    response = get_razorpay_client().order.payments(order_id)
+    return _latest_by_order(response.get('items', []))
+
+
+def _chunks(values, size):
+    for index in range(0, len(values), size):
+        yield values[index:index + size]
+
+
+def plan_fixes(remote, chunk_size=RECONCILE_CHUNK_SIZE):
+    """
+    Compare Razorpay payments with the local Payment rows (bulk lookups by order_id)
+
+    Returns:
+        dict: {
+            'status': [(order_id, new_status, razorpay payment entity)],
+            'booking': [order_id] - successful booking payments without a booking Payment,
+            'unknown': [order_id] - orders Razorpay has and we do not,
+        }
+    """
+    from core.booking.models import Payment as BookingPayment
+
+    plan = {'status': [], 'booking': [], 'unknown': []}
+    order_ids = sorted(remote)
+
+    for chunk in _chunks(order_ids, chunk_size):
+        local = {
+            row['order_id']: row
+            for row in Payment.objects.filter(order_id__in=chunk).values(
+                'order_id', 'status', 'content_type_id', 'object_id'
+            )
+        }
+        recorded = set(
+            BookingPayment.objects.filter(transaction_id__in=chunk).values_list('transaction_id', flat=True)
+        )
+
+        for order_id in chunk:
+            row = local.get(order_id)
+            if row is None:
+                plan['unknown'].append(order_id)
+                continue
+
+            entity = remote[order_id]
+            new_status, replaces = STATUS_FIXES.get(entity.get('status'), (None, ()))
+            status = row['status']
+            if new_status and status in replaces:
+                plan['status'].append((order_id, new_status, entity))
+                status = new_status
+
+            if (
+                status == 'SUCCESS'
+                and row['content_type_id'] is not None
+                and row['object_id'] is not None
+                and order_id not in recorded
+            ):
+                plan['booking'].append(order_id)
+
+    return plan
+
+
+def apply_fixes(plan, chunk_size=RECONCILE_CHUNK_SIZE):
+    """
+    Apply a plan from plan_fixes(), one transaction per chunk of orders
+
+    Rows are re-checked under select_for_update, so orders changed by verify_payment or
+    the webhook in the meantime are left alone. A failing order is rolled back on its
+    own (savepoint) without losing the rest of its chunk.
+
+    Returns:
+        dict: {'status_fixed': int, 'booking_processed': int, 'errors': [(order_id, error)]}
+    """
+    from .views import _process_booking_payment
+
+    result = {'status_fixed': 0, 'booking_processed': 0, 'errors': []}
+    fixes = {order_id: (new_status, entity) for order_id, new_status, entity in plan['status']}
+    booking_orders = set(plan['booking'])
+    order_ids = sorted(set(fixes) | booking_orders)
+
+    for chunk in _chunks(order_ids, chunk_size):
+        with transaction.atomic():
+            payments = Payment.objects.select_for_update().filter(order_id__in=chunk).order_by('order_id')
+            for payment in payments:
+                try:
+                    with transaction.atomic():
+                        if payment.order_id in fixes:
+                            new_status, entity = fixes[payment.order_id]
+                            _, replaces = STATUS_FIXES[entity['status']]
+                            if payment.status in replaces:
+                                payment.status = new_status
+                                remote_payment_id = entity.get('id')
+                                if (
+                                    remote_payment_id
+                                    and not payment.payment_id
+                                    and not Payment.objects.filter(payment_id=remote_payment_id).exists()
+                                ):
+                                    payment.payment_id = remote_payment_id
+                                payment.save(update_fields=['status', 'payment_id', 'updated_at'])
+                                result['status_fixed'] += 1
+                                logger.info(
+                                    f"Reconciled payment {payment.order_id} to {new_status} "
+                                    f"(Razorpay status {entity['status']})"
+                                )
+
+                        if payment.status == 'SUCCESS' and (
+                            payment.order_id in booking_orders or payment.order_id in fixes
+                        ):
+                            booking_payment, booking = _process_booking_payment(payment)
+                            if booking_payment:
+                                result['booking_processed'] += 1
+                except Exception as e:
+                    logger.error(f"Error reconciling payment {payment.order_id}: {e}", exc_info=True)
+                    result['errors'].append((payment.order_id, str(e)))
+
+    return result
+
+
+def reconcile_payments(start=None, end=None, order_id=None, dry_run=False, window=RECONCILE_WINDOW,
+                       workers=RECONCILE_WORKERS, page_size=RECONCILE_PAGE_SIZE,
+                       chunk_size=RECONCILE_CHUNK_SIZE):
+    """
+    Reconcile local payments with Razorpay for a time range (or a single order)
+
+    Returns:
+        dict: {'remote': int, 'plan': dict, 'result': dict | None, 'timings': {phase: seconds}}
+    """
+    timings = {}
+
+    started = time.monotonic()
+    if order_id:
+        remote = fetch_order_payments(order_id)
+    else:
+        end = end or timezone.now()
+        start = start or end - timedelta(days=7)
+        remote = fetch_remote_payments(start, end, window=window, workers=workers, page_size=page_size)
+    timings['fetch'] = time.monotonic() - started
+
+    started = time.monotonic()
+    plan = plan_fixes(remote, chunk_size=chunk_size)
+    timings['match'] = time.monotonic() - started
+
+    result = None
+    if not dry_run:
+        started = time.monotonic()
+        result = apply_fixes(plan, chunk_size=chunk_size)
+        timings['apply'] = time.monotonic() - started
+
+    return {'remote': len(remote), 'plan': plan, 'result': result, 'timings': timings}
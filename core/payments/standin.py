@@ -0,0 +1,385 @@
+"""
+Local stand-in for the Razorpay and RazorpayX APIs
+
+Lets create_order, verify_payment, the webhooks, refunds, reconciliation and payouts run
+end to end on one machine for load tests and benchmarks. Point the app at it with
+RAZORPAY_API_BASE_URL (see run_razorpay_standin). State is kept in memory.
+
+Razorpay:   POST /v1/orders, GET /v1/orders/<id>, GET /v1/orders/<id>/payments,
+            GET /v1/payments, GET /v1/payments/<id>, POST /v1/payments/<id>/refund
+RazorpayX:  POST/GET /v1/contacts, POST /v1/fund_accounts, POST /v1/payouts,
+            GET /v1/payouts/<id>
+Control:    POST /_standin/orders/<id>/pay   {"status": "captured" | "failed"}
+            POST /_standin/config            {"latency_ms": .., "error_rate": .., ...}
+            GET  /_standin/stats
+
+Paying an order returns the checkout fields verify_payment expects (signed with the
+key secret) and, if a webhook URL is configured, delivers signed payment.captured /
+payment.failed and order.paid webhooks. Payouts are settled after payout_delay seconds
+with a signed payout.processed (or payout.failed) webhook.
+"""
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import hashlib
+import hmac
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StandInConfig:
+    """Behaviour of the stand-in (changeable at runtime through /_standin/config)"""
+    key_secret: str = ''
+    webhook_url: str = ''
+    webhook_secret: str = ''
+    payout_webhook_url: str = ''
+    payout_webhook_secret: str = ''
+    latency_ms: float = 0.0
+    latency_jitter_ms: float = 0.0
+    error_rate: float = 0.0  # fraction of API calls answered with a 500 SERVER_ERROR
+    webhook_delay: float = 0.0  # seconds between paying an order and its webhooks
+    payout_delay: float = 1.0  # seconds until a payout is settled
+    payout_failure_rate: float = 0.0
+
+
+def _new_id(prefix):
+    return f"{prefix}_{uuid.uuid4().hex[:14]}"
+
+
+def sign(secret, message):
+    """HMAC-SHA256 hex digest, as Razorpay signs checkout responses and webhooks"""
+    if isinstance(message, str):
+        message = message.encode('utf-8')
+    return hmac.new(secret.encode('utf-8'), message, hashlib.sha256).hexdigest()
+
+
+class RazorpayStandIn:
+    """In-memory Razorpay/RazorpayX state, shared by the request handler threads"""
+
+    def __init__(self, config=None):
+        self.config = config or StandInConfig()
+        self.lock = threading.Lock()
+        self.orders = {}
+        self.payments = {}
+        self.refunds = {}
+        self.contacts = {}
+        self.fund_accounts = {}
+        self.payouts = {}
+        self.stats = {'requests': 0, 'errors_injected': 0, 'webhooks_sent': 0, 'webhooks_failed': 0}
+        self.webhook_session = requests.Session()
+
+    # Razorpay
+
+    def create_order(self, data):
+        order = {
+            'id': _new_id('order'),
+            'entity': 'order',
+            'amount': int(data.get('amount', 0)),
+            'amount_paid': 0,
+            'amount_due': int(data.get('amount', 0)),
+            'currency': data.get('currency', 'INR'),
+            'receipt': data.get('receipt'),
+            'status': 'created',
+            'attempts': 0,
+            'notes': data.get('notes', {}),
+            'created_at': int(time.time()),
+        }
+        with self.lock:
+            self.orders[order['id']] = order
+        return order
+
+    def add_payment(self, order_id, status='captured', created_at=None, amount=None, payment_id=None):
+        """Record a payment attempt for an order (the order need not exist here)"""
+        with self.lock:
+            order = self.orders.get(order_id)
+            payment = {
+                'id': payment_id or _new_id('pay'),
+                'entity': 'payment',
+                'amount': amount if amount is not None else (order['amount'] if order else 0),
+                'currency': 'INR',
+                'status': status,
+                'order_id': order_id,
+                'method': 'upi',
+                'amount_refunded': 0,
+                'captured': status == 'captured',
+                'created_at': created_at if created_at is not None else int(time.time()),
+            }
+            self.payments[payment['id']] = payment
+            if order:
+                order['attempts'] += 1
+                if status == 'captured':
+                    order['status'] = 'paid'
+                    order['amount_paid'] = order['amount']
+                    order['amount_due'] = 0
+        return payment
+
+    def list_payments(self, params):
+        with self.lock:
+            payments = sorted(self.payments.values(), key=lambda payment: payment['created_at'])
+        start = int(params.get('from', 0))
+        end = int(params.get('to', 2 ** 31))
+        count = min(int(params.get('count', 10)), 100)
+        skip = int(params.get('skip', 0))
+        matching = [payment for payment in payments if start <= payment['created_at'] <= end]
+        return matching[skip:skip + count]
+
+    def refund(self, payment_id, data):
+        with self.lock:
+            payment = self.payments.get(payment_id)
+            if payment is None:
+                return None
+            amount = int(data.get('amount', payment['amount'] - payment['amount_refunded']))
+            refund = {
+                'id': _new_id('rfnd'),
+                'entity': 'refund',
+                'amount': amount,
+                'currency': 'INR',
+                'payment_id': payment_id,
+                'notes': data.get('notes', {}),
+                'status': 'processed',
+                'speed_processed': 'normal',
+                'speed_requested': data.get('speed', 'normal'),
+                'created_at': int(time.time()),
+            }
+            self.refunds[refund['id']] = refund
+            payment['amount_refunded'] += amount
+            if payment['amount_refunded'] >= payment['amount']:
+                payment['status'] = 'refunded'
+        return refund
+
+    # RazorpayX
+
+    def create_contact(self, data):
+        contact = dict(data, id=_new_id('cont'), entity='contact', active=True, created_at=int(time.time()))
+        with self.lock:
+            self.contacts[contact['id']] = contact
+        return contact
+
+    def find_contacts(self, email):
+        with self.lock:
+            return [contact for contact in self.contacts.values() if contact.get('email') == email]
+
+    def create_fund_account(self, data):
+        account = dict(data, id=_new_id('fa'), entity='fund_account', active=True, created_at=int(time.time()))
+        with self.lock:
+            self.fund_accounts[account['id']] = account
+        return account
+
+    def create_payout(self, data):
+        payout = dict(
+            data, id=_new_id('pout'), entity='payout', status='processing', fees=0, tax=0,
+            utr=None, failure_reason=None, created_at=int(time.time()),
+        )
+        with self.lock:
+            self.payouts[payout['id']] = payout
+        self._later(self.config.payout_delay, self.settle_payout, payout['id'])
+        return payout
+
+    def settle_payout(self, payout_id):
+        with self.lock:
+            payout = self.payouts[payout_id]
+            if random.random() < self.config.payout_failure_rate:
+                payout.update(status='failed', failure_reason='Beneficiary bank offline (stand-in)')
+            else:
+                payout.update(status='processed', utr=uuid.uuid4().hex[:12].upper())
+            event = f"payout.{payout['status']}"
+            body = {'entity': 'event', 'event': event, 'payload': {'payout': dict(payout)}}
+        self.send_webhook(self.config.payout_webhook_url, self.config.payout_webhook_secret, body)
+
+    # Checkout and webhooks
+
+    def pay_order(self, order_id, status='captured'):
+        """
+        Complete checkout for an order
+
+        Returns:
+            dict: razorpay_order_id, razorpay_payment_id and razorpay_signature (the
+            verify_payment request body), plus the payment status
+        """
+        payment = self.add_payment(order_id, status=status)
+        result = {
+            'razorpay_order_id': order_id,
+            'razorpay_payment_id': payment['id'],
+            'razorpay_signature': sign(self.config.key_secret, f"{order_id}|{payment['id']}"),
+            'status': status,
+        }
+
+        events = [('payment.failed' if status == 'failed' else 'payment.captured', {'payment': {'entity': payment}})]
+        if status == 'captured':
+            with self.lock:
+                order = dict(self.orders.get(order_id) or {'id': order_id})
+            events.append(('order.paid', {'payment': {'entity': payment}, 'order': {'entity': order}}))
+
+        def deliver():
+            for event, payload in events:
+                self.send_webhook(
+                    self.config.webhook_url, self.config.webhook_secret,
+                    {'entity': 'event', 'event': event, 'payload': payload, 'created_at': int(time.time())},
+                )
+
+        if self.config.webhook_url:
+            self._later(self.config.webhook_delay, deliver)
+        return result
+
+    def _later(self, delay, function, *args):
+        timer = threading.Timer(delay, function, args=args)
+        timer.daemon = True
+        timer.start()
+
+    def send_webhook(self, url, secret, body):
+        """POST a signed webhook to the app (no-op without a URL)"""
+        if not url:
+            return
+        raw = json.dumps(body).encode('utf-8')
+        headers = {
+            'Content-Type': 'application/json',
+            'X-Razorpay-Signature': sign(secret, raw),
+            'X-Razorpay-Event-Id': _new_id('evt'),
+        }
+        try:
+            response = self.webhook_session.post(url, data=raw, headers=headers, timeout=30)
+            sent = response.status_code < 300
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Stand-in webhook {body['event']} to {url} failed: {e}")
+            sent = False
+        with self.lock:
+            self.stats['webhooks_sent' if sent else 'webhooks_failed'] += 1
+
+
+class StandInRequestHandler(BaseHTTPRequestHandler):
+    """Routes API calls to the RazorpayStandIn on self.server.standin"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        logger.debug(f"Stand-in {self.address_string()} {format % args}")
+
+    def _send(self, status, body):
+        raw = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def _error(self, status, code, description):
+        self._send(status, {'error': {'code': code, 'description': description}})
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length))
+        except ValueError:
+            return {}
+
+    def _handle(self, method):
+        standin = self.server.standin
+        config = standin.config
+        url = urlparse(self.path)
+        parts = [part for part in url.path.split('/') if part]
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        body = self._body() if method == 'POST' else {}
+
+        if parts[:1] == ['_standin']:
+            return self._control(standin, parts[1:], body)
+
+        with standin.lock:
+            standin.stats['requests'] += 1
+
+        if config.latency_ms or config.latency_jitter_ms:
+            time.sleep(max(0.0, config.latency_ms + random.uniform(-1, 1) * config.latency_jitter_ms) / 1000)
+        if config.error_rate and random.random() < config.error_rate:
+            with standin.lock:
+                standin.stats['errors_injected'] += 1
+            return self._error(500, 'SERVER_ERROR', 'Injected error (stand-in)')
+
+        if parts[:1] != ['v1'] or len(parts) < 2:
+            return self._error(404, 'BAD_REQUEST_ERROR', 'The requested URL was not found on the server.')
+        resource, rest = parts[1], parts[2:]
+
+        if resource == 'orders':
+            if method == 'POST' and not rest:
+                return self._send(200, standin.create_order(body))
+            order = standin.orders.get(rest[0]) if rest else None
+            if order is None:
+                return self._error(400, 'BAD_REQUEST_ERROR', 'The id provided does not exist')
+            if rest[1:] == ['payments']:
+                items = [payment for payment in standin.payments.values() if payment['order_id'] == rest[0]]
+                return self._send(200, {'entity': 'collection', 'count': len(items), 'items': items})
+            return self._send(200, order)
+
+        if resource == 'payments':
+            if not rest:
+                items = standin.list_payments(params)
+                return self._send(200, {'entity': 'collection', 'count': len(items), 'items': items})
+            if rest[1:] == ['refund'] and method == 'POST':
+                refund = standin.refund(rest[0], body)
+                if refund is None:
+                    return self._error(400, 'BAD_REQUEST_ERROR', 'The id provided does not exist')
+                return self._send(200, refund)
+            payment = standin.payments.get(rest[0])
+            if payment is None:
+                return self._error(400, 'BAD_REQUEST_ERROR', 'The id provided does not exist')
+            return self._send(200, payment)
+
+        if resource == 'contacts':
+            if method == 'POST':
+                return self._send(200, standin.create_contact(body))
+            items = standin.find_contacts(params.get('email'))
+            return self._send(200, {'entity': 'collection', 'count': len(items), 'items': items})
+
+        if resource == 'fund_accounts' and method == 'POST':
+            return self._send(200, standin.create_fund_account(body))
+
+        if resource == 'payouts':
+            if method == 'POST':
+                return self._send(200, standin.create_payout(body))
+            payout = standin.payouts.get(rest[0]) if rest else None
+            if payout is None:
+                return self._error(400, 'BAD_REQUEST_ERROR', 'The id provided does not exist')
+            return self._send(200, payout)
+
+        return self._error(404, 'BAD_REQUEST_ERROR', 'The requested URL was not found on the server.')
+
+    def _control(self, standin, parts, body):
+        if parts[:1] == ['orders'] and parts[2:] == ['pay']:
+            return self._send(200, standin.pay_order(parts[1], body.get('status', 'captured')))
+        if parts == ['config']:
+            for field, value in body.items():
+                if hasattr(standin.config, field):
+                    setattr(standin.config, field, type(getattr(standin.config, field))(value))
+            return self._send(200, asdict(standin.config))
+        if parts == ['stats']:
+            with standin.lock:
+                return self._send(200, dict(standin.stats, orders=len(standin.orders), payments=len(standin.payments)))
+        return self._error(404, 'BAD_REQUEST_ERROR', 'Unknown stand-in control endpoint')
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+
+def make_standin_server(host='127.0.0.1', port=0, config=None):
+    """
+    Create (but do not start) a threaded stand-in server
+
+    Returns:
+        ThreadingHTTPServer: server.standin holds the RazorpayStandIn state;
+        server.server_port is the bound port
+    """
+    server = ThreadingHTTPServer((host, port), StandInRequestHandler)
+    server.daemon_threads = True
+    server.standin = RazorpayStandIn(config)
+    return server
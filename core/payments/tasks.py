@@ -0,0 +1,90 @@
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+from datetime import timedelta
+import logging
+from .models import WebhookEvent
+from .utils.order_lock import OrderLocked, get_webhook_order_key, get_webhook_queue
+
+logger = logging.getLogger(__name__)
+
+# Pending events whose next attempt is overdue by this much were never picked up
+# (broker unavailable at enqueue time, worker lost the task) and are enqueued again
+WEBHOOK_SWEEP_GRACE_SECONDS = getattr(settings, 'RAZORPAY_WEBHOOK_SWEEP_GRACE_SECONDS', 120)
+WEBHOOK_SWEEP_BATCH_SIZE = 200
+
+# Delay before retrying an event whose order is being processed elsewhere (not counted as an attempt)
+ORDER_LOCKED_RETRY_DELAY = 5  # seconds
+
+
+def enqueue_webhook_event(webhook_event):
+    """
+    Send a stored webhook event to the consumer, on its order's partition queue
+    when RAZORPAY_WEBHOOK_PARTITIONS is set
+    """
+    queue = get_webhook_queue(get_webhook_order_key(webhook_event.payload))
+    process_webhook_event_task.apply_async(args=[webhook_event.id], queue=queue)
+
+
+@shared_task(bind=True, max_retries=None)
+def process_webhook_event_task(self, webhook_event_id):
+    """
+    Apply a stored Razorpay webhook event
+    
+    Failures are recorded on the event and retried with exponential backoff until
+    WEBHOOK_MAX_ATTEMPTS is reached (the attempt count lives on the event, so it also
+    covers attempts started by the pending events sweep). If the order is locked by
+    verify_payment or another consumer the task is retried shortly, without waiting.
+    
+    Args:
+        webhook_event_id (int): WebhookEvent primary key
+    
+    Returns:
+        dict: Processing result
+    """
+    from .views import process_webhook_event, record_webhook_event_failure
+    
+    try:
+        webhook_event = process_webhook_event(webhook_event_id)
+    except OrderLocked:
+        logger.info(f"Order of webhook event {webhook_event_id} is being processed elsewhere, retrying shortly")
+        raise self.retry(countdown=ORDER_LOCKED_RETRY_DELAY)
+    except Exception as e:
+        logger.error(f"Error processing webhook event {webhook_event_id}: {e}", exc_info=True)
+        retry_in = record_webhook_event_failure(webhook_event_id, e)
+        if retry_in is None:
+            logger.error(f"Giving up on webhook event {webhook_event_id}: {e}")
+            return {'success': False, 'error': str(e)}
+        raise self.retry(exc=e, countdown=retry_in)
+    
+    if webhook_event is None:
+        return {'success': False, 'error': 'Webhook event not found'}
+    
+    return {
+        'success': webhook_event.processed,
+        'event_id': webhook_event.event_id,
+        'error': webhook_event.error_message,
+    }
+
+
+@shared_task
+def process_pending_webhook_events_task():
+    """
+    Enqueue webhook events whose processing is overdue
+    
+    Returns:
+        int: Number of events enqueued
+    """
+    cutoff = timezone.now() - timedelta(seconds=WEBHOOK_SWEEP_GRACE_SECONDS)
+    webhook_events = list(
+        WebhookEvent.objects.filter(processed=False, next_attempt_at__lte=cutoff)
+        .order_by('next_attempt_at')
+        .only('id', 'payload')[:WEBHOOK_SWEEP_BATCH_SIZE]
+    )
+    
+    for webhook_event in webhook_events:
+        enqueue_webhook_event(webhook_event)
+    
+    if webhook_events:
+        logger.warning(f"Re-enqueued {len(webhook_events)} overdue webhook events")
+    return len(webhook_events)
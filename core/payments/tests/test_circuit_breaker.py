@@ -0,0 +1,166 @@
+"""
+Tests for the Razorpay circuit breaker and the create_order latency budget
+"""
+import time
+from unittest.mock import MagicMock, patch
+import requests
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+from core.payments import views
+from core.payments.models import Payment
+from core.payments.utils.circuit_breaker import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    CircuitBreaker,
+    CircuitOpen,
+)
+from core.payments.utils.razorpay_client import get_request_timeout
+from core.users.models import User
+
+LOCMEM_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'payment-breaker-tests'}
+}
+
+
+def _timeout(*args, **kwargs):
+    raise requests.exceptions.Timeout('read timed out')
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CircuitBreakerTest(SimpleTestCase):
+    """State transitions of the shared breaker"""
+
+    def setUp(self):
+        cache.clear()
+        self.breaker = CircuitBreaker('test', failure_threshold=3, failure_window=30, reset_timeout=30)
+
+    def _fail(self, times):
+        for _ in range(times):
+            with self.assertRaises(requests.exceptions.Timeout):
+                self.breaker.call(_timeout, failure_exceptions=(requests.exceptions.Timeout,))
+
+    def test_opens_at_threshold_and_rejects_without_calling(self):
+        self._fail(2)
+        self.assertEqual(self.breaker.get_state()['state'], STATE_CLOSED)
+        self._fail(1)
+
+        func = MagicMock()
+        with self.assertRaises(CircuitOpen) as raised:
+            self.breaker.call(func)
+        func.assert_not_called()
+        self.assertGreater(raised.exception.retry_after, 0)
+
+        state = self.breaker.get_state()
+        self.assertEqual(state['state'], STATE_OPEN)
+        self.assertEqual(state['metrics']['opened'], 1)
+        self.assertEqual(state['metrics']['rejected'], 1)
+        self.assertEqual(state['metrics']['failures_total'], 3)
+
+    def test_other_errors_do_not_count(self):
+        for _ in range(5):
+            with self.assertRaises(ValueError):
+                self.breaker.call(MagicMock(side_effect=ValueError), failure_exceptions=(requests.exceptions.Timeout,))
+        self.assertEqual(self.breaker.get_state()['state'], STATE_CLOSED)
+
+    def test_half_open_trial_success_closes(self):
+        self._fail(3)
+        with patch('core.payments.utils.circuit_breaker.time.time', return_value=time.time() + 31):
+            self.assertEqual(self.breaker.get_state()['state'], STATE_HALF_OPEN)
+            self.assertEqual(self.breaker.before_call(), STATE_HALF_OPEN)
+            # Only one trial at a time
+            with self.assertRaises(CircuitOpen):
+                self.breaker.before_call()
+            self.breaker.record_success(STATE_HALF_OPEN)
+
+        state = self.breaker.get_state()
+        self.assertEqual(state['state'], STATE_CLOSED)
+        self.assertEqual(state['metrics']['half_open'], 1)
+        self.assertEqual(state['metrics']['closed'], 1)
+        self.assertEqual(self.breaker.call(lambda: 'ok'), 'ok')
+
+    def test_half_open_trial_failure_reopens(self):
+        self._fail(3)
+        later = time.time() + 31
+        with patch('core.payments.utils.circuit_breaker.time.time', return_value=later):
+            self._fail(1)
+            state = self.breaker.get_state()
+        self.assertEqual(state['state'], STATE_OPEN)
+        self.assertEqual(state['metrics']['opened'], 2)
+
+    def test_cache_failure_allows_calls(self):
+        with patch('core.payments.utils.circuit_breaker.cache.get', side_effect=ConnectionError('redis down')):
+            self.assertEqual(self.breaker.before_call(), STATE_CLOSED)
+
+    def test_request_timeout_is_capped_by_deadline(self):
+        connect, read = get_request_timeout(time.monotonic() + 2)
+        self.assertLessEqual(connect, 2)
+        self.assertLessEqual(read, 2)
+        with self.assertRaises(requests.exceptions.Timeout):
+            get_request_timeout(time.monotonic() - 1)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CreateOrderBreakerTest(TestCase):
+    """create_order fails fast while the gateway breaker is open"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='breaker', email='breaker@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        content_type = ContentType.objects.get_for_model(Payment)
+        patcher = patch.object(views, '_calculate_amount_from_entity', return_value=(1000.0, None, content_type))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _create_order(self):
+        return self.client.post(
+            '/api/payments/create-order/', {'entity_type': 'booking', 'entity_id': 1}, format='json', secure=True
+        )
+
+    def test_gateway_timeouts_open_breaker_and_fail_fast(self):
+        client = MagicMock()
+        client.order.create.side_effect = _timeout
+
+        with patch.object(views, 'get_razorpay_client', return_value=client), \
+                patch.object(views, 'RAZORPAY_MAX_RETRIES', 0), \
+                patch.object(views.time, 'sleep'):
+            for _ in range(views.RAZORPAY_BREAKER.failure_threshold):
+                self.assertEqual(self._create_order().status_code, 504)
+
+            calls = client.order.create.call_count
+            response = self._create_order()
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(client.order.create.call_count, calls)
+        self.assertEqual(response['Retry-After'], str(response.data['retry_after']))
+        self.assertFalse(Payment.objects.exists())
+
+    def test_call_gets_budgeted_timeout(self):
+        client = MagicMock()
+        client.order.create.return_value = {'id': 'order_BUDGET1'}
+
+        with patch.object(views, 'get_razorpay_client', return_value=client):
+            response = self._create_order()
+
+        self.assertEqual(response.status_code, 201)
+        connect, read = client.order.create.call_args.kwargs['timeout']
+        self.assertLessEqual(read, views.RAZORPAY_ORDER_LATENCY_BUDGET)
+        self.assertTrue(Payment.objects.filter(order_id='order_BUDGET1').exists())
+
+    def test_no_retry_past_budget(self):
+        client = MagicMock()
+        client.order.create.side_effect = _timeout
+
+        with patch.object(views, 'get_razorpay_client', return_value=client), \
+                patch.object(views, 'RAZORPAY_MAX_RETRIES', 3), \
+                patch.object(views, 'RAZORPAY_ORDER_LATENCY_BUDGET', 1.5), \
+                patch.object(views.time, 'sleep') as sleep:
+            response = self._create_order()
+
+        self.assertEqual(response.status_code, 504)
+        self.assertEqual(client.order.create.call_count, 1)
+        sleep.assert_not_called()
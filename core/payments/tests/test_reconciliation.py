@@ -0,0 +1,102 @@
+"""
+Tests for Razorpay payment reconciliation against the local Razorpay stand-in
+"""
+import threading
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from core.payments.models import Payment
+from core.payments.reconciliation import reconcile_payments, split_windows
+from core.payments.standin import make_standin_server
+from core.payments.utils.razorpay_client import reset_razorpay_client
+
+
+class ReconciliationTest(TestCase):
+    """Remote payment statuses are fetched in windows and applied to local payments"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = make_standin_server()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.now = timezone.now().replace(microsecond=0)
+        self.standin = self.server.standin
+        self.standin.payments.clear()
+        self.standin.stats['requests'] = 0
+        settings_override = override_settings(
+            RAZORPAY_KEY_ID='rzp_test', RAZORPAY_KEY_SECRET='secret',
+            RAZORPAY_API_BASE_URL=f'http://127.0.0.1:{self.server.server_port}',
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        reset_razorpay_client()
+        self.addCleanup(reset_razorpay_client)
+
+    def _remote(self, payment_id, order_id, status, hours_ago=1):
+        self.standin.add_payment(
+            order_id, status=status, payment_id=payment_id,
+            created_at=int((self.now - timedelta(hours=hours_ago)).timestamp()),
+        )
+
+    def test_windows_cover_range_without_overlap(self):
+        windows = split_windows(self.now - timedelta(hours=13), self.now, timedelta(hours=6))
+        self.assertEqual(len(windows), 3)
+        for (_, previous_end), (start, _) in zip(windows, windows[1:]):
+            self.assertEqual(start, previous_end + 1)
+
+    def test_statuses_are_reconciled_in_bulk(self):
+        Payment.objects.create(order_id='order_lost_capture', amount=1000)
+        Payment.objects.create(order_id='order_retried', amount=1000, status='FAILED')
+        Payment.objects.create(order_id='order_abandoned', amount=1000)
+        Payment.objects.create(order_id='order_ok', amount=1000, status='SUCCESS', payment_id='pay_ok')
+        self._remote('pay_lost', 'order_lost_capture', 'captured', hours_ago=30)
+        self._remote('pay_failed_attempt', 'order_retried', 'failed', hours_ago=2)
+        self._remote('pay_retry', 'order_retried', 'captured', hours_ago=1)
+        self._remote('pay_abandoned', 'order_abandoned', 'failed', hours_ago=50)
+        self._remote('pay_ok', 'order_ok', 'captured')
+        self._remote('pay_other', 'order_elsewhere', 'captured')
+
+        report = reconcile_payments(
+            start=self.now - timedelta(days=3), end=self.now, window=timedelta(hours=6), workers=4,
+            page_size=1,
+        )
+
+        self.assertEqual(report['remote'], 5)
+        self.assertEqual(report['plan']['unknown'], ['order_elsewhere'])
+        self.assertEqual(report['result']['status_fixed'], 3)
+        self.assertEqual(
+            dict(Payment.objects.values_list('order_id', 'status')),
+            {
+                'order_lost_capture': 'SUCCESS',
+                'order_retried': 'SUCCESS',
+                'order_abandoned': 'FAILED',
+                'order_ok': 'SUCCESS',
+            },
+        )
+        self.assertEqual(Payment.objects.get(order_id='order_retried').payment_id, 'pay_retry')
+        self.assertEqual(set(report['timings']), {'fetch', 'match', 'apply'})
+        # 12 windows, each paged until a short page
+        self.assertGreater(self.standin.stats['requests'], 12)
+
+    def test_dry_run_and_single_order(self):
+        order_id = self.standin.create_order({'amount': 1000})['id']
+        Payment.objects.create(order_id=order_id, amount=1000)
+        self._remote('pay_1', order_id, 'captured')
+
+        out = StringIO()
+        call_command('process_razorpay_payments', '--order-id', order_id, '--dry-run', stdout=out)
+
+        self.assertIn(f'WOULD FIX: {order_id} -> SUCCESS', out.getvalue())
+        self.assertIn('fetch:', out.getvalue())
+        self.assertEqual(self.standin.stats['requests'], 1)
+        self.assertEqual(Payment.objects.get(order_id=order_id).status, 'CREATED')
@@ -0,0 +1,97 @@
+"""
+Tests for the local Razorpay/RazorpayX stand-in
+"""
+import json
+import threading
+from unittest.mock import patch
+import razorpay
+from django.test import SimpleTestCase, override_settings
+from core.payments.standin import StandInConfig, make_standin_server
+from core.payments.utils import razorpayx_client
+from core.payments.utils.razorpay_client import get_razorpay_client, reset_razorpay_client
+from core.payments.utils.signature import verify_payment_signature, verify_webhook_signature
+
+
+class RazorpayStandInTest(SimpleTestCase):
+    """The app's Razorpay clients work against the stand-in"""
+
+    def setUp(self):
+        self.config = StandInConfig(
+            key_secret='key_secret', webhook_url='http://app.test/api/payments/webhook/',
+            webhook_secret='webhook_secret', payout_delay=0,
+        )
+        self.server = make_standin_server(config=self.config)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.base_url = f'http://127.0.0.1:{self.server.server_port}'
+
+        settings_override = override_settings(
+            RAZORPAY_KEY_ID='rzp_test', RAZORPAY_KEY_SECRET='key_secret',
+            RAZORPAY_WEBHOOK_SECRET='webhook_secret', RAZORPAY_API_BASE_URL=self.base_url,
+            RAZORPAYX_KEY_ID='rzpx_test', RAZORPAYX_KEY_SECRET='x_secret',
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        reset_razorpay_client()
+        self.addCleanup(reset_razorpay_client)
+
+    def _capture_webhooks(self, count):
+        """Patch webhook delivery; returns (calls, event set once `count` were sent)"""
+        calls = []
+        done = threading.Event()
+
+        def post(url, data, headers, timeout):
+            calls.append((url, data, headers))
+            if len(calls) == count:
+                done.set()
+            return type('Response', (), {'status_code': 200})()
+
+        patcher = patch.object(self.server.standin.webhook_session, 'post', side_effect=post)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return calls, done
+
+    def test_order_checkout_and_signed_webhooks(self):
+        calls, done = self._capture_webhooks(2)
+
+        order = get_razorpay_client().order.create(data={'amount': 50000, 'currency': 'INR'})
+        checkout = self.server.standin.pay_order(order['id'])
+
+        self.assertTrue(verify_payment_signature(
+            checkout['razorpay_order_id'], checkout['razorpay_payment_id'], checkout['razorpay_signature']
+        ))
+        self.assertTrue(done.wait(5))
+        self.assertEqual([json.loads(data)['event'] for _, data, _ in calls], ['payment.captured', 'order.paid'])
+        for url, data, headers in calls:
+            self.assertEqual(url, self.config.webhook_url)
+            self.assertTrue(verify_webhook_signature(data, headers['X-Razorpay-Signature']))
+        self.assertEqual(get_razorpay_client().order.fetch(order['id'])['status'], 'paid')
+
+    def test_refund_marks_payment_refunded(self):
+        order = get_razorpay_client().order.create(data={'amount': 1000})
+        payment_id = self.server.standin.add_payment(order['id'])['id']
+
+        refund = get_razorpay_client().payment.refund(payment_id, {'amount': 1000})
+
+        self.assertEqual(refund['status'], 'processed')
+        self.assertEqual(get_razorpay_client().payment.fetch(payment_id)['status'], 'refunded')
+
+    def test_injected_errors(self):
+        self.config.error_rate = 1.0
+        with self.assertRaises(razorpay.errors.ServerError):
+            get_razorpay_client().order.create(data={'amount': 1000})
+        self.assertEqual(self.server.standin.stats['errors_injected'], 1)
+
+    def test_payout_settles_with_webhook(self):
+        self.config.payout_webhook_url = 'http://app.test/api/payout/webhook/'
+        calls, done = self._capture_webhooks(1)
+
+        with patch.object(razorpayx_client, 'RAZORPAYX_API_BASE_URL', f'{self.base_url}/v1'):
+            contact = razorpayx_client.create_razorpayx_contact({'name': 'A', 'email': 'a@example.com'})
+            self.assertEqual(razorpayx_client.get_razorpayx_contact_by_email('a@example.com')['id'], contact['id'])
+            payout = razorpayx_client.create_razorpayx_payout({'amount': 1000, 'mode': 'IMPS'})
+
+        self.assertTrue(done.wait(5))
+        body = json.loads(calls[0][1])
+        self.assertEqual((body['event'], body['payload']['payout']['id']), ('payout.processed', payout['id']))
@@ -0,0 +1,214 @@
+"""
+Tests for Razorpay payment webhook ingestion and asynchronous processing
+"""
+import hashlib
+import hmac
+import json
+from datetime import timedelta
+from unittest.mock import patch
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from core.payments.models import Payment, WebhookEvent
+from core.payments.tasks import process_pending_webhook_events_task, process_webhook_event_task
+from core.payments.utils.order_lock import get_webhook_order_key, get_webhook_queue, order_lock
+from core.payments.views import WEBHOOK_MAX_ATTEMPTS, get_webhook_retry_delay
+
+WEBHOOK_SECRET = 'test_webhook_secret'
+
+LOCMEM_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'payment-webhook-tests'}
+}
+
+
+@override_settings(RAZORPAY_WEBHOOK_SECRET=WEBHOOK_SECRET, CACHES=LOCMEM_CACHES)
+class WebhookIngestionTest(TestCase):
+    """The webhook request only stores the event and hands it to the consumer"""
+
+    def _post(self, payload, event_id=None):
+        body = json.dumps(payload).encode('utf-8')
+        headers = {
+            'HTTP_X_RAZORPAY_SIGNATURE': hmac.new(WEBHOOK_SECRET.encode('utf-8'), body, hashlib.sha256).hexdigest(),
+        }
+        if event_id:
+            headers['HTTP_X_RAZORPAY_EVENT_ID'] = event_id
+        return self.client.post(
+            '/api/payments/webhook/', data=body, content_type='application/json', secure=True, **headers
+        )
+
+    def _captured(self, order_id='order_TEST1', payment_id='pay_TEST1'):
+        return {
+            'event': 'payment.captured',
+            'payload': {'payment': {'entity': {'id': payment_id, 'order_id': order_id, 'status': 'captured'}}},
+        }
+
+    def test_invalid_signature_is_rejected(self):
+        response = self.client.post(
+            '/api/payments/webhook/', data=b'{}', content_type='application/json', secure=True,
+            HTTP_X_RAZORPAY_SIGNATURE='invalid',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    @patch('core.payments.tasks.process_webhook_event_task.apply_async')
+    def test_event_is_stored_and_enqueued_without_processing(self, mock_enqueue):
+        Payment.objects.create(order_id='order_TEST1', amount=50000)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self._post(self._captured(), event_id='evt_1')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['queued'])
+        event = WebhookEvent.objects.get(event_id='evt_1')
+        self.assertFalse(event.processed)
+        self.assertIsNotNone(event.next_attempt_at)
+        mock_enqueue.assert_called_once_with(args=[event.id], queue=None)
+        # Not applied inside the request
+        self.assertEqual(Payment.objects.get(order_id='order_TEST1').status, 'CREATED')
+
+    @patch('core.payments.tasks.process_webhook_event_task.apply_async')
+    def test_redelivery_is_not_stored_or_enqueued_twice(self, mock_enqueue):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._post(self._captured(), event_id='evt_1')
+            response = self._post(self._captured(), event_id='evt_1')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.json()['queued'])
+        self.assertEqual(WebhookEvent.objects.filter(event_id='evt_1').count(), 1)
+        self.assertEqual(mock_enqueue.call_count, 1)
+
+    @patch('core.payments.tasks.process_webhook_event_task.apply_async', side_effect=ConnectionError('broker down'))
+    def test_broker_outage_still_acknowledges(self, mock_enqueue):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self._post(self._captured(), event_id='evt_1')
+
+        self.assertEqual(response.status_code, 200)
+        # Left pending for the sweep
+        self.assertIsNotNone(WebhookEvent.objects.get(event_id='evt_1').next_attempt_at)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class WebhookProcessingTest(TestCase):
+    """The Celery consumer applies stored events, with retries and backoff"""
+
+    def setUp(self):
+        cache.clear()
+        self.payment = Payment.objects.create(order_id='order_TEST1', amount=50000)
+        self.event = WebhookEvent.objects.create(
+            event_id='evt_1',
+            event_type='payment.captured',
+            payload={
+                'event': 'payment.captured',
+                'payload': {'payment': {'entity': {'id': 'pay_TEST1', 'order_id': 'order_TEST1'}}},
+            },
+            next_attempt_at=timezone.now(),
+        )
+
+    def test_event_is_applied_once(self):
+        result = process_webhook_event_task.apply(args=[self.event.id]).get()
+        self.assertTrue(result['success'])
+
+        self.payment.refresh_from_db()
+        self.assertEqual((self.payment.status, self.payment.payment_id), ('SUCCESS', 'pay_TEST1'))
+        self.event.refresh_from_db()
+        self.assertTrue(self.event.processed)
+        self.assertEqual(self.event.attempts, 1)
+        self.assertIsNone(self.event.next_attempt_at)
+
+        with patch('core.payments.views._apply_webhook_event') as mock_apply:
+            process_webhook_event_task.apply(args=[self.event.id])
+        mock_apply.assert_not_called()
+
+    def test_missing_payment_is_recorded_without_retry(self):
+        self.payment.delete()
+        result = process_webhook_event_task.apply(args=[self.event.id]).get()
+
+        self.assertFalse(result['success'])
+        self.event.refresh_from_db()
+        self.assertFalse(self.event.processed)
+        self.assertIn('Payment not found', self.event.error_message)
+        self.assertIsNone(self.event.next_attempt_at)
+
+    @patch('core.payments.views._apply_webhook_event', side_effect=RuntimeError('lock wait timeout'))
+    def test_failure_is_recorded_and_retried_with_backoff(self, mock_apply):
+        with patch.object(process_webhook_event_task, 'retry', side_effect=RuntimeError('retry')) as mock_retry:
+            with self.assertRaises(RuntimeError):
+                process_webhook_event_task.apply(args=[self.event.id], throw=True)
+
+        self.assertEqual(mock_retry.call_args.kwargs['countdown'], get_webhook_retry_delay(1))
+        self.event.refresh_from_db()
+        self.assertFalse(self.event.processed)
+        self.assertEqual(self.event.attempts, 1)
+        self.assertEqual(self.event.error_message, 'lock wait timeout')
+        self.assertGreater(self.event.next_attempt_at, timezone.now())
+
+    @patch('core.payments.views._apply_webhook_event', side_effect=RuntimeError('lock wait timeout'))
+    def test_gives_up_after_max_attempts(self, mock_apply):
+        WebhookEvent.objects.filter(id=self.event.id).update(attempts=WEBHOOK_MAX_ATTEMPTS - 1)
+
+        result = process_webhook_event_task.apply(args=[self.event.id]).get()
+
+        self.assertFalse(result['success'])
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.attempts, WEBHOOK_MAX_ATTEMPTS)
+        self.assertIsNone(self.event.next_attempt_at)
+
+    def test_retry_delay_doubles_up_to_the_cap(self):
+        self.assertEqual(get_webhook_retry_delay(2), 2 * get_webhook_retry_delay(1))
+        self.assertIsNone(get_webhook_retry_delay(WEBHOOK_MAX_ATTEMPTS))
+
+    @patch('core.payments.tasks.process_webhook_event_task.apply_async')
+    def test_sweep_enqueues_only_overdue_events(self, mock_enqueue):
+        WebhookEvent.objects.filter(id=self.event.id).update(next_attempt_at=timezone.now() - timedelta(minutes=10))
+        WebhookEvent.objects.create(
+            event_id='evt_2', event_type='payment.captured', payload={}, next_attempt_at=timezone.now()
+        )
+        WebhookEvent.objects.create(event_id='evt_3', event_type='payment.captured', payload={}, processed=True)
+
+        self.assertEqual(process_pending_webhook_events_task(), 1)
+        mock_enqueue.assert_called_once_with(args=[self.event.id], queue=None)
+
+    def test_locked_order_is_retried_without_counting_an_attempt(self):
+        with order_lock('order_TEST1') as acquired:
+            self.assertTrue(acquired)
+            with patch.object(process_webhook_event_task, 'retry', side_effect=RuntimeError('retry')) as mock_retry:
+                with self.assertRaises(RuntimeError):
+                    process_webhook_event_task.apply(args=[self.event.id], throw=True)
+
+        self.assertNotIn('exc', mock_retry.call_args.kwargs)
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.attempts, 0)
+        self.assertEqual(Payment.objects.get(id=self.payment.id).status, 'CREATED')
+
+        # Released: the next run applies it
+        self.assertTrue(process_webhook_event_task.apply(args=[self.event.id]).get()['success'])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class OrderPartitioningTest(TestCase):
+    """Events are keyed by order so one order is handled by one consumer at a time"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_order_lock_is_exclusive_until_released(self):
+        with order_lock('order_A') as first:
+            with order_lock('order_A') as second, order_lock('order_B') as other:
+                self.assertEqual((first, second, other), (True, False, True))
+        with order_lock('order_A') as again:
+            self.assertTrue(again)
+
+    def test_order_key_from_payloads(self):
+        captured = {'payload': {'payment': {'entity': {'id': 'pay_1', 'order_id': 'order_1'}}}}
+        order_paid = {'payload': {'order': {'entity': {'id': 'order_1'}}, 'payment': {'entity': {'id': 'pay_1'}}}}
+        refund = {'payload': {'refund': {'entity': {'id': 'rfnd_1', 'payment_id': 'pay_1'}}}}
+        self.assertEqual(get_webhook_order_key(captured), 'order_1')
+        self.assertEqual(get_webhook_order_key(order_paid), 'order_1')
+        self.assertEqual(get_webhook_order_key(refund), 'pay_1')
+
+    def test_queue_is_stable_per_order(self):
+        self.assertIsNone(get_webhook_queue('order_1'))
+        with override_settings(RAZORPAY_WEBHOOK_PARTITIONS=8):
+            queue = get_webhook_queue('order_1')
+            self.assertEqual(queue, get_webhook_queue('order_1'))
+            self.assertRegex(queue, r'^payments\.webhooks\.[0-7]$')
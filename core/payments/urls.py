@@ -9,5 +9,6 @@ urlpatterns = [
     path('webhook/', views.webhook, name='webhook'),
     path('create-payout/', views.create_payout, name='create-payout'),
     path('refund/', views.create_refund, name='refund'),
+    path('gateway-status/', views.gateway_status, name='gateway-status'),
 ]
 
@@ -0,0 +1,193 @@
+"""
+Shared circuit breaker for calls to the payment gateway
+
+When Razorpay is degraded every call waits for its full timeout, and with sync Gunicorn
+workers a few dozen such requests drain the worker pool. The breaker counts gateway
+failures across all workers in the cache (Redis); once a threshold is reached within
+the failure window it opens, and calls fail immediately with a retry-after hint instead
+of waiting on the gateway. After the reset timeout one call is let through as a trial
+(half-open): success closes the breaker, failure opens it again.
+
+If the cache is unavailable the breaker stays closed and calls go through as before.
+"""
+from django.core.cache import cache
+import logging
+import math
+import time
+
+logger = logging.getLogger(__name__)
+
+BREAKER_KEY = 'payments:breaker:{name}:{field}'
+
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half_open'
+
+# Counters exported with the breaker state
+BREAKER_METRICS = ('failures_total', 'opened', 'half_open', 'closed', 'rejected')
+
+
+class CircuitOpen(Exception):
+    """The breaker is open; the call was not made"""
+
+    def __init__(self, name, retry_after):
+        self.name = name
+        self.retry_after = retry_after
+        super().__init__(f"Circuit breaker '{name}' is open, retry after {retry_after}s")
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker with its state shared through the cache
+
+    Args:
+        name (str): Breaker name, used in the cache keys
+        failure_threshold (int): Failures within failure_window that open the breaker
+        failure_window (int): Seconds over which failures are counted
+        reset_timeout (int): Seconds the breaker stays open before a trial call
+        trial_timeout (int): Seconds other callers are rejected while a trial call runs
+    """
+
+    def __init__(self, name, failure_threshold=5, failure_window=30, reset_timeout=30, trial_timeout=None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.failure_window = failure_window
+        self.reset_timeout = reset_timeout
+        self.trial_timeout = trial_timeout or reset_timeout
+
+    def _key(self, field):
+        return BREAKER_KEY.format(name=self.name, field=field)
+
+    def _incr(self, field, timeout=None):
+        key = self._key(field)
+        cache.add(key, 0, timeout)
+        return cache.incr(key)
+
+    def _count(self, metric):
+        try:
+            self._incr(f'metric:{metric}')
+        except Exception as e:
+            logger.debug(f"Could not update breaker metric {self.name}.{metric}: {e}")
+
+    def before_call(self):
+        """
+        Check the breaker before calling the gateway
+
+        Returns:
+            str: STATE_CLOSED, or STATE_HALF_OPEN if this call is the trial call
+
+        Raises:
+            CircuitOpen: If the breaker is open (or another caller holds the trial)
+        """
+        try:
+            open_until = cache.get(self._key('open_until'))
+            if open_until is None:
+                return STATE_CLOSED
+
+            now = time.time()
+            if now < open_until:
+                retry_after = max(1, math.ceil(open_until - now))
+            elif cache.add(self._key('trial'), now, self.trial_timeout):
+                self._count('half_open')
+                logger.warning(f"Circuit breaker '{self.name}' half-open: sending a trial call")
+                return STATE_HALF_OPEN
+            else:
+                retry_after = max(1, math.ceil(self.trial_timeout / 2))
+        except Exception as e:
+            logger.warning(f"Circuit breaker '{self.name}' unavailable, allowing call: {e}")
+            return STATE_CLOSED
+
+        self._count('rejected')
+        raise CircuitOpen(self.name, retry_after)
+
+    def record_success(self, state=STATE_CLOSED):
+        """Record a successful call; a successful trial closes the breaker"""
+        if state != STATE_HALF_OPEN:
+            return
+        try:
+            cache.delete_many([self._key('open_until'), self._key('failures'), self._key('trial')])
+        except Exception as e:
+            logger.warning(f"Could not close circuit breaker '{self.name}': {e}")
+            return
+        self._count('closed')
+        logger.warning(f"Circuit breaker '{self.name}' closed: trial call succeeded")
+
+    def record_failure(self, state=STATE_CLOSED):
+        """Record a failed call; opens the breaker at the threshold or when a trial fails"""
+        self._count('failures_total')
+        try:
+            if state == STATE_HALF_OPEN:
+                self._open('trial call failed')
+                cache.delete(self._key('trial'))
+                return
+            failures = self._incr('failures', self.failure_window)
+            if failures >= self.failure_threshold and cache.get(self._key('open_until')) is None:
+                self._open(f'{failures} failures within {self.failure_window}s')
+        except Exception as e:
+            logger.warning(f"Could not record failure on circuit breaker '{self.name}': {e}")
+
+    def _open(self, reason):
+        cache.set(self._key('open_until'), time.time() + self.reset_timeout, None)
+        cache.delete(self._key('failures'))
+        self._count('opened')
+        logger.error(f"🔌 Circuit breaker '{self.name}' opened for {self.reset_timeout}s: {reason}")
+
+    def call(self, func, *args, failure_exceptions=(Exception,), **kwargs):
+        """
+        Call func through the breaker
+
+        Only exceptions in failure_exceptions count as gateway failures; anything else
+        (e.g. a 400 for a bad request) is re-raised without affecting the breaker.
+
+        Raises:
+            CircuitOpen: If the breaker is open; func is not called
+        """
+        state = self.before_call()
+        try:
+            result = func(*args, **kwargs)
+        except failure_exceptions:
+            self.record_failure(state)
+            raise
+        except Exception:
+            if state == STATE_HALF_OPEN:
+                # The gateway answered, so the trial counts as a success
+                self.record_success(state)
+            raise
+        self.record_success(state)
+        return result
+
+    def get_state(self):
+        """
+        Current breaker state and counters, for monitoring
+
+        Returns:
+            dict: {'name', 'state', 'failures', 'retry_after', 'metrics': {metric: int}}
+        """
+        keys = [self._key('open_until'), self._key('failures'), self._key('trial')] + [
+            self._key(f'metric:{metric}') for metric in BREAKER_METRICS
+        ]
+        values = cache.get_many(keys)
+        open_until = values.get(self._key('open_until'))
+        now = time.time()
+
+        if open_until is None:
+            state, retry_after = STATE_CLOSED, 0
+        elif now < open_until:
+            state, retry_after = STATE_OPEN, max(1, math.ceil(open_until - now))
+        else:
+            state, retry_after = STATE_HALF_OPEN, 0
+
+        return {
+            'name': self.name,
+            'state': state,
+            'failures': values.get(self._key('failures'), 0),
+            'failure_threshold': self.failure_threshold,
+            'retry_after': retry_after,
+            'metrics': {
+                metric: values.get(self._key(f'metric:{metric}'), 0) for metric in BREAKER_METRICS
+            },
+        }
+
+    def reset(self):
+        """Close the breaker and clear its failure count (counters are kept)"""
+        cache.delete_many([self._key('open_until'), self._key('failures'), self._key('trial')])
@@ -0,0 +1,108 @@
+"""
+Per-order serialization of payment processing
+
+verify_payment and the webhook consumer can both try to apply the same Razorpay
+order. Holding a short cache (Redis) lock per order means only one of them does the
+work; the other finds the payment already applied, instead of queueing on the
+Payment row lock inside a transaction. The database locks stay in place as the
+correctness guarantee if the cache is unavailable.
+
+With RAZORPAY_WEBHOOK_PARTITIONS > 0, webhook events are also routed to one of that
+many Celery queues by a hash of the order id, so the events of one order are consumed
+in order by a single worker (run each partition queue with --concurrency=1).
+"""
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.cache import cache
+import hashlib
+import logging
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+ORDER_LOCK_KEY = 'payments:order_lock:{order_key}'
+ORDER_LOCK_TIMEOUT = 60  # seconds; a crashed holder releases after this
+ORDER_LOCK_POLL_INTERVAL = 0.05  # seconds
+
+WEBHOOK_QUEUE_PREFIX = 'payments.webhooks'
+
+
+class OrderLocked(Exception):
+    """Another process is applying a payment for the same order"""
+
+
+@contextmanager
+def order_lock(order_key, wait=0):
+    """
+    Hold the processing lock of an order for the duration of the block
+
+    Args:
+        order_key (str): Razorpay order id (payment id when the order is unknown)
+        wait (float): Seconds to wait for a busy lock; 0 tries once
+
+    Yields:
+        bool: True if the lock is held (or the cache is unavailable and the caller
+        should rely on database locks), False if another process holds it
+    """
+    key = ORDER_LOCK_KEY.format(order_key=order_key)
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + wait
+
+    try:
+        acquired = cache.add(key, token, ORDER_LOCK_TIMEOUT)
+        while not acquired and time.monotonic() < deadline:
+            time.sleep(ORDER_LOCK_POLL_INTERVAL)
+            acquired = cache.add(key, token, ORDER_LOCK_TIMEOUT)
+    except Exception as e:
+        logger.warning(f"Order lock unavailable for {order_key}, relying on database locks: {e}")
+        yield True
+        return
+
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            try:
+                if cache.get(key) == token:
+                    cache.delete(key)
+            except Exception as e:
+                logger.warning(f"Could not release order lock for {order_key}: {e}")
+
+
+def get_webhook_order_key(payload):
+    """
+    Order a webhook payload belongs to
+
+    Returns:
+        str | None: The order id; the payment id for events without one (refunds)
+    """
+    data = payload.get('payload') or {}
+    if not isinstance(data, dict):
+        return None
+
+    def _entity(name):
+        value = data.get(name) or {}
+        if isinstance(value, dict) and isinstance(value.get('entity'), dict):
+            return value['entity']
+        return value if isinstance(value, dict) else {}
+
+    payment = _entity('payment')
+    order = _entity('order')
+    refund = _entity('refund')
+    return payment.get('order_id') or order.get('id') or payment.get('id') or refund.get('payment_id')
+
+
+def get_webhook_queue(order_key):
+    """
+    Celery queue for the webhook events of an order
+
+    Returns:
+        str | None: The partition queue, or None (default queue) when partitioning is
+        disabled or the order is unknown
+    """
+    partitions = getattr(settings, 'RAZORPAY_WEBHOOK_PARTITIONS', 0)
+    if not partitions or not order_key:
+        return None
+    digest = hashlib.md5(order_key.encode('utf-8')).hexdigest()
+    return f"{WEBHOOK_QUEUE_PREFIX}.{int(digest, 16) % partitions}"
@@ -6,6 +6,7 @@ from django.conf import settings
 import logging
 import functools
 import requests
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -65,7 +66,13 @@ def get_razorpay_client():
                 "Please set RAZORPAY_KEY_ID and RAZORPAY_KEY_SECRET in environment variables."
             )
         
-        _client = razorpay.Client(auth=(key_id, key_secret))
+        options = {}
+        base_url = getattr(settings, 'RAZORPAY_API_BASE_URL', '')
+        if base_url:
+            options['base_url'] = base_url.rstrip('/')
+            logger.warning(f"Razorpay client using API base URL override: {options['base_url']}")
+        
+        _client = razorpay.Client(auth=(key_id, key_secret), **options)
         
         # Configure connection pooling and keep-alive for better performance
         # This helps reuse connections and reduces latency on subsequent requests
@@ -121,3 +128,27 @@ def get_razorpay_client():
     
     return _client
 
+
+def reset_razorpay_client():
+    """Drop the cached client so the next get_razorpay_client() call re-reads settings"""
+    global _client
+    _client = None
+
+
+def get_request_timeout(deadline):
+    """
+    (connect, read) timeout for a Razorpay call that must finish by deadline
+
+    Args:
+        deadline (float): time.monotonic() value by which the caller needs an answer
+
+    Returns:
+        tuple: The configured timeouts, capped at the time left
+
+    Raises:
+        requests.exceptions.Timeout: If the latency budget is already spent
+    """
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise requests.exceptions.Timeout("Razorpay latency budget exhausted")
+    return (min(RAZORPAY_CONNECT_TIMEOUT, remaining), min(RAZORPAY_READ_TIMEOUT, remaining))
@@ -14,8 +14,12 @@ RAZORPAYX_CONNECT_TIMEOUT = getattr(settings, 'RAZORPAY_CONNECT_TIMEOUT', 10)
 RAZORPAYX_READ_TIMEOUT = getattr(settings, 'RAZORPAY_READ_TIMEOUT', 30)
 RAZORPAYX_TIMEOUT = (RAZORPAYX_CONNECT_TIMEOUT, RAZORPAYX_READ_TIMEOUT)
 
-# RazorpayX API base URL
-RAZORPAYX_API_BASE_URL = 'https://api.razorpay.com/v1'
+# RazorpayX API base URL (RAZORPAY_API_BASE_URL overrides the host, e.g. for the local stand-in)
+RAZORPAYX_API_BASE_URL = (
+    f"{settings.RAZORPAY_API_BASE_URL.rstrip('/')}/v1"
+    if getattr(settings, 'RAZORPAY_API_BASE_URL', '')
+    else 'https://api.razorpay.com/v1'
+)
 
 
 def get_razorpayx_auth_headers():
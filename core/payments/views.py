@@ -3,7 +3,7 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError, PermissionDenied
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from django.contrib.contenttypes.models import ContentType
 from django.views.decorators.csrf import csrf_exempt
 from django.http import JsonResponse
@@ -14,6 +14,7 @@ import json
 import logging
 import hashlib
 import time
+import razorpay
 import requests
 from functools import wraps
 from urllib3.exceptions import ReadTimeoutError as Urllib3ReadTimeoutError
@@ -29,7 +30,8 @@ from .serializers import (
     CreateRefundRequestSerializer,
     CreateRefundResponseSerializer,
 )
-from .utils.razorpay_client import get_razorpay_client
+from .utils.razorpay_client import get_razorpay_client, get_request_timeout
+from .utils.circuit_breaker import CircuitBreaker, CircuitOpen
 from .utils.razorpayx_client import (
     create_razorpayx_contact,
     get_razorpayx_contact_by_email,
@@ -37,6 +39,8 @@ from .utils.razorpayx_client import (
     create_razorpayx_payout
 )
 from .utils.signature import verify_payment_signature, verify_webhook_signature
+from .tasks import enqueue_webhook_event
+from .utils.order_lock import OrderLocked, get_webhook_order_key, order_lock
 from celery import shared_task
 
 logger = logging.getLogger(__name__)
@@ -50,20 +54,53 @@ RAZORPAY_NET_TO_GROSS_DIVISOR = 0.9764  # 1 - 0.0236
 RAZORPAY_MAX_RETRIES = getattr(settings, 'RAZORPAY_MAX_RETRIES', 2)  # Maximum retry attempts
 RAZORPAY_RETRY_BACKOFF_BASE = getattr(settings, 'RAZORPAY_RETRY_BACKOFF_BASE', 1)  # Base delay in seconds
 
+# Total time create_order may spend on Razorpay, retries and backoff included
+RAZORPAY_ORDER_LATENCY_BUDGET = getattr(settings, 'RAZORPAY_ORDER_LATENCY_BUDGET', 8.0)  # seconds
 
-def retry_on_timeout(max_retries=RAZORPAY_MAX_RETRIES, backoff_base=RAZORPAY_RETRY_BACKOFF_BASE):
+# Shared (cache-backed) circuit breaker for Razorpay order creation
+RAZORPAY_BREAKER = CircuitBreaker(
+    'razorpay',
+    failure_threshold=getattr(settings, 'RAZORPAY_BREAKER_FAILURE_THRESHOLD', 5),
+    failure_window=getattr(settings, 'RAZORPAY_BREAKER_FAILURE_WINDOW', 30),
+    reset_timeout=getattr(settings, 'RAZORPAY_BREAKER_RESET_TIMEOUT', 30),
+)
+# Errors that mean the gateway is unhealthy (a 400 for a bad request does not)
+RAZORPAY_BREAKER_FAILURES = (
+    requests.exceptions.RequestException,
+    Urllib3ReadTimeoutError,
+    razorpay.errors.ServerError,
+)
+
+# Retry configuration for asynchronous webhook event processing
+WEBHOOK_MAX_ATTEMPTS = getattr(settings, 'RAZORPAY_WEBHOOK_MAX_ATTEMPTS', 6)
+WEBHOOK_RETRY_BACKOFF_BASE = getattr(settings, 'RAZORPAY_WEBHOOK_RETRY_BACKOFF_BASE', 30)  # seconds, doubled per attempt
+WEBHOOK_RETRY_BACKOFF_MAX = getattr(settings, 'RAZORPAY_WEBHOOK_RETRY_BACKOFF_MAX', 3600)  # seconds
+
+# How long verify_payment waits for an order being applied by the webhook consumer
+VERIFY_ORDER_LOCK_WAIT = 10  # seconds
+
+
+def retry_on_timeout(max_retries=RAZORPAY_MAX_RETRIES, backoff_base=RAZORPAY_RETRY_BACKOFF_BASE, deadline=None):
     """
     Decorator to retry Razorpay API calls on timeout errors with exponential backoff.
     
     Args:
         max_retries: Maximum number of retry attempts (default: 2)
         backoff_base: Base delay in seconds for exponential backoff (default: 1)
+        deadline: Optional time.monotonic() value; no retry is started that could not
+            finish by then (the last error is re-raised instead)
     
     Usage:
         @retry_on_timeout(max_retries=2)
         def create_razorpay_order(client, order_data):
             return client.order.create(data=order_data)
     """
+    def _can_retry(attempt):
+        # Backoff plus at least one more second for the attempt itself must fit the budget
+        if deadline is None:
+            return True
+        return time.monotonic() + backoff_base * (2 ** attempt) + 1 < deadline
+
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
@@ -73,7 +110,7 @@ def retry_on_timeout(max_retries=RAZORPAY_MAX_RETRIES, backoff_base=RAZORPAY_RET
                     return func(*args, **kwargs)
                 except (requests.exceptions.Timeout, Urllib3ReadTimeoutError) as timeout_error:
                     last_exception = timeout_error
-                    if attempt < max_retries:
+                    if attempt < max_retries and _can_retry(attempt):
                         # Calculate exponential backoff delay: base * 2^attempt
                         delay = backoff_base * (2 ** attempt)
                         logger.warning(
@@ -84,7 +121,7 @@ def retry_on_timeout(max_retries=RAZORPAY_MAX_RETRIES, backoff_base=RAZORPAY_RET
                     else:
                         # Final attempt failed, log and re-raise
                         logger.error(
-                            f"Razorpay API timeout after {max_retries + 1} attempts. "
+                            f"Razorpay API timeout after {attempt + 1} attempts. "
                             f"Giving up. Error: {timeout_error}",
                             exc_info=True
                         )
@@ -92,7 +129,7 @@ def retry_on_timeout(max_retries=RAZORPAY_MAX_RETRIES, backoff_base=RAZORPAY_RET
                 except requests.exceptions.ConnectionError as conn_error:
                     # Connection errors are usually transient, retry with backoff
                     last_exception = conn_error
-                    if attempt < max_retries:
+                    if attempt < max_retries and _can_retry(attempt):
                         delay = backoff_base * (2 ** attempt)
                         logger.warning(
                             f"Razorpay API connection error (attempt {attempt + 1}/{max_retries + 1}). "
@@ -101,7 +138,7 @@ def retry_on_timeout(max_retries=RAZORPAY_MAX_RETRIES, backoff_base=RAZORPAY_RET
                         time.sleep(delay)
                     else:
                         logger.error(
-                            f"Razorpay API connection error after {max_retries + 1} attempts. "
+                            f"Razorpay API connection error after {attempt + 1} attempts. "
                             f"Giving up. Error: {conn_error}",
                             exc_info=True
                         )
@@ -832,13 +869,38 @@ def create_order(request):
                 }
             }
 
-            @retry_on_timeout(max_retries=RAZORPAY_MAX_RETRIES)
+            # Every attempt goes through the shared breaker and gets only the time left
+            # in the latency budget, so a gateway brownout cannot hold the worker for
+            # connect+read timeout x retries
+            deadline = time.monotonic() + RAZORPAY_ORDER_LATENCY_BUDGET
+
+            @retry_on_timeout(max_retries=RAZORPAY_MAX_RETRIES, deadline=deadline)
             def create_razorpay_order_with_retry(client, order_data):
-                return client.order.create(data=order_data)
+                return RAZORPAY_BREAKER.call(
+                    client.order.create,
+                    data=order_data,
+                    timeout=get_request_timeout(deadline),
+                    failure_exceptions=RAZORPAY_BREAKER_FAILURES,
+                )
 
             try:
                 razorpay_order = create_razorpay_order_with_retry(client, order_data)
                 timing['razorpay_api'] = (time.time() - razorpay_start) * 1000  # ms
+            except CircuitOpen as breaker_open:
+                # Fail fast: the gateway is known to be down, don't spend a worker on it
+                logger.warning(
+                    f"Razorpay circuit breaker open, rejecting create_order for user {request.user.id}, "
+                    f"entity_type={entity_type}, entity_id={entity_id} (retry after {breaker_open.retry_after}s)"
+                )
+                response = Response(
+                    {
+                        'error': 'Payment gateway is temporarily unavailable. Please try again shortly.',
+                        'retry_after': breaker_open.retry_after,
+                    },
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE
+                )
+                response['Retry-After'] = str(breaker_open.retry_after)
+                return response
             except requests.exceptions.Timeout as timeout_error:
                 logger.error(
                     f"Razorpay API timeout while creating order for user {request.user.id}, "
@@ -985,58 +1047,518 @@ def verify_payment(request):
         # Verify signature
         is_valid = verify_payment_signature(order_id, payment_id, signature)
         
-        # Update payment status atomically
-        with transaction.atomic():
-            payment = Payment.objects.select_for_update().get(order_id=order_id)
+        # Update payment status atomically. The order lock (shared with the webhook consumer)
+        # keeps both from applying the same order concurrently.
+        with order_lock(order_id, wait=VERIFY_ORDER_LOCK_WAIT) as acquired:
+            if not acquired:
+                logger.warning(
+                    f"Order lock for {order_id} still held after {VERIFY_ORDER_LOCK_WAIT}s, "
+                    f"relying on the payment row lock"
+                )
+            with transaction.atomic():
+                payment = Payment.objects.select_for_update().get(order_id=order_id)
+                
+                # Double-check status (prevent race condition)
+                if payment.status in ['SUCCESS', 'FAILED']:
+                    response_serializer = VerifyPaymentResponseSerializer({
+                        'order_id': payment.order_id,
+                        'payment_id': payment.payment_id or '',
+                        'status': payment.status,
+                        'amount': payment.amount,
+                        'message': f'Payment already {payment.status.lower()}',
+                    })
+                    return Response(response_serializer.data)
+                
+                if is_valid:
+                    payment.status = 'SUCCESS'
+                    payment.payment_id = payment_id
+                    payment.save()
+                    logger.info(f"Payment verified successfully: order_id={order_id}, payment_id={payment_id}")
+                    
+                    # Process booking payment if this is a booking payment
+                    try:
+                        _process_booking_payment(payment)
+                    except Exception as e:
+                        logger.error(
+                            f"Error processing booking payment for Razorpay payment {order_id}: {e}",
+                            exc_info=True
+                        )
+                        # Don't fail the verification if booking payment processing fails
+                        # The payment is already verified, booking can be updated manually if needed
+                else:
+                    payment.status = 'FAILED'
+                    payment.save()
+                    logger.warning(f"Payment verification failed: order_id={order_id}")
+        
+        response_serializer = VerifyPaymentResponseSerializer({
+            'order_id': payment.order_id,
+            'payment_id': payment.payment_id or '',
+            'status': payment.status,
+            'amount': payment.amount,
+            'message': 'Payment verified successfully' if is_valid else 'Payment verification failed',
+        })
+        
+        return Response(response_serializer.data)
+    
+    except Exception as e:
+        logger.error(f"Error verifying payment: {e}", exc_info=True)
+        return Response(
+            {'error': 'Failed to verify payment. Please try again.'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+def _apply_webhook_event(payload, event_id):
+    """
+    Apply a Razorpay webhook payload to the matching Payment (and booking)
+    
+    Must run inside a transaction: Payment rows are locked with select_for_update.
+    
+    Args:
+        payload (dict): Webhook payload as received
+        event_id (str): WebhookEvent.event_id (for logging)
+    
+    Returns:
+        tuple: (processed, error) - processed is False with an error message when the
+        event could not be applied (e.g. no matching Payment)
+    """
+    event_type = payload.get('event')
+    
+    # Extract event_data - handle nested 'entity' structure
+    raw_event_data = payload.get('payload', {}).get('payment', {}) or payload.get('payload', {}).get('order', {}) or payload.get('payload', {})
+    # If event_data has 'entity' key, use that, otherwise use event_data directly
+    if isinstance(raw_event_data, dict) and 'entity' in raw_event_data:
+        event_data = raw_event_data.get('entity', raw_event_data)
+    else:
+        event_data = raw_event_data
+    
+    webhook_processed = False
+    webhook_error = None
+    
+    # Initialize payment variable to avoid UnboundLocalError
+    payment = None
+    
+    if event_type == 'payment.captured':
+        payment_id = event_data.get('id')
+        order_id = event_data.get('order_id')
+        
+        # Skip if both order_id and payment_id are missing
+        if not order_id and not payment_id:
+            logger.warning(
+                f"⚠️ payment.captured webhook received with missing order_id and payment_id. "
+                f"Event data: {event_data}, Event ID: {event_id}"
+            )
+            webhook_error = "Both order_id and payment_id are missing"
+        else:
+            # First, try to find Payment by payment_id (if already set)
+            # This prevents duplicates when the same payment_id is assigned to multiple orders
+            if payment_id:
+                existing_payments = Payment.objects.filter(payment_id=payment_id).select_for_update()
+                if existing_payments.exists():
+                    payment = existing_payments.first()
+                    if existing_payments.count() > 1:
+                        logger.warning(
+                            f"Multiple Payment records found with payment_id={payment_id}. "
+                            f"Using the first one for webhook update."
+                        )
+                    # If found by payment_id but order_id doesn't match, log warning
+                    if order_id and payment.order_id != order_id:
+                        logger.warning(
+                            f"Payment found by payment_id={payment_id} has different order_id. "
+                            f"Expected: {order_id}, Found: {payment.order_id}"
+                        )
             
-            # Double-check status (prevent race condition)
-            if payment.status in ['SUCCESS', 'FAILED']:
-                response_serializer = VerifyPaymentResponseSerializer({
-                    'order_id': payment.order_id,
-                    'payment_id': payment.payment_id or '',
-                    'status': payment.status,
-                    'amount': payment.amount,
-                    'message': f'Payment already {payment.status.lower()}',
-                })
-                return Response(response_serializer.data)
+            # If not found by payment_id, try by order_id
+            if not payment and order_id:
+                try:
+                    payment = Payment.objects.select_for_update().get(order_id=order_id)
+                except Payment.DoesNotExist:
+                    logger.warning(
+                        f"Payment not found for webhook: order_id={order_id}, payment_id={payment_id}, "
+                        f"event_id={event_id}"
+                    )
+                    payment = None
+                    webhook_error = f"Payment not found for order_id={order_id}, payment_id={payment_id}"
+            elif not payment and not order_id:
+                logger.warning(
+                    f"⚠️ Cannot process payment.captured webhook: order_id is missing. "
+                    f"payment_id={payment_id}, event_id={event_id}"
+                )
+                webhook_error = "order_id is missing from webhook payload"
+        
+        if payment:
+            # Check if payment_id is already set and different
+            if payment.payment_id and payment.payment_id != payment_id:
+                logger.warning(
+                    f"Payment {payment.order_id} already has payment_id={payment.payment_id}, "
+                    f"but webhook has payment_id={payment_id}. Not updating payment_id."
+                )
+            elif not payment.payment_id:
+                # Only set payment_id if it's not already set
+                payment.payment_id = payment_id
             
-            if is_valid:
+            if payment.status != 'SUCCESS':
                 payment.status = 'SUCCESS'
-                payment.payment_id = payment_id
+                payment.raw_payload = payload
                 payment.save()
-                logger.info(f"Payment verified successfully: order_id={order_id}, payment_id={payment_id}")
+                webhook_processed = True
+                logger.info(f"✅ Updated payment to SUCCESS via webhook: order_id={order_id}, payment_id={payment_id}")
                 
                 # Process booking payment if this is a booking payment
                 try:
                     _process_booking_payment(payment)
                 except Exception as e:
                     logger.error(
-                        f"Error processing booking payment for Razorpay payment {order_id}: {e}",
+                        f"Error processing booking payment for webhook payment {order_id}: {e}",
                         exc_info=True
                     )
-                    # Don't fail the verification if booking payment processing fails
-                    # The payment is already verified, booking can be updated manually if needed
+                    # Don't mark as failed if booking payment processing fails - payment was still updated
             else:
+                # Payment already has SUCCESS status
+                webhook_processed = True
+                logger.info(f"✅ Payment already has SUCCESS status: order_id={order_id}, payment_id={payment_id}")
+    
+    elif event_type == 'payment.failed':
+        payment_id = event_data.get('id')
+        order_id = event_data.get('order_id')
+        
+        # Skip if both order_id and payment_id are missing
+        if not order_id and not payment_id:
+            logger.warning(
+                f"⚠️ payment.failed webhook received with missing order_id and payment_id. "
+                f"Event data: {event_data}, Event ID: {event_id}"
+            )
+            webhook_error = "Both order_id and payment_id are missing"
+            payment = None
+        else:
+            # First, try to find Payment by payment_id (if already set)
+            payment = None
+            if payment_id:
+                existing_payments = Payment.objects.filter(payment_id=payment_id).select_for_update()
+                if existing_payments.exists():
+                    payment = existing_payments.first()
+                    if existing_payments.count() > 1:
+                        logger.warning(
+                            f"Multiple Payment records found with payment_id={payment_id}. "
+                            f"Using the first one for webhook update."
+                        )
+            
+            # If not found by payment_id, try by order_id
+            if not payment and order_id:
+                try:
+                    payment = Payment.objects.select_for_update().get(order_id=order_id)
+                except Payment.DoesNotExist:
+                    logger.warning(
+                        f"Payment not found for webhook: order_id={order_id}, payment_id={payment_id}, "
+                        f"event_id={event_id}"
+                    )
+                    payment = None
+                    webhook_error = f"Payment not found for order_id={order_id}, payment_id={payment_id}"
+            elif not payment and not order_id:
+                logger.warning(
+                    f"⚠️ Cannot process payment.failed webhook: order_id is missing. "
+                    f"payment_id={payment_id}, event_id={event_id}"
+                )
+                webhook_error = "order_id is missing from webhook payload"
+        
+        if payment:
+            # Check if payment_id is already set and different
+            if payment.payment_id and payment.payment_id != payment_id:
+                logger.warning(
+                    f"Payment {payment.order_id} already has payment_id={payment.payment_id}, "
+                    f"but webhook has payment_id={payment_id}. Not updating payment_id."
+                )
+            elif not payment.payment_id:
+                # Only set payment_id if it's not already set
+                payment.payment_id = payment_id
+            
+            if payment.status != 'FAILED':
                 payment.status = 'FAILED'
+                payment.raw_payload = payload
                 payment.save()
-                logger.warning(f"Payment verification failed: order_id={order_id}")
+                webhook_processed = True
+                logger.info(f"✅ Updated payment to FAILED via webhook: order_id={order_id}, payment_id={payment_id}")
+            else:
+                # Payment already has FAILED status
+                webhook_processed = True
+                logger.info(f"✅ Payment already has FAILED status: order_id={order_id}, payment_id={payment_id}")
+    
+    elif event_type == 'order.paid':
+        order_id = event_data.get('id')
+        payment_data = payload.get('payload', {}).get('payment', {})
+        payment_id = payment_data.get('id') if payment_data else None
+        
+        # First, try to find Payment by payment_id (if available)
+        payment = None
+        if payment_id:
+            existing_payments = Payment.objects.filter(payment_id=payment_id).select_for_update()
+            if existing_payments.exists():
+                payment = existing_payments.first()
+                if existing_payments.count() > 1:
+                    logger.warning(
+                        f"Multiple Payment records found with payment_id={payment_id}. "
+                        f"Using the first one for webhook update."
+                    )
         
-        response_serializer = VerifyPaymentResponseSerializer({
-            'order_id': payment.order_id,
-            'payment_id': payment.payment_id or '',
-            'status': payment.status,
-            'amount': payment.amount,
-            'message': 'Payment verified successfully' if is_valid else 'Payment verification failed',
-        })
+        # If not found by payment_id, try by order_id
+        if not payment:
+            try:
+                payment = Payment.objects.select_for_update().get(order_id=order_id)
+            except Payment.DoesNotExist:
+                logger.warning(f"Payment not found for webhook: order_id={order_id}, payment_id={payment_id}")
+                payment = None
         
-        return Response(response_serializer.data)
+        if payment:
+            # Try to get payment_id from payload if available
+            if payment_id:
+                # Check if payment_id is already set and different
+                if payment.payment_id and payment.payment_id != payment_id:
+                    logger.warning(
+                        f"Payment {payment.order_id} already has payment_id={payment.payment_id}, "
+                        f"but webhook has payment_id={payment_id}. Not updating payment_id."
+                    )
+                elif not payment.payment_id:
+                    # Only set payment_id if it's not already set
+                    payment.payment_id = payment_id
+            
+            if payment.status != 'SUCCESS':
+                payment.status = 'SUCCESS'
+                payment.raw_payload = payload
+                payment.save()
+                webhook_processed = True
+                logger.info(f"✅ Updated payment to SUCCESS via order.paid webhook: order_id={order_id}, payment_id={payment_id}")
+                
+                # Process booking payment if this is a booking payment
+                try:
+                    _process_booking_payment(payment)
+                except Exception as e:
+                    logger.error(
+                        f"Error processing booking payment for webhook payment {order_id}: {e}",
+                        exc_info=True
+                    )
+                    # Don't mark as failed if booking payment processing fails - payment was still updated
+            else:
+                # Payment already has SUCCESS status - booking payment should already be processed
+                # Don't call _process_booking_payment again to avoid duplicate processing
+                webhook_processed = True
+                logger.info(f"✅ Payment already has SUCCESS status: order_id={order_id}, payment_id={payment_id}. Skipping booking payment processing (already done).")
     
-    except Exception as e:
-        logger.error(f"Error verifying payment: {e}", exc_info=True)
-        return Response(
-            {'error': 'Failed to verify payment. Please try again.'},
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+    elif event_type == 'refund.processed':
+        # For refund.processed events, payment_id is in the refund entity, not in event_data
+        # Try multiple locations where payment_id might be
+        refund_data = payload.get('payload', {}).get('refund', {})
+        payment_id = None
+        refund_id = None
+        webhook_processed = False
+        webhook_error = None
+        
+        # Extract refund_id for tracking
+        if refund_data:
+            if isinstance(refund_data, dict):
+                if 'entity' in refund_data and isinstance(refund_data['entity'], dict):
+                    refund_id = refund_data['entity'].get('id')
+                    payment_id = refund_data['entity'].get('payment_id')
+                if not refund_id:
+                    refund_id = refund_data.get('id')
+                if not payment_id:
+                    payment_id = refund_data.get('payment_id')
+        
+        # Fallback: try to get from payment entity if available
+        if not payment_id:
+            payment_entity = payload.get('payload', {}).get('payment', {})
+            if payment_entity:
+                if isinstance(payment_entity, dict):
+                    if 'entity' in payment_entity and isinstance(payment_entity['entity'], dict):
+                        payment_id = payment_entity['entity'].get('id')
+                    if not payment_id:
+                        payment_id = payment_entity.get('id')
+        
+        # Only process if we have a valid payment_id
+        if payment_id:
+            try:
+                payment = Payment.objects.select_for_update().get(payment_id=payment_id)
+                if payment.status != 'REFUNDED':
+                    payment.status = 'REFUNDED'
+                    payment.raw_payload = payload
+                    payment.save()
+                    webhook_processed = True
+                    logger.info(
+                        f"✅ Refund webhook processed successfully: "
+                        f"payment_id={payment_id}, refund_id={refund_id}, "
+                        f"order_id={payment.order_id}, event_id={payload.get('id', 'N/A')}"
+                    )
+                else:
+                    webhook_processed = True
+                    logger.info(
+                        f"✅ Refund webhook received (already processed): "
+                        f"payment_id={payment_id}, refund_id={refund_id}, "
+                        f"order_id={payment.order_id}, event_id={payload.get('id', 'N/A')}"
+                    )
+            except Payment.DoesNotExist:
+                webhook_error = f"Payment not found for payment_id={payment_id}"
+                logger.warning(
+                    f"❌ {webhook_error}. "
+                    f"refund_id={refund_id}, event_id={payload.get('id', 'N/A')}"
+                )
+            except Payment.MultipleObjectsReturned:
+                # Handle duplicate payment_ids - update the latest payment
+                logger.warning(
+                    f"⚠️ Multiple Payment records found for payment_id={payment_id}. "
+                    f"Updating the latest payment to REFUNDED."
+                )
+                payment = Payment.objects.filter(payment_id=payment_id).select_for_update().latest('created_at')
+                if payment.status != 'REFUNDED':
+                    payment.status = 'REFUNDED'
+                    payment.raw_payload = payload
+                    payment.save()
+                    webhook_processed = True
+                    logger.info(
+                        f"✅ Refund webhook processed (duplicate handled): "
+                        f"payment_id={payment_id}, refund_id={refund_id}, "
+                        f"order_id={payment.order_id}, event_id={payload.get('id', 'N/A')}"
+                    )
+                else:
+                    webhook_processed = True
+                    logger.info(
+                        f"✅ Refund webhook received (duplicate, already processed): "
+                        f"payment_id={payment_id}, refund_id={refund_id}, "
+                        f"order_id={payment.order_id}, event_id={payload.get('id', 'N/A')}"
+                    )
+        else:
+            webhook_error = "payment_id is missing from webhook payload"
+            logger.error(
+                f"❌ Cannot process refund.processed webhook: {webhook_error}. "
+                f"Refund data: {refund_data}, event_id={payload.get('id', 'N/A')}"
+            )
+    
+    else:
+        logger.warning(f"Unknown webhook event type: {event_type}")
+        webhook_error = f"Unsupported event type: {event_type}"
+        # Store unknown events for debugging (get_or_create: the event may be retried)
+        Payment.objects.get_or_create(
+            order_id=f"webhook_{event_type}_{payload.get('payload', {}).get('payment', {}).get('id', 'unknown')}",
+            defaults={'raw_payload': payload, 'status': 'CREATED', 'amount': 0},
+        )
+    
+    return webhook_processed, webhook_error
+
+
+def process_webhook_event(webhook_event_id):
+    """
+    Apply a stored webhook event (run by the Celery consumer, see tasks.py)
+    
+    The event's order is locked with order_lock() (shared with verify_payment) and the
+    WebhookEvent row stays locked while the event is applied, so each order is applied
+    by one process at a time and concurrent deliveries of the same event are applied
+    once. Exceptions roll back the whole event and propagate to the caller, which
+    records the failure and retries.
+    
+    Args:
+        webhook_event_id (int): WebhookEvent primary key
+    
+    Returns:
+        WebhookEvent | None: The event after processing, or None if it does not exist
+    
+    Raises:
+        OrderLocked: The order is being processed elsewhere (nothing was done)
+    """
+    from .models import WebhookEvent
+    
+    payload = WebhookEvent.objects.filter(id=webhook_event_id).values_list('payload', flat=True).first()
+    if payload is None:
+        logger.warning(f"Webhook event {webhook_event_id} not found, nothing to process")
+        return None
+    
+    order_key = get_webhook_order_key(payload) or f"event_{webhook_event_id}"
+    with order_lock(order_key) as acquired:
+        if not acquired:
+            raise OrderLocked(order_key)
+        
+        with transaction.atomic():
+            webhook_event = WebhookEvent.objects.select_for_update().get(id=webhook_event_id)
+            
+            if webhook_event.processed:
+                logger.info(
+                    f"✅ Webhook event {webhook_event.event_id} already processed at {webhook_event.processed_at}. "
+                    f"Skipping duplicate processing (idempotent)."
+                )
+                return webhook_event
+            
+            webhook_processed, webhook_error = _apply_webhook_event(webhook_event.payload, webhook_event.event_id)
+            
+            webhook_event.processed = webhook_processed
+            webhook_event.error_message = webhook_error
+            webhook_event.attempts += 1
+            webhook_event.next_attempt_at = None
+            if webhook_processed:
+                webhook_event.processed_at = timezone.now()
+            webhook_event.save()
+            logger.info(
+                f"💾 Webhook event {webhook_event.event_id} marked as processed={webhook_processed} "
+                f"(error: {webhook_error if webhook_error else 'None'})"
+            )
+    
+    return webhook_event
+
+
+def get_webhook_retry_delay(attempts):
+    """
+    Seconds to wait before the next processing attempt of a webhook event
+    
+    Args:
+        attempts (int): Failed attempts so far (>= 1)
+    
+    Returns:
+        int | None: Delay in seconds, or None once WEBHOOK_MAX_ATTEMPTS is reached
+    """
+    if attempts >= WEBHOOK_MAX_ATTEMPTS:
+        return None
+    return min(WEBHOOK_RETRY_BACKOFF_BASE * (2 ** (attempts - 1)), WEBHOOK_RETRY_BACKOFF_MAX)
+
+
+def record_webhook_event_failure(webhook_event_id, error):
+    """
+    Record a failed processing attempt and schedule the next one
+    
+    Returns:
+        int | None: Seconds until the next attempt, or None if the event has used up
+        its attempts (it then stays unprocessed with the error for manual review)
+    """
+    from .models import WebhookEvent
+    
+    with transaction.atomic():
+        webhook_event = WebhookEvent.objects.select_for_update().filter(id=webhook_event_id).first()
+        if webhook_event is None or webhook_event.processed:
+            return None
+        
+        webhook_event.attempts += 1
+        webhook_event.error_message = str(error)
+        retry_in = get_webhook_retry_delay(webhook_event.attempts)
+        webhook_event.next_attempt_at = (
+            timezone.now() + timedelta(seconds=retry_in) if retry_in is not None else None
         )
+        webhook_event.save(update_fields=['attempts', 'error_message', 'next_attempt_at', 'updated_at'])
+    
+    return retry_in
+
+
+def _enqueue_webhook_event(webhook_event):
+    """
+    Hand a stored webhook event to the Celery consumer
+    If the broker is unavailable the event stays pending and is picked up by
+    process_pending_webhook_events_task.
+    """
+    def _enqueue():
+        try:
+            enqueue_webhook_event(webhook_event)
+        except Exception as e:
+            logger.error(
+                f"Could not enqueue webhook event {webhook_event.event_id}, "
+                f"leaving it for the pending events sweep: {e}",
+                exc_info=True
+            )
+    
+    transaction.on_commit(_enqueue)
 
 
 @csrf_exempt
@@ -1046,6 +1568,9 @@ def webhook(request):
     
     POST /api/payments/webhook/
     CSRF exempt for webhook endpoint
+    
+    Only verifies the signature and stores the event in webhook_events before
+    acknowledging; the event is applied asynchronously by process_webhook_event_task.
     """
     if request.method != 'POST':
         error_response = {'error': 'Method not allowed'}
@@ -1085,8 +1610,12 @@ def webhook(request):
         
         event_type = payload.get('event')
         # Try multiple locations for event_id (Razorpay may use different structures)
-        # Standard Razorpay webhook has 'id' at top level, but check multiple locations
-        event_id = payload.get('id') or payload.get('event_id')
+        # Razorpay sends the event id in the X-Razorpay-Event-Id header (same value on redelivery)
+        event_id = (
+            request.META.get('HTTP_X_RAZORPAY_EVENT_ID')
+            or payload.get('id')
+            or payload.get('event_id')
+        )
         
         # Check in payload if it's a dict
         if not event_id:
@@ -1126,408 +1655,59 @@ def webhook(request):
                     f"Generated fallback event_id: {event_id}. event_type={event_type}"
                 )
         
-        # Extract event_data - handle nested 'entity' structure
-        raw_event_data = payload.get('payload', {}).get('payment', {}) or payload.get('payload', {}).get('order', {}) or payload.get('payload', {})
-        # If event_data has 'entity' key, use that, otherwise use event_data directly
-        if isinstance(raw_event_data, dict) and 'entity' in raw_event_data:
-            event_data = raw_event_data.get('entity', raw_event_data)
-        else:
-            event_data = raw_event_data
-        
-        # Log full payload + event_id
-        logger.info(
-            f"📥 Webhook received: event_type={event_type}, event_id={event_id}, "
-            f"payload={json.dumps(payload, indent=2)}"
-        )
+        logger.info(f"📥 Webhook received: event_type={event_type}, event_id={event_id}")
         
-        # Track webhook processing status
-        webhook_processed = False
-        webhook_error = None
+        from .models import WebhookEvent
         
-        # Handle different event types with idempotency check
-        with transaction.atomic():
-            from .models import WebhookEvent
-            
-            # Check if this event_id has already been processed (idempotency)
-            try:
-                existing_event = WebhookEvent.objects.select_for_update().get(event_id=event_id)
-                if existing_event.processed:
-                    logger.info(
-                        f"✅ Webhook event {event_id} already processed at {existing_event.processed_at}. "
-                        f"Skipping duplicate processing (idempotent)."
-                    )
-                    webhook_processed = True
-                    # Return success response without processing again
-                    response_data = {
-                        'status': 'success',
-                        'event': event_type,
-                        'event_id': event_id,
-                        'processed': True,
-                        'message': 'Event already processed (idempotent)',
-                        'error': None
-                    }
-                    logger.info(f"📤 Webhook response sent (idempotent): {response_data}")
-                    return JsonResponse(response_data, status=200)
-                else:
-                    # Event exists but not processed - update it
-                    webhook_event = existing_event
-                    logger.warning(
-                        f"⚠️ Webhook event {event_id} exists but was not marked as processed. "
-                        f"Will attempt to process again."
-                    )
-            except WebhookEvent.DoesNotExist:
-                # Create new webhook event record
+        try:
+            with transaction.atomic():
                 webhook_event = WebhookEvent.objects.create(
                     event_id=event_id,
-                    event_type=event_type,
+                    event_type=event_type or '',
                     payload=payload,
-                    processed=False
+                    processed=False,
+                    next_attempt_at=timezone.now(),
                 )
-                logger.info(f"📝 Created new webhook event record: {event_id}")
-            
-            # Initialize payment variable to avoid UnboundLocalError
-            payment = None
-            
-            if event_type == 'payment.captured':
-                payment_id = event_data.get('id')
-                order_id = event_data.get('order_id')
-                
-                # Skip if both order_id and payment_id are missing
-                if not order_id and not payment_id:
-                    logger.warning(
-                        f"⚠️ payment.captured webhook received with missing order_id and payment_id. "
-                        f"Event data: {event_data}, Event ID: {event_id}"
-                    )
-                    webhook_error = "Both order_id and payment_id are missing"
-                else:
-                    # First, try to find Payment by payment_id (if already set)
-                    # This prevents duplicates when the same payment_id is assigned to multiple orders
-                    if payment_id:
-                        existing_payments = Payment.objects.filter(payment_id=payment_id).select_for_update()
-                        if existing_payments.exists():
-                            payment = existing_payments.first()
-                            if existing_payments.count() > 1:
-                                logger.warning(
-                                    f"Multiple Payment records found with payment_id={payment_id}. "
-                                    f"Using the first one for webhook update."
-                                )
-                            # If found by payment_id but order_id doesn't match, log warning
-                            if order_id and payment.order_id != order_id:
-                                logger.warning(
-                                    f"Payment found by payment_id={payment_id} has different order_id. "
-                                    f"Expected: {order_id}, Found: {payment.order_id}"
-                                )
-                    
-                    # If not found by payment_id, try by order_id
-                    if not payment and order_id:
-                        try:
-                            payment = Payment.objects.select_for_update().get(order_id=order_id)
-                        except Payment.DoesNotExist:
-                            logger.warning(
-                                f"Payment not found for webhook: order_id={order_id}, payment_id={payment_id}, "
-                                f"event_id={event_id}"
-                            )
-                            payment = None
-                            webhook_error = f"Payment not found for order_id={order_id}, payment_id={payment_id}"
-                    elif not payment and not order_id:
-                        logger.warning(
-                            f"⚠️ Cannot process payment.captured webhook: order_id is missing. "
-                            f"payment_id={payment_id}, event_id={event_id}"
-                        )
-                        webhook_error = "order_id is missing from webhook payload"
-                
-                if payment:
-                    # Check if payment_id is already set and different
-                    if payment.payment_id and payment.payment_id != payment_id:
-                        logger.warning(
-                            f"Payment {payment.order_id} already has payment_id={payment.payment_id}, "
-                            f"but webhook has payment_id={payment_id}. Not updating payment_id."
-                        )
-                    elif not payment.payment_id:
-                        # Only set payment_id if it's not already set
-                        payment.payment_id = payment_id
-                    
-                    if payment.status != 'SUCCESS':
-                        payment.status = 'SUCCESS'
-                        payment.raw_payload = payload
-                        payment.save()
-                        webhook_processed = True
-                        logger.info(f"✅ Updated payment to SUCCESS via webhook: order_id={order_id}, payment_id={payment_id}")
-                        
-                        # Process booking payment if this is a booking payment
-                        try:
-                            _process_booking_payment(payment)
-                        except Exception as e:
-                            logger.error(
-                                f"Error processing booking payment for webhook payment {order_id}: {e}",
-                                exc_info=True
-                            )
-                            # Don't mark as failed if booking payment processing fails - payment was still updated
-                    else:
-                        # Payment already has SUCCESS status
-                        webhook_processed = True
-                        logger.info(f"✅ Payment already has SUCCESS status: order_id={order_id}, payment_id={payment_id}")
-            
-            elif event_type == 'payment.failed':
-                payment_id = event_data.get('id')
-                order_id = event_data.get('order_id')
-                
-                # Skip if both order_id and payment_id are missing
-                if not order_id and not payment_id:
-                    logger.warning(
-                        f"⚠️ payment.failed webhook received with missing order_id and payment_id. "
-                        f"Event data: {event_data}, Event ID: {event_id}"
-                    )
-                    webhook_error = "Both order_id and payment_id are missing"
-                    payment = None
-                else:
-                    # First, try to find Payment by payment_id (if already set)
-                    payment = None
-                    if payment_id:
-                        existing_payments = Payment.objects.filter(payment_id=payment_id).select_for_update()
-                        if existing_payments.exists():
-                            payment = existing_payments.first()
-                            if existing_payments.count() > 1:
-                                logger.warning(
-                                    f"Multiple Payment records found with payment_id={payment_id}. "
-                                    f"Using the first one for webhook update."
-                                )
-                    
-                    # If not found by payment_id, try by order_id
-                    if not payment and order_id:
-                        try:
-                            payment = Payment.objects.select_for_update().get(order_id=order_id)
-                        except Payment.DoesNotExist:
-                            logger.warning(
-                                f"Payment not found for webhook: order_id={order_id}, payment_id={payment_id}, "
-                                f"event_id={event_id}"
-                            )
-                            payment = None
-                            webhook_error = f"Payment not found for order_id={order_id}, payment_id={payment_id}"
-                    elif not payment and not order_id:
-                        logger.warning(
-                            f"⚠️ Cannot process payment.failed webhook: order_id is missing. "
-                            f"payment_id={payment_id}, event_id={event_id}"
-                        )
-                        webhook_error = "order_id is missing from webhook payload"
-                
-                if payment:
-                    # Check if payment_id is already set and different
-                    if payment.payment_id and payment.payment_id != payment_id:
-                        logger.warning(
-                            f"Payment {payment.order_id} already has payment_id={payment.payment_id}, "
-                            f"but webhook has payment_id={payment_id}. Not updating payment_id."
-                        )
-                    elif not payment.payment_id:
-                        # Only set payment_id if it's not already set
-                        payment.payment_id = payment_id
-                    
-                    if payment.status != 'FAILED':
-                        payment.status = 'FAILED'
-                        payment.raw_payload = payload
-                        payment.save()
-                        webhook_processed = True
-                        logger.info(f"✅ Updated payment to FAILED via webhook: order_id={order_id}, payment_id={payment_id}")
-                    else:
-                        # Payment already has FAILED status
-                        webhook_processed = True
-                        logger.info(f"✅ Payment already has FAILED status: order_id={order_id}, payment_id={payment_id}")
-            
-            elif event_type == 'order.paid':
-                order_id = event_data.get('id')
-                payment_data = payload.get('payload', {}).get('payment', {})
-                payment_id = payment_data.get('id') if payment_data else None
-                
-                # First, try to find Payment by payment_id (if available)
-                payment = None
-                if payment_id:
-                    existing_payments = Payment.objects.filter(payment_id=payment_id).select_for_update()
-                    if existing_payments.exists():
-                        payment = existing_payments.first()
-                        if existing_payments.count() > 1:
-                            logger.warning(
-                                f"Multiple Payment records found with payment_id={payment_id}. "
-                                f"Using the first one for webhook update."
-                            )
-                
-                # If not found by payment_id, try by order_id
-                if not payment:
-                    try:
-                        payment = Payment.objects.select_for_update().get(order_id=order_id)
-                    except Payment.DoesNotExist:
-                        logger.warning(f"Payment not found for webhook: order_id={order_id}, payment_id={payment_id}")
-                        payment = None
-                
-                if payment:
-                    # Try to get payment_id from payload if available
-                    if payment_id:
-                        # Check if payment_id is already set and different
-                        if payment.payment_id and payment.payment_id != payment_id:
-                            logger.warning(
-                                f"Payment {payment.order_id} already has payment_id={payment.payment_id}, "
-                                f"but webhook has payment_id={payment_id}. Not updating payment_id."
-                            )
-                        elif not payment.payment_id:
-                            # Only set payment_id if it's not already set
-                            payment.payment_id = payment_id
-                    
-                    if payment.status != 'SUCCESS':
-                        payment.status = 'SUCCESS'
-                        payment.raw_payload = payload
-                        payment.save()
-                        webhook_processed = True
-                        logger.info(f"✅ Updated payment to SUCCESS via order.paid webhook: order_id={order_id}, payment_id={payment_id}")
-                        
-                        # Process booking payment if this is a booking payment
-                        try:
-                            _process_booking_payment(payment)
-                        except Exception as e:
-                            logger.error(
-                                f"Error processing booking payment for webhook payment {order_id}: {e}",
-                                exc_info=True
-                            )
-                            # Don't mark as failed if booking payment processing fails - payment was still updated
-                    else:
-                        # Payment already has SUCCESS status - booking payment should already be processed
-                        # Don't call _process_booking_payment again to avoid duplicate processing
-                        webhook_processed = True
-                        logger.info(f"✅ Payment already has SUCCESS status: order_id={order_id}, payment_id={payment_id}. Skipping booking payment processing (already done).")
-            
-            elif event_type == 'refund.processed':
-                # For refund.processed events, payment_id is in the refund entity, not in event_data
-                # Try multiple locations where payment_id might be
-                refund_data = payload.get('payload', {}).get('refund', {})
-                payment_id = None
-                refund_id = None
-                webhook_processed = False
-                webhook_error = None
-                
-                # Extract refund_id for tracking
-                if refund_data:
-                    if isinstance(refund_data, dict):
-                        if 'entity' in refund_data and isinstance(refund_data['entity'], dict):
-                            refund_id = refund_data['entity'].get('id')
-                            payment_id = refund_data['entity'].get('payment_id')
-                        if not refund_id:
-                            refund_id = refund_data.get('id')
-                        if not payment_id:
-                            payment_id = refund_data.get('payment_id')
-                
-                # Fallback: try to get from payment entity if available
-                if not payment_id:
-                    payment_entity = payload.get('payload', {}).get('payment', {})
-                    if payment_entity:
-                        if isinstance(payment_entity, dict):
-                            if 'entity' in payment_entity and isinstance(payment_entity['entity'], dict):
-                                payment_id = payment_entity['entity'].get('id')
-                            if not payment_id:
-                                payment_id = payment_entity.get('id')
-                
-                # Only process if we have a valid payment_id
-                if payment_id:
-                    try:
-                        payment = Payment.objects.select_for_update().get(payment_id=payment_id)
-                        if payment.status != 'REFUNDED':
-                            payment.status = 'REFUNDED'
-                            payment.raw_payload = payload
-                            payment.save()
-                            webhook_processed = True
-                            logger.info(
-                                f"✅ Refund webhook processed successfully: "
-                                f"payment_id={payment_id}, refund_id={refund_id}, "
-                                f"order_id={payment.order_id}, event_id={payload.get('id', 'N/A')}"
-                            )
-                        else:
-                            webhook_processed = True
-                            logger.info(
-                                f"✅ Refund webhook received (already processed): "
-                                f"payment_id={payment_id}, refund_id={refund_id}, "
-                                f"order_id={payment.order_id}, event_id={payload.get('id', 'N/A')}"
-                            )
-                    except Payment.DoesNotExist:
-                        webhook_error = f"Payment not found for payment_id={payment_id}"
-                        logger.warning(
-                            f"❌ {webhook_error}. "
-                            f"refund_id={refund_id}, event_id={payload.get('id', 'N/A')}"
-                        )
-                    except Payment.MultipleObjectsReturned:
-                        # Handle duplicate payment_ids - update the latest payment
-                        logger.warning(
-                            f"⚠️ Multiple Payment records found for payment_id={payment_id}. "
-                            f"Updating the latest payment to REFUNDED."
-                        )
-                        payment = Payment.objects.filter(payment_id=payment_id).select_for_update().latest('created_at')
-                        if payment.status != 'REFUNDED':
-                            payment.status = 'REFUNDED'
-                            payment.raw_payload = payload
-                            payment.save()
-                            webhook_processed = True
-                            logger.info(
-                                f"✅ Refund webhook processed (duplicate handled): "
-                                f"payment_id={payment_id}, refund_id={refund_id}, "
-                                f"order_id={payment.order_id}, event_id={payload.get('id', 'N/A')}"
-                            )
-                        else:
-                            webhook_processed = True
-                            logger.info(
-                                f"✅ Refund webhook received (duplicate, already processed): "
-                                f"payment_id={payment_id}, refund_id={refund_id}, "
-                                f"order_id={payment.order_id}, event_id={payload.get('id', 'N/A')}"
-                            )
-                else:
-                    webhook_error = "payment_id is missing from webhook payload"
-                    logger.error(
-                        f"❌ Cannot process refund.processed webhook: {webhook_error}. "
-                        f"Refund data: {refund_data}, event_id={payload.get('id', 'N/A')}"
-                    )
-            
-            else:
-                logger.warning(f"Unknown webhook event type: {event_type}")
-                # Store unknown events for debugging
-                Payment.objects.create(
-                    raw_payload=payload,
-                    status='CREATED',
-                    order_id=f"webhook_{event_type}_{payload.get('payload', {}).get('payment', {}).get('id', 'unknown')}",
-                    amount=0,
+            queued = True
+            logger.info(f"📝 Created new webhook event record: {event_id}")
+        except IntegrityError:
+            # Redelivery of an event we already stored
+            webhook_event = WebhookEvent.objects.get(event_id=event_id)
+            queued = False
+            if webhook_event.processed:
+                logger.info(
+                    f"✅ Webhook event {event_id} already processed at {webhook_event.processed_at}. "
+                    f"Skipping duplicate processing (idempotent)."
                 )
-            
-            # Mark webhook event as processed (inside transaction)
-            webhook_event.processed = webhook_processed
-            webhook_event.error_message = webhook_error if webhook_error else None
-            if webhook_processed:
-                from django.utils import timezone
-                webhook_event.processed_at = timezone.now()
-            webhook_event.save()
-            logger.info(
-                f"💾 Webhook event {event_id} marked as processed={webhook_processed} "
-                f"(error: {webhook_error if webhook_error else 'None'})"
-            )
+            elif webhook_event.next_attempt_at is None:
+                # Previously applied without success (or out of attempts): try again
+                queued = WebhookEvent.objects.filter(
+                    id=webhook_event.id, processed=False, next_attempt_at__isnull=True
+                ).update(next_attempt_at=timezone.now()) > 0
+                logger.warning(
+                    f"⚠️ Webhook event {event_id} exists but was not marked as processed. "
+                    f"Will attempt to process again."
+                )
+        
+        if queued:
+            _enqueue_webhook_event(webhook_event)
         
-        # Always return 200 OK to prevent Razorpay from retrying
-        # Include processing status in response for debugging
         response_data = {
             'status': 'success',
             'event': event_type,
             'event_id': event_id,
-            'processed': webhook_processed,
-            'error': webhook_error if webhook_error else None
+            'processed': webhook_event.processed,
+            'queued': queued,
         }
-        
-        # Log the response being sent
-        logger.info(
-            f"📤 Webhook response sent: event={event_type}, event_id={event_id}, "
-            f"processed={webhook_processed}, error={webhook_error if webhook_error else 'None'}, "
-            f"response_data={response_data}"
-        )
-        
+        logger.info(f"📤 Webhook response sent: {response_data}")
         return JsonResponse(response_data, status=200)
     
     except Exception as e:
-        logger.error(f"Error processing webhook: {e}", exc_info=True)
-        # Still return 200 to prevent retries
-        error_response = {'status': 'error', 'message': str(e)}
-        logger.info(f"📤 Webhook error response sent: {error_response}")
-        return JsonResponse(error_response, status=200)
+        # The event was not stored: let Razorpay retry the delivery
+        logger.error(f"Error storing webhook: {e}", exc_info=True)
+        error_response = {'status': 'error', 'message': 'Webhook could not be stored'}
+        logger.info(f"📤 Webhook error response sent (500): {error_response}")
+        return JsonResponse(error_response, status=500)
 
 
 @api_view(['POST'])
@@ -1929,3 +2109,21 @@ def create_refund(request):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def gateway_status(request):
+    """
+    Razorpay circuit breaker state and counters (closed / open / half_open), for monitoring.
+    
+    GET /api/payments/gateway-status/
+    """
+    try:
+        return Response(RAZORPAY_BREAKER.get_state())
+    except Exception as e:
+        logger.error(f"Error reading Razorpay circuit breaker state: {e}", exc_info=True)
+        return Response(
+            {'error': 'Circuit breaker state unavailable'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
@@ -2,7 +2,6 @@ from rest_framework import viewsets, status, serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.pagination import PageNumberPagination
 from django.db import transaction
 from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
@@ -17,11 +16,12 @@ from .utils.signature import verify_payout_webhook_signature
 from .tasks import process_payout_success, process_payout_failure
 from core.wallet.utils import get_or_create_wallet
 from core.settings.models import PlatformSettings
+from core.pagination import EstimatedCountPagination
 
 logger = logging.getLogger(__name__)
 
 
-class PayoutPagination(PageNumberPagination):
+class PayoutPagination(EstimatedCountPagination):
     """Custom pagination for payout list with page_size support"""
     page_size = 20
     page_size_query_param = 'page_size'
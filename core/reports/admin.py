@@ -1,2 +1,66 @@
-# Reports module doesn't have models, only views
+from django.contrib import admin
+from .models import DailyUserRollup, DailyBookingRollup, DailyPaymentRollup, ReportExport, MonthlyBuyerSnapshot
 
+
+@admin.register(DailyUserRollup)
+class DailyUserRollupAdmin(admin.ModelAdmin):
+    """Read-only view of the daily user rollup"""
+    list_display = ('date', 'role', 'is_active_buyer', 'has_pre_booked', 'has_paid', 'has_delivered', 'user_count')
+    list_filter = ('role', 'is_active_buyer')
+    date_hierarchy = 'date'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DailyBookingRollup)
+class DailyBookingRollupAdmin(admin.ModelAdmin):
+    """Read-only view of the daily booking rollup"""
+    list_display = ('date', 'role', 'status', 'payment_option', 'is_paid', 'booking_count')
+    list_filter = ('role', 'status', 'payment_option')
+    date_hierarchy = 'date'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DailyPaymentRollup)
+class DailyPaymentRollupAdmin(admin.ModelAdmin):
+    """Read-only view of the daily payment rollup"""
+    list_display = ('date', 'role', 'payment_method', 'status', 'payment_count', 'total_amount')
+    list_filter = ('role', 'payment_method', 'status')
+    date_hierarchy = 'date'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(MonthlyBuyerSnapshot)
+class MonthlyBuyerSnapshotAdmin(admin.ModelAdmin):
+    """Read-only view of the monthly buyer growth snapshots"""
+    list_display = ('month', 'role', 'total_buyers', 'active_buyers', 'refreshed_at')
+    list_filter = ('role',)
+    date_hierarchy = 'month'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ReportExport)
+class ReportExportAdmin(admin.ModelAdmin):
+    list_display = ('id', 'report_type', 'export_format', 'status', 'row_count', 'requested_by', 'created_at', 'completed_at')
+    list_filter = ('report_type', 'export_format', 'status')
+    search_fields = ('requested_by__username',)
+    readonly_fields = ('created_at', 'started_at', 'completed_at')
@@ -0,0 +1,90 @@
+"""
+Shared aggregation helpers for report sections
+
+Report summaries used to run one COUNT/SUM per day, status or type. These helpers
+express each of those buckets as a filtered aggregate so a whole summary over one
+table is computed in a single query.
+"""
+from django.db.models import OuterRef, Q, Subquery
+from django.utils import timezone
+from datetime import timedelta
+
+
+def aggregate_buckets(queryset, buckets, metrics):
+    """
+    Compute every metric for every bucket in one aggregate() query
+
+    Args:
+        queryset: Base queryset all buckets are drawn from
+        buckets: Ordered mapping of bucket key -> Q condition (None for the whole queryset).
+                 Keys can be any hashable (status names, dates, ...)
+        metrics: Mapping of metric name -> (aggregate class, field), e.g.
+                 {'count': (Count, 'id'), 'total': (Sum, 'amount')}
+
+    Returns:
+        dict: {bucket key: {metric name: value}}; empty buckets yield 0, not None
+    """
+    aggregates = {}
+    aliases = {}
+    for index, (bucket, condition) in enumerate(buckets.items()):
+        for metric, (function, field) in metrics.items():
+            alias = f'bucket_{index}_{metric}'
+            aliases[(bucket, metric)] = alias
+            if condition is None:
+                aggregates[alias] = function(field)
+            else:
+                aggregates[alias] = function(field, filter=condition)
+
+    row = queryset.aggregate(**aggregates) if aggregates else {}
+
+    return {
+        bucket: {
+            metric: row[aliases[(bucket, metric)]] or 0
+            for metric in metrics
+        }
+        for bucket in buckets
+    }
+
+
+def daily_buckets(field, days, now=None):
+    """
+    Build one bucket per day for the last `days` days (oldest first, today last)
+
+    Args:
+        field: Datetime field to bucket on, e.g. 'created_at'
+        days: Number of days, including today
+        now: Reference time (defaults to timezone.now())
+
+    Returns:
+        dict: {day datetime: Q condition covering that whole day}
+    """
+    now = now or timezone.now()
+    buckets = {}
+    for i in range(days):
+        day = now - timedelta(days=days - 1 - i)
+        day_start = day.replace(hour=0, minute=0, second=0, microsecond=0)
+        day_end = day.replace(hour=23, minute=59, second=59, microsecond=999999)
+        buckets[day] = Q(**{f'{field}__gte': day_start, f'{field}__lte': day_end})
+    return buckets
+
+
+def related_aggregate(queryset, field, aggregate):
+    """
+    Correlated subquery aggregating the queryset rows that point at the outer row
+
+    Use it to annotate a handful of parent rows (e.g. the top 5 users) with per-row
+    totals in the same query instead of running one aggregate per row.
+
+    Args:
+        queryset: Child rows, e.g. WalletTransaction.objects.filter(transaction_type=...)
+        field: Child field referencing the outer row's pk, e.g. 'user'
+        aggregate: Aggregate expression, e.g. Sum('amount')
+
+    Returns:
+        Subquery: Annotatable expression; NULL when no child rows match
+    """
+    return Subquery(
+        queryset.filter(**{field: OuterRef('pk')}).order_by().values(field).annotate(
+            value=aggregate
+        ).values('value')[:1]
+    )
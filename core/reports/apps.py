@@ -5,3 +5,5 @@ class ReportsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core.reports'
 
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,144 @@
+"""
+Monthly buyer growth snapshots for the admin dashboard
+
+Closed months are read from MonthlyBuyerSnapshot (one row per month and role, written
+at month close); only the current month is computed live, from the daily user rollup.
+"""
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+from datetime import date, datetime
+from core.users.models import User
+from .models import DailyUserRollup, MonthlyBuyerSnapshot
+import logging
+
+logger = logging.getLogger(__name__)
+
+BUYER_GROWTH_ROLES = ('user', 'staff')
+
+
+def add_months(month, offset):
+    """First day of the month `offset` months after the given month start"""
+    index = month.year * 12 + month.month - 1 + offset
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _month_end_datetime(month):
+    """Aware local datetime at which the month closes (start of the next month)"""
+    return timezone.make_aware(datetime.combine(add_months(month, 1), datetime.min.time()))
+
+
+def compute_buyer_growth(months, roles=BUYER_GROWTH_ROLES):
+    """
+    Total and active buyers per role at the close of each month, from the users table
+    (one grouped query for all months)
+
+    A user counts as an active buyer at month close if they are one now and became
+    one before the month closed.
+
+    Returns:
+        dict: {(month, role): {'total': int, 'active': int}}
+    """
+    aggregates = {}
+    for index, month in enumerate(months):
+        closes_at = _month_end_datetime(month)
+        aggregates[f'total_{index}'] = Count('id', filter=Q(date_joined__lt=closes_at))
+        aggregates[f'active_{index}'] = Count('id', filter=Q(
+            date_joined__lt=closes_at,
+            is_active_buyer=True,
+        ) & (Q(active_buyer_since__lt=closes_at) | Q(active_buyer_since__isnull=True)))
+
+    rows = {
+        row['role']: row
+        for row in User.objects.filter(role__in=roles).values('role').annotate(**aggregates).order_by()
+    }
+
+    growth = {}
+    for role in roles:
+        row = rows.get(role, {})
+        for index, month in enumerate(months):
+            growth[(month, role)] = {
+                'total': row.get(f'total_{index}', 0),
+                'active': row.get(f'active_{index}', 0),
+            }
+    return growth
+
+
+def snapshot_buyer_growth(months=None):
+    """
+    Store the month-close buyer counts
+
+    Args:
+        months: Month start dates to (re)write; defaults to the month that just closed
+
+    Returns:
+        int: Number of snapshot rows written
+    """
+    if months is None:
+        months = [add_months(timezone.localdate().replace(day=1), -1)]
+
+    growth = compute_buyer_growth(months)
+    for (month, role), counts in growth.items():
+        MonthlyBuyerSnapshot.objects.update_or_create(
+            month=month,
+            role=role,
+            defaults={'total_buyers': counts['total'], 'active_buyers': counts['active']},
+        )
+
+    logger.info(f"Buyer growth snapshot written for {', '.join(f'{m:%Y-%m}' for m in months)}")
+    return len(growth)
+
+
+def get_buyer_growth(months, roles=BUYER_GROWTH_ROLES):
+    """
+    Buyer counts per month and role for the growth chart
+
+    Closed months come from the snapshots (months never snapshotted are computed
+    from the users table once and stored as snapshots); the current month is live
+    from the daily user rollup.
+
+    Returns:
+        dict: {(month, role): {'total': int, 'active': int}}
+    """
+    current_month = timezone.localdate().replace(day=1)
+    closed_months = [month for month in months if month < current_month]
+
+    growth = {}
+    for snapshot in MonthlyBuyerSnapshot.objects.filter(month__in=closed_months, role__in=roles):
+        growth[(snapshot.month, snapshot.role)] = {
+            'total': snapshot.total_buyers,
+            'active': snapshot.active_buyers,
+        }
+
+    missing = sorted({
+        month for month in closed_months for role in roles if (month, role) not in growth
+    })
+    if missing:
+        logger.warning(
+            f"No buyer growth snapshot for {', '.join(f'{m:%Y-%m}' for m in missing)}; computing from users"
+        )
+        for (month, role), counts in compute_buyer_growth(missing, roles).items():
+            if (month, role) in growth:
+                continue
+            growth[(month, role)] = counts
+            MonthlyBuyerSnapshot.objects.update_or_create(
+                month=month,
+                role=role,
+                defaults={'total_buyers': counts['total'], 'active_buyers': counts['active']},
+            )
+
+    if current_month in months:
+        live = {
+            row['role']: row
+            for row in DailyUserRollup.objects.filter(role__in=roles).values('role').annotate(
+                total=Sum('user_count'),
+                active=Sum('user_count', filter=Q(is_active_buyer=True)),
+            ).order_by()
+        }
+        for role in roles:
+            row = live.get(role, {})
+            growth[(current_month, role)] = {
+                'total': row.get('total') or 0,
+                'active': row.get('active') or 0,
+            }
+
+    return growth
@@ -0,0 +1,156 @@
+"""
+Materialized distributor dashboards
+
+DistributorDashboardView serves a stored payload; the payload is rebuilt by a
+debounced Celery task whenever a tree, payment or pair event touches the distributor.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from core.binary.models import BinaryNode
+from .models import DistributorDashboardSnapshot
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Events for the same distributor within this window collapse into one refresh
+DISTRIBUTOR_DASHBOARD_REFRESH_DELAY = 30  # seconds
+
+DISTRIBUTOR_DASHBOARD_SCHEDULED_KEY = 'reports:distributor_dashboard:scheduled:{user_id}'
+
+DISTRIBUTOR_DASHBOARD_NODE_SCHEDULED_KEY = 'reports:distributor_dashboard:node_scheduled:{node_id}'
+
+
+def store_distributor_dashboard(distributor, distributor_node=None):
+    """
+    Build the dashboard payload for a distributor and store it
+
+    Args:
+        distributor: User with is_distributor=True
+        distributor_node: The distributor's BinaryNode (loaded if not given)
+
+    Returns:
+        DistributorDashboardSnapshot: The stored snapshot
+    """
+    from .views import DistributorDashboardView
+
+    if distributor_node is None:
+        distributor_node = BinaryNode.objects.select_related('user').get(user=distributor)
+
+    payload = DistributorDashboardView().build_dashboard_payload(distributor, distributor_node)
+    snapshot, _ = DistributorDashboardSnapshot.objects.update_or_create(
+        user=distributor,
+        defaults={'payload': payload, 'refreshed_at': timezone.now()},
+    )
+    return snapshot
+
+
+def get_distributor_ids_for_nodes(node_ids):
+    """
+    Get the user IDs of distributors whose dashboard covers any of the given nodes,
+    i.e. the distributors among the nodes themselves and all of their ancestors
+    (one recursive CTE query for all nodes)
+    """
+    from django.db import connection
+
+    node_ids = list(node_ids)
+    if not node_ids:
+        return []
+
+    placeholders = ', '.join(['%s'] * len(node_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            WITH RECURSIVE ancestors AS (
+                SELECT id, parent_id, user_id, 0 as depth
+                FROM binary_nodes WHERE id IN ({placeholders})
+                UNION
+                SELECT bn.id, bn.parent_id, bn.user_id, a.depth + 1
+                FROM binary_nodes bn
+                INNER JOIN ancestors a ON bn.id = a.parent_id
+                WHERE a.depth < 100
+            )
+            SELECT DISTINCT u.id FROM ancestors a
+            INNER JOIN users u ON u.id = a.user_id
+            WHERE u.is_distributor = %s
+        """, node_ids + [True])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def schedule_distributor_dashboard_refresh(user_ids):
+    """
+    Queue a dashboard refresh for each distributor, once per debounce window
+
+    The first event for a distributor enqueues the task with a countdown; further
+    events before it runs are absorbed by the scheduled marker in the cache. The task
+    is enqueued after the current transaction commits so it sees the new data.
+    Never raises: a failed refresh only leaves the stored dashboard stale.
+    """
+    def _enqueue():
+        from .tasks import refresh_distributor_dashboard_task
+
+        for user_id in set(user_ids):
+            key = DISTRIBUTOR_DASHBOARD_SCHEDULED_KEY.format(user_id=user_id)
+            try:
+                if cache.add(key, 1, timeout=DISTRIBUTOR_DASHBOARD_REFRESH_DELAY * 10):
+                    refresh_distributor_dashboard_task.apply_async(
+                        args=[user_id], countdown=DISTRIBUTOR_DASHBOARD_REFRESH_DELAY
+                    )
+            except Exception as e:
+                try:
+                    cache.delete(key)
+                except Exception:
+                    pass
+                logger.warning(f"Could not schedule distributor dashboard refresh for user {user_id}: {e}")
+
+    if user_ids:
+        transaction.on_commit(_enqueue)
+
+
+def schedule_refresh_for_nodes(node_ids):
+    """
+    Queue dashboard refreshes for the distributors covering the given nodes
+
+    Only the node IDs are queued (once per debounce window per node, like
+    schedule_distributor_dashboard_refresh); the ancestor lookup runs in
+    refresh_dashboards_for_nodes_task, not in the request or signal that changed
+    the tree. Never raises.
+    """
+    def _enqueue():
+        from .tasks import refresh_dashboards_for_nodes_task
+
+        pending = []
+        for node_id in set(node_ids):
+            key = DISTRIBUTOR_DASHBOARD_NODE_SCHEDULED_KEY.format(node_id=node_id)
+            try:
+                if cache.add(key, 1, timeout=DISTRIBUTOR_DASHBOARD_REFRESH_DELAY * 10):
+                    pending.append(node_id)
+            except Exception as e:
+                logger.warning(f"Could not mark node {node_id} for dashboard refresh: {e}")
+                pending.append(node_id)
+        if not pending:
+            return
+        try:
+            refresh_dashboards_for_nodes_task.apply_async(
+                args=[sorted(pending)], countdown=DISTRIBUTOR_DASHBOARD_REFRESH_DELAY
+            )
+        except Exception as e:
+            try:
+                cache.delete_many([
+                    DISTRIBUTOR_DASHBOARD_NODE_SCHEDULED_KEY.format(node_id=node_id) for node_id in pending
+                ])
+            except Exception:
+                pass
+            logger.warning(f"Could not schedule dashboard refresh for nodes {pending}: {e}")
+
+    if node_ids:
+        transaction.on_commit(_enqueue)
+
+
+def schedule_refresh_for_users(user_ids):
+    """Queue dashboard refreshes for the distributors covering the given users' nodes"""
+    try:
+        node_ids = list(BinaryNode.objects.filter(user_id__in=user_ids).values_list('id', flat=True))
+    except Exception as e:
+        logger.warning(f"Could not resolve nodes for dashboard refresh: {e}")
+        return
+    schedule_refresh_for_nodes(node_ids)
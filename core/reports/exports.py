@@ -0,0 +1,346 @@
+"""
+Streaming report exports
+
+Full-table exports are written by a Celery task, one keyset batch of rows at a time,
+to a temporary file that is then uploaded to storage, so memory use stays flat no
+matter how many rows a table has and API workers are never tied up by an export.
+
+Files go to the private export storage (core.storage.get_report_export_storage) under
+random names; they are only reachable through a short-lived signed URL or the
+authenticated download endpoint, and are deleted after REPORT_EXPORT_RETENTION_DAYS.
+"""
+from django.conf import settings
+from django.core.files import File
+from django.urls import reverse
+from django.utils import timezone
+from datetime import datetime, timedelta
+import csv
+import logging
+import os
+import tempfile
+import uuid
+
+from core.wallet.models import WalletTransaction
+from core.booking.models import Booking
+from core.payout.models import Payout
+from core.compliance.models import TDSRecord
+from core.db_router import use_replica
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched per query
+EXPORT_CHUNK_SIZE = 2000
+
+# Exports (file and record) are deleted this many days after they were requested
+REPORT_EXPORT_RETENTION_DAYS = getattr(settings, 'REPORT_EXPORT_RETENTION_DAYS', 7)
+
+# Excel caps a sheet at 1,048,576 rows; larger exports continue on a new sheet
+XLSX_MAX_ROWS_PER_SHEET = 1048575
+
+# report_type -> model, date field the start/end filters apply to, (header, field) columns
+EXPORT_DEFINITIONS = {
+    'wallet_transactions': {
+        'model': WalletTransaction,
+        'date_field': 'created_at',
+        'columns': [
+            ('ID', 'id'),
+            ('User ID', 'user_id'),
+            ('Username', 'user__username'),
+            ('Transaction Type', 'transaction_type'),
+            ('Amount', 'amount'),
+            ('Balance Before', 'balance_before'),
+            ('Balance After', 'balance_after'),
+            ('Description', 'description'),
+            ('Reference ID', 'reference_id'),
+            ('Reference Type', 'reference_type'),
+            ('Created At', 'created_at'),
+        ],
+    },
+    'bookings': {
+        'model': Booking,
+        'date_field': 'created_at',
+        'columns': [
+            ('ID', 'id'),
+            ('Booking Number', 'booking_number'),
+            ('User ID', 'user_id'),
+            ('Username', 'user__username'),
+            ('Vehicle Model', 'vehicle_model__name'),
+            ('Status', 'status'),
+            ('Payment Option', 'payment_option'),
+            ('Booking Amount', 'booking_amount'),
+            ('Total Amount', 'total_amount'),
+            ('Total Paid', 'total_paid'),
+            ('Remaining Amount', 'remaining_amount'),
+            ('Referred By', 'referred_by__username'),
+            ('Created At', 'created_at'),
+            ('Confirmed At', 'confirmed_at'),
+            ('Completed At', 'completed_at'),
+        ],
+    },
+    'payouts': {
+        'model': Payout,
+        'date_field': 'created_at',
+        'columns': [
+            ('ID', 'id'),
+            ('User ID', 'user_id'),
+            ('Username', 'user__username'),
+            ('Requested Amount', 'requested_amount'),
+            ('TDS Amount', 'tds_amount'),
+            ('Net Amount', 'net_amount'),
+            ('EMI Amount', 'emi_amount'),
+            ('Status', 'status'),
+            ('Bank Name', 'bank_name'),
+            ('Account Holder Name', 'account_holder_name'),
+            ('IFSC Code', 'ifsc_code'),
+            ('Transaction ID', 'transaction_id'),
+            ('Created At', 'created_at'),
+            ('Processed At', 'processed_at'),
+            ('Completed At', 'completed_at'),
+        ],
+    },
+    'tds_records': {
+        'model': TDSRecord,
+        'date_field': 'created_at',
+        'columns': [
+            ('ID', 'id'),
+            ('User ID', 'user_id'),
+            ('Username', 'user__username'),
+            ('Financial Year', 'financial_year'),
+            ('Total Payout', 'total_payout'),
+            ('TDS Deducted', 'tds_deducted'),
+            ('Certificate Number', 'certificate_number'),
+            ('Created At', 'created_at'),
+        ],
+    },
+}
+
+
+def get_export_queryset(report_type, filters=None):
+    """
+    Base queryset for a report type with the export filters applied
+
+    Args:
+        report_type: Key of EXPORT_DEFINITIONS
+        filters: Optional dict with 'start_date' / 'end_date' (YYYY-MM-DD, inclusive)
+
+    Returns:
+        QuerySet
+    """
+    definition = EXPORT_DEFINITIONS[report_type]
+    queryset = definition['model'].objects.all()
+    filters = filters or {}
+    date_field = definition['date_field']
+
+    if filters.get('start_date'):
+        queryset = queryset.filter(**{f'{date_field}__date__gte': filters['start_date']})
+    if filters.get('end_date'):
+        queryset = queryset.filter(**{f'{date_field}__date__lte': filters['end_date']})
+
+    return queryset
+
+
+def iterate_export_rows(queryset, fields, chunk_size=None):
+    """
+    Yield value tuples for every row of queryset in primary key order
+
+    Rows are read in keyset batches (id > last id seen) rather than with a single
+    iterator() cursor: the MySQL driver buffers a whole result set client-side, so
+    one big SELECT would pull the full table into memory.
+    """
+    chunk_size = chunk_size or EXPORT_CHUNK_SIZE
+    fields = list(fields)
+    if 'id' not in fields:
+        fields.append('id')
+    id_index = fields.index('id')
+
+    last_id = None
+    while True:
+        batch = queryset.order_by('id')
+        if last_id is not None:
+            batch = batch.filter(id__gt=last_id)
+        rows = list(batch.values_list(*fields)[:chunk_size])
+        if not rows:
+            return
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        last_id = rows[-1][id_index]
+
+
+def _cell(value):
+    """Convert a DB value to a plain, spreadsheet-safe cell value"""
+    if isinstance(value, datetime):
+        # Local time without tzinfo; XLSX cannot store aware datetimes
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        return value.replace(tzinfo=None)
+    if isinstance(value, str) and value[:1] in ('=', '+', '-', '@'):
+        # Keep user-entered text from being evaluated as a spreadsheet formula
+        return f"'{value}"
+    return value
+
+
+def write_csv(path, headers, rows):
+    """Write rows to a CSV file at path, returning the number of data rows"""
+    count = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(headers)
+        for row in rows:
+            writer.writerow([_cell(value) for value in row])
+            count += 1
+    return count
+
+
+def write_xlsx(path, headers, rows):
+    """
+    Write rows to an XLSX file at path, returning the number of data rows
+    Uses openpyxl's write-only mode, which streams rows to disk instead of
+    keeping the whole workbook in memory
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = None
+    sheet_rows = 0
+    count = 0
+    for row in rows:
+        if sheet is None or sheet_rows >= XLSX_MAX_ROWS_PER_SHEET:
+            sheet = workbook.create_sheet(title=f'Sheet{len(workbook.worksheets) + 1}')
+            sheet.append(headers)
+            sheet_rows = 0
+        sheet.append([_cell(value) for value in row])
+        sheet_rows += 1
+        count += 1
+
+    if sheet is None:
+        workbook.create_sheet(title='Sheet1').append(headers)
+
+    workbook.save(path)
+    return count
+
+
+WRITERS = {
+    'csv': write_csv,
+    'xlsx': write_xlsx,
+}
+
+
+def run_report_export(export):
+    """
+    Generate the file for a ReportExport and attach it to the export
+
+    Args:
+        export: ReportExport in 'pending' (or retried 'failed') state
+
+    Returns:
+        ReportExport: The export, now 'completed' or 'failed'
+    """
+    definition = EXPORT_DEFINITIONS[export.report_type]
+    headers = [header for header, _ in definition['columns']]
+    fields = [field for _, field in definition['columns']]
+
+    export.status = 'processing'
+    export.started_at = timezone.now()
+    export.error_message = ''
+    export.save(update_fields=['status', 'started_at', 'error_message'])
+
+    fd, path = tempfile.mkstemp(suffix=f'.{export.export_format}')
+    os.close(fd)
+    try:
+        queryset = get_export_queryset(export.report_type, export.filters)
+        # Only the requested columns are read; keyset batching adds 'id' if missing
+        rows = (row[:len(fields)] for row in iterate_export_rows(queryset, fields))
+        with use_replica():
+            row_count = WRITERS[export.export_format](path, headers, rows)
+
+        # Random name: the stored path must not be guessable from the export's type, time or id
+        filename = f"{uuid.uuid4().hex}.{export.export_format}"
+        with open(path, 'rb') as f:
+            export.file.save(filename, File(f), save=False)
+
+        export.row_count = row_count
+        export.status = 'completed'
+        export.completed_at = timezone.now()
+        export.save(update_fields=['file', 'row_count', 'status', 'completed_at'])
+        logger.info(f"Report export {export.id} ({export.report_type}) completed: {row_count} rows")
+    except Exception as e:
+        export.status = 'failed'
+        export.error_message = str(e)
+        export.completed_at = timezone.now()
+        export.save(update_fields=['status', 'error_message', 'completed_at'])
+        logger.error(f"Report export {export.id} failed: {e}", exc_info=True)
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    return export
+
+
+def export_download_name(export):
+    """File name offered to the browser, e.g. wallet_transactions_20260121103000.csv"""
+    return f"{export.report_type}_{export.created_at:%Y%m%d%H%M%S}.{export.export_format}"
+
+
+def get_export_download_url(export, request=None):
+    """
+    Download URL of a completed export, for the requesting admin only
+
+    Storages that sign their URLs (the private Azure container, expiration_secs set)
+    return a SAS URL valid for REPORT_EXPORT_URL_EXPIRY seconds; anything else is
+    served through the authenticated ReportExportDownloadView.
+
+    Returns:
+        str or None: None unless the export is completed
+    """
+    if export.status != 'completed' or not export.file:
+        return None
+
+    storage = export.file.storage
+    if getattr(storage, 'expiration_secs', None):
+        return storage.url(
+            export.file.name,
+            parameters={'content_disposition': f'attachment; filename="{export_download_name(export)}"'},
+        )
+
+    url = reverse('report-export-download', args=[export.id])
+    return request.build_absolute_uri(url) if request else url
+
+
+def get_export_expires_at(export):
+    """When the export is deleted by delete_expired_exports"""
+    return export.created_at + timedelta(days=REPORT_EXPORT_RETENTION_DAYS)
+
+
+def delete_expired_exports(retention_days=None):
+    """
+    Delete exports requested more than retention_days ago, with their files
+
+    Args:
+        retention_days (int): Default REPORT_EXPORT_RETENTION_DAYS
+
+    Returns:
+        int: Number of exports deleted
+    """
+    from .models import ReportExport
+
+    days = REPORT_EXPORT_RETENTION_DAYS if retention_days is None else retention_days
+    cutoff = timezone.now() - timedelta(days=days)
+
+    deleted = 0
+    for export in ReportExport.objects.filter(created_at__lt=cutoff).iterator():
+        if export.file:
+            try:
+                export.file.delete(save=False)
+            except Exception as e:
+                # Keep the record so the file is retried on the next run
+                logger.error(f"Could not delete file of report export {export.id}: {e}", exc_info=True)
+                continue
+        export.delete()
+        deleted += 1
+
+    if deleted:
+        logger.info(f"Deleted {deleted} report export(s) older than {days} days")
+    return deleted
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from core.reports.rollups import refresh_dashboard_rollups
+
+
+class Command(BaseCommand):
+    """
+    Fill the admin dashboard daily rollup tables.
+    
+    Run with --full once after deploying to backfill history; the Celery beat
+    schedule keeps the tables current afterwards.
+    """
+
+    help = "Fill the admin dashboard daily rollup tables (incrementally, or all days with --full)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Rebuild every day instead of only the days touched since the last run',
+        )
+
+    def handle(self, *args, **options):
+        result = refresh_dashboard_rollups(full=options['full'])
+
+        mode = 'full' if result['full'] else 'incremental'
+        self.stdout.write(self.style.SUCCESS(f"Dashboard rollups refreshed ({mode})"))
+        for table, rows in result['rows_written'].items():
+            self.stdout.write(f"  {table}: {rows} row(s) written")
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from core.reports.buyer_growth import add_months, snapshot_buyer_growth
+
+
+class Command(BaseCommand):
+    """
+    Write the monthly buyer growth snapshots.
+    
+    Run with --months once after deploying to backfill the closed months shown on the
+    admin dashboard; the Celery beat schedule writes each new month afterwards.
+    """
+
+    help = "Write month-close buyer growth snapshots (the last closed month, or the last N with --months)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months',
+            type=int,
+            default=1,
+            help='Number of closed months to (re)write, counting back from last month',
+        )
+
+    def handle(self, *args, **options):
+        current_month = timezone.localdate().replace(day=1)
+        months = [add_months(current_month, -offset) for offset in range(options['months'], 0, -1)]
+
+        rows = snapshot_buyer_growth(months)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Buyer growth snapshots written: {rows} row(s) for {months[0]:%Y-%m} to {months[-1]:%Y-%m}"
+        ))
@@ -0,0 +1,72 @@
+# Generated by Django 4.2.7 on 2026-10-18 22:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyUserRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(db_index=True)),
+                ('role', models.CharField(max_length=20)),
+                ('is_active_buyer', models.BooleanField(default=False)),
+                ('has_pre_booked', models.BooleanField(default=False)),
+                ('has_paid', models.BooleanField(default=False)),
+                ('has_delivered', models.BooleanField(default=False)),
+                ('user_count', models.IntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Daily User Rollup',
+                'verbose_name_plural': 'Daily User Rollups',
+                'db_table': 'report_daily_users',
+                'unique_together': {('date', 'role', 'is_active_buyer', 'has_pre_booked', 'has_paid', 'has_delivered')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyPaymentRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(db_index=True)),
+                ('role', models.CharField(max_length=20)),
+                ('payment_method', models.CharField(max_length=20)),
+                ('status', models.CharField(max_length=20)),
+                ('payment_count', models.IntegerField(default=0)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Daily Payment Rollup',
+                'verbose_name_plural': 'Daily Payment Rollups',
+                'db_table': 'report_daily_payments',
+                'unique_together': {('date', 'role', 'payment_method', 'status')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyBookingRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(db_index=True)),
+                ('role', models.CharField(max_length=20)),
+                ('status', models.CharField(max_length=20)),
+                ('payment_option', models.CharField(max_length=100)),
+                ('is_paid', models.BooleanField(default=False)),
+                ('booking_count', models.IntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Daily Booking Rollup',
+                'verbose_name_plural': 'Daily Booking Rollups',
+                'db_table': 'report_daily_bookings',
+                'unique_together': {('date', 'role', 'status', 'payment_option', 'is_paid')},
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-18 22:11
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('reports', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DistributorDashboardSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('payload', models.JSONField(default=dict)),
+                ('refreshed_at', models.DateTimeField()),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='distributor_dashboard_snapshot', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Distributor Dashboard Snapshot',
+                'verbose_name_plural': 'Distributor Dashboard Snapshots',
+                'db_table': 'report_distributor_dashboards',
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-18 22:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0003_reportexport'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyBuyerSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(db_index=True)),
+                ('role', models.CharField(max_length=20)),
+                ('total_buyers', models.IntegerField(default=0)),
+                ('active_buyers', models.IntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Monthly Buyer Snapshot',
+                'verbose_name_plural': 'Monthly Buyer Snapshots',
+                'db_table': 'report_monthly_buyers',
+                'unique_together': {('month', 'role')},
+            },
+        ),
+    ]
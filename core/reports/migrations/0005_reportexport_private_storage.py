@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:46
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0004_monthlybuyersnapshot'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='reportexport',
+            name='file',
+            field=models.FileField(blank=True, null=True, storage=core.storage.get_report_export_storage, upload_to='report_exports/'),
+        ),
+    ]
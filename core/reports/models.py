@@ -0,0 +1,181 @@
+from django.db import models
+from core.users.models import User
+from core.storage import get_report_export_storage
+
+
+class DailyUserRollup(models.Model):
+    """
+    Users joined on a given day, grouped by role and current buyer/funnel state
+    Filled by core.reports.rollups.refresh_dashboard_rollups
+    """
+    date = models.DateField(db_index=True)  # Day the users joined (date_joined)
+    role = models.CharField(max_length=20)
+    is_active_buyer = models.BooleanField(default=False)
+    has_pre_booked = models.BooleanField(default=False)  # Has a booking with status 'pending'
+    has_paid = models.BooleanField(default=False)  # Has a booking with a completed payment
+    has_delivered = models.BooleanField(default=False)  # Has a booking with status 'completed'
+    user_count = models.IntegerField(default=0)
+
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'report_daily_users'
+        verbose_name = 'Daily User Rollup'
+        verbose_name_plural = 'Daily User Rollups'
+        unique_together = [
+            ['date', 'role', 'is_active_buyer', 'has_pre_booked', 'has_paid', 'has_delivered']
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.role} - {self.user_count} users"
+
+
+class DailyBookingRollup(models.Model):
+    """
+    Bookings created on a given day, grouped by buyer role, status and payment option
+    """
+    date = models.DateField(db_index=True)  # Day the bookings were created
+    role = models.CharField(max_length=20)
+    status = models.CharField(max_length=20)
+    payment_option = models.CharField(max_length=100)
+    is_paid = models.BooleanField(default=False)  # Booking has at least one completed payment
+    booking_count = models.IntegerField(default=0)
+
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'report_daily_bookings'
+        verbose_name = 'Daily Booking Rollup'
+        verbose_name_plural = 'Daily Booking Rollups'
+        unique_together = [['date', 'role', 'status', 'payment_option', 'is_paid']]
+
+    def __str__(self):
+        return f"{self.date} {self.role} {self.status} - {self.booking_count} bookings"
+
+
+class DailyPaymentRollup(models.Model):
+    """
+    Payments made on a given day, grouped by payer role, payment method and status
+    """
+    date = models.DateField(db_index=True)  # Day the payments were made (payment_date)
+    role = models.CharField(max_length=20)
+    payment_method = models.CharField(max_length=20)
+    status = models.CharField(max_length=20)
+    payment_count = models.IntegerField(default=0)
+    total_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'report_daily_payments'
+        verbose_name = 'Daily Payment Rollup'
+        verbose_name_plural = 'Daily Payment Rollups'
+        unique_together = [['date', 'role', 'payment_method', 'status']]
+
+    def __str__(self):
+        return f"{self.date} {self.payment_method} {self.status} - {self.payment_count} payments"
+
+
+class RollupWatermark(models.Model):
+    """
+    Start time of the last refresh of a set of rollup tables; incremental refreshes
+    rebuild the days touched since then
+    Written by core.reports.rollups.refresh_dashboard_rollups
+    """
+    name = models.CharField(max_length=50, unique=True)  # e.g. 'dashboard'
+    refreshed_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'report_rollup_watermarks'
+        verbose_name = 'Rollup Watermark'
+        verbose_name_plural = 'Rollup Watermarks'
+
+    def __str__(self):
+        return f"{self.name} rollups refreshed at {self.refreshed_at}"
+
+
+class DistributorDashboardSnapshot(models.Model):
+    """
+    Precomputed DistributorDashboardView payload for one distributor
+    Refreshed in the background from tree, payment and pair events
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='distributor_dashboard_snapshot')
+    payload = models.JSONField(default=dict)
+    refreshed_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'report_distributor_dashboards'
+        verbose_name = 'Distributor Dashboard Snapshot'
+        verbose_name_plural = 'Distributor Dashboard Snapshots'
+
+    def __str__(self):
+        return f"Distributor Dashboard - {self.user.username} ({self.refreshed_at})"
+
+
+class ReportExport(models.Model):
+    """
+    Asynchronous full-table report export (CSV or XLSX)
+    Written by core.reports.tasks.generate_report_export_task
+    """
+    REPORT_TYPE_CHOICES = [
+        ('wallet_transactions', 'Wallet Transactions'),
+        ('bookings', 'Bookings'),
+        ('payouts', 'Payouts'),
+        ('tds_records', 'TDS Records'),
+    ]
+
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('xlsx', 'XLSX'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    requested_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='report_exports')
+    report_type = models.CharField(max_length=30, choices=REPORT_TYPE_CHOICES)
+    export_format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default='csv')
+    filters = models.JSONField(default=dict, blank=True)  # e.g. {"start_date": "2024-04-01", "end_date": "2025-03-31"}
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    file = models.FileField(upload_to='report_exports/', storage=get_report_export_storage, null=True, blank=True)
+    row_count = models.IntegerField(default=0)
+    error_message = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'report_exports'
+        verbose_name = 'Report Export'
+        verbose_name_plural = 'Report Exports'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.get_report_type_display()} export ({self.export_format}) - {self.status}"
+
+
+class MonthlyBuyerSnapshot(models.Model):
+    """
+    Total and active buyers per role at the close of a month
+    Written by core.reports.buyer_growth.snapshot_buyer_growth on the 1st of each month
+    """
+    month = models.DateField(db_index=True)  # First day of the month
+    role = models.CharField(max_length=20)
+    total_buyers = models.IntegerField(default=0)  # Users of the role joined by month end
+    active_buyers = models.IntegerField(default=0)  # Of those, active buyers at month end
+
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'report_monthly_buyers'
+        verbose_name = 'Monthly Buyer Snapshot'
+        verbose_name_plural = 'Monthly Buyer Snapshots'
+        unique_together = [['month', 'role']]
+
+    def __str__(self):
+        return f"{self.month:%b %Y} {self.role} - {self.active_buyers}/{self.total_buyers} active"
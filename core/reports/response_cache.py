@@ -0,0 +1,197 @@
+"""
+Response cache for report endpoints
+
+Report GETs are cached per user scope and normalized query parameters. Every cache key
+embeds the current version counter of each data scope the report reads (wallet, booking,
+payment, binary); writes to those tables bump the counter, so only the reports that depend on
+the changed data miss on their next request. Writes that bypass model signals
+(queryset.update(), bulk_create) are picked up when the entry times out.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from functools import wraps
+from rest_framework.response import Response
+import hashlib
+import logging
+import time
+from urllib.parse import urlencode
+
+logger = logging.getLogger(__name__)
+
+REPORT_CACHE_TIMEOUT = 300  # seconds
+
+REPORT_CACHE_SCOPES = ('wallet', 'booking', 'payment', 'binary')
+
+REPORT_CACHE_VERSION_KEY = 'reports:cache_version:{scope}'
+REPORT_CACHE_RESPONSE_KEY = 'reports:response:{view}:{user_scope}:{versions}:{params}'
+REPORT_CACHE_STATS_KEY = 'reports:cache_stats:{view}:{outcome}'
+
+# Names of the views using cached_report (for get_report_cache_stats)
+CACHED_REPORT_VIEWS = []
+
+
+def _incr(key):
+    """Increment a counter, creating it if it does not exist"""
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, timeout=None):
+            return 1
+        return cache.incr(key)
+
+
+def get_report_cache_versions(scopes):
+    """
+    Current version counter of each scope
+
+    A missing counter (never bumped, or evicted) starts from the current time in
+    nanoseconds rather than 0, so it can never fall back to a value that older
+    cached responses were stored under.
+    """
+    keys = {scope: REPORT_CACHE_VERSION_KEY.format(scope=scope) for scope in scopes}
+    found = cache.get_many(list(keys.values()))
+
+    versions = {}
+    for scope, key in keys.items():
+        version = found.get(key)
+        if version is None:
+            cache.add(key, time.time_ns(), timeout=None)
+            version = cache.get(key)
+        versions[scope] = version
+    return versions
+
+
+def bump_report_cache_version(*scopes):
+    """
+    Invalidate every cached report reading any of the given scopes
+    Bumped after the current transaction commits, so a report computed in between
+    cannot be stored under the new version with the old data. Never raises.
+    """
+    def _bump():
+        for scope in scopes:
+            key = REPORT_CACHE_VERSION_KEY.format(scope=scope)
+            try:
+                try:
+                    cache.incr(key)
+                except ValueError:
+                    cache.add(key, time.time_ns(), timeout=None)
+            except Exception as e:
+                logger.warning(f"Could not bump report cache version for {scope}: {e}")
+
+    transaction.on_commit(_bump)
+
+
+def get_report_user_scope(user):
+    """Admins see the same data regardless of who asks; everyone else is cached per user"""
+    if user.is_superuser or getattr(user, 'role', None) == 'admin':
+        return 'admin'
+    return f'user:{user.id}'
+
+
+def normalize_query_params(query_params):
+    """Stable digest of the query parameters (order-insensitive, empty values dropped)"""
+    items = sorted(
+        (key, value)
+        for key in query_params
+        for value in query_params.getlist(key)
+        if value != ''
+    )
+    return hashlib.sha1(urlencode(items).encode('utf-8')).hexdigest()
+
+
+def _record(view_name, outcome):
+    try:
+        _incr(REPORT_CACHE_STATS_KEY.format(view=view_name, outcome=outcome))
+    except Exception:
+        pass
+
+
+def cached_report(scopes, timeout=REPORT_CACHE_TIMEOUT):
+    """
+    Cache the 200 responses of a report view's get() method
+
+    Args:
+        scopes: Data scopes the report reads, from REPORT_CACHE_SCOPES
+        timeout: Seconds an entry is kept at most
+
+    Responses carry an X-Report-Cache header (HIT or MISS). If the cache is
+    unavailable the report is computed as if uncached.
+    """
+    unknown = set(scopes) - set(REPORT_CACHE_SCOPES)
+    if unknown:
+        raise ValueError(f"Unknown report cache scopes: {', '.join(sorted(unknown))}")
+
+    def decorator(get):
+        view_name = get.__qualname__.split('.')[0]
+        CACHED_REPORT_VIEWS.append(view_name)
+
+        @wraps(get)
+        def wrapper(self, request, *args, **kwargs):
+            try:
+                versions = get_report_cache_versions(scopes)
+                key = REPORT_CACHE_RESPONSE_KEY.format(
+                    view=view_name,
+                    user_scope=get_report_user_scope(request.user),
+                    versions='.'.join(str(versions[scope]) for scope in scopes),
+                    params=normalize_query_params(request.query_params),
+                )
+                data = cache.get(key)
+            except Exception as e:
+                logger.warning(f"Report cache unavailable for {view_name}: {e}")
+                return get(self, request, *args, **kwargs)
+
+            if data is not None:
+                _record(view_name, 'hit')
+                response = Response(data)
+                response['X-Report-Cache'] = 'HIT'
+                return response
+
+            _record(view_name, 'miss')
+            response = get(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                try:
+                    cache.set(key, response.data, timeout)
+                except Exception as e:
+                    logger.warning(f"Could not cache {view_name} response: {e}")
+            response['X-Report-Cache'] = 'MISS'
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def get_report_cache_stats():
+    """
+    Hit and miss counts per cached report view since the counters were last reset
+
+    Returns:
+        dict: {view name: {'hits': int, 'misses': int, 'hit_rate': float (percent)}}
+    """
+    keys = {
+        (view, outcome): REPORT_CACHE_STATS_KEY.format(view=view, outcome=outcome)
+        for view in CACHED_REPORT_VIEWS
+        for outcome in ('hit', 'miss')
+    }
+    counts = cache.get_many(list(keys.values()))
+
+    stats = {}
+    for view in CACHED_REPORT_VIEWS:
+        hits = counts.get(keys[(view, 'hit')], 0)
+        misses = counts.get(keys[(view, 'miss')], 0)
+        total = hits + misses
+        stats[view] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total * 100, 1) if total else 0.0,
+        }
+    return stats
+
+
+def reset_report_cache_stats():
+    """Zero the hit and miss counters"""
+    cache.delete_many([
+        REPORT_CACHE_STATS_KEY.format(view=view, outcome=outcome)
+        for view in CACHED_REPORT_VIEWS
+        for outcome in ('hit', 'miss')
+    ])
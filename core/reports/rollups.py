@@ -0,0 +1,224 @@
+"""
+Daily fact rollups backing the admin dashboard
+
+The rollup tables hold one row per day and dimension combination, so dashboard reads
+scan a number of rows proportional to the number of days covered, not to the size of
+the users, bookings or payments tables.
+"""
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from core.users.models import User
+from core.booking.models import Booking, Payment
+from .models import DailyUserRollup, DailyBookingRollup, DailyPaymentRollup, RollupWatermark
+import logging
+
+logger = logging.getLogger(__name__)
+
+# RollupWatermark row of the admin dashboard rollups
+ROLLUP_WATERMARK_NAME = 'dashboard'
+
+# Number of days rebuilt per delete/insert round
+ROLLUP_DATE_CHUNK_SIZE = 200
+
+
+def _user_rows(dates=None):
+    """Grouped user counts per join day, role and buyer/funnel state"""
+    users = User.objects.all()
+    if dates is not None:
+        users = users.filter(date_joined__date__in=dates)
+
+    return users.annotate(
+        day=TruncDate('date_joined'),
+        pre_booked=Exists(Booking.objects.filter(user=OuterRef('pk'), status='pending')),
+        paid=Exists(Payment.objects.filter(booking__user=OuterRef('pk'), status='completed')),
+        delivered=Exists(Booking.objects.filter(user=OuterRef('pk'), status='completed')),
+    ).values(
+        'day', 'role', 'is_active_buyer', 'pre_booked', 'paid', 'delivered'
+    ).annotate(total=Count('id')).order_by()
+
+
+def _booking_rows(dates=None):
+    """Grouped booking counts per creation day, buyer role, status and payment option"""
+    bookings = Booking.objects.all()
+    if dates is not None:
+        bookings = bookings.filter(created_at__date__in=dates)
+
+    return bookings.annotate(
+        day=TruncDate('created_at'),
+        paid=Exists(Payment.objects.filter(booking=OuterRef('pk'), status='completed')),
+    ).values(
+        'day', 'user__role', 'status', 'payment_option', 'paid'
+    ).annotate(total=Count('id')).order_by()
+
+
+def _payment_rows(dates=None):
+    """Grouped payment counts and amounts per payment day, payer role, method and status"""
+    payments = Payment.objects.all()
+    if dates is not None:
+        payments = payments.filter(payment_date__date__in=dates)
+
+    return payments.annotate(
+        day=TruncDate('payment_date'),
+    ).values(
+        'day', 'user__role', 'payment_method', 'status'
+    ).annotate(total=Count('id'), amount=Sum('amount')).order_by()
+
+
+def _build_user_rollup(row):
+    return DailyUserRollup(
+        date=row['day'],
+        role=row['role'],
+        is_active_buyer=row['is_active_buyer'],
+        has_pre_booked=row['pre_booked'],
+        has_paid=row['paid'],
+        has_delivered=row['delivered'],
+        user_count=row['total'],
+    )
+
+
+def _build_booking_rollup(row):
+    return DailyBookingRollup(
+        date=row['day'],
+        role=row['user__role'],
+        status=row['status'],
+        payment_option=row['payment_option'],
+        is_paid=row['paid'],
+        booking_count=row['total'],
+    )
+
+
+def _build_payment_rollup(row):
+    return DailyPaymentRollup(
+        date=row['day'],
+        role=row['user__role'],
+        payment_method=row['payment_method'],
+        status=row['status'],
+        payment_count=row['total'],
+        total_amount=row['amount'] or 0,
+    )
+
+
+ROLLUPS = [
+    (DailyUserRollup, _user_rows, _build_user_rollup),
+    (DailyBookingRollup, _booking_rows, _build_booking_rollup),
+    (DailyPaymentRollup, _payment_rows, _build_payment_rollup),
+]
+
+
+def _rebuild_rollup(model, rows_for, build, dates=None):
+    """
+    Replace the rollup rows for the given days (or all days when dates is None)
+
+    Returns:
+        int: Number of rollup rows written
+    """
+    if dates is None:
+        with transaction.atomic():
+            model.objects.all().delete()
+            objs = [build(row) for row in rows_for()]
+            model.objects.bulk_create(objs, batch_size=1000)
+        return len(objs)
+
+    written = 0
+    dates = sorted(dates)
+    for i in range(0, len(dates), ROLLUP_DATE_CHUNK_SIZE):
+        chunk = dates[i:i + ROLLUP_DATE_CHUNK_SIZE]
+        with transaction.atomic():
+            model.objects.filter(date__in=chunk).delete()
+            objs = [build(row) for row in rows_for(chunk)]
+            model.objects.bulk_create(objs, batch_size=1000)
+        written += len(objs)
+    return written
+
+
+def _days(queryset, field):
+    """Distinct local days of a datetime field across queryset"""
+    return set(
+        queryset.annotate(day=TruncDate(field)).values_list('day', flat=True).distinct().order_by()
+    )
+
+
+def get_touched_days(since):
+    """
+    Find the days whose rollup rows may have changed since the given timestamp
+
+    Users are bucketed by join day, bookings by creation day and payments by payment
+    day, so a change to an old row dirties the (old) day it belongs to.
+
+    Args:
+        since: Aware datetime of the previous refresh
+
+    Returns:
+        dict: {rollup model: set of dates}
+    """
+    changed_bookings = Booking.objects.filter(updated_at__gte=since)
+    changed_payments = Payment.objects.filter(payment_date__gte=since) | Payment.objects.filter(
+        completed_at__gte=since
+    )
+
+    user_days = _days(User.objects.filter(date_joined__gte=since), 'date_joined')
+    user_days |= _days(User.objects.filter(active_buyer_since__gte=since), 'date_joined')
+    user_days |= _days(
+        User.objects.filter(id__in=changed_bookings.values('user_id')), 'date_joined'
+    )
+    user_days |= _days(
+        User.objects.filter(id__in=changed_payments.values('booking__user_id')), 'date_joined'
+    )
+
+    booking_days = _days(changed_bookings, 'created_at')
+    booking_days |= _days(
+        Booking.objects.filter(id__in=changed_payments.values('booking_id')), 'created_at'
+    )
+
+    return {
+        DailyUserRollup: user_days,
+        DailyBookingRollup: booking_days,
+        DailyPaymentRollup: _days(changed_payments, 'payment_date'),
+    }
+
+
+def refresh_dashboard_rollups(full=False):
+    """
+    Bring the daily rollup tables up to date
+
+    Incremental runs rebuild only the days touched since the previous run (tracked in
+    RollupWatermark, so a cache flush does not force a full rebuild). A full run rebuilds every day; it also picks up changes that leave no
+    timestamp behind, such as a user losing active buyer status or a payment being
+    refunded, so it is scheduled nightly.
+
+    Args:
+        full: Rebuild all days instead of only the touched ones
+
+    Returns:
+        dict: Rows written per rollup table and whether the run was full
+    """
+    started_at = timezone.now()
+    since = None if full else get_rollups_refreshed_at()
+
+    touched = get_touched_days(since) if since else None
+
+    written = {}
+    for model, rows_for, build in ROLLUPS:
+        dates = touched[model] if touched is not None else None
+        written[model._meta.db_table] = _rebuild_rollup(model, rows_for, build, dates)
+
+    # Source rows updated while this run was in progress are caught by the next run
+    RollupWatermark.objects.update_or_create(
+        name=ROLLUP_WATERMARK_NAME, defaults={'refreshed_at': started_at}
+    )
+
+    logger.info(
+        f"Dashboard rollups refreshed ({'full' if touched is None else 'incremental'}): {written}"
+    )
+
+    return {'full': touched is None, 'rows_written': written}
+
+
+def get_rollups_refreshed_at():
+    """Timestamp of the last rollup refresh, or None if rollups were never built"""
+    return RollupWatermark.objects.filter(name=ROLLUP_WATERMARK_NAME).values_list(
+        'refreshed_at', flat=True
+    ).first()
+
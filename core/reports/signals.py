@@ -0,0 +1,84 @@
+"""
+Signal receivers that keep the materialized distributor dashboards and the
+report response cache fresh
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from core.binary.models import BinaryNode, BinaryPair, BinaryEarning
+from core.booking.models import Booking, Payment
+from core.payout.models import Payout
+from core.users.models import User
+from core.wallet.models import Wallet, WalletTransaction
+from .response_cache import bump_report_cache_version
+from .distributor_dashboard import (
+    schedule_distributor_dashboard_refresh,
+    schedule_refresh_for_nodes,
+    schedule_refresh_for_users,
+)
+
+
+# Saves touching only these columns are count maintenance, not placements or moves
+BINARY_NODE_COUNT_FIELDS = frozenset({'left_count', 'right_count', 'direct_children_count'})
+
+
+def _owner_is_distributor(instance):
+    """is_distributor of instance.user without lazy-loading the user"""
+    if instance._meta.get_field('user').is_cached(instance):
+        return instance.user.is_distributor
+    return User.objects.filter(pk=instance.user_id, is_distributor=True).exists()
+
+
+@receiver(post_save, sender=BinaryNode)
+def binary_node_saved(sender, instance, update_fields=None, **kwargs):
+    """Node placed or moved: the team of every distributor above it changed"""
+    if update_fields and BINARY_NODE_COUNT_FIELDS.issuperset(update_fields):
+        return
+    schedule_refresh_for_nodes([instance.id])
+
+
+@receiver(post_save, sender=BinaryPair)
+def binary_pair_saved(sender, instance, **kwargs):
+    """Pair created or updated: the owner's recent sales activity changed"""
+    if _owner_is_distributor(instance):
+        schedule_distributor_dashboard_refresh([instance.user_id])
+
+
+@receiver(post_save, sender=BinaryEarning)
+def binary_earning_saved(sender, instance, **kwargs):
+    """Earning recorded: the owner's commission trend changed"""
+    if _owner_is_distributor(instance):
+        schedule_distributor_dashboard_refresh([instance.user_id])
+
+
+@receiver(post_save, sender=Payment)
+def payment_saved(sender, instance, **kwargs):
+    """Completed payment: pair PV of distributors above the payer changed"""
+    if instance.status == 'completed':
+        schedule_refresh_for_users([instance.user_id])
+
+
+@receiver([post_save, post_delete], sender=Wallet)
+@receiver([post_save, post_delete], sender=WalletTransaction)
+@receiver([post_save, post_delete], sender=Payout)
+def wallet_data_changed(sender, **kwargs):
+    """Invalidate cached reports reading wallets, wallet transactions or payouts"""
+    bump_report_cache_version('wallet')
+
+
+@receiver([post_save, post_delete], sender=Booking)
+def booking_changed(sender, **kwargs):
+    """Invalidate cached reports reading bookings"""
+    bump_report_cache_version('booking')
+
+
+@receiver([post_save, post_delete], sender=Payment)
+def payment_changed(sender, **kwargs):
+    """Invalidate cached reports reading payments"""
+    bump_report_cache_version('payment')
+
+
+@receiver([post_save, post_delete], sender=BinaryPair)
+@receiver([post_save, post_delete], sender=BinaryEarning)
+def binary_data_changed(sender, **kwargs):
+    """Invalidate cached reports reading binary pairs or earnings"""
+    bump_report_cache_version('binary')
@@ -0,0 +1,131 @@
+"""
+Celery tasks for reports
+"""
+from celery import shared_task
+from .rollups import refresh_dashboard_rollups
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def refresh_dashboard_rollups_task(full=False):
+    """
+    Periodic task to fill the admin dashboard daily rollup tables
+    Runs incrementally every 10 minutes and as a full rebuild nightly
+    (configured in CELERY_BEAT_SCHEDULE)
+    """
+    try:
+        return refresh_dashboard_rollups(full=full)
+    except Exception as e:
+        logger.error(f"Error in refresh_dashboard_rollups_task: {e}", exc_info=True)
+        raise
+
+
+@shared_task
+def snapshot_buyer_growth_task():
+    """
+    Monthly task storing the buyer growth figures of the month that just closed
+    (configured in CELERY_BEAT_SCHEDULE for the 1st of each month)
+    """
+    from .buyer_growth import snapshot_buyer_growth
+
+    try:
+        return {'rows_written': snapshot_buyer_growth()}
+    except Exception as e:
+        logger.error(f"Error in snapshot_buyer_growth_task: {e}", exc_info=True)
+        raise
+
+
+@shared_task
+def refresh_distributor_dashboard_task(user_id):
+    """
+    Rebuild the stored DistributorDashboardView payload for one distributor
+    Queued (debounced) by schedule_distributor_dashboard_refresh
+    """
+    from django.core.cache import cache
+    from core.binary.models import BinaryNode
+    from .distributor_dashboard import DISTRIBUTOR_DASHBOARD_SCHEDULED_KEY, store_distributor_dashboard
+    from .models import DistributorDashboardSnapshot
+
+    # Clear the marker first so events arriving during the rebuild schedule another run
+    cache.delete(DISTRIBUTOR_DASHBOARD_SCHEDULED_KEY.format(user_id=user_id))
+
+    try:
+        distributor_node = BinaryNode.objects.select_related('user').get(
+            user_id=user_id, user__is_distributor=True
+        )
+    except BinaryNode.DoesNotExist:
+        DistributorDashboardSnapshot.objects.filter(user_id=user_id).delete()
+        return {'refreshed': False}
+
+    try:
+        snapshot = store_distributor_dashboard(distributor_node.user, distributor_node)
+    except Exception as e:
+        logger.error(f"Error refreshing distributor dashboard for user {user_id}: {e}", exc_info=True)
+        raise
+
+    return {'refreshed': True, 'refreshed_at': snapshot.refreshed_at.isoformat()}
+
+
+@shared_task
+def refresh_dashboards_for_nodes_task(node_ids):
+    """
+    Resolve the distributors covering the given nodes (the nodes and all their
+    ancestors) and queue their dashboard refreshes
+    Queued (debounced) by schedule_refresh_for_nodes
+    """
+    from django.core.cache import cache
+    from .distributor_dashboard import (
+        DISTRIBUTOR_DASHBOARD_NODE_SCHEDULED_KEY,
+        get_distributor_ids_for_nodes,
+        schedule_distributor_dashboard_refresh,
+    )
+
+    # Clear the markers first so tree events arriving now schedule another run
+    cache.delete_many([DISTRIBUTOR_DASHBOARD_NODE_SCHEDULED_KEY.format(node_id=node_id) for node_id in node_ids])
+
+    try:
+        distributor_ids = get_distributor_ids_for_nodes(node_ids)
+    except Exception as e:
+        logger.error(f"Error resolving distributors for nodes {node_ids}: {e}", exc_info=True)
+        raise
+
+    schedule_distributor_dashboard_refresh(distributor_ids)
+    return {'distributors': len(distributor_ids)}
+
+
+@shared_task
+def generate_report_export_task(export_id):
+    """
+    Write the file for a ReportExport requested through the export API
+    """
+    from .exports import run_report_export
+    from .models import ReportExport
+
+    try:
+        export = ReportExport.objects.get(id=export_id)
+    except ReportExport.DoesNotExist:
+        logger.warning(f"Report export {export_id} no longer exists")
+        return {'status': 'missing'}
+
+    if export.status == 'completed':
+        return {'status': export.status, 'row_count': export.row_count}
+
+    export = run_report_export(export)
+    return {'status': export.status, 'row_count': export.row_count}
+
+
+@shared_task
+def delete_expired_report_exports_task():
+    """
+    Daily task deleting report exports (and their files) older than
+    REPORT_EXPORT_RETENTION_DAYS (configured in CELERY_BEAT_SCHEDULE)
+    """
+    from .exports import delete_expired_exports
+
+    try:
+        return {'deleted': delete_expired_exports()}
+    except Exception as e:
+        logger.error(f"Error in delete_expired_report_exports_task: {e}", exc_info=True)
+        raise
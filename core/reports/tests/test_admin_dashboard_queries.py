@@ -0,0 +1,68 @@
+"""
+Tests for the SQL-side admin dashboard payment distribution and booking trends
+"""
+from decimal import Decimal
+from django.test import TestCase
+from core.booking.models import Booking, Payment
+from core.inventory.models import Vehicle
+from core.reports.views import AdminDashboardView
+from core.users.models import User
+
+
+class AdminDashboardAggregationTest(TestCase):
+    """Payment distribution and booking trends are computed in a constant number of queries"""
+
+    def setUp(self):
+        self.vehicle = Vehicle.objects.create(name='EV One', model_code='EV1', price=Decimal('100000'))
+        self.view = AdminDashboardView()
+        self.counter = 0
+
+    def _booking(self, payment_option, methods, role='user'):
+        self.counter += 1
+        user = User.objects.create_user(
+            username=f'user{self.counter}',
+            email=f'user{self.counter}@example.com',
+            password='testpass123',
+            role=role,
+        )
+        booking = Booking.objects.create(
+            user=user,
+            vehicle_model=self.vehicle,
+            booking_amount=Decimal('5000'),
+            total_amount=Decimal('100000'),
+            payment_option=payment_option,
+        )
+        Payment.objects.bulk_create([
+            Payment(booking=booking, user=user, amount=Decimal('1000'), payment_method=method, status=status)
+            for method, status in methods
+        ])
+        return booking
+
+    def test_payment_distribution(self):
+        self._booking('full_payment', [('online', 'completed'), ('online', 'completed')])
+        self._booking('full_payment', [('wallet', 'completed')])
+        self._booking('full_payment', [('online', 'completed'), ('cash', 'completed')])
+        self._booking('full_payment', [('online', 'completed'), ('wallet', 'failed')])
+        self._booking('emi_options', [('online', 'completed'), ('cash', 'completed')])
+        self._booking('emi_options', [('wallet', 'completed')])
+        self._booking('emi_options', [('online', 'pending')])
+
+        with self.assertNumQueries(1):
+            distribution = self.view._get_payment_distribution()
+
+        self.assertEqual(distribution['full_payment'], {'count': 2, 'percentage': 33.3})
+        self.assertEqual(distribution['wallet'], {'count': 2, 'percentage': 33.3})
+        self.assertEqual(distribution['mixed']['count'], 1)
+        self.assertEqual(distribution['emi']['count'], 1)
+
+    def test_booking_trends(self):
+        for _ in range(3):
+            self._booking('full_payment', [])
+        self._booking('full_payment', [], role='staff')
+
+        with self.assertNumQueries(1):
+            trends = self.view._get_booking_trends()
+
+        self.assertEqual(trends['normal_users']['bookings'][-1], 3)
+        self.assertEqual(trends['staff_users']['bookings'][-1], 1)
+        self.assertEqual(len(trends['normal_users']['months']), 4)
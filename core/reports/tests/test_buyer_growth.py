@@ -0,0 +1,89 @@
+"""
+Tests for the monthly buyer growth snapshots
+"""
+from datetime import timedelta
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from core.reports.buyer_growth import add_months, get_buyer_growth, snapshot_buyer_growth
+from core.reports.models import MonthlyBuyerSnapshot
+from core.reports.rollups import refresh_dashboard_rollups
+from core.reports.views import AdminDashboardView
+from core.users.models import User
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class BuyerGrowthSnapshotTest(TestCase):
+    """Closed months are read from snapshots, the current month live from the rollup"""
+
+    def setUp(self):
+        self.counter = 0
+        self.current_month = timezone.localdate().replace(day=1)
+        self.last_month = add_months(self.current_month, -1)
+
+    def _user(self, joined, active_since=None, role='user'):
+        self.counter += 1
+        user = User.objects.create_user(
+            username=f'user{self.counter}', email=f'user{self.counter}@example.com',
+            password='testpass123', role=role,
+        )
+        User.objects.filter(id=user.id).update(
+            date_joined=joined,
+            is_active_buyer=active_since is not None,
+            active_buyer_since=active_since,
+        )
+        return user
+
+    def test_snapshot_counts_state_at_month_close(self):
+        before_close = timezone.now() - timedelta(days=45)
+        self._user(before_close, active_since=before_close)
+        # Became an active buyer only after last month closed
+        self._user(before_close, active_since=timezone.now())
+        # Joined this month
+        self._user(timezone.now(), active_since=timezone.now())
+        self._user(before_close, role='staff')
+
+        self.assertEqual(snapshot_buyer_growth([add_months(self.last_month, -1)]), 2)
+        self.assertEqual(snapshot_buyer_growth(), 2)
+
+        snapshot = MonthlyBuyerSnapshot.objects.get(month=self.last_month, role='user')
+        self.assertEqual((snapshot.total_buyers, snapshot.active_buyers), (2, 1))
+        staff = MonthlyBuyerSnapshot.objects.get(month=self.last_month, role='staff')
+        self.assertEqual((staff.total_buyers, staff.active_buyers), (1, 0))
+
+    def test_trend_reads_snapshots_and_live_current_month(self):
+        for offset in range(-5, 0):
+            for role in ('user', 'staff'):
+                MonthlyBuyerSnapshot.objects.create(
+                    month=add_months(self.current_month, offset), role=role,
+                    total_buyers=10 + offset, active_buyers=5 + offset,
+                )
+        self._user(timezone.now(), active_since=timezone.now())
+        self._user(timezone.now())
+        refresh_dashboard_rollups(full=True)
+
+        with self.assertNumQueries(2):
+            trend = AdminDashboardView()._get_buyer_growth_trend()
+
+        normal = trend['normal_users']
+        self.assertEqual(normal['total_buyers'], [5, 6, 7, 8, 9, 2])
+        self.assertEqual(normal['active_buyers'], [0, 1, 2, 3, 4, 1])
+        self.assertEqual(trend['staff_users']['total_buyers'][-1], 0)
+
+    def test_missing_closed_months_are_computed_once_and_stored(self):
+        two_months_ago = add_months(self.current_month, -2)
+        MonthlyBuyerSnapshot.objects.create(month=two_months_ago, role='user', total_buyers=7, active_buyers=3)
+        before_close = timezone.now() - timedelta(days=45)
+        self._user(before_close, active_since=before_close)
+        months = [two_months_ago, self.last_month]
+
+        growth = get_buyer_growth(months)
+
+        self.assertEqual(growth[(two_months_ago, 'user')], {'total': 7, 'active': 3})
+        self.assertEqual(growth[(self.last_month, 'user')], {'total': 1, 'active': 1})
+        self.assertEqual(MonthlyBuyerSnapshot.objects.count(), 4)
+        stored = MonthlyBuyerSnapshot.objects.get(month=two_months_ago, role='user')
+        self.assertEqual((stored.total_buyers, stored.active_buyers), (7, 3))
+
+        # Served from the stored snapshots: no users table counts
+        with self.assertNumQueries(1):
+            self.assertEqual(get_buyer_growth(months), growth)
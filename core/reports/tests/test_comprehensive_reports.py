@@ -0,0 +1,131 @@
+"""
+Tests for the shared report aggregation used by ComprehensiveReportsView
+"""
+from decimal import Decimal
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from core.binary.models import BinaryEarning, BinaryPair
+from core.booking.models import Booking, Payment
+from core.inventory.models import Vehicle
+from core.reports.views import ComprehensiveReportsView
+from core.users.models import User
+from core.wallet.models import Wallet, WalletTransaction
+
+
+class ComprehensiveReportsAggregationTest(TestCase):
+    """Report sections compute their summaries in a constant number of queries"""
+
+    PAGINATION = {'page': 1, 'page_size': 20}
+
+    def setUp(self):
+        self.vehicle = Vehicle.objects.create(name='EV One', model_code='EV1', price=Decimal('100000'))
+        self.view = ComprehensiveReportsView()
+        self.counter = 0
+
+    def _populate(self, count):
+        now = timezone.now()
+        for _ in range(count):
+            self.counter += 1
+            distributor = User.objects.create_user(
+                username=f'distributor{self.counter}',
+                email=f'distributor{self.counter}@example.com',
+                password='testpass123',
+                is_distributor=True,
+            )
+            user = User.objects.create_user(
+                username=f'user{self.counter}',
+                email=f'user{self.counter}@example.com',
+                password='testpass123',
+                referred_by=distributor,
+            )
+            wallet = Wallet.objects.create(user=distributor)
+            booking = Booking.objects.create(
+                user=user,
+                vehicle_model=self.vehicle,
+                booking_amount=Decimal('5000'),
+                total_amount=Decimal('100000'),
+                total_paid=Decimal('6000'),
+                status='active',
+                referred_by=distributor,
+            )
+            Payment.objects.bulk_create([
+                Payment(booking=booking, user=user, amount=Decimal('6000'), payment_method='online', status='completed'),
+                Payment(booking=booking, user=user, amount=Decimal('100'), payment_method='online', status='failed'),
+            ])
+            WalletTransaction.objects.bulk_create([
+                WalletTransaction(
+                    user=distributor, wallet=wallet, transaction_type=transaction_type, amount=amount,
+                    balance_before=0, balance_after=0, description=description
+                )
+                for transaction_type, amount, description in [
+                    ('REFERRAL_BONUS', Decimal('1000'), 'Referral bonus'),
+                    ('TDS_DEDUCTION', Decimal('-200'), 'TDS on referral bonus'),
+                    ('TDS_DEDUCTION', Decimal('-40'), 'TDS on binary pair'),
+                    ('EXTRA_DEDUCTION', Decimal('-60'), 'Extra deduction'),
+                ]
+            ])
+            pair = BinaryPair.objects.create(
+                user=distributor, left_user=user, right_user=user,
+                pair_amount=Decimal('2000'), earning_amount=Decimal('2000'),
+                status='processed', pair_month=now.month, pair_year=now.year
+            )
+            BinaryEarning.objects.create(
+                user=distributor, binary_pair=pair, amount=Decimal('2000'),
+                pair_number=1, net_amount=Decimal('1800')
+            )
+
+    def _sections(self):
+        return {
+            'transaction_history': lambda: self.view._get_transaction_history(self.PAGINATION),
+            'investment_logs': lambda: self.view._get_investment_logs(self.PAGINATION),
+            'bv_logs': lambda: self.view._get_bv_logs(self.PAGINATION),
+            'referral_commission': lambda: self.view._get_referral_commission(self.PAGINATION),
+            'team_commission': lambda: self.view._get_team_commission(self.PAGINATION),
+        }
+
+    def _query_counts(self):
+        counts = {}
+        for name, section in self._sections().items():
+            with CaptureQueriesContext(connection) as ctx:
+                section()
+            counts[name] = len(ctx.captured_queries)
+        return counts
+
+    def test_query_counts_do_not_grow(self):
+        self._populate(2)
+        small = self._query_counts()
+        self._populate(6)
+        self.assertEqual(self._query_counts(), small)
+
+    def test_summary_values(self):
+        self._populate(3)
+
+        transactions = self.view._get_transaction_history(self.PAGINATION)
+        self.assertEqual(transactions['summary_cards']['total_transactions'], 12)
+        self.assertEqual(transactions['summary_cards']['success_rate'], 50.0)
+        self.assertEqual(transactions['summary_cards']['failed'], 3)
+        today = timezone.now().strftime('%a')
+        self.assertEqual(transactions['weekly_trend'][today]['transactions'], 12)
+
+        investments = self.view._get_investment_logs(self.PAGINATION)
+        self.assertEqual(investments['summary_cards']['active_investments'], 3)
+        top_up = investments['investment_type_summary'][3]
+        self.assertEqual((top_up['type'], top_up['count'], top_up['total_amount']), ('Top Up', 3, '18,000.00'))
+
+        bv = self.view._get_bv_logs(self.PAGINATION)
+        self.assertEqual(bv['summary_cards']['total_bv_used'], '6,000.00')
+        self.assertEqual(bv['bv_source_summary'][0]['count'], 3)
+
+        referral = self.view._get_referral_commission(self.PAGINATION)
+        self.assertEqual(referral['summary_cards']['total_amount'], '3,000.00')
+        self.assertEqual(referral['commission_status_summary'][0]['tds'], '600.00')
+        self.assertEqual(referral['top_referrer_performance'][0]['referrals'], 2)
+        self.assertEqual(referral['top_referrer_performance'][0]['paid'], 1)
+
+        team = self.view._get_team_commission(self.PAGINATION)
+        self.assertEqual(team['summary_cards']['pool_money'], '300.00')
+        self.assertEqual(team['top_distributor_performance'][0]['pool_money'], '100.00')
+        self.assertEqual(team['top_distributor_performance'][0]['paid'], 1)
+        self.assertEqual(team['commission_breakdown_by_status'][0]['net_amount'], '5,400.00')
@@ -0,0 +1,142 @@
+"""
+Tests for the admin dashboard daily rollups
+"""
+from decimal import Decimal
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from core.booking.models import Booking, Payment
+from core.inventory.models import Vehicle
+from core.reports.models import DailyBookingRollup, DailyPaymentRollup
+from core.reports.rollups import refresh_dashboard_rollups
+from core.reports.views import AdminDashboardView
+from core.users.models import User
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class DashboardRollupTest(TestCase):
+    """Dashboard figures read from rollups must match the source tables"""
+
+    def setUp(self):
+        self.vehicle = Vehicle.objects.create(name='EV One', model_code='EV1', price=Decimal('100000'))
+        self.counter = 0
+
+    def _user(self, role='user', is_active_buyer=False):
+        self.counter += 1
+        return User.objects.create_user(
+            username=f'user{self.counter}',
+            email=f'user{self.counter}@example.com',
+            password='testpass123',
+            role=role,
+            is_active_buyer=is_active_buyer,
+        )
+
+    def _booking(self, user, status='pending', paid=False):
+        booking = Booking.objects.create(
+            user=user,
+            vehicle_model=self.vehicle,
+            booking_amount=Decimal('5000'),
+            total_amount=Decimal('100000'),
+            status=status,
+        )
+        if paid:
+            Payment.objects.bulk_create([Payment(
+                booking=booking,
+                user=user,
+                amount=Decimal('5000'),
+                payment_method='online',
+                status='completed',
+            )])
+        return booking
+
+    def _populate(self, count):
+        for _ in range(count):
+            self._booking(self._user(is_active_buyer=True), status='active', paid=True)
+            self._booking(self._user(), status='pending')
+            self._booking(self._user(role='staff'), status='completed', paid=True)
+            self._user()
+
+    def test_kpi_cards_and_funnel(self):
+        self._populate(2)
+        refresh_dashboard_rollups(full=True)
+
+        view = AdminDashboardView()
+        kpis = view._get_kpi_cards()
+        self.assertEqual(kpis['active_buyers']['value'], 2)
+        self.assertEqual(kpis['total_visitors']['value'], 8)
+        self.assertEqual(kpis['pre_booked']['value'], 2)
+        self.assertEqual(kpis['paid_orders']['value'], 4)
+        self.assertEqual(kpis['delivered']['value'], 2)
+
+        segments = view._get_buyer_segments()
+        self.assertEqual(segments['normal_users']['active_buyers'], 2)
+        self.assertEqual(segments['normal_users']['inactive'], 4)
+        self.assertEqual(segments['normal_users']['pre_booked'], 2)
+        self.assertEqual(segments['staff_users']['new_this_month'], 2)
+
+        funnel = view._get_sales_funnel()['staff_users']
+        self.assertEqual([stage['count'] for stage in funnel], [2, 0, 0, 2, 2])
+
+        trend = view._get_buyer_growth_trend()['normal_users']
+        self.assertEqual(trend['total_buyers'][-1], 6)
+        self.assertEqual(trend['active_buyers'][-1], 2)
+
+        payments = DailyPaymentRollup.objects.get(role='user', payment_method='online', status='completed')
+        self.assertEqual(payments.payment_count, 2)
+        self.assertEqual(payments.total_amount, Decimal('10000'))
+
+        payment_methods = view._get_payment_methods()
+        self.assertEqual(payment_methods['by_method']['online'], {
+            'count': 4, 'completed_count': 4, 'completed_amount': 20000.0, 'current_month_completed_amount': 20000.0
+        })
+        self.assertEqual(payment_methods['by_method']['cash']['count'], 0)
+        self.assertEqual(payment_methods['by_status']['completed'], {'count': 4, 'amount': 20000.0})
+        self.assertEqual(payment_methods['by_status']['pending']['count'], 0)
+
+    def test_incremental_refresh_picks_up_changes(self):
+        self._populate(1)
+        refresh_dashboard_rollups(full=True)
+
+        booking = Booking.objects.get(status='pending')
+        booking.status = 'completed'
+        booking.save()
+        self._booking(self._user(), status='pending')
+
+        # The watermark is stored in the database, not the cache
+        cache.clear()
+        result = refresh_dashboard_rollups()
+        self.assertFalse(result['full'])
+
+        kpis = AdminDashboardView()._get_kpi_cards()
+        self.assertEqual(kpis['pre_booked']['value'], 1)
+        self.assertEqual(kpis['delivered']['value'], 2)
+        self.assertEqual(kpis['total_visitors']['value'], 5)
+        self.assertEqual(
+            sum(DailyBookingRollup.objects.values_list('booking_count', flat=True)),
+            Booking.objects.count()
+        )
+
+    def test_query_count_independent_of_table_size(self):
+        view = AdminDashboardView()
+
+        def dashboard_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                view._get_kpi_cards()
+                view._get_staff_performance()
+                view._get_buyer_growth_trend()
+                view._get_buyer_segments()
+                view._get_sales_funnel()
+                view._get_conversion_rates()
+                view._get_payment_methods()
+            return len(ctx.captured_queries)
+
+        self._populate(1)
+        refresh_dashboard_rollups(full=True)
+        # The first request stores the missing buyer growth snapshots of closed months
+        dashboard_queries()
+        small = dashboard_queries()
+
+        self._populate(5)
+        refresh_dashboard_rollups(full=True)
+        self.assertEqual(dashboard_queries(), small)
@@ -0,0 +1,116 @@
+"""
+Tests for the materialized distributor dashboard
+"""
+from decimal import Decimal
+from unittest.mock import patch
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from core.binary.models import BinaryEarning, BinaryPair
+from core.binary.utils import create_binary_node
+from core.reports.models import DistributorDashboardSnapshot
+from core.reports.tasks import refresh_dashboards_for_nodes_task, refresh_distributor_dashboard_task
+from core.users.models import User
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class DistributorDashboardSnapshotTest(TestCase):
+    """GET serves the stored payload; tree events queue one debounced refresh"""
+
+    def setUp(self):
+        cache.clear()
+        self.distributor = self._user('distributor', is_distributor=True)
+        self.distributor_node = create_binary_node(self.distributor)
+        self.client = APIClient()
+        self.client.force_authenticate(self.distributor)
+
+    def _user(self, username, **extra):
+        return User.objects.create_user(
+            username=username,
+            email=f'{username}@example.com',
+            password='testpass123',
+            **extra
+        )
+
+    def _get_dashboard(self):
+        response = self.client.get('/api/reports/distributor-dashboard/', secure=True)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_get_serves_stored_payload(self):
+        create_binary_node(self._user('a'), parent=self.distributor_node, side='left')
+
+        data = self._get_dashboard()
+        self.assertEqual(data['team_distribution']['rsa_count'], 1)
+        self.assertIn('refreshed_at', data)
+        self.assertEqual(DistributorDashboardSnapshot.objects.count(), 1)
+
+        # Later tree changes show up only after the background refresh
+        create_binary_node(self._user('b'), parent=self.distributor_node, side='right')
+        self.assertEqual(self._get_dashboard()['team_distribution']['rsb_count'], 0)
+
+        refresh_distributor_dashboard_task(self.distributor.id)
+        self.assertEqual(self._get_dashboard()['team_distribution']['rsb_count'], 1)
+
+    @patch('core.reports.tasks.refresh_distributor_dashboard_task.apply_async')
+    @patch('core.reports.tasks.refresh_dashboards_for_nodes_task.apply_async')
+    def test_tree_events_are_debounced(self, nodes_apply_async, apply_async):
+        with self.captureOnCommitCallbacks(execute=True):
+            left = create_binary_node(self._user('a'), parent=self.distributor_node, side='left')
+
+        # The save only queues node IDs; the ancestors are resolved by the task
+        apply_async.assert_not_called()
+        nodes_apply_async.assert_called_once()
+        node_ids = nodes_apply_async.call_args.kwargs['args'][0]
+        self.assertIn(left.id, node_ids)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_binary_node(self._user('b'), parent=left, side='left')
+            refresh_dashboards_for_nodes_task(node_ids)
+        with self.captureOnCommitCallbacks(execute=True):
+            create_binary_node(self._user('c'), parent=left, side='right')
+            refresh_dashboards_for_nodes_task([left.id])
+
+        apply_async.assert_called_once()
+        self.assertEqual(apply_async.call_args.kwargs['args'], [self.distributor.id])
+
+        # Once the refresh runs, the next event schedules again
+        refresh_distributor_dashboard_task(self.distributor.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            refresh_dashboards_for_nodes_task([left.id])
+        self.assertEqual(apply_async.call_count, 2)
+
+    @patch('core.reports.tasks.refresh_dashboards_for_nodes_task.apply_async')
+    def test_count_updates_are_not_tree_events(self, nodes_apply_async):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.distributor_node.update_counts()
+            self.distributor_node.direct_children_count = 1
+            self.distributor_node.save(update_fields=['direct_children_count'])
+        nodes_apply_async.assert_not_called()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.distributor_node.save(update_fields=['side', 'left_count'])
+        nodes_apply_async.assert_called_once()
+
+    @patch('core.reports.tasks.refresh_distributor_dashboard_task.apply_async')
+    def test_pair_and_earning_saves_do_not_load_the_owner(self, apply_async):
+        member = self._user('member')
+        pair = BinaryPair.objects.create(
+            user=self.distributor, pair_amount=Decimal('2000'), earning_amount=Decimal('2000')
+        )
+        earning = BinaryEarning.objects.create(
+            user=member, binary_pair=pair, amount=Decimal('2000'), pair_number=1, net_amount=Decimal('2000')
+        )
+        apply_async.reset_mock()
+
+        pair = BinaryPair.objects.get(pk=pair.pk)
+        earning = BinaryEarning.objects.get(pk=earning.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            # One exists() per save, no SELECT of the whole user row
+            with self.assertNumQueries(2):
+                pair.save(update_fields=['pair_amount'])
+            with self.assertNumQueries(2):
+                earning.save(update_fields=['amount'])
+
+        apply_async.assert_called_once()
+        self.assertEqual(apply_async.call_args.kwargs['args'], [self.distributor.id])
@@ -0,0 +1,104 @@
+"""
+Query-count regression tests for the distributor dashboard helpers
+"""
+from decimal import Decimal
+from django.test import TestCase
+from django.utils import timezone
+from core.binary.models import BinaryEarning, BinaryPair
+from core.binary.utils import create_binary_node
+from core.booking.models import Booking, Payment
+from core.inventory.models import Vehicle
+from core.reports.views import DistributorDashboardView
+from core.users.models import User
+
+
+class DistributorDashboardQueryTest(TestCase):
+    """Top performers and recent sales activity run a constant number of queries"""
+
+    def setUp(self):
+        self.vehicle = Vehicle.objects.create(name='EV One', model_code='EV1', price=Decimal('100000'))
+        self.distributor = self._user('distributor', is_distributor=True)
+        self.distributor_node = create_binary_node(self.distributor)
+        self.view = DistributorDashboardView()
+        self.nodes = []
+        self.counter = 0
+
+    def _user(self, username, **extra):
+        return User.objects.create_user(
+            username=username,
+            email=f'{username}@example.com',
+            password='testpass123',
+            **extra
+        )
+
+    def _booking(self, user, booking_amount=Decimal('5000'), **extra):
+        return Booking.objects.create(
+            user=user,
+            vehicle_model=self.vehicle,
+            booking_amount=booking_amount,
+            total_amount=Decimal('100000'),
+            **extra
+        )
+
+    def _grow_team(self, count):
+        """Add members in a left chain; every member refers one user and books once"""
+        parent = self.nodes[-1] if self.nodes else self.distributor_node
+        for _ in range(count):
+            self.counter += 1
+            member = self._user(f'member{self.counter}', first_name='Member', last_name=str(self.counter))
+            parent = create_binary_node(member, parent=parent, side='left')
+            self.nodes.append(parent)
+
+            referred = self._user(f'referred{self.counter}', referred_by=member)
+            self._booking(referred, referred_by=member)
+            self._booking(self._user(f'booked{self.counter}'), referred_by=member)
+
+    def _add_pairs(self, count):
+        for _ in range(count):
+            self.counter += 1
+            left = self._user(f'left{self.counter}')
+            right = self._user(f'right{self.counter}')
+            booking = self._booking(left)
+            self._booking(right, booking_amount=Decimal('3000'))
+            Payment.objects.bulk_create([Payment(
+                booking=booking, user=left, amount=Decimal('5000'),
+                payment_method='online', status='completed'
+            )])
+            now = timezone.now()
+            pair = BinaryPair.objects.create(
+                user=self.distributor, left_user=left, right_user=right,
+                pair_amount=Decimal('2000'), earning_amount=Decimal('2000'),
+                status='matched', pair_month=now.month, pair_year=now.year
+            )
+            BinaryEarning.objects.create(
+                user=self.distributor, binary_pair=pair, amount=Decimal('2000'),
+                pair_number=self.counter, net_amount=Decimal('1800')
+            )
+
+    def test_top_performers_query_count(self):
+        self._grow_team(3)
+        with self.assertNumQueries(1):
+            performers = self.view._get_top_performers(self.distributor_node)
+        self.assertEqual(len(performers), 3)
+        self.assertTrue(all(p['referrals'] == 2 for p in performers))
+
+        self._grow_team(12)
+        with self.assertNumQueries(1):
+            performers = self.view._get_top_performers(self.distributor_node)
+        self.assertEqual(len(performers), 5)
+        self.assertEqual(performers[0], {'name': 'Member 1', 'referrals': 2, 'team': 'RSA'})
+
+    def test_recent_sales_activity_query_count(self):
+        self._add_pairs(2)
+        with self.assertNumQueries(4):
+            activity = self.view._get_recent_sales_activity(self.distributor)
+        self.assertEqual(len(activity), 2)
+        self.assertEqual(Decimal(activity[0]['left_pv']), Decimal('5000'))
+        self.assertEqual(Decimal(activity[0]['right_pv']), Decimal('3000'))
+        self.assertEqual(Decimal(activity[0]['matched_pv']), Decimal('3000'))
+        self.assertEqual(Decimal(activity[0]['net_amount']), Decimal('1800'))
+
+        self._add_pairs(25)
+        with self.assertNumQueries(4):
+            activity = self.view._get_recent_sales_activity(self.distributor)
+        self.assertEqual(len(activity), 20)
@@ -0,0 +1,74 @@
+"""
+Tests for read-replica routing of report reads
+"""
+from unittest.mock import patch
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+from core import db_router
+from core.db_router import ReplicaRouter, reset_replica_state, use_replica
+from core.users.models import User
+
+
+@patch('core.db_router.replica_configured', return_value=True)
+class ReplicaRouterTest(SimpleTestCase):
+    """Reads use the replica only inside use_replica() and while its lag is acceptable"""
+
+    def setUp(self):
+        reset_replica_state()
+        self.addCleanup(reset_replica_state)
+        self.router = ReplicaRouter()
+
+    def test_reads_outside_block_use_primary(self, _):
+        with patch('core.db_router.get_replica_lag', return_value=0) as get_lag:
+            self.assertEqual(self.router.db_for_read(User), 'default')
+        get_lag.assert_not_called()
+
+    @override_settings(REPLICA_MAX_LAG_SECONDS=30)
+    def test_reads_inside_block_use_replica(self, _):
+        with patch('core.db_router.get_replica_lag', return_value=5), use_replica():
+            self.assertEqual(self.router.db_for_read(User), 'replica')
+            self.assertEqual(self.router.db_for_write(User), 'default')
+        self.assertEqual(self.router.db_for_read(User), 'default')
+
+    @override_settings(REPLICA_MAX_LAG_SECONDS=30)
+    def test_lagging_or_broken_replica_falls_back_to_primary(self, _):
+        for lag in (31, None, ConnectionError('down')):
+            reset_replica_state()
+            with patch('core.db_router.get_replica_lag', side_effect=[lag]), use_replica():
+                self.assertEqual(self.router.db_for_read(User), 'default', lag)
+
+    def test_lag_check_is_cached(self, _):
+        with patch('core.db_router.get_replica_lag', return_value=0) as get_lag, use_replica():
+            self.router.db_for_read(User)
+            self.router.db_for_read(User)
+        get_lag.assert_called_once()
+
+        with patch('core.db_router.time.monotonic', return_value=10 ** 9), \
+                patch('core.db_router.get_replica_lag', return_value=0) as get_lag, use_replica():
+            self.router.db_for_read(User)
+        get_lag.assert_called_once()
+
+    def test_decorator(self, _):
+        @use_replica()
+        def read():
+            return db_router._replica_reads.get()
+
+        self.assertTrue(read())
+        self.assertFalse(db_router._replica_reads.get())
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ReportViewReplicaTest(TestCase):
+    """GET report requests run inside use_replica()"""
+
+    def test_report_get_checks_replica(self):
+        admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='testpass123', role='admin'
+        )
+        client = APIClient()
+        client.force_authenticate(admin)
+
+        with patch('core.db_router.replica_is_usable', return_value=False) as usable:
+            response = client.get('/api/reports/dashboard/', secure=True)
+        self.assertEqual(response.status_code, 200)
+        usable.assert_called()
@@ -0,0 +1,102 @@
+"""
+Tests for the report response cache
+"""
+from decimal import Decimal
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from core.binary.models import BinaryPair
+from core.users.models import User
+from core.wallet.models import Wallet, WalletTransaction
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'report-cache-tests'}
+})
+class ReportResponseCacheTest(TestCase):
+    """Repeated report GETs are served from cache until a relevant write bumps the version"""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = self._user('admin', role='admin', is_staff=True)
+        self.wallet = Wallet.objects.create(user=self.admin)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _user(self, username, **extra):
+        return User.objects.create_user(
+            username=username, email=f'{username}@example.com', password='testpass123', **extra
+        )
+
+    def _transaction(self, amount):
+        with self.captureOnCommitCallbacks(execute=True):
+            WalletTransaction.objects.create(
+                user=self.admin, wallet=self.wallet, transaction_type='DEPOSIT', amount=Decimal(amount),
+                balance_before=0, balance_after=0,
+            )
+
+    def _get(self, url):
+        response = self.client.get(url, secure=True)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_repeated_request_is_served_from_cache(self):
+        self._transaction('100')
+
+        first = self._get('/api/reports/wallet/?start_date=2000-01-01&end_date=2100-01-01')
+        self.assertEqual(first['X-Report-Cache'], 'MISS')
+
+        # Same filters in another order
+        with self.assertNumQueries(0):
+            second = self._get('/api/reports/wallet/?end_date=2100-01-01&start_date=2000-01-01')
+        self.assertEqual(second['X-Report-Cache'], 'HIT')
+        self.assertEqual(second.data, first.data)
+
+        stats = self._get('/api/reports/cache-stats/').data['WalletReportView']
+        self.assertEqual((stats['hits'], stats['misses'], stats['hit_rate']), (1, 1, 50.0))
+
+    def test_writes_invalidate_only_dependent_reports(self):
+        self._transaction('100')
+        self._get('/api/reports/wallet/')
+        self._get('/api/reports/sales/')
+
+        self._transaction('50')
+
+        wallet_report = self._get('/api/reports/wallet/')
+        self.assertEqual(wallet_report['X-Report-Cache'], 'MISS')
+        self.assertEqual(wallet_report.data['total_credit'], Decimal('150'))
+        # The sales report does not read wallet data
+        self.assertEqual(self._get('/api/reports/sales/')['X-Report-Cache'], 'HIT')
+
+    def test_binary_writes_invalidate_binary_reports(self):
+        user = self._user('member')
+        self.client.force_authenticate(user)
+        self.assertEqual(self._get('/api/reports/dashboard/').data['binary_pairs'], 0)
+        self.client.force_authenticate(self.admin)
+        self._get('/api/reports/wallet/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            BinaryPair.objects.create(user=user, pair_amount=Decimal('2000'), earning_amount=Decimal('2000'))
+
+        self.client.force_authenticate(user)
+        response = self._get('/api/reports/dashboard/')
+        self.assertEqual(response['X-Report-Cache'], 'MISS')
+        self.assertEqual(response.data['binary_pairs'], 1)
+        # The wallet report does not read binary data
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(self._get('/api/reports/wallet/')['X-Report-Cache'], 'HIT')
+
+    def test_non_admin_users_are_cached_separately(self):
+        self._get('/api/reports/dashboard/')
+
+        user = self._user('u')
+        self.client.force_authenticate(user)
+        response = self._get('/api/reports/dashboard/')
+        self.assertEqual(response['X-Report-Cache'], 'MISS')
+        self.assertNotIn('total_users', response.data)
+
+    def test_error_responses_are_not_cached(self):
+        self.assertEqual(self.client.get('/api/reports/user/', secure=True).status_code, 400)
+        stats = self._get('/api/reports/cache-stats/').data['UserReportView']
+        self.client.get('/api/reports/user/', secure=True)
+        self.assertEqual(self._get('/api/reports/cache-stats/').data['UserReportView']['misses'], stats['misses'] + 1)
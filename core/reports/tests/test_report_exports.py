@@ -0,0 +1,177 @@
+"""
+Tests for the asynchronous report export API
+"""
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+import csv
+import io
+import shutil
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from openpyxl import load_workbook
+from rest_framework.test import APIClient
+from core.reports.exports import delete_expired_exports, iterate_export_rows
+from core.reports.models import ReportExport
+from core.reports.tasks import generate_report_export_task
+from core.users.models import User
+from core.wallet.models import Wallet, WalletTransaction
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+class SignedURLStorage(FileSystemStorage):
+    """Stand-in for the private Azure container (signed, expiring URLs)"""
+    expiration_secs = 300
+
+    def url(self, name, parameters=None):
+        self.last_parameters = parameters
+        return f"https://blob.example.com/report-exports/{name}?sig=signed"
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    MEDIA_ROOT=MEDIA_ROOT,
+    STORAGES={
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    },
+)
+class ReportExportTest(TestCase):
+    """POST queues an export; the task streams the rows into a stored file"""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='testpass123', role='admin'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+        self.storage = FileSystemStorage(location=f'{MEDIA_ROOT}/private')
+        storage = patch.object(ReportExport._meta.get_field('file'), 'storage', self.storage)
+        storage.start()
+        self.addCleanup(storage.stop)
+
+        wallet = Wallet.objects.create(user=self.admin)
+        WalletTransaction.objects.bulk_create([
+            WalletTransaction(
+                user=self.admin, wallet=wallet, transaction_type='DEPOSIT', amount=Decimal(i),
+                balance_before=0, balance_after=0, description='=HYPERLINK("x")' if i == 1 else ''
+            )
+            for i in range(1, 6)
+        ])
+
+    @patch('core.reports.tasks.generate_report_export_task.delay')
+    def _request_export(self, data, delay):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/reports/exports/', data, format='json', secure=True)
+        self.assertEqual(response.status_code, 202)
+        delay.assert_called_once_with(response.data['id'])
+        return response.data['id']
+
+    def test_csv_export(self):
+        export_id = self._request_export({'report_type': 'wallet_transactions'})
+        self.assertEqual(ReportExport.objects.get(id=export_id).status, 'pending')
+
+        with patch('core.reports.exports.EXPORT_CHUNK_SIZE', 2):
+            generate_report_export_task(export_id)
+
+        response = self.client.get(f'/api/reports/exports/{export_id}/', secure=True)
+        self.assertEqual(response.data['status'], 'completed')
+        self.assertEqual(response.data['row_count'], 5)
+        self.assertTrue(
+            response.data['download_url'].endswith(f'/api/reports/exports/{export_id}/download/')
+        )
+
+        download = self.client.get(f'/api/reports/exports/{export_id}/download/', secure=True)
+        self.assertEqual(download.status_code, 200)
+        self.assertIn('attachment; filename="wallet_transactions_', download['Content-Disposition'])
+        rows = list(csv.reader(io.StringIO(b''.join(download.streaming_content).decode('utf-8'))))
+        self.assertEqual(rows[0][:4], ['ID', 'User ID', 'Username', 'Transaction Type'])
+        self.assertEqual([row[4] for row in rows[1:]], ['1.00', '2.00', '3.00', '4.00', '5.00'])
+        self.assertEqual(rows[1][7], '\'=HYPERLINK("x")')
+
+    def test_xlsx_export_with_date_filter(self):
+        export_id = self._request_export({
+            'report_type': 'wallet_transactions', 'export_format': 'xlsx', 'start_date': '2000-01-01',
+        })
+        generate_report_export_task(export_id)
+
+        export = ReportExport.objects.get(id=export_id)
+        self.assertEqual(export.status, 'completed')
+        with export.file.open('rb') as f:
+            sheet = load_workbook(io.BytesIO(f.read()), read_only=True).worksheets[0]
+            rows = list(sheet.values)
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[0][0], 'ID')
+
+    def test_keyset_batches_cover_every_row_once(self):
+        queryset = WalletTransaction.objects.all()
+        ids = [row[0] for row in iterate_export_rows(queryset, ['id', 'amount'], chunk_size=2)]
+        self.assertEqual(ids, list(queryset.order_by('id').values_list('id', flat=True)))
+
+        # 5 rows in batches of 2: the short third batch ends the scan
+        with self.assertNumQueries(3):
+            list(iterate_export_rows(queryset, ['amount'], chunk_size=2))
+
+    def test_invalid_report_type(self):
+        response = self.client.post(
+            '/api/reports/exports/', {'report_type': 'users'}, format='json', secure=True
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_non_admin_forbidden(self):
+        user = User.objects.create_user(username='u', email='u@example.com', password='testpass123')
+        self.client.force_authenticate(user)
+        response = self.client.post(
+            '/api/reports/exports/', {'report_type': 'bookings'}, format='json', secure=True
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_file_is_private_with_random_name(self):
+        export_id = self._request_export({'report_type': 'wallet_transactions'})
+        generate_report_export_task(export_id)
+
+        export = ReportExport.objects.get(id=export_id)
+        self.assertIs(export.file.storage, self.storage)
+        self.assertRegex(export.file.name, r'^report_exports/[0-9a-f]{32}\.csv$')
+
+        # Only the admin who requested it can download it
+        other_admin = User.objects.create_user(
+            username='admin2', email='admin2@example.com', password='testpass123', role='admin'
+        )
+        self.client.force_authenticate(other_admin)
+        self.assertEqual(self.client.get(f'/api/reports/exports/{export_id}/download/', secure=True).status_code, 404)
+        self.client.logout()
+        self.assertEqual(self.client.get(f'/api/reports/exports/{export_id}/download/', secure=True).status_code, 401)
+
+    def test_signed_url_storage(self):
+        storage = SignedURLStorage(location=f'{MEDIA_ROOT}/signed')
+        with patch.object(ReportExport._meta.get_field('file'), 'storage', storage):
+            export_id = self._request_export({'report_type': 'bookings'})
+            generate_report_export_task(export_id)
+            response = self.client.get(f'/api/reports/exports/{export_id}/', secure=True)
+
+        self.assertTrue(response.data['download_url'].startswith('https://blob.example.com/report-exports/report_exports/'))
+        self.assertIn('attachment; filename="bookings_', storage.last_parameters['content_disposition'])
+
+    def test_expired_exports_are_deleted(self):
+        old_id = self._request_export({'report_type': 'wallet_transactions'})
+        generate_report_export_task(old_id)
+        old = ReportExport.objects.get(id=old_id)
+        ReportExport.objects.filter(id=old_id).update(created_at=timezone.now() - timedelta(days=8))
+        recent = ReportExport.objects.create(requested_by=self.admin, report_type='payouts')
+
+        self.assertEqual(delete_expired_exports(retention_days=7), 1)
+        self.assertFalse(ReportExport.objects.filter(id=old_id).exists())
+        self.assertFalse(self.storage.exists(old.file.name))
+        self.assertTrue(ReportExport.objects.filter(id=recent.id).exists())
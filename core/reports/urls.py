@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import DashboardView, SalesReportView, UserReportView, WalletReportView, DistributorDashboardView, AdminDashboardView, ComprehensiveReportsView
+from .views import DashboardView, SalesReportView, UserReportView, WalletReportView, DistributorDashboardView, AdminDashboardView, ComprehensiveReportsView, ReportExportView, ReportExportDetailView, ReportExportDownloadView, ReportCacheStatsView
 
 urlpatterns = [
     path('dashboard/', DashboardView.as_view(), name='dashboard'),
@@ -9,5 +9,9 @@ urlpatterns = [
     path('distributor-dashboard/', DistributorDashboardView.as_view(), name='distributor-dashboard'),
     path('admin-dashboard/', AdminDashboardView.as_view(), name='admin-dashboard'),
     path('comprehensive/', ComprehensiveReportsView.as_view(), name='comprehensive-reports'),
+    path('exports/', ReportExportView.as_view(), name='report-exports'),
+    path('exports/<int:export_id>/', ReportExportDetailView.as_view(), name='report-export-detail'),
+    path('exports/<int:export_id>/download/', ReportExportDownloadView.as_view(), name='report-export-download'),
+    path('cache-stats/', ReportCacheStatsView.as_view(), name='report-cache-stats'),
 ]
 
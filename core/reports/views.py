@@ -1,8 +1,12 @@
 from rest_framework import views
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
-from rest_framework.exceptions import PermissionDenied
-from django.db.models import Sum, Count, Q, Avg, F
+from rest_framework.exceptions import PermissionDenied, ValidationError, NotFound
+from rest_framework import status
+from django.db.models import Sum, Count, Q, Avg, F, Case, When, Value, CharField, Exists, OuterRef, Subquery
+from django.db.models.functions import TruncMonth
+from django.db import transaction
+from django.http import FileResponse
 from django.utils import timezone
 from datetime import timedelta, datetime
 from decimal import Decimal
@@ -13,14 +17,27 @@ from core.binary.models import BinaryPair, BinaryNode, BinaryEarning
 from core.binary.utils import get_all_descendant_nodes
 from core.payout.models import Payout
 from core.notification.models import Notification
+from core.db_router import ReplicaReadMixin
+from core.pagination import get_estimated_count
+from .models import DailyUserRollup, DailyBookingRollup, DailyPaymentRollup, DistributorDashboardSnapshot, ReportExport
+from .rollups import get_rollups_refreshed_at
+from .buyer_growth import add_months, get_buyer_growth
+from .distributor_dashboard import store_distributor_dashboard
+from .aggregation import aggregate_buckets, daily_buckets, related_aggregate
+from .exports import EXPORT_DEFINITIONS, export_download_name, get_export_download_url, get_export_expires_at
+from .response_cache import cached_report, get_report_cache_stats, reset_report_cache_stats
+import logging
 
+logger = logging.getLogger(__name__)
 
-class DashboardView(views.APIView):
+
+class DashboardView(ReplicaReadMixin, views.APIView):
     """
     Dashboard statistics
     """
     permission_classes = [IsAuthenticated]
     
+    @cached_report(scopes=('wallet', 'booking', 'payment', 'binary'))
     def get(self, request):
         user = request.user
         is_admin = user.is_superuser or user.role == 'admin'
@@ -56,12 +73,13 @@ class DashboardView(views.APIView):
         return Response(stats)
 
 
-class SalesReportView(views.APIView):
+class SalesReportView(ReplicaReadMixin, views.APIView):
     """
     Sales report (admin only)
     """
     permission_classes = [IsAdminUser]
     
+    @cached_report(scopes=('booking', 'payment'))
     def get(self, request):
         start_date = request.query_params.get('start_date')
         end_date = request.query_params.get('end_date')
@@ -84,12 +102,13 @@ class SalesReportView(views.APIView):
         return Response(report)
 
 
-class UserReportView(views.APIView):
+class UserReportView(ReplicaReadMixin, views.APIView):
     """
     User activity report
     """
     permission_classes = [IsAuthenticated]
     
+    @cached_report(scopes=('wallet', 'booking', 'payment', 'binary'))
     def get(self, request):
         user = request.user
         is_admin = user.is_superuser or user.role == 'admin'
@@ -121,12 +140,13 @@ class UserReportView(views.APIView):
         return Response(report)
 
 
-class WalletReportView(views.APIView):
+class WalletReportView(ReplicaReadMixin, views.APIView):
     """
     Wallet transaction report
     """
     permission_classes = [IsAuthenticated]
     
+    @cached_report(scopes=('wallet',))
     def get(self, request):
         user = request.user
         is_admin = user.is_superuser or user.role == 'admin'
@@ -156,16 +176,16 @@ class WalletReportView(views.APIView):
             'total_debit': abs(transactions.filter(amount__lt=0).aggregate(
                 total=Sum('amount')
             )['total'] or 0),
-            'by_type': transactions.values('transaction_type').annotate(
+            'by_type': list(transactions.values('transaction_type').annotate(
                 count=Count('id'),
                 total=Sum('amount')
-            ),
+            )),
         }
         
         return Response(report)
 
 
-class DistributorDashboardView(views.APIView):
+class DistributorDashboardView(ReplicaReadMixin, views.APIView):
     """
     Distributor dashboard with team performance, growth trends, and sales activity
     Only accessible to users with is_distributor=True
@@ -187,70 +207,80 @@ class DistributorDashboardView(views.APIView):
                 'error': 'Binary node not found. Please ensure you have a binary tree structure.'
             }, status=404)
         
-        # Get all team members (all descendants)
-        all_team_members = self._get_all_team_members(distributor_node)
+        # Serve the precomputed payload; build it inline only the first time
+        snapshot = DistributorDashboardSnapshot.objects.filter(user=user).first()
+        if snapshot is None:
+            snapshot = store_distributor_dashboard(user, distributor_node)
         
-        # Calculate all dashboard data
-        dashboard_data = {
-            'top_performers': self._get_top_performers(all_team_members, distributor_node),
-            'team_growth_trend': self._get_team_growth_trend(all_team_members),
-            'team_distribution': self._get_team_distribution(distributor_node),
-            'recent_sales_activity': self._get_recent_sales_activity(user),
-            'commission_trend': self._get_commission_trend(user),
-        }
+        dashboard_data = dict(snapshot.payload)
+        dashboard_data['refreshed_at'] = snapshot.refreshed_at
         
         return Response(dashboard_data)
     
-    def _get_all_team_members(self, distributor_node):
-        """Get all team members (descendants) in the distributor's binary tree"""
-        all_members = []
-        
-        # Get all left descendants
-        left_descendants = get_all_descendant_nodes(distributor_node, 'left')
-        all_members.extend(left_descendants)
-        
-        # Get all right descendants
-        right_descendants = get_all_descendant_nodes(distributor_node, 'right')
-        all_members.extend(right_descendants)
+    def build_dashboard_payload(self, distributor, distributor_node):
+        """Calculate all dashboard data for a distributor (run in the background refresh)"""
+        # Get all team members (all descendants)
+        left_team_members = get_all_descendant_nodes(distributor_node, 'left')
+        right_team_members = get_all_descendant_nodes(distributor_node, 'right')
+        all_team_members = left_team_members + right_team_members
         
-        return all_members
+        # Calculate all dashboard data
+        return {
+            'top_performers': self._get_top_performers(distributor_node),
+            'team_growth_trend': self._get_team_growth_trend(all_team_members),
+            'team_distribution': self._get_team_distribution(
+                len(left_team_members), len(right_team_members)
+            ),
+            'recent_sales_activity': self._get_recent_sales_activity(distributor),
+            'commission_trend': self._get_commission_trend(distributor),
+        }
     
-    def _get_top_performers(self, team_members, distributor_node):
-        """Get top 5 performers based on referral count"""
-        performers = []
+    def _get_top_performers(self, distributor_node):
+        """
+        Get top 5 performers based on referral count
         
-        for node in team_members:
-            team_member_user = node.user
-            
-            # Count total referrals for this team member
-            # Direct referrals via referred_by field
-            direct_referrals = User.objects.filter(referred_by=team_member_user).count()
-            
-            # Users who used referral code in bookings
-            booking_referrals = Booking.objects.filter(
-                referred_by=team_member_user
-            ).values('user').distinct().count()
-            
-            # Get unique count
-            all_referred_user_ids = set(
-                list(User.objects.filter(referred_by=team_member_user).values_list('id', flat=True)) +
-                list(Booking.objects.filter(referred_by=team_member_user).values_list('user_id', flat=True).distinct())
-            )
-            
-            referral_count = len(all_referred_user_ids)
-            
-            # Determine team (RSA = left, RSB = right)
-            team = 'RSA' if node.side == 'left' else 'RSB'
-            
-            performers.append({
-                'name': team_member_user.get_full_name() or team_member_user.username,
+        Counts distinct referred users (referred_by on the user or on any of their
+        bookings) per downline member in one GROUP BY over the descendant set, with
+        the top 5 ordering done in SQL.
+        """
+        from django.db import connection
+        
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                WITH RECURSIVE team AS (
+                    SELECT id, user_id, side, level FROM binary_nodes WHERE parent_id = %s
+                    UNION ALL
+                    SELECT bn.id, bn.user_id, bn.side, bn.level
+                    FROM binary_nodes bn
+                    INNER JOIN team t ON bn.parent_id = t.id
+                ),
+                referrals AS (
+                    SELECT referred_by_id AS referrer_id, id AS referred_id
+                    FROM users WHERE referred_by_id IN (SELECT user_id FROM team)
+                    UNION
+                    SELECT referred_by_id, user_id
+                    FROM bookings WHERE referred_by_id IN (SELECT user_id FROM team)
+                )
+                SELECT u.first_name, u.last_name, u.username, t.side,
+                       COUNT(DISTINCT r.referred_id) AS referral_count
+                FROM team t
+                INNER JOIN users u ON u.id = t.user_id
+                LEFT JOIN referrals r ON r.referrer_id = t.user_id
+                GROUP BY t.id, t.level, t.side, u.first_name, u.last_name, u.username
+                ORDER BY referral_count DESC, t.level, t.id
+                LIMIT 5
+            """, [distributor_node.id])
+            rows = cursor.fetchall()
+        
+        return [
+            {
+                'name': f"{first_name} {last_name}".strip() or username,
                 'referrals': referral_count,
-                'team': team
-            })
-        
-        # Sort by referral count (descending) and return top 5
-        performers.sort(key=lambda x: x['referrals'], reverse=True)
-        return performers[:5]
+                # Determine team (RSA = left, RSB = right)
+                'team': 'RSA' if side == 'left' else 'RSB'
+            }
+            for first_name, last_name, username, side, referral_count in rows
+        ]
     
     def _get_team_growth_trend(self, team_members):
         """Get monthly team member growth for last 6 months"""
@@ -300,14 +330,8 @@ class DistributorDashboardView(views.APIView):
             'counts': counts
         }
     
-    def _get_team_distribution(self, distributor_node):
-        """Get RSA (left) vs RSB (right) distribution"""
-        # Update counts to ensure accuracy
-        distributor_node.update_counts()
-        distributor_node.refresh_from_db()
-        
-        left_count = distributor_node.left_count
-        right_count = distributor_node.right_count
+    def _get_team_distribution(self, left_count, right_count):
+        """Get RSA (left) vs RSB (right) distribution from the loaded team sizes"""
         total = left_count + right_count
         
         if total == 0:
@@ -331,62 +355,62 @@ class DistributorDashboardView(views.APIView):
     def _get_recent_sales_activity(self, distributor):
         """Get recent sales activity (binary pairs) with PV calculations"""
         # Get recent binary pairs for distributor (last 20)
-        recent_pairs = BinaryPair.objects.filter(
+        recent_pairs = list(BinaryPair.objects.filter(
             user=distributor
-        ).select_related(
-            'left_user', 'right_user'
-        ).order_by('-created_at')[:20]
+        ).order_by('-created_at')[:20])
+        
+        # Completed payment totals for all left/right users in one aggregate
+        pair_user_ids = {
+            user_id
+            for pair in recent_pairs
+            for user_id in (pair.left_user_id, pair.right_user_id)
+            if user_id
+        }
+        paid_by_user = {
+            row['user_id']: row['total']
+            for row in Payment.objects.filter(
+                user_id__in=pair_user_ids,
+                status='completed'
+            ).values('user_id').annotate(total=Sum('amount')).order_by()
+        }
+        
+        # Fallback to the latest booking amount for users without completed payments
+        latest_booking_amount = {}
+        unpaid_user_ids = [user_id for user_id in pair_user_ids if not paid_by_user.get(user_id)]
+        if unpaid_user_ids:
+            for user_id, booking_amount in Booking.objects.filter(
+                user_id__in=unpaid_user_ids
+            ).order_by('-created_at').values_list('user_id', 'booking_amount'):
+                latest_booking_amount.setdefault(user_id, booking_amount)
+        
+        # Earnings for all pairs in bulk (first by BinaryEarning ordering, newest first)
+        net_amount_by_pair = {}
+        for pair_id, net_amount in BinaryEarning.objects.filter(
+            binary_pair__in=recent_pairs
+        ).values_list('binary_pair_id', 'net_amount'):
+            net_amount_by_pair.setdefault(pair_id, net_amount)
+        
+        def _get_pv(user_id):
+            """PV from the user's completed payments, or latest booking amount if none"""
+            if not user_id:
+                return Decimal('0')
+            if paid_by_user.get(user_id):
+                return Decimal(str(paid_by_user[user_id]))
+            return latest_booking_amount.get(user_id) or Decimal('0')
         
         sales_activity = []
         
         for pair in recent_pairs:
-            # Calculate Left PV (from left_user's completed payments)
-            left_pv = Decimal('0')
-            if pair.left_user:
-                left_payments = Payment.objects.filter(
-                    user=pair.left_user,
-                    status='completed'
-                ).aggregate(total=Sum('amount'))['total']
-                if left_payments:
-                    left_pv = Decimal(str(left_payments))
-                else:
-                    # Fallback to booking amount
-                    left_booking = Booking.objects.filter(
-                        user=pair.left_user
-                    ).order_by('-created_at').first()
-                    if left_booking:
-                        left_pv = left_booking.booking_amount or Decimal('0')
-            
-            # Calculate Right PV (from right_user's completed payments)
-            right_pv = Decimal('0')
-            if pair.right_user:
-                right_payments = Payment.objects.filter(
-                    user=pair.right_user,
-                    status='completed'
-                ).aggregate(total=Sum('amount'))['total']
-                if right_payments:
-                    right_pv = Decimal(str(right_payments))
-                else:
-                    # Fallback to booking amount
-                    right_booking = Booking.objects.filter(
-                        user=pair.right_user
-                    ).order_by('-created_at').first()
-                    if right_booking:
-                        right_pv = right_booking.booking_amount or Decimal('0')
+            # Calculate Left PV and Right PV
+            left_pv = _get_pv(pair.left_user_id)
+            right_pv = _get_pv(pair.right_user_id)
             
             # Matched PV is minimum of Left PV and Right PV, or use pair_amount
             matched_pv = min(left_pv, right_pv) if left_pv > 0 and right_pv > 0 else (pair.pair_amount if pair.pair_amount else Decimal('0'))
             
             # Get commission and net amount from BinaryEarning
             commission = pair.pair_amount or pair.earning_amount or Decimal('0')
-            net_amount = Decimal('0')
-            
-            try:
-                earning = BinaryEarning.objects.filter(binary_pair=pair).first()
-                if earning:
-                    net_amount = earning.net_amount
-            except BinaryEarning.DoesNotExist:
-                pass
+            net_amount = net_amount_by_pair.get(pair.id, Decimal('0'))
             
             # Format date
             date_obj = pair.matched_at or pair.created_at
@@ -458,7 +482,7 @@ class DistributorDashboardView(views.APIView):
         }
 
 
-class AdminDashboardView(views.APIView):
+class AdminDashboardView(ReplicaReadMixin, views.APIView):
     """
     Admin Dashboard with comprehensive business intelligence data
     Only accessible to admin and staff roles
@@ -477,6 +501,7 @@ class AdminDashboardView(views.APIView):
             'kpi_cards': self._get_kpi_cards(),
             'booking_trends': self._get_booking_trends(),
             'payment_distribution': self._get_payment_distribution(),
+            'payment_methods': self._get_payment_methods(),
             'staff_performance': self._get_staff_performance(),
             'buyer_growth_trend': self._get_buyer_growth_trend(),
             'buyer_segments': self._get_buyer_segments(),
@@ -485,51 +510,48 @@ class AdminDashboardView(views.APIView):
             'pre_bookings': self._get_pre_bookings(),
             'emi_orders': self._get_emi_orders(),
             'cancelled_orders': self._get_cancelled_orders(),
+            'rollups_refreshed_at': get_rollups_refreshed_at(),
         }
         
         return Response(dashboard_data)
     
     def _get_kpi_cards(self):
-        """Calculate all KPI metrics with percentage changes"""
-        now = timezone.now()
-        
-        # Calculate current and previous month date ranges
-        current_month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        if now.month == 1:
-            previous_month_start = now.replace(year=now.year-1, month=12, day=1, hour=0, minute=0, second=0, microsecond=0)
-        else:
-            previous_month_start = now.replace(month=now.month-1, day=1, hour=0, minute=0, second=0, microsecond=0)
-        
-        previous_month_end = current_month_start - timedelta(days=1)
-        previous_month_start = previous_month_start.replace(day=1)
-        
-        # Active Buyers
-        current_active_buyers = User.objects.filter(is_active_buyer=True).count()
-        previous_active_buyers = User.objects.filter(
-            is_active_buyer=True,
-            date_joined__lt=current_month_start
-        ).count()
+        """Calculate all KPI metrics with percentage changes (read from daily rollups)"""
+        current_month_start = timezone.localdate().replace(day=1)
+        
+        # Active Buyers / Total Visitors (Total registered users), now and at the start of the month
+        users = DailyUserRollup.objects.aggregate(
+            current_active_buyers=Sum('user_count', filter=Q(is_active_buyer=True)),
+            previous_active_buyers=Sum(
+                'user_count', filter=Q(is_active_buyer=True, date__lt=current_month_start)
+            ),
+            current_total_visitors=Sum('user_count'),
+            previous_total_visitors=Sum('user_count', filter=Q(date__lt=current_month_start)),
+        )
+        current_active_buyers = users['current_active_buyers'] or 0
+        previous_active_buyers = users['previous_active_buyers'] or 0
         active_buyers_change = self._calculate_percentage_change(current_active_buyers, previous_active_buyers)
         
-        # Total Visitors (Total registered users)
-        current_total_visitors = User.objects.count()
-        previous_total_visitors = User.objects.filter(
-            date_joined__lt=current_month_start
-        ).count()
+        current_total_visitors = users['current_total_visitors'] or 0
+        previous_total_visitors = users['previous_total_visitors'] or 0
         total_visitors_change = self._calculate_percentage_change(current_total_visitors, previous_total_visitors)
         
+        bookings = DailyBookingRollup.objects.aggregate(
+            pre_booked=Sum('booking_count', filter=Q(status='pending')),
+            paid_orders=Sum('booking_count', filter=Q(is_paid=True)),
+            delivered=Sum('booking_count', filter=Q(status='completed')),
+        )
+        
         # Pre-Booked (Bookings with status='pending')
-        pre_booked = Booking.objects.filter(status='pending').count()
+        pre_booked = bookings['pre_booked'] or 0
         pre_booked_conversion = (pre_booked / current_total_visitors * 100) if current_total_visitors > 0 else 0
         
         # Paid Orders (Bookings with completed payments)
-        paid_orders = Booking.objects.filter(
-            payments__status='completed'
-        ).distinct().count()
+        paid_orders = bookings['paid_orders'] or 0
         paid_orders_conversion = (paid_orders / pre_booked * 100) if pre_booked > 0 else 0
         
         # Delivered (Bookings with status='completed')
-        delivered = Booking.objects.filter(status='completed').count()
+        delivered = bookings['delivered'] or 0
         delivered_conversion = (delivered / paid_orders * 100) if paid_orders > 0 else 0
         
         return {
@@ -559,9 +581,21 @@ class AdminDashboardView(views.APIView):
     
     def _get_booking_trends(self):
         """Calculate monthly booking data and growth percentage"""
+        now = timezone.now()
+        
+        # Count bookings per role and month in the database
+        monthly_counts = {}
+        for row in Booking.objects.filter(
+            user__role__in=['user', 'staff'],
+            created_at__gte=timezone.make_aware(datetime(now.year, now.month, 1)) - timedelta(days=120)
+        ).annotate(
+            month=TruncMonth('created_at')
+        ).values('user__role', 'month').annotate(count=Count('id')).order_by():
+            month_key = f"{row['month'].year}-{row['month'].month:02d}"
+            monthly_counts[(row['user__role'], month_key)] = row['count']
+        
         def _get_trends_for_role(user_role):
             """Get booking trends for a specific user role"""
-            now = timezone.now()
             month_names = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
             
             # Get last 4 months of booking data
@@ -582,20 +616,9 @@ class AdminDashboardView(views.APIView):
                 month_key = f"{year}-{month:02d}"
                 months_data[month_key] = {
                     'month_name': month_names[month - 1],
-                    'count': 0
+                    'count': monthly_counts.get((user_role, month_key), 0)
                 }
             
-            # Count bookings by month for this role
-            bookings = Booking.objects.filter(
-                user__role=user_role,
-                created_at__gte=datetime(now.year, now.month, 1) - timedelta(days=120)
-            )
-            
-            for booking in bookings:
-                booking_month = booking.created_at.strftime('%Y-%m')
-                if booking_month in months_data:
-                    months_data[booking_month]['count'] += 1
-            
             # Format response
             months = []
             booking_counts = []
@@ -624,39 +647,75 @@ class AdminDashboardView(views.APIView):
             'staff_users': _get_trends_for_role('staff')
         }
     
+    def _get_payment_methods(self):
+        """Payment counts and amounts per payment method and status (read from daily rollups)"""
+        current_month_start = timezone.localdate().replace(day=1)
+        
+        def _method_totals():
+            return {'count': 0, 'completed_count': 0, 'completed_amount': 0.0, 'current_month_completed_amount': 0.0}
+        
+        by_method = {method: _method_totals() for method, _ in Payment.PAYMENT_METHOD_CHOICES}
+        by_status = {status: {'count': 0, 'amount': 0.0} for status, _ in Payment.STATUS_CHOICES}
+        
+        for row in DailyPaymentRollup.objects.values('payment_method', 'status').annotate(
+            count=Sum('payment_count'),
+            amount=Sum('total_amount'),
+            current_month_amount=Sum('total_amount', filter=Q(date__gte=current_month_start)),
+        ).order_by():
+            method = by_method.setdefault(row['payment_method'], _method_totals())
+            method['count'] += row['count'] or 0
+            if row['status'] == 'completed':
+                method['completed_count'] += row['count'] or 0
+                method['completed_amount'] += float(row['amount'] or 0)
+                method['current_month_completed_amount'] += float(row['current_month_amount'] or 0)
+            
+            status_totals = by_status.setdefault(row['status'], {'count': 0, 'amount': 0.0})
+            status_totals['count'] += row['count'] or 0
+            status_totals['amount'] += float(row['amount'] or 0)
+        
+        return {
+            'by_method': by_method,
+            'by_status': by_status,
+        }
+    
     def _get_payment_distribution(self):
         """Analyze payment types: Full Payment, EMI, Wallet, Mixed"""
-        # Get all bookings with completed payments
-        bookings_with_payments = Booking.objects.filter(
-            payments__status='completed'
-        ).distinct().prefetch_related('payments')
-        
-        full_payment_count = 0
-        emi_count = 0
-        wallet_count = 0
-        mixed_count = 0
-        
-        for booking in bookings_with_payments:
-            payment_methods = set(booking.payments.filter(status='completed').values_list('payment_method', flat=True))
-            
-            # Check if it's a full payment booking
-            if booking.payment_option == 'full_payment' and len(payment_methods) == 1:
-                if 'wallet' in payment_methods:
-                    wallet_count += 1
-                else:
-                    full_payment_count += 1
-            # Check if it's EMI
-            elif booking.payment_option == 'emi_options':
-                if len(payment_methods) == 1 and 'wallet' in payment_methods:
-                    wallet_count += 1
-                else:
-                    emi_count += 1
-            # Mixed payment methods
-            elif len(payment_methods) > 1:
-                mixed_count += 1
-            # Wallet only
-            elif 'wallet' in payment_methods:
-                wallet_count += 1
+        completed_payments = Payment.objects.filter(booking=OuterRef('pk'), status='completed')
+        
+        # Per booking: number of distinct completed payment methods and whether wallet was used,
+        # then classify and count bookings per payment type in a single grouped query
+        single_method = Q(method_count=1)
+        distribution = Booking.objects.filter(
+            Exists(completed_payments)
+        ).annotate(
+            method_count=Subquery(
+                completed_payments.values('booking').annotate(
+                    count=Count('payment_method', distinct=True)
+                ).values('count')
+            ),
+            has_wallet=Exists(completed_payments.filter(payment_method='wallet')),
+        ).annotate(
+            payment_type=Case(
+                # Full payment booking with a single payment method
+                When(single_method & Q(payment_option='full_payment', has_wallet=True), then=Value('wallet')),
+                When(single_method & Q(payment_option='full_payment'), then=Value('full_payment')),
+                # EMI (wallet-only EMI bookings count as wallet)
+                When(single_method & Q(payment_option='emi_options', has_wallet=True), then=Value('wallet')),
+                When(payment_option='emi_options', then=Value('emi')),
+                # Mixed payment methods
+                When(method_count__gt=1, then=Value('mixed')),
+                # Wallet only
+                When(has_wallet=True, then=Value('wallet')),
+                default=Value(None),
+                output_field=CharField(),
+            )
+        ).values('payment_type').annotate(count=Count('id')).order_by()
+        
+        counts = {row['payment_type']: row['count'] for row in distribution}
+        full_payment_count = counts.get('full_payment', 0)
+        emi_count = counts.get('emi', 0)
+        wallet_count = counts.get('wallet', 0)
+        mixed_count = counts.get('mixed', 0)
         
         total = full_payment_count + emi_count + wallet_count + mixed_count
         
@@ -690,43 +749,31 @@ class AdminDashboardView(views.APIView):
     def _get_staff_performance(self):
         """Calculate staff achievement percentages based on bookings processed"""
         # Get all staff users
-        staff_users = User.objects.filter(role='staff')
+        staff_users = list(User.objects.filter(role='staff'))
         
-        now = timezone.now()
-        current_month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        current_month_start = timezone.localdate().replace(day=1)
         
         staff_performance = []
         
         # Default target: 100 bookings per month (can be adjusted)
         default_target = 100
         
+        # There's no direct staff field on Booking, so bookings created this month
+        # are divided among staff members. In production, you'd have a proper
+        # tracking mechanism (e.g. the staff member who accepted the payment).
+        bookings_processed = DailyBookingRollup.objects.filter(
+            date__gte=current_month_start
+        ).aggregate(total=Sum('booking_count'))['total'] or 0
+        
+        if staff_users:
+            avg_bookings_per_staff = bookings_processed / len(staff_users)
+        else:
+            avg_bookings_per_staff = 0
+        
+        achievement = round((avg_bookings_per_staff / default_target) * 100) if default_target > 0 else 0
+        achievement = min(achievement, 100)  # Cap at 100%
+        
         for staff in staff_users:
-            # Count bookings processed by this staff member this month
-            # Since there's no direct staff field on Booking, we'll count bookings
-            # where payments were accepted by staff (via accept_payment action)
-            # For now, we'll use a simpler approach: count bookings created this month
-            # and assume staff are involved in processing them
-            # In a real scenario, you'd track which staff member processed each booking
-            
-            # Alternative: Count total bookings and divide by number of staff
-            # Or track staff assignments in a separate model
-            
-            # For this implementation, we'll calculate based on total bookings
-            # and assign proportionally, or use a fixed target system
-            bookings_processed = Booking.objects.filter(
-                created_at__gte=current_month_start
-            ).count()
-            
-            # Simple approach: divide bookings among staff members
-            # In production, you'd have a proper tracking mechanism
-            if staff_users.count() > 0:
-                avg_bookings_per_staff = bookings_processed / staff_users.count()
-            else:
-                avg_bookings_per_staff = 0
-            
-            achievement = round((avg_bookings_per_staff / default_target) * 100) if default_target > 0 else 0
-            achievement = min(achievement, 100)  # Cap at 100%
-            
             staff_performance.append({
                 'name': staff.get_full_name() or staff.username or staff.first_name or 'Staff',
                 'achievement': achievement
@@ -738,73 +785,22 @@ class AdminDashboardView(views.APIView):
         return staff_performance
     
     def _get_buyer_growth_trend(self):
-        """Get buyer growth trend over last 6 months - cumulative totals at end of each month"""
+        """
+        Get buyer growth trend over last 6 months - totals at end of each month
+        Closed months come from the monthly snapshots, the current month is live
+        """
+        month_names = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+        current_month = timezone.localdate().replace(day=1)
+        months = [add_months(current_month, offset) for offset in range(-5, 1)]
+        
+        growth = get_buyer_growth(months, roles=('user', 'staff'))
+        
         def _get_trend_for_role(user_role):
             """Get buyer growth trend for a specific user role"""
-            now = timezone.now()
-            month_names = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-            
-            # Initialize data for last 6 months
-            months_data = []
-            for i in range(6):
-                month_offset = 5 - i
-                year = now.year
-                month = now.month - month_offset
-                
-                # Handle year rollover
-                while month <= 0:
-                    month += 12
-                    year -= 1
-                while month > 12:
-                    month -= 12
-                    year += 1
-                
-                # Calculate end of month date
-                if month == 12:
-                    next_month = 1
-                    next_year = year + 1
-                else:
-                    next_month = month + 1
-                    next_year = year
-                
-                month_end = datetime(next_year, next_month, 1) - timedelta(days=1)
-                month_end = timezone.make_aware(month_end.replace(hour=23, minute=59, second=59))
-                
-                months_data.append({
-                    'month_name': month_names[month - 1],
-                    'month_end': month_end,
-                    'year': year,
-                    'month': month
-                })
-            
-            # Calculate cumulative counts at end of each month
-            months = []
-            active_buyers_list = []
-            total_buyers_list = []
-            
-            for month_info in months_data:
-                month_end = month_info['month_end']
-                
-                # Count total users up to end of this month for this role
-                total_buyers = User.objects.filter(role=user_role, date_joined__lte=month_end).count()
-                
-                # Count active buyers up to end of this month for this role
-                # Note: This assumes is_active_buyer status is current, not historical
-                # For accurate historical data, you'd need to track status changes over time
-                active_buyers = User.objects.filter(
-                    role=user_role,
-                    is_active_buyer=True,
-                    date_joined__lte=month_end
-                ).count()
-                
-                months.append(month_info['month_name'])
-                active_buyers_list.append(active_buyers)
-                total_buyers_list.append(total_buyers)
-            
             return {
-                'months': months,
-                'active_buyers': active_buyers_list,
-                'total_buyers': total_buyers_list
+                'months': [month_names[month.month - 1] for month in months],
+                'active_buyers': [growth[(month, user_role)]['active'] for month in months],
+                'total_buyers': [growth[(month, user_role)]['total'] for month in months]
             }
         
         return {
@@ -814,51 +810,67 @@ class AdminDashboardView(views.APIView):
     
     def _get_buyer_segments(self):
         """Get buyer category distribution"""
-        now = timezone.now()
-        current_month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        
-        # Normal users (role='user')
-        normal_active_buyers = User.objects.filter(is_active_buyer=True, role='user').count()
-        normal_inactive = User.objects.filter(is_active_buyer=False, role='user').count()
-        normal_pre_booked = User.objects.filter(role='user', bookings__status='pending').distinct().count()
-        normal_new_this_month = User.objects.filter(
-            role='user',
-            date_joined__gte=current_month_start
-        ).count()
-        
-        # Staff users (role='staff')
-        staff_active_buyers = User.objects.filter(is_active_buyer=True, role='staff').count()
-        staff_inactive = User.objects.filter(is_active_buyer=False, role='staff').count()
-        staff_pre_booked = User.objects.filter(role='staff', bookings__status='pending').distinct().count()
-        staff_new_this_month = User.objects.filter(
-            role='staff',
-            date_joined__gte=current_month_start
-        ).count()
+        current_month_start = timezone.localdate().replace(day=1)
+        
+        segments = {
+            row['role']: row
+            for row in DailyUserRollup.objects.filter(
+                role__in=['user', 'staff']
+            ).values('role').annotate(
+                active_buyers=Sum('user_count', filter=Q(is_active_buyer=True)),
+                inactive=Sum('user_count', filter=Q(is_active_buyer=False)),
+                pre_booked=Sum('user_count', filter=Q(has_pre_booked=True)),
+                new_this_month=Sum('user_count', filter=Q(date__gte=current_month_start)),
+            ).order_by()
+        }
         
-        return {
-            'normal_users': {
-                'active_buyers': normal_active_buyers,
-                'inactive': normal_inactive,
-                'pre_booked': normal_pre_booked,
-                'new_this_month': normal_new_this_month
-            },
-            'staff_users': {
-                'active_buyers': staff_active_buyers,
-                'inactive': staff_inactive,
-                'pre_booked': staff_pre_booked,
-                'new_this_month': staff_new_this_month
+        def _get_segment_for_role(user_role):
+            row = segments.get(user_role, {})
+            return {
+                'active_buyers': row.get('active_buyers') or 0,
+                'inactive': row.get('inactive') or 0,
+                'pre_booked': row.get('pre_booked') or 0,
+                'new_this_month': row.get('new_this_month') or 0
             }
+        
+        return {
+            'normal_users': _get_segment_for_role('user'),
+            'staff_users': _get_segment_for_role('staff')
         }
     
+    def _get_funnel_counts(self, user_role, joined_before=None):
+        """
+        Count users of a role at each funnel stage from the daily user rollup
+        
+        Args:
+            user_role: User role to count
+            joined_before: Only count users who joined before this date
+        
+        Returns:
+            dict: total_visitors, interested, paid and delivered user counts
+        """
+        rollups = DailyUserRollup.objects.filter(role=user_role)
+        if joined_before:
+            rollups = rollups.filter(date__lt=joined_before)
+        
+        counts = rollups.aggregate(
+            total_visitors=Sum('user_count'),
+            interested=Sum('user_count', filter=Q(has_pre_booked=True)),
+            paid=Sum('user_count', filter=Q(has_paid=True)),
+            delivered=Sum('user_count', filter=Q(has_delivered=True)),
+        )
+        return {key: value or 0 for key, value in counts.items()}
+    
     def _get_sales_funnel(self):
         """Get sales funnel visualization data"""
         def _build_funnel(user_role):
             """Build funnel for a specific user role"""
-            total_visitors = User.objects.filter(role=user_role).count()
-            interested = User.objects.filter(role=user_role, bookings__status='pending').distinct().count()
+            counts = self._get_funnel_counts(user_role)
+            total_visitors = counts['total_visitors']
+            interested = counts['interested']
             pre_booked = interested  # Same as interested based on our definition
-            paid = User.objects.filter(role=user_role, bookings__payments__status='completed').distinct().count()
-            delivered = User.objects.filter(role=user_role, bookings__status='completed').distinct().count()
+            paid = counts['paid']
+            delivered = counts['delivered']
             
             funnel = []
             
@@ -921,41 +933,23 @@ class AdminDashboardView(views.APIView):
         """Get stage-to-stage conversion rates with trend indicators"""
         def _get_rates_for_role(user_role):
             """Get conversion rates for a specific user role"""
-            now = timezone.now()
-            current_month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+            current_month_start = timezone.localdate().replace(day=1)
             
             # Current period data
-            total_visitors = User.objects.filter(role=user_role).count()
-            interested = User.objects.filter(role=user_role, bookings__status='pending').distinct().count()
+            counts = self._get_funnel_counts(user_role)
+            total_visitors = counts['total_visitors']
+            interested = counts['interested']
             pre_booked = interested
-            paid = User.objects.filter(role=user_role, bookings__payments__status='completed').distinct().count()
-            delivered = User.objects.filter(role=user_role, bookings__status='completed').distinct().count()
-            
-            # Previous period data (previous month)
-            if now.month == 1:
-                prev_month_start = now.replace(year=now.year-1, month=12, day=1, hour=0, minute=0, second=0, microsecond=0)
-            else:
-                prev_month_start = now.replace(month=now.month-1, day=1, hour=0, minute=0, second=0, microsecond=0)
+            paid = counts['paid']
+            delivered = counts['delivered']
             
-            prev_month_end = current_month_start - timedelta(days=1)
-            
-            prev_visitors = User.objects.filter(role=user_role, date_joined__lt=current_month_start).count()
-            prev_interested = User.objects.filter(
-                role=user_role,
-                bookings__created_at__lt=current_month_start,
-                bookings__status='pending'
-            ).distinct().count()
+            # Previous period data: the cohort that had joined before this month
+            prev_counts = self._get_funnel_counts(user_role, joined_before=current_month_start)
+            prev_visitors = prev_counts['total_visitors']
+            prev_interested = prev_counts['interested']
             prev_pre_booked = prev_interested
-            prev_paid = User.objects.filter(
-                role=user_role,
-                bookings__payments__completed_at__lt=current_month_start,
-                bookings__payments__status='completed'
-            ).distinct().count()
-            prev_delivered = User.objects.filter(
-                role=user_role,
-                bookings__completed_at__lt=current_month_start,
-                bookings__status='completed'
-            ).distinct().count()
+            prev_paid = prev_counts['paid']
+            prev_delivered = prev_counts['delivered']
             
             # Calculate conversion rates
             visitors_to_interested = (interested / total_visitors * 100) if total_visitors > 0 else 0
@@ -1355,13 +1349,14 @@ class AdminDashboardView(views.APIView):
         }
 
 
-class ComprehensiveReportsView(views.APIView):
+class ComprehensiveReportsView(ReplicaReadMixin, views.APIView):
     """
     Comprehensive reports endpoint that aggregates all dashboard data
     Only accessible to admin and staff roles
     """
     permission_classes = [IsAuthenticated]
     
+    @cached_report(scopes=('wallet', 'booking', 'payment', 'binary'))
     def get(self, request):
         user = request.user
         
@@ -1479,8 +1474,8 @@ class ComprehensiveReportsView(views.APIView):
         page_size = min(max(1, page_size), max_page_size)
         page = max(1, page)
         
-        # Get total count
-        total_count = queryset.count()
+        # Exact for filtered sections; cached for unfiltered large tables
+        total_count, count_is_estimate = get_estimated_count(queryset)
         
         # Calculate total pages
         total_pages = (total_count + page_size - 1) // page_size if total_count > 0 else 1
@@ -1497,6 +1492,7 @@ class ComprehensiveReportsView(views.APIView):
         # Build pagination metadata
         pagination_meta = {
             'total_count': total_count,
+            'count_is_estimate': count_is_estimate,
             'total_pages': total_pages,
             'current_page': page,
             'page_size': page_size,
@@ -1575,20 +1571,27 @@ class ComprehensiveReportsView(views.APIView):
         # Apply status filter for detailed list
         filtered_transactions = self._apply_transaction_status_filter(all_transactions, status_filter)
         
-        # Get payment transactions for success/failure calculation
-        all_payments = Payment.objects.all()
-        
-        # Summary cards (based on all transactions, not filtered)
-        total_transactions = all_transactions.count()
-        total_amount_result = all_transactions.aggregate(total=Sum('amount'))['total'] or Decimal('0')
-        total_amount = abs(float(total_amount_result))
+        # Summary cards and weekly trend (last 7 days) in one query
+        # (based on all transactions, not filtered)
+        amount_metrics = {'count': (Count, 'id'), 'total': (Sum, 'amount')}
+        week_buckets = daily_buckets('created_at', 7)
+        transaction_totals = aggregate_buckets(
+            all_transactions,
+            {'all': None, **week_buckets},
+            amount_metrics
+        )
+        total_transactions = transaction_totals['all']['count']
+        total_amount = abs(float(transaction_totals['all']['total']))
         
         # Success rate and failed count based on Payment model (actual payment success/failure)
         # Wallet transactions don't have a status field - they're all successful by design
-        successful_payments = all_payments.filter(status='completed').count()
-        failed_payments = all_payments.filter(status='failed').count()
-        pending_payments = all_payments.filter(status='pending').count()
-        refunded_payments = all_payments.filter(status='refunded').count()
+        payment_totals = aggregate_buckets(
+            Payment.objects.all(),
+            {'all': None, 'completed': Q(status='completed'), 'failed': Q(status='failed')},
+            {'count': (Count, 'id')}
+        )
+        successful_payments = payment_totals['completed']['count']
+        failed_payments = payment_totals['failed']['count']
         
         # Calculate success rate: completed / (completed + failed) * 100
         # Exclude pending (not yet processed) and refunded (were successful but refunded)
@@ -1598,7 +1601,7 @@ class ComprehensiveReportsView(views.APIView):
             success_rate = (successful_payments / processed_payments * 100)
         else:
             # If no processed payments, check if there are any payments at all
-            total_payments = all_payments.count()
+            total_payments = payment_totals['all']['count']
             if total_payments > 0:
                 # All payments are pending - can't calculate success rate yet
                 success_rate = 0.0
@@ -1615,49 +1618,24 @@ class ComprehensiveReportsView(views.APIView):
             avg_amount=Avg('amount')
         ).order_by('-count')
         
-        # Calculate success rate per type
-        # For wallet transactions, success rate is based on whether they're credit (positive) or debit (negative)
-        # Credits are successful additions, debits are successful deductions
-        # Since wallet transactions don't fail (they're only created on success), we calculate based on payment success
+        # Wallet transactions don't fail (they're only created on success),
+        # so every type with transactions has a 100% success rate
         type_summary_list = []
         for item in type_summary:
-            type_transactions = all_transactions.filter(transaction_type=item['transaction_type'])
-            type_total = item['count']
-            
-            # For transaction types that relate to payments, check payment status
-            # For others, assume 100% success (wallet transactions are only created on success)
-            if item['transaction_type'] in ['DEPOSIT', 'REFUND']:
-                # These might relate to payments - check if we can find related payments
-                # For now, assume successful (wallet transactions are only created on success)
-                type_success_rate = 100.0
-            else:
-                # All wallet transactions are successful by design
-                type_success_rate = 100.0 if type_total > 0 else 0.0
-            
             type_summary_list.append({
                 'type': item['transaction_type'],
                 'count': item['count'],
                 'total_amount': str(abs(float(item['total_amount'] or 0))),
                 'avg_amount': str(abs(float(item['avg_amount'] or 0))),
-                'success_rate': round(type_success_rate, 1)
+                'success_rate': 100.0 if item['count'] > 0 else 0.0
             })
         
         # Weekly transaction trend (last 7 days)
-        now = timezone.now()
         week_data = {}
-        for i in range(7):
-            day = now - timedelta(days=6-i)
-            day_start = day.replace(hour=0, minute=0, second=0, microsecond=0)
-            day_end = day.replace(hour=23, minute=59, second=59, microsecond=999999)
-            
-            day_transactions = all_transactions.filter(created_at__gte=day_start, created_at__lte=day_end)
-            day_count = day_transactions.count()
-            day_amount = abs(float(day_transactions.aggregate(total=Sum('amount'))['total'] or 0))
-            
-            day_name = day.strftime('%a')
-            week_data[day_name] = {
-                'transactions': day_count,
-                'amount': day_amount
+        for day in week_buckets:
+            week_data[day.strftime('%a')] = {
+                'transactions': transaction_totals[day]['count'],
+                'amount': abs(float(transaction_totals[day]['total']))
             }
         
         # Paginate transactions
@@ -1710,23 +1688,46 @@ class ComprehensiveReportsView(views.APIView):
         # Apply status filter for detailed list
         filtered_bookings = self._apply_investment_status_filter(all_bookings, status_filter)
         
-        # Summary cards (based on all bookings, not filtered)
-        total_investments = all_bookings.count()
-        total_amount_result = all_bookings.aggregate(total=Sum('booking_amount'))['total'] or Decimal('0')
-        total_amount = float(total_amount_result)
-        avg_investment_result = all_bookings.aggregate(avg=Avg('booking_amount'))['avg'] or Decimal('0')
-        avg_investment = float(avg_investment_result) if total_investments > 0 else 0
-        active_investments = all_bookings.filter(status__in=['pending', 'active']).count()
+        # Summary cards and investment type summary in one query (based on all bookings, not filtered)
+        full_payment = Q(payment_option='full_payment')
+        emi = Q(payment_option='emi_options')
+        booking_totals = aggregate_buckets(
+            all_bookings,
+            {
+                'all': None,
+                'active': Q(status__in=['pending', 'active']),
+                'pre_booking': full_payment & Q(status='pending'),
+                'full_payment': full_payment & Q(status__in=['active', 'completed']),
+                'full_payment_completed': full_payment & Q(status='completed'),
+                'full_payment_active': full_payment & Q(status='active'),
+                'emi': emi,
+                'emi_completed': emi & Q(status='completed'),
+                'emi_pending': emi & Q(status__in=['pending', 'active']),
+                # Top ups are active bookings where total_paid > booking_amount
+                'top_up': Q(status='active', total_paid__gt=F('booking_amount')),
+            },
+            {
+                'count': (Count, 'id'),
+                'total': (Sum, 'booking_amount'),
+                'avg': (Avg, 'booking_amount'),
+                'total_paid': (Sum, 'total_paid'),
+            }
+        )
+        
+        # Summary cards
+        total_investments = booking_totals['all']['count']
+        total_amount = float(booking_totals['all']['total'])
+        avg_investment = float(booking_totals['all']['avg']) if total_investments > 0 else 0
+        active_investments = booking_totals['active']['count']
         
         # Investment type summary
         investment_type_summary = []
         
         # Pre-Booking
-        pre_booking = all_bookings.filter(payment_option='full_payment', status='pending')
-        pre_booking_count = pre_booking.count()
-        pre_booking_total = float(pre_booking.aggregate(total=Sum('booking_amount'))['total'] or 0)
+        pre_booking_count = booking_totals['pre_booking']['count']
+        pre_booking_total = float(booking_totals['pre_booking']['total'])
         pre_booking_avg = (pre_booking_total / pre_booking_count) if pre_booking_count > 0 else 0
-        pre_booking_completed = all_bookings.filter(payment_option='full_payment', status='completed').count()
+        pre_booking_completed = booking_totals['full_payment_completed']['count']
         pre_booking_pending = pre_booking_count
         
         investment_type_summary.append({
@@ -1739,12 +1740,11 @@ class ComprehensiveReportsView(views.APIView):
         })
         
         # Full Payment
-        full_payment = all_bookings.filter(payment_option='full_payment', status__in=['active', 'completed'])
-        full_payment_count = full_payment.count()
-        full_payment_total = float(full_payment.aggregate(total=Sum('booking_amount'))['total'] or 0)
+        full_payment_count = booking_totals['full_payment']['count']
+        full_payment_total = float(booking_totals['full_payment']['total'])
         full_payment_avg = (full_payment_total / full_payment_count) if full_payment_count > 0 else 0
-        full_payment_completed = all_bookings.filter(payment_option='full_payment', status='completed').count()
-        full_payment_pending = all_bookings.filter(payment_option='full_payment', status='active').count()
+        full_payment_completed = booking_totals['full_payment_completed']['count']
+        full_payment_pending = booking_totals['full_payment_active']['count']
         
         investment_type_summary.append({
             'type': 'Full Payment',
@@ -1756,12 +1756,11 @@ class ComprehensiveReportsView(views.APIView):
         })
         
         # EMI
-        emi = all_bookings.filter(payment_option='emi_options')
-        emi_count = emi.count()
-        emi_total = float(emi.aggregate(total=Sum('booking_amount'))['total'] or 0)
+        emi_count = booking_totals['emi']['count']
+        emi_total = float(booking_totals['emi']['total'])
         emi_avg = (emi_total / emi_count) if emi_count > 0 else 0
-        emi_completed = emi.filter(status='completed').count()
-        emi_pending = emi.filter(status__in=['pending', 'active']).count()
+        emi_completed = booking_totals['emi_completed']['count']
+        emi_pending = booking_totals['emi_pending']['count']
         
         investment_type_summary.append({
             'type': 'EMI',
@@ -1773,14 +1772,8 @@ class ComprehensiveReportsView(views.APIView):
         })
         
         # Top Up (bookings with status='active' that have additional payments)
-        # Top ups are bookings where total_paid > booking_amount
-        top_up_bookings = []
-        for booking in all_bookings.filter(status='active'):
-            if float(booking.total_paid) > float(booking.booking_amount):
-                top_up_bookings.append(booking)
-        
-        top_up_count = len(top_up_bookings)
-        top_up_total = sum(float(b.total_paid) for b in top_up_bookings)
+        top_up_count = booking_totals['top_up']['count']
+        top_up_total = float(booking_totals['top_up']['total_paid'])
         top_up_avg = (top_up_total / top_up_count) if top_up_count > 0 else 0
         top_up_completed = 0  # Top ups don't have a completed status
         top_up_pending = top_up_count
@@ -1795,13 +1788,12 @@ class ComprehensiveReportsView(views.APIView):
         })
         
         # Payment method summary
-        all_payments = Payment.objects.filter(status='completed')
-        payment_method_summary = all_payments.values('payment_method').annotate(
+        payment_method_summary = list(Payment.objects.filter(status='completed').values('payment_method').annotate(
             count=Count('id'),
             total_amount=Sum('amount')
-        )
+        ).order_by())
         
-        total_payment_amount = float(all_payments.aggregate(total=Sum('amount'))['total'] or 0)
+        total_payment_amount = sum(float(item['total_amount'] or 0) for item in payment_method_summary)
         
         payment_method_list = []
         for item in payment_method_summary:
@@ -1866,29 +1858,47 @@ class ComprehensiveReportsView(views.APIView):
         # Apply status filter for detailed list
         filtered_pairs = self._apply_bv_status_filter(all_pairs, status_filter)
         
-        # Summary cards (based on all pairs, not filtered)
-        total_bv_generated = float(all_pairs.aggregate(total=Sum('pair_amount'))['total'] or 0)
+        # Summary cards and BV type summary, one query per source table (based on all pairs, not filtered)
+        pair_totals = aggregate_buckets(
+            all_pairs,
+            {
+                'all': None,
+                'used': Q(status='processed'),
+                'active': Q(status__in=['pending', 'matched']),
+                'expired': Q(status='expired'),
+            },
+            {'count': (Count, 'id'), 'total': (Sum, 'pair_amount')}
+        )
+        earning_totals = aggregate_buckets(
+            BinaryEarning.objects.all(),
+            {'all': None},
+            {'count': (Count, 'id'), 'total': (Sum, 'amount')}
+        )['all']
+        booking_totals = aggregate_buckets(
+            Payment.objects.all(),
+            {'completed': Q(status='completed')},
+            {'count': (Count, 'id'), 'total': (Sum, 'amount')}
+        )['completed']
+        
+        total_bv_generated = float(pair_totals['all']['total'])
         
         # Total BV Distributed (from BinaryEarning)
-        all_earnings = BinaryEarning.objects.all()
-        total_bv_distributed = float(all_earnings.aggregate(total=Sum('amount'))['total'] or 0)
+        total_bv_distributed = float(earning_totals['total'])
         
         # Total BV Used (processed pairs)
-        used_pairs = all_pairs.filter(status='processed')
-        total_bv_used = float(used_pairs.aggregate(total=Sum('pair_amount'))['total'] or 0)
+        total_bv_used = float(pair_totals['used']['total'])
         
         # Active BV (pending + matched pairs)
-        active_pairs = all_pairs.filter(status__in=['pending', 'matched'])
-        active_bv = float(active_pairs.aggregate(total=Sum('pair_amount'))['total'] or 0)
+        active_bv = float(pair_totals['active']['total'])
         
         # BV Type Summary
         bv_type_summary = []
         
         # Generated
-        generated_count = all_pairs.count()
+        generated_count = pair_totals['all']['count']
         generated_total = total_bv_generated
         generated_avg = (generated_total / generated_count) if generated_count > 0 else 0
-        generated_active = active_pairs.count()
+        generated_active = pair_totals['active']['count']
         
         bv_type_summary.append({
             'type': 'Generated',
@@ -1899,7 +1909,7 @@ class ComprehensiveReportsView(views.APIView):
         })
         
         # Distributed
-        distributed_count = all_earnings.count()
+        distributed_count = earning_totals['count']
         distributed_total = total_bv_distributed
         distributed_avg = (distributed_total / distributed_count) if distributed_count > 0 else 0
         distributed_active = distributed_count  # All distributed are considered active
@@ -1913,7 +1923,7 @@ class ComprehensiveReportsView(views.APIView):
         })
         
         # Used
-        used_count = used_pairs.count()
+        used_count = pair_totals['used']['count']
         used_total = total_bv_used
         used_avg = (used_total / used_count) if used_count > 0 else 0
         used_active = 0  # Used pairs are not active
@@ -1927,9 +1937,8 @@ class ComprehensiveReportsView(views.APIView):
         })
         
         # Expired (pairs that are expired - if status exists)
-        expired_pairs = all_pairs.filter(status='expired') if hasattr(BinaryPair, 'status') else all_pairs.none()
-        expired_count = expired_pairs.count()
-        expired_total = float(expired_pairs.aggregate(total=Sum('pair_amount'))['total'] or 0)
+        expired_count = pair_totals['expired']['count']
+        expired_total = float(pair_totals['expired']['total'])
         expired_avg = (expired_total / expired_count) if expired_count > 0 else 0
         
         bv_type_summary.append({
@@ -1942,7 +1951,7 @@ class ComprehensiveReportsView(views.APIView):
         
         # BV Source Summary
         # Booking source (BV from bookings/payments)
-        booking_bv = float(Payment.objects.filter(status='completed').aggregate(total=Sum('amount'))['total'] or 0)
+        booking_bv = float(booking_totals['total'])
         
         # Commission source (BV from commissions - BinaryEarning amounts)
         commission_bv = total_bv_distributed
@@ -1954,7 +1963,7 @@ class ComprehensiveReportsView(views.APIView):
         booking_percentage = (booking_bv / total_bv_source * 100) if total_bv_source > 0 else 0
         bv_source_summary.append({
             'source': 'Booking',
-            'count': Payment.objects.filter(status='completed').count(),
+            'count': booking_totals['count'],
             'total_amount': f"{booking_bv:,.2f}",
             'percentage': round(booking_percentage, 1)
         })
@@ -1962,7 +1971,7 @@ class ComprehensiveReportsView(views.APIView):
         commission_percentage = (commission_bv / total_bv_source * 100) if total_bv_source > 0 else 0
         bv_source_summary.append({
             'source': 'Commission',
-            'count': all_earnings.count(),
+            'count': earning_totals['count'],
             'total_amount': f"{commission_bv:,.2f}",
             'percentage': round(commission_percentage, 1)
         })
@@ -2024,18 +2033,19 @@ class ComprehensiveReportsView(views.APIView):
             transaction_type='REFERRAL_BONUS'
         )
         
-        # Summary cards
-        total_commissions = referral_transactions.count()
-        total_amount_result = referral_transactions.aggregate(total=Sum('amount'))['total'] or Decimal('0')
-        total_amount = float(total_amount_result)
-        
-        # Calculate TDS for referral commissions (20% typically)
+        # Summary cards and referral TDS in one query
         # TDS is stored in TDS_DEDUCTION transactions
-        referral_tds = WalletTransaction.objects.filter(
-            transaction_type='TDS_DEDUCTION',
-            description__icontains='referral'
-        ).aggregate(total=Sum('amount'))['total'] or Decimal('0')
-        referral_tds_amount = abs(float(referral_tds))
+        transaction_totals = aggregate_buckets(
+            WalletTransaction.objects.all(),
+            {
+                'referral': Q(transaction_type='REFERRAL_BONUS'),
+                'referral_tds': Q(transaction_type='TDS_DEDUCTION', description__icontains='referral'),
+            },
+            {'count': (Count, 'id'), 'total': (Sum, 'amount')}
+        )
+        total_commissions = transaction_totals['referral']['count']
+        total_amount = float(transaction_totals['referral']['total'])
+        referral_tds_amount = abs(float(transaction_totals['referral_tds']['total']))
         
         # Paid amount (transactions that have been processed)
         paid_amount = total_amount  # All referral bonuses are considered paid when credited
@@ -2046,28 +2056,30 @@ class ComprehensiveReportsView(views.APIView):
         avg_commission = (total_amount / total_commissions) if total_commissions > 0 else 0
         
         # Top Referrer Performance
-        # Get users who have referred others
-        referrers = User.objects.filter(referrals__isnull=False).distinct()
+        # Get users who have referred others, with their referral and commission totals
+        referrers = User.objects.filter(referrals__isnull=False).distinct().annotate(
+            direct_referrals=related_aggregate(User.objects.all(), 'referred_by', Count('id')),
+            booking_referrals=related_aggregate(
+                Booking.objects.all(), 'referred_by', Count('user', distinct=True)
+            ),
+            commission_total=related_aggregate(referral_transactions, 'user', Sum('amount')),
+            commission_count=related_aggregate(referral_transactions, 'user', Count('id')),
+        )
         
         top_referrers = []
         for referrer in referrers[:5]:  # Top 5
             # Count referrals
-            referrals_count = User.objects.filter(referred_by=referrer).count()
-            referrals_count += Booking.objects.filter(referred_by=referrer).values('user').distinct().count()
+            referrals_count = (referrer.direct_referrals or 0) + (referrer.booking_referrals or 0)
             
             # Get referral commission amount
-            referrer_commissions = WalletTransaction.objects.filter(
-                user=referrer,
-                transaction_type='REFERRAL_BONUS'
-            )
-            referrer_total = float(referrer_commissions.aggregate(total=Sum('amount'))['total'] or 0)
+            referrer_total = float(referrer.commission_total or 0)
             
             # Calculate TDS (10% of total typically, but using 20% as per system)
             referrer_tds = referrer_total * 0.20  # 20% TDS
             referrer_net = referrer_total - referrer_tds
             
             # Paid and pending counts
-            referrer_paid = referrer_commissions.count()  # All are paid
+            referrer_paid = referrer.commission_count or 0  # All are paid
             referrer_pending = 0
             
             top_referrers.append({
@@ -2152,68 +2164,77 @@ class ComprehensiveReportsView(views.APIView):
         """Get team commission (binary) data with pagination"""
         # Get all binary earnings
         all_earnings = BinaryEarning.objects.all()
-        all_pairs = BinaryPair.objects.all()
         
-        # Summary cards
-        total_commissions = all_earnings.count()
-        total_pairs = all_pairs.count()
-        total_amount_result = all_earnings.aggregate(total=Sum('amount'))['total'] or Decimal('0')
-        total_amount = float(total_amount_result)
+        # Summary cards and status breakdown, one query per source table
+        earning_totals = aggregate_buckets(
+            all_earnings,
+            {'all': None, 'completed': Q(binary_pair__status='processed')},
+            {'count': (Count, 'id'), 'total': (Sum, 'amount'), 'net': (Sum, 'net_amount')}
+        )
+        pair_totals = aggregate_buckets(
+            BinaryPair.objects.all(),
+            {'all': None, 'completed': Q(status='processed')},
+            {'count': (Count, 'id')}
+        )
         
         # Pool Money (20% of total typically, but calculate from TDS and extra deductions)
-        pool_money_tds = abs(float(WalletTransaction.objects.filter(
-            transaction_type='TDS_DEDUCTION',
-            description__icontains='binary pair'
-        ).aggregate(total=Sum('amount'))['total'] or 0))
+        pool_tds = Q(transaction_type='TDS_DEDUCTION', description__icontains='binary pair')
+        pool_extra = Q(transaction_type='EXTRA_DEDUCTION')
+        pool_totals = aggregate_buckets(
+            WalletTransaction.objects.all(),
+            {'tds': pool_tds, 'extra': pool_extra},
+            {'total': (Sum, 'amount')}
+        )
         
-        pool_money_extra = abs(float(WalletTransaction.objects.filter(
-            transaction_type='EXTRA_DEDUCTION'
-        ).aggregate(total=Sum('amount'))['total'] or 0))
+        # Summary cards
+        total_commissions = earning_totals['all']['count']
+        total_pairs = pair_totals['all']['count']
+        total_amount = float(earning_totals['all']['total'])
+        
+        pool_money_tds = abs(float(pool_totals['tds']['total']))
+        pool_money_extra = abs(float(pool_totals['extra']['total']))
         
         pool_money = pool_money_tds + pool_money_extra
         
         # Net Payout (sum of net_amount from BinaryEarning)
-        net_payout_result = all_earnings.aggregate(total=Sum('net_amount'))['total'] or Decimal('0')
-        net_payout = float(net_payout_result)
+        net_payout = float(earning_totals['all']['net'])
         
         avg_per_pair = (total_amount / total_pairs) if total_pairs > 0 else 0
         
         # Top Distributor Performance
-        distributors = User.objects.filter(is_distributor=True)
+        distributor_pairs = BinaryPair.objects.all()
+        distributors = User.objects.filter(is_distributor=True).annotate(
+            pairs_count=related_aggregate(distributor_pairs, 'user', Count('id')),
+            paid_pairs=related_aggregate(distributor_pairs.filter(status='processed'), 'user', Count('id')),
+            pending_pairs=related_aggregate(
+                distributor_pairs.filter(status__in=['pending', 'matched']), 'user', Count('id')
+            ),
+            earnings_total=related_aggregate(all_earnings, 'user', Sum('amount')),
+            earnings_net=related_aggregate(all_earnings, 'user', Sum('net_amount')),
+            pool_tds=related_aggregate(WalletTransaction.objects.filter(pool_tds), 'user', Sum('amount')),
+            pool_extra=related_aggregate(WalletTransaction.objects.filter(pool_extra), 'user', Sum('amount')),
+        )
         
         top_distributors = []
         for distributor in distributors[:5]:  # Top 5
             # Get pairs for this distributor
-            distributor_pairs = BinaryPair.objects.filter(user=distributor)
-            pairs_count = distributor_pairs.count()
+            pairs_count = distributor.pairs_count or 0
             
             # Get earnings
-            distributor_earnings = BinaryEarning.objects.filter(user=distributor)
-            distributor_total = float(distributor_earnings.aggregate(total=Sum('amount'))['total'] or 0)
+            distributor_total = float(distributor.earnings_total or 0)
             
             # Calculate TDS (20% of total)
             distributor_tds = distributor_total * 0.20
             
             # Pool money for this distributor (TDS + extra deductions)
-            distributor_pool_tds = abs(float(WalletTransaction.objects.filter(
-                user=distributor,
-                transaction_type='TDS_DEDUCTION',
-                description__icontains='binary pair'
-            ).aggregate(total=Sum('amount'))['total'] or 0))
-            
-            distributor_pool_extra = abs(float(WalletTransaction.objects.filter(
-                user=distributor,
-                transaction_type='EXTRA_DEDUCTION'
-            ).aggregate(total=Sum('amount'))['total'] or 0))
-            
-            distributor_pool = distributor_pool_tds + distributor_pool_extra
+            distributor_pool = abs(float(distributor.pool_tds or 0)) + abs(float(distributor.pool_extra or 0))
             
             # Net amount
-            distributor_net = float(distributor_earnings.aggregate(total=Sum('net_amount'))['total'] or 0)
+            distributor_net = float(distributor.earnings_net or 0)
             
             # Paid and pending
-            distributor_paid = distributor_pairs.filter(status='processed').count()
-            distributor_pending = distributor_pairs.filter(status__in=['pending', 'matched']).count()
+            distributor_paid = distributor.paid_pairs or 0
+            distributor_pending = distributor.pending_pairs or 0
             
             top_distributors.append({
                 'distributor': distributor.get_full_name() or distributor.username,
@@ -2233,13 +2254,11 @@ class ComprehensiveReportsView(views.APIView):
         status_breakdown = []
         
         # Completed (processed pairs)
-        completed_pairs = all_pairs.filter(status='processed')
-        completed_count = completed_pairs.count()
-        completed_earnings = BinaryEarning.objects.filter(binary_pair__status='processed')
-        completed_total = float(completed_earnings.aggregate(total=Sum('amount'))['total'] or 0)
+        completed_count = pair_totals['completed']['count']
+        completed_total = float(earning_totals['completed']['total'])
         completed_tds = completed_total * 0.20
         completed_pool = completed_tds  # Simplified
-        completed_net = float(completed_earnings.aggregate(total=Sum('net_amount'))['total'] or 0)
+        completed_net = float(earning_totals['completed']['net'])
         
         status_breakdown.append({
             'status': 'Completed',
@@ -2445,3 +2464,134 @@ class ComprehensiveReportsView(views.APIView):
             }
         }
 
+
+def _check_export_access(user):
+    """Report exports contain every user's financial records: admins only"""
+    if not (user.is_superuser or user.role == 'admin'):
+        raise PermissionDenied("Report exports are only available for admin users.")
+
+
+def _get_own_export(request, export_id):
+    """Export requested by the current (admin) user, else 404"""
+    _check_export_access(request.user)
+    try:
+        return ReportExport.objects.get(id=export_id, requested_by=request.user)
+    except ReportExport.DoesNotExist:
+        raise NotFound("Export not found.")
+
+
+def _serialize_export(export, request):
+    return {
+        'id': export.id,
+        'report_type': export.report_type,
+        'export_format': export.export_format,
+        'filters': export.filters,
+        'status': export.status,
+        'row_count': export.row_count,
+        'download_url': get_export_download_url(export, request),
+        'error_message': export.error_message,
+        'created_at': export.created_at,
+        'started_at': export.started_at,
+        'completed_at': export.completed_at,
+        'expires_at': get_export_expires_at(export),
+    }
+
+
+class ReportExportView(views.APIView):
+    """
+    Request full report exports (CSV/XLSX) and list the recent ones
+    The file is generated by a Celery task; poll the export until it is completed
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        _check_export_access(request.user)
+        exports = ReportExport.objects.filter(requested_by=request.user)[:50]
+        return Response({'results': [_serialize_export(export, request) for export in exports]})
+
+    def post(self, request):
+        _check_export_access(request.user)
+
+        report_type = request.data.get('report_type')
+        export_format = request.data.get('export_format', 'csv')
+        if report_type not in EXPORT_DEFINITIONS:
+            raise ValidationError({
+                'report_type': f"Must be one of: {', '.join(EXPORT_DEFINITIONS)}"
+            })
+        if export_format not in dict(ReportExport.FORMAT_CHOICES):
+            raise ValidationError({'export_format': "Must be one of: csv, xlsx"})
+
+        filters = {}
+        for key in ('start_date', 'end_date'):
+            value = request.data.get(key)
+            if value:
+                try:
+                    datetime.strptime(value, '%Y-%m-%d')
+                except (TypeError, ValueError):
+                    raise ValidationError({key: "Use the YYYY-MM-DD format"})
+                filters[key] = value
+
+        export = ReportExport.objects.create(
+            requested_by=request.user,
+            report_type=report_type,
+            export_format=export_format,
+            filters=filters,
+        )
+
+        def _enqueue():
+            from .tasks import generate_report_export_task
+            try:
+                generate_report_export_task.delay(export.id)
+            except Exception as e:
+                logger.error(f"Could not queue report export {export.id}: {e}", exc_info=True)
+                ReportExport.objects.filter(id=export.id).update(
+                    status='failed', error_message='Could not queue the export, please try again.'
+                )
+
+        transaction.on_commit(_enqueue)
+
+        return Response(_serialize_export(export, request), status=status.HTTP_202_ACCEPTED)
+
+
+class ReportExportDetailView(views.APIView):
+    """
+    Status of a report export, with the download URL once it is completed
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, export_id):
+        export = _get_own_export(request, export_id)
+        return Response(_serialize_export(export, request))
+
+
+class ReportExportDownloadView(views.APIView):
+    """
+    Stream a completed export file to the admin who requested it
+    (download_url for export storages without signed URLs)
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, export_id):
+        export = _get_own_export(request, export_id)
+        if export.status != 'completed' or not export.file:
+            raise NotFound("Export file is not available.")
+        return FileResponse(
+            export.file.open('rb'), as_attachment=True, filename=export_download_name(export)
+        )
+
+
+class ReportCacheStatsView(views.APIView):
+    """
+    Hit/miss counts of the report response cache (admin only)
+    DELETE resets the counters
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        _check_export_access(request.user)
+        return Response(get_report_cache_stats())
+
+    def delete(self, request):
+        _check_export_access(request.user)
+        reset_report_cache_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
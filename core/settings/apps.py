@@ -5,3 +5,5 @@ class SettingsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core.settings'
 
+    def ready(self):
+        from . import signals  # noqa: F401
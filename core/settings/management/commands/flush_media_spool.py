@@ -0,0 +1,59 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from core.storage import SpooledStorage
+import os
+import time
+
+
+class Command(BaseCommand):
+    """
+    Upload media files left in the write-behind spool (see core/storage.py), e.g. after
+    the blob backend was down for longer than the upload retries, or before removing
+    a container. Files younger than --min-age are skipped, as the process that spooled
+    them is most likely still uploading them.
+    """
+
+    help = "Upload media files still waiting in the local write-behind spool."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=60,
+            help='Only upload files spooled at least this many seconds ago (default: 60)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='List spooled files without uploading them',
+        )
+
+    def handle(self, *args, **options):
+        if not isinstance(default_storage, SpooledStorage):
+            raise CommandError('The media write-behind spool is not enabled (MEDIA_SPOOL_ENABLED).')
+
+        cutoff = time.time() - options['min_age']
+        uploaded = failed = skipped = 0
+
+        for name in default_storage.spooled_names():
+            try:
+                if os.path.getmtime(default_storage.spool_path(name)) > cutoff:
+                    skipped += 1
+                    continue
+            except FileNotFoundError:
+                continue
+
+            if options['dry_run']:
+                self.stdout.write(f"  {name} ({default_storage.size(name)} bytes)")
+                continue
+
+            try:
+                default_storage.upload(name)
+                uploaded += 1
+                self.stdout.write(f"  Uploaded {name}")
+            except Exception as e:
+                failed += 1
+                self.stdout.write(self.style.ERROR(f"  Failed {name}: {e}"))
+
+        summary = f"Uploaded: {uploaded}, failed: {failed}, skipped (younger than {options['min_age']}s): {skipped}"
+        self.stdout.write(self.style.SUCCESS(summary) if not failed else self.style.WARNING(summary))
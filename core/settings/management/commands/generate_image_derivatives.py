@@ -0,0 +1,118 @@
+from django.core.management.base import BaseCommand
+from core.images import (
+    IMAGE_DERIVATIVE_WORKERS,
+    IMAGE_SOURCES,
+    get_image_source,
+    needs_derivatives,
+    record_derivative_failure,
+    render_derivatives_batch,
+    store_derivatives,
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """
+    Backfill resized WebP/JPEG variants (see core/images.py) for vehicle images,
+    gallery items and profile pictures uploaded before derivatives existed, or whose
+    variants are missing or stale.
+
+    Originals are read in batches, rendered on a pool of --workers processes and the
+    variants saved from this process. Images that cannot be rendered are recorded as
+    failed and skipped by later runs unless --force is given.
+    """
+
+    help = "Generate resized image derivatives for existing vehicle, gallery and profile images."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model',
+            choices=sorted(IMAGE_SOURCES),
+            action='append',
+            help='Only this model (can be repeated; default: all)',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenerate derivatives even if they are up to date or previously failed',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show how many images would be processed without generating anything',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=IMAGE_DERIVATIVE_WORKERS,
+            help=f'Processes rendering images in parallel (default: {IMAGE_DERIVATIVE_WORKERS}, 1 = in this process)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Images read and rendered per batch (default: 50)',
+        )
+
+    def handle(self, *args, **options):
+        total_generated = total_failed = 0
+
+        for model_label in options['model'] or IMAGE_SOURCES:
+            model, image_field, variants_field = get_image_source(model_label)
+            queryset = model.objects.exclude(**{image_field: ''}).exclude(
+                **{f'{image_field}__isnull': True}
+            ).order_by('pk')
+
+            pending = [
+                instance for instance in queryset.only('pk', image_field, variants_field).iterator()
+                if options['force'] or needs_derivatives(instance, image_field, variants_field)
+            ]
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{model_label}: {len(pending)} image(s) to process"))
+            if options['dry_run'] or not pending:
+                continue
+
+            batch_size = max(1, options['batch_size'])
+            for start in range(0, len(pending), batch_size):
+                generated, failed = self._process_batch(
+                    pending[start:start + batch_size], image_field, variants_field, options['workers']
+                )
+                total_generated += generated
+                total_failed += failed
+                self.stdout.write(f"  {min(start + batch_size, len(pending))}/{len(pending)} processed")
+
+        if not options['dry_run']:
+            summary = f"Generated derivatives for {total_generated} image(s), {total_failed} failed"
+            self.stdout.write(self.style.SUCCESS(summary) if not total_failed else self.style.WARNING(summary))
+
+    def _process_batch(self, instances, image_field, variants_field, workers):
+        """Read, render and store one batch; returns (generated, failed)"""
+        readable, originals = [], []
+        failed = 0
+        for instance in instances:
+            try:
+                with getattr(instance, image_field).open('rb') as source:
+                    originals.append(source.read())
+                readable.append(instance)
+            except Exception as e:
+                failed += 1
+                self.stdout.write(self.style.ERROR(f"  Could not read {getattr(instance, image_field).name}: {e}"))
+
+        generated = 0
+        for instance, result in zip(readable, render_derivatives_batch(originals, workers=workers)):
+            name = getattr(instance, image_field).name
+            if isinstance(result, Exception):
+                failed += 1
+                self.stdout.write(self.style.ERROR(f"  Could not render {name}: {result}"))
+                record_derivative_failure(instance, image_field, variants_field, result)
+                continue
+            try:
+                original_width, rendered = result
+                store_derivatives(instance, image_field, variants_field, original_width, rendered)
+                generated += 1
+            except Exception as e:
+                failed += 1
+                logger.error(f"Could not store image derivatives for {name}: {e}", exc_info=True)
+                self.stdout.write(self.style.ERROR(f"  Could not store derivatives for {name}: {e}"))
+        return generated, failed
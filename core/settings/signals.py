@@ -0,0 +1,32 @@
+"""
+Signal receivers that queue image derivatives for newly uploaded images
+(vehicle images, gallery items and profile pictures, see core/images.py)
+"""
+from django.apps import apps
+from django.db import transaction
+from django.db.models.signals import post_save
+from core.images import IMAGE_SOURCES, needs_derivatives
+from .tasks import generate_image_derivatives_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def image_saved(sender, instance, **kwargs):
+    """New or replaced image: render its derivatives in the background"""
+    model_label = sender._meta.label
+    image_field, variants_field = IMAGE_SOURCES[model_label]
+    if not needs_derivatives(instance, image_field, variants_field):
+        return
+
+    def _enqueue():
+        try:
+            generate_image_derivatives_task.delay(model_label, instance.pk)
+        except Exception as e:
+            logger.error(f"Could not enqueue image derivatives for {model_label} {instance.pk}: {e}", exc_info=True)
+
+    transaction.on_commit(_enqueue)
+
+
+for _model_label in IMAGE_SOURCES:
+    post_save.connect(image_saved, sender=apps.get_model(_model_label), dispatch_uid=f'image_derivatives:{_model_label}')
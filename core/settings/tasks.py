@@ -0,0 +1,39 @@
+from celery import shared_task
+from PIL import Image, UnidentifiedImageError
+from core.images import generate_derivatives, get_image_source, needs_derivatives, record_derivative_failure
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def generate_image_derivatives_task(self, model_label, pk):
+    """
+    Celery task to render the resized WebP/JPEG variants of an uploaded image.
+    Queued after commit when a vehicle image, gallery item or profile picture is saved
+    with a new image (see core/settings/signals.py). An image that cannot be decoded,
+    or still fails after the retries, is recorded as failed so it is not queued again.
+
+    Args:
+        model_label: Model label from core.images.IMAGE_SOURCES (e.g. 'gallery.GalleryItem')
+        pk: Primary key of the instance
+    """
+    model, image_field, variants_field = get_image_source(model_label)
+    instance = None
+    try:
+        instance = model.objects.get(pk=pk)
+        if not needs_derivatives(instance, image_field, variants_field):
+            return
+        generate_derivatives(instance, image_field, variants_field)
+    except model.DoesNotExist:
+        logger.info(f"{model_label} {pk} was deleted before its image derivatives were generated")
+    except (UnidentifiedImageError, Image.DecompressionBombError) as e:
+        # Retrying will not help: the file is not an image Pillow can render
+        logger.warning(f"Image of {model_label} {pk} cannot be rendered, skipping derivatives: {e}")
+        record_derivative_failure(instance, image_field, variants_field, e)
+    except Exception as e:
+        logger.error(f"Error generating image derivatives for {model_label} {pk}: {e}", exc_info=True)
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=e)
+        if instance is not None:
+            record_derivative_failure(instance, image_field, variants_field, e)
@@ -0,0 +1,352 @@
+"""
+Write-behind media storage
+
+Receipt PDFs, KYC documents, profile pictures and gallery images were written straight
+to Azure Blob storage, so every save paid a full blob round-trip inside the request or
+task. SpooledStorage writes the file to a local spool directory instead, returns the
+final name immediately and uploads it to the real backend (MEDIA_SPOOL_BACKEND, Azure
+by default) on a background thread, retrying with backoff. Until the upload finishes,
+open()/exists()/size() are served from the spool, so a file can be read back right
+after it was saved (e.g. the download endpoints).
+
+url() always points at the backend; a URL handed out for a file that is still spooled
+resolves once its upload completes (normally within a second or two).
+
+The spool is opt-in (MEDIA_SPOOL_ENABLED, off by default). Until its upload finishes a
+file exists only in MEDIA_SPOOL_DIR, so that directory must be a persistent volume
+shared by every web and Celery worker: a server without it reports the file missing
+(the compliance download views answer 404 with Retry-After), and a spool on an
+ephemeral disk loses pending uploads on redeploy.
+
+Files the process could not upload (backend down longer than the retries, or a restart
+with uploads pending) stay in the spool. They are picked up again the next time the
+process starts uploading, and by `python manage.py flush_media_spool`.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from django.core.files import File
+from django.core.files.move import file_move_safe
+from django.core.files.storage import Storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.utils._os import safe_join
+from django.utils.deconstruct import deconstructible
+from django.utils.module_loading import import_string
+from django.utils import timezone
+import logging
+import os
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+MEDIA_SPOOL_BACKEND = getattr(settings, 'MEDIA_SPOOL_BACKEND', 'storages.backends.azure_storage.AzureStorage')
+MEDIA_SPOOL_DIR = getattr(settings, 'MEDIA_SPOOL_DIR', os.path.join(settings.BASE_DIR, 'spool', 'media'))
+MEDIA_SPOOL_UPLOAD_WORKERS = getattr(settings, 'MEDIA_SPOOL_UPLOAD_WORKERS', 4)
+MEDIA_SPOOL_MAX_ATTEMPTS = getattr(settings, 'MEDIA_SPOOL_MAX_ATTEMPTS', 5)
+MEDIA_SPOOL_RETRY_DELAY = getattr(settings, 'MEDIA_SPOOL_RETRY_DELAY', 2)  # seconds, doubled per attempt
+
+# Spooled files younger than this are assumed to be in flight in another process
+# sharing the spool directory and are left alone by recover()
+MEDIA_SPOOL_RECOVER_AGE = 300  # seconds
+
+# Suffix of partially written spool files (never uploaded or served)
+PARTIAL_SUFFIX = '.spooling'
+
+
+@deconstructible
+class SpooledStorage(Storage):
+    """
+    Storage that spools writes locally and uploads them to a backend storage in the background
+
+    Args:
+        backend: Storage instance to upload to (default: an instance of MEDIA_SPOOL_BACKEND)
+        spool_dir (str): Local directory for files not yet uploaded (default: MEDIA_SPOOL_DIR)
+        workers (int): Background upload threads (default: MEDIA_SPOOL_UPLOAD_WORKERS)
+        max_attempts (int): Upload attempts per file before it is left for recovery
+        retry_delay (float): Delay before the first retry, doubled for each further attempt
+    """
+
+    def __init__(self, backend=None, spool_dir=None, workers=None, max_attempts=None, retry_delay=None):
+        self.backend = backend if backend is not None else import_string(MEDIA_SPOOL_BACKEND)()
+        self.spool_dir = os.path.abspath(spool_dir or MEDIA_SPOOL_DIR)
+        self.workers = workers or MEDIA_SPOOL_UPLOAD_WORKERS
+        self.max_attempts = max_attempts or MEDIA_SPOOL_MAX_ATTEMPTS
+        self.retry_delay = MEDIA_SPOOL_RETRY_DELAY if retry_delay is None else retry_delay
+        self._executor = None
+        self._executor_pid = None
+        self._pending = {}
+        self._deleted = set()
+        self._lock = threading.Lock()
+
+    # ── Spool ──────────────────────────────────────────────────────────────────
+
+    def spool_path(self, name):
+        """Local path of a spooled file"""
+        try:
+            return safe_join(self.spool_dir, name)
+        except SuspiciousFileOperation:
+            raise SuspiciousFileOperation(f"Attempted access to '{name}' denied.")
+
+    def is_spooled(self, name):
+        """Whether the file is still waiting to be uploaded"""
+        return os.path.isfile(self.spool_path(name))
+
+    def spooled_names(self):
+        """Names of all files in the spool, oldest first"""
+        files = []
+        for root, _dirs, filenames in os.walk(self.spool_dir):
+            for filename in filenames:
+                if filename.endswith(PARTIAL_SUFFIX):
+                    continue
+                path = os.path.join(root, filename)
+                try:
+                    files.append((os.path.getmtime(path), os.path.relpath(path, self.spool_dir)))
+                except FileNotFoundError:
+                    continue  # Uploaded meanwhile
+        return [name.replace(os.sep, '/') for _mtime, name in sorted(files)]
+
+    def _write_spool(self, name, content):
+        path = self.spool_path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file and rename, so a spooled file is always complete
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=PARTIAL_SUFFIX)
+        try:
+            if hasattr(content, 'temporary_file_path'):
+                os.close(fd)
+                file_move_safe(content.temporary_file_path(), tmp_path, allow_overwrite=True)
+            else:
+                with os.fdopen(fd, 'wb') as spool_file:
+                    if hasattr(content, 'seek'):
+                        content.seek(0)
+                    for chunk in content.chunks():
+                        spool_file.write(chunk if isinstance(chunk, bytes) else chunk.encode())
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _remove_spool(self, name):
+        try:
+            os.remove(self.spool_path(name))
+        except FileNotFoundError:
+            pass
+
+    # ── Background upload ──────────────────────────────────────────────────────
+
+    def _get_executor(self):
+        with self._lock:
+            # A forked worker (Celery prefork, Gunicorn) inherits the pool without its threads
+            if self._executor is not None and self._executor_pid == os.getpid():
+                return self._executor
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='media-spool')
+            self._executor_pid = os.getpid()
+            self._pending = {}
+            executor = self._executor
+        # Pick up files left over by an earlier run
+        executor.submit(self.recover)
+        return executor
+
+    def _schedule(self, name):
+        executor = self._get_executor()
+        with self._lock:
+            if name in self._pending:
+                return
+            future = executor.submit(self._upload_with_retries, name)
+            self._pending[name] = future
+        future.add_done_callback(lambda _future: self._forget(name, _future))
+
+    def _forget(self, name, future):
+        with self._lock:
+            if self._pending.get(name) is future:
+                del self._pending[name]
+
+    def upload(self, name):
+        """
+        Upload one spooled file to the backend and remove it from the spool
+
+        Returns:
+            bool: True if uploaded (or nothing left to upload)
+        """
+        path = self.spool_path(name)
+        try:
+            spool_file = open(path, 'rb')
+        except FileNotFoundError:
+            with self._lock:
+                self._deleted.discard(name)
+            return True  # Uploaded by another worker, or deleted
+
+        with spool_file:
+            spooled = os.fstat(spool_file.fileno())
+            try:
+                saved_name = self.backend._save(name, File(spool_file, name=name))
+            except Exception:
+                # A retry after an upload that succeeded but was not recorded fails on
+                # backends that refuse to overwrite; the blob is already there.
+                if not self._uploaded(name, path):
+                    raise
+                saved_name = name
+
+        if saved_name != name:
+            logger.error(f"Spooled media file {name} was stored by the backend as {saved_name}")
+
+        with self._lock:
+            deleted = name in self._deleted
+            self._deleted.discard(name)
+        if deleted:
+            # delete() was called while this upload was in flight
+            self.backend.delete(saved_name)
+            return True
+
+        try:
+            current = os.stat(path)
+        except FileNotFoundError:
+            return True
+        if (current.st_ino, current.st_mtime_ns) != (spooled.st_ino, spooled.st_mtime_ns):
+            # Saved again while uploading; upload the new content
+            return self.upload(name)
+        self._remove_spool(name)
+        return True
+
+    def _uploaded(self, name, path):
+        try:
+            return self.backend.exists(name) and self.backend.size(name) == os.path.getsize(path)
+        except Exception:
+            return False
+
+    def _upload_with_retries(self, name):
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                return self.upload(name)
+            except Exception as e:
+                if attempt == self.max_attempts:
+                    logger.error(
+                        f"Could not upload spooled media file {name} after {attempt} attempts, "
+                        f"leaving it in the spool: {e}",
+                        exc_info=True
+                    )
+                    return False
+                delay = self.retry_delay * (2 ** (attempt - 1))
+                logger.warning(f"Upload of spooled media file {name} failed (attempt {attempt}), retrying in {delay}s: {e}")
+                time.sleep(delay)
+
+    def recover(self, min_age=MEDIA_SPOOL_RECOVER_AGE):
+        """
+        Queue uploads for files left in the spool
+
+        Args:
+            min_age (int): Only files spooled at least this many seconds ago (younger
+                files may still be in flight in another process)
+
+        Returns:
+            int: Number of files queued
+        """
+        cutoff = time.time() - min_age
+        queued = 0
+        for name in self.spooled_names():
+            try:
+                if os.path.getmtime(self.spool_path(name)) > cutoff:
+                    continue
+            except FileNotFoundError:
+                continue
+            self._schedule(name)
+            queued += 1
+        if queued:
+            logger.info(f"Recovered {queued} spooled media file(s) for upload")
+        return queued
+
+    def flush(self, timeout=None):
+        """
+        Wait for the uploads queued so far
+
+        Returns:
+            bool: True if all of them finished within the timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                futures = list(self._pending.values())
+            if not futures:
+                return True
+            for future in futures:
+                remaining = None if deadline is None else max(0, deadline - time.monotonic())
+                try:
+                    future.result(timeout=remaining)
+                except Exception:
+                    return False
+
+    # ── Storage API ────────────────────────────────────────────────────────────
+
+    def _save(self, name, content):
+        with self._lock:
+            self._deleted.discard(name)
+        self._write_spool(name, content)
+        self._schedule(name)
+        return name
+
+    def _open(self, name, mode='rb'):
+        if 'r' in mode and '+' not in mode:
+            try:
+                return File(open(self.spool_path(name), mode), name=name)
+            except FileNotFoundError:
+                pass
+        return self.backend.open(name, mode)
+
+    def exists(self, name):
+        return self.is_spooled(name) or self.backend.exists(name)
+
+    def delete(self, name):
+        with self._lock:
+            if name in self._pending:
+                self._deleted.add(name)
+        self._remove_spool(name)
+        self.backend.delete(name)
+
+    def size(self, name):
+        try:
+            return os.path.getsize(self.spool_path(name))
+        except FileNotFoundError:
+            return self.backend.size(name)
+
+    def url(self, name):
+        return self.backend.url(name)
+
+    def listdir(self, path):
+        directories, files = self.backend.listdir(path)
+        spool_path = self.spool_path(path)
+        if os.path.isdir(spool_path):
+            for entry in os.scandir(spool_path):
+                if entry.is_dir():
+                    directories.append(entry.name)
+                elif not entry.name.endswith(PARTIAL_SUFFIX):
+                    files.append(entry.name)
+        return sorted(set(directories)), sorted(set(files))
+
+    def get_valid_name(self, name):
+        return self.backend.get_valid_name(name)
+
+    def get_modified_time(self, name):
+        try:
+            mtime = datetime.fromtimestamp(os.path.getmtime(self.spool_path(name)), tz=dt_timezone.utc)
+        except FileNotFoundError:
+            return self.backend.get_modified_time(name)
+        return mtime if settings.USE_TZ else timezone.make_naive(mtime)
+
+
+# ── Private storage ────────────────────────────────────────────────────────────
+
+REPORT_EXPORT_STORAGE = getattr(settings, 'REPORT_EXPORT_STORAGE', 'storages.backends.azure_storage.AzureStorage')
+REPORT_EXPORT_STORAGE_OPTIONS = getattr(settings, 'REPORT_EXPORT_STORAGE_OPTIONS', {})
+
+
+def get_report_export_storage():
+    """
+    Storage of report export files (ReportExport.file)
+
+    Exports hold every user's financial records, so they never go to the public media
+    container: REPORT_EXPORT_STORAGE is a private container (or a directory outside
+    MEDIA_ROOT), and nothing is spooled. Used as a FileField storage callable.
+    """
+    return import_string(REPORT_EXPORT_STORAGE)(**REPORT_EXPORT_STORAGE_OPTIONS)
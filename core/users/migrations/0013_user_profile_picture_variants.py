@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 23:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0012_user_active_buyer_since'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='profile_picture_variants',
+            field=models.JSONField(blank=True, default=dict, help_text='Resized WebP/JPEG variants of the profile picture (generated in the background)'),
+        ),
+    ]
@@ -31,6 +31,7 @@ class User(AbstractBaseUser, PermissionsMixin):
     gender = models.CharField(max_length=10, choices=GENDER_CHOICES, null=True, blank=True)
     date_of_birth = models.DateField(null=True, blank=True)
     profile_picture = models.ImageField(upload_to='profile_pictures/', null=True, blank=True)
+    profile_picture_variants = models.JSONField(default=dict, blank=True, help_text='Resized WebP/JPEG variants of the profile picture (generated in the background)')
     
     # Address fields
     address_line1 = models.TextField(blank=True)
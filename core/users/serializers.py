@@ -4,6 +4,7 @@ from django.conf import settings
 from .models import User, KYC, Nominee, DistributorApplication
 from django.utils import timezone
 from urllib.parse import quote
+from core.images import image_variant_urls
 
 
 class ReferredByUserSerializer(serializers.Serializer):
@@ -63,11 +64,12 @@ class ReviewedByUserSerializer(serializers.Serializer):
 class UserSerializer(serializers.ModelSerializer):
     kyc_status = serializers.SerializerMethodField()
     profile_picture_url = serializers.SerializerMethodField()
+    profile_picture_variants = serializers.SerializerMethodField()
     
     class Meta:
         model = User
         fields = ('id', 'email', 'mobile', 'first_name', 'last_name',
-                  'gender', 'date_of_birth', 'profile_picture_url',
+                  'gender', 'date_of_birth', 'profile_picture_url', 'profile_picture_variants',
                   'address_line1', 'address_line2', 'city', 'state', 'pincode', 'country',
                   'role', 'is_distributor', 'is_active_buyer', 'referral_code', 
                   'date_joined', 'last_login', 'kyc_status')
@@ -90,6 +92,10 @@ class UserSerializer(serializers.ModelSerializer):
                 return request.build_absolute_uri(obj.profile_picture.url)
             return obj.profile_picture.url
         return None
+    
+    def get_profile_picture_variants(self, obj):
+        """Get resized profile picture URLs per width and format (None until generated)"""
+        return image_variant_urls(obj, 'profile_picture', 'profile_picture_variants', self.context.get('request'))
 
 
 class UserNormalListSerializer(UserSerializer):
@@ -131,6 +137,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
     is_distributor_terms_and_conditions_accepted = serializers.SerializerMethodField()
     distributor_application_status = serializers.SerializerMethodField()
     profile_picture_url = serializers.SerializerMethodField()
+    profile_picture_variants = serializers.SerializerMethodField()
     referral_link = serializers.SerializerMethodField()
     payment_terms_acceptance_document_url = serializers.SerializerMethodField()
     payment_receipt_urls = serializers.SerializerMethodField()
@@ -140,7 +147,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('id', 'username', 'email', 'mobile', 'first_name', 'last_name',
-                  'gender', 'date_of_birth', 'profile_picture', 'profile_picture_url',
+                  'gender', 'date_of_birth', 'profile_picture', 'profile_picture_url', 'profile_picture_variants',
                   'address_line1', 'address_line2', 'city', 'state', 'pincode', 'country',
                   'role', 'is_distributor', 'is_active_buyer', 'referral_code', 'referral_link',
                   'referred_by', 'kyc_status', 'nominee_exists', 'nominee_kyc_status', 'date_joined',
@@ -242,6 +249,10 @@ class UserProfileSerializer(serializers.ModelSerializer):
             return obj.profile_picture.url
         return None
     
+    def get_profile_picture_variants(self, obj):
+        """Get resized profile picture URLs per width and format (None until generated)"""
+        return image_variant_urls(obj, 'profile_picture', 'profile_picture_variants', self.context.get('request'))
+    
     def get_referral_link(self, obj):
         """Generate referral link using FRONTEND_BASE_URL and user's referral code with name parameter"""
         if not obj.referral_code:
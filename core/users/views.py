@@ -3,7 +3,6 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.exceptions import PermissionDenied
-from rest_framework.pagination import PageNumberPagination
 from django.shortcuts import get_object_or_404
 from django.db.models import Q
 from django.utils import timezone
@@ -13,10 +12,12 @@ from .models import User, KYC, Nominee, DistributorApplication
 from .serializers import UserSerializer, UserNormalListSerializer, UserProfileSerializer, KYCSerializer, NomineeSerializer, DistributorApplicationSerializer, UnifiedKYCSerializer, UpdateTotalEarnedSerializer
 from core.settings.models import PlatformSettings
 from core.wallet.utils import get_or_create_wallet
+from core.db_router import use_replica
+from core.pagination import EstimatedCountPagination
 from decimal import Decimal
 
 
-class DistributorApplicationPagination(PageNumberPagination):
+class DistributorApplicationPagination(EstimatedCountPagination):
     """Custom pagination for distributor application list with page_size support"""
     page_size = 20
     page_size_query_param = 'page_size'
@@ -407,6 +408,7 @@ class KYCViewSet(viewsets.ModelViewSet):
         return Response({'status': new_status})
     
     @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    @use_replica()
     def list_all(self, request):
         """
         List all KYC documents (both User KYC and Nominee KYC) with filtering (Admin only)
@@ -811,6 +813,7 @@ class DistributorApplicationViewSet(viewsets.ModelViewSet):
             })
     
     @action(detail=False, methods=['get'])
+    @use_replica()
     def list_all(self, request):
         """
         List all distributor applications with filtering and pagination (Admin/Staff only)
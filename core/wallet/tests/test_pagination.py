@@ -0,0 +1,64 @@
+"""
+Tests for cached counts when paging through the wallet ledger
+"""
+from decimal import Decimal
+from unittest.mock import patch
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from core.pagination import get_estimated_count
+from core.users.models import User
+from core.wallet.models import Wallet, WalletTransaction
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'pagination-tests'}
+})
+class EstimatedCountPaginationTest(TestCase):
+    """Filtered listings count exactly; unfiltered large tables reuse a cached count"""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='testpass123', role='admin'
+        )
+        wallet = Wallet.objects.create(user=self.admin)
+        WalletTransaction.objects.bulk_create([
+            WalletTransaction(
+                user=self.admin, wallet=wallet, transaction_type='DEPOSIT', amount=Decimal('10'),
+                balance_before=0, balance_after=0
+            )
+            for _ in range(3)
+        ])
+
+    def test_filtered_queryset_counts_exactly(self):
+        queryset = WalletTransaction.objects.filter(user=self.admin)
+        with patch('core.pagination.get_table_row_estimate', return_value=10 ** 7) as estimate:
+            self.assertEqual(get_estimated_count(queryset), (3, False))
+        estimate.assert_not_called()
+
+    def test_small_table_counts_exactly(self):
+        with patch('core.pagination.get_table_row_estimate', return_value=100):
+            self.assertEqual(get_estimated_count(WalletTransaction.objects.order_by('-id')), (3, False))
+
+    def test_large_table_count_is_cached(self):
+        queryset = WalletTransaction.objects.order_by('-id')
+        with patch('core.pagination.get_table_row_estimate', return_value=10 ** 7):
+            self.assertEqual(get_estimated_count(queryset), (3, True))
+
+            WalletTransaction.objects.filter(id=queryset[0].id).delete()
+            with self.assertNumQueries(0):
+                self.assertEqual(get_estimated_count(queryset), (3, True))
+
+    def test_ledger_listing_reports_estimate_flag(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+
+        with patch('core.pagination.get_table_row_estimate', return_value=10 ** 7):
+            response = client.get('/api/wallet/transactions/?page_size=2', secure=True)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual((response.data['count'], response.data['count_is_estimate']), (3, True))
+            self.assertEqual(len(response.data['results']), 2)
+
+            response = client.get('/api/wallet/transactions/?transaction_type=DEPOSIT', secure=True)
+            self.assertEqual(response.data['count_is_estimate'], False)
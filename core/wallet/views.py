@@ -3,7 +3,6 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import NotFound, ValidationError, PermissionDenied
-from rest_framework.pagination import PageNumberPagination
 from django.contrib.auth import get_user_model
 from decimal import Decimal
 from datetime import datetime, timedelta
@@ -11,13 +10,14 @@ import logging
 from .models import Wallet, WalletTransaction
 from .serializers import WalletSerializer, WalletTransactionSerializer, CreateWalletRefundSerializer
 from .utils import get_or_create_wallet, add_wallet_balance
+from core.pagination import EstimatedCountPagination
 
 logger = logging.getLogger(__name__)
 
 User = get_user_model()
 
 
-class WalletTransactionPagination(PageNumberPagination):
+class WalletTransactionPagination(EstimatedCountPagination):
     """Custom pagination for wallet transaction list with page_size support"""
     page_size = 20
     page_size_query_param = 'page_size'
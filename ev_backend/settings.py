@@ -7,6 +7,7 @@ import environ
 import os
 from datetime import timedelta
 import hashlib
+from celery.schedules import crontab
 
 # --------------------------------------------------
 # BASE
@@ -121,6 +122,16 @@ if DB_ENGINE == "mysql":
             },
         }
     }
+    # Read replica for reports, dashboards and exports (see core/db_router.py)
+    if env("DB_REPLICA_HOST", default=""):
+        DATABASES["replica"] = {
+            **DATABASES["default"],
+            "HOST": env("DB_REPLICA_HOST"),
+            "PORT": env("DB_REPLICA_PORT", default=DATABASES["default"]["PORT"]),
+            "USER": env("DB_REPLICA_USER", default=DATABASES["default"]["USER"]),
+            "PASSWORD": env("DB_REPLICA_PASSWORD", default=DATABASES["default"]["PASSWORD"]),
+            "TEST": {"MIRROR": "default"},
+        }
 else:
     DATABASES = {
         "default": {
@@ -128,6 +139,19 @@ else:
             "NAME": BASE_DIR / "db.sqlite3",
         }
     }
+    # Optional second SQLite file standing in for the replica locally
+    # (e.g. cp db.sqlite3 db_replica.sqlite3 and set DB_REPLICA_NAME=db_replica.sqlite3)
+    if env("DB_REPLICA_NAME", default=""):
+        DATABASES["replica"] = {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": BASE_DIR / env("DB_REPLICA_NAME"),
+            "TEST": {"MIRROR": "default"},
+        }
+
+DATABASE_ROUTERS = ["core.db_router.ReplicaRouter"]
+
+# Reads fall back to the primary when the replica is further behind than this
+REPLICA_MAX_LAG_SECONDS = env.int("DB_REPLICA_MAX_LAG_SECONDS", default=30)
 
 # --------------------------------------------------
 # AUTH
@@ -155,11 +179,32 @@ USE_TZ = True
 # STATIC & MEDIA (AZURE BLOB STORAGE)
 # --------------------------------------------------
 
-DEFAULT_FILE_STORAGE = "storages.backends.azure_storage.AzureStorage"
+# Opt-in: media writes are spooled locally and uploaded to MEDIA_SPOOL_BACKEND in the
+# background (core/storage.py). Until uploaded, a file exists only in MEDIA_SPOOL_DIR,
+# so only enable this when MEDIA_SPOOL_DIR is a persistent volume shared by every web
+# and Celery worker (otherwise another server cannot read the file and a redeploy
+# loses the pending uploads). Disabled, media is written to Azure directly.
+MEDIA_SPOOL_ENABLED = env.bool("MEDIA_SPOOL_ENABLED", default=False)
+MEDIA_SPOOL_BACKEND = env("MEDIA_SPOOL_BACKEND", default="storages.backends.azure_storage.AzureStorage")
+MEDIA_SPOOL_DIR = env("MEDIA_SPOOL_DIR", default=str(BASE_DIR / "spool" / "media"))
+MEDIA_SPOOL_UPLOAD_WORKERS = env.int("MEDIA_SPOOL_UPLOAD_WORKERS", default=4)
+MEDIA_SPOOL_MAX_ATTEMPTS = env.int("MEDIA_SPOOL_MAX_ATTEMPTS", default=5)
+MEDIA_SPOOL_RETRY_DELAY = env.float("MEDIA_SPOOL_RETRY_DELAY", default=2.0)
+
+DEFAULT_FILE_STORAGE = "core.storage.SpooledStorage" if MEDIA_SPOOL_ENABLED else MEDIA_SPOOL_BACKEND
+
+# Resized variants of vehicle, gallery and profile images (core/images.py)
+IMAGE_DERIVATIVE_WIDTHS = tuple(env.list("IMAGE_DERIVATIVE_WIDTHS", cast=int, default=[320, 640, 1280]))
+IMAGE_DERIVATIVE_FORMATS = tuple(env.list("IMAGE_DERIVATIVE_FORMATS", default=["webp", "jpeg"]))
+IMAGE_DERIVATIVE_QUALITY = env.int("IMAGE_DERIVATIVE_QUALITY", default=80)
+IMAGE_DERIVATIVE_WORKERS = env.int("IMAGE_DERIVATIVE_WORKERS", default=4)
 STATICFILES_STORAGE = "storages.backends.azure_storage.AzureStorage"
 
 AZURE_ACCOUNT_NAME = env("AZURE_STORAGE_NAME")
 AZURE_ACCOUNT_KEY = env("AZURE_STORAGE_KEY")
+# Optional, e.g. an Azurite emulator for local runs:
+# DefaultEndpointsProtocol=http;AccountName=devstoreaccount1;AccountKey=...;BlobEndpoint=http://127.0.0.1:10000/devstoreaccount1;
+AZURE_CONNECTION_STRING = env("AZURE_CONNECTION_STRING", default=None)
 
 AZURE_STATIC_CONTAINER = env("AZURE_STATIC_CONTAINER", default="static")
 AZURE_MEDIA_CONTAINER = env("AZURE_MEDIA_CONTAINER", default="media")
@@ -169,6 +214,24 @@ AZURE_CONTAINER = AZURE_STATIC_CONTAINER
 STATIC_URL = f"https://{AZURE_ACCOUNT_NAME}.blob.core.windows.net/{AZURE_STATIC_CONTAINER}/"
 MEDIA_URL = f"https://{AZURE_ACCOUNT_NAME}.blob.core.windows.net/{AZURE_MEDIA_CONTAINER}/"
 
+# Report exports (core/reports/exports.py) hold every user's financial records. They are
+# written to a private container (no public access) instead of the media container, handed
+# out only as SAS URLs valid for REPORT_EXPORT_URL_EXPIRY seconds and deleted after
+# REPORT_EXPORT_RETENTION_DAYS. With a non-Azure backend they are kept outside MEDIA_ROOT
+# and served through the authenticated download endpoint.
+REPORT_EXPORT_STORAGE = env("REPORT_EXPORT_STORAGE", default="storages.backends.azure_storage.AzureStorage")
+REPORT_EXPORT_URL_EXPIRY = env.int("REPORT_EXPORT_URL_EXPIRY", default=300)
+REPORT_EXPORT_RETENTION_DAYS = env.int("REPORT_EXPORT_RETENTION_DAYS", default=7)
+if REPORT_EXPORT_STORAGE == "storages.backends.azure_storage.AzureStorage":
+    REPORT_EXPORT_STORAGE_OPTIONS = {
+        "azure_container": env("AZURE_EXPORTS_CONTAINER", default="report-exports"),
+        "expiration_secs": REPORT_EXPORT_URL_EXPIRY,
+    }
+else:
+    REPORT_EXPORT_STORAGE_OPTIONS = {
+        "location": env("REPORT_EXPORT_DIR", default=str(BASE_DIR / "private" / "report_exports")),
+    }
+
 # --------------------------------------------------
 # REST FRAMEWORK
 # --------------------------------------------------
@@ -233,6 +296,30 @@ CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = TIME_ZONE
 
+CELERY_BEAT_SCHEDULE = {
+    "refresh-dashboard-rollups": {
+        "task": "core.reports.tasks.refresh_dashboard_rollups_task",
+        "schedule": 600.0,
+    },
+    "rebuild-dashboard-rollups-nightly": {
+        "task": "core.reports.tasks.refresh_dashboard_rollups_task",
+        "schedule": crontab(hour=2, minute=30),
+        "kwargs": {"full": True},
+    },
+    "snapshot-buyer-growth-monthly": {
+        "task": "core.reports.tasks.snapshot_buyer_growth_task",
+        "schedule": crontab(day_of_month=1, hour=0, minute=15),
+    },
+    "delete-expired-report-exports": {
+        "task": "core.reports.tasks.delete_expired_report_exports_task",
+        "schedule": crontab(hour=3, minute=15),
+    },
+    "process-pending-webhook-events": {
+        "task": "core.payments.tasks.process_pending_webhook_events_task",
+        "schedule": 60.0,
+    },
+}
+
 CSRF_TRUSTED_ORIGINS = [
     "https://ev-backend-api-dca5g4adcrgwhbfg.southindia-01.azurewebsites.net",
 ]
@@ -276,6 +363,9 @@ RAZORPAY_KEY_ID = env("RAZORPAY_KEY_ID", default="")
 RAZORPAY_KEY_SECRET = env("RAZORPAY_KEY_SECRET", default="")
 RAZORPAY_WEBHOOK_SECRET = env("RAZORPAY_WEBHOOK_SECRET", default="")
 RAZORPAY_PAYOUT_WEBHOOK_SECRET = env("RAZORPAY_PAYOUT_WEBHOOK_SECRET", default="")
+# Number of payments.webhooks.<n> Celery queues webhook events are partitioned into by
+# order id (0 = default queue). Run one --concurrency=1 worker per partition queue.
+RAZORPAY_WEBHOOK_PARTITIONS = env.int("RAZORPAY_WEBHOOK_PARTITIONS", default=0)
 # RazorpayX (Payouts) - separate credentials for payout operations
 RAZORPAYX_KEY_ID = env("RAZORPAYX_KEY_ID", default="")
 RAZORPAYX_KEY_SECRET = env("RAZORPAYX_KEY_SECRET", default="")
@@ -293,6 +383,18 @@ RAZORPAY_CONNECT_TIMEOUT = env.int("RAZORPAY_CONNECT_TIMEOUT", default=10)
 RAZORPAY_READ_TIMEOUT = env.int("RAZORPAY_READ_TIMEOUT", default=20)
 RAZORPAY_MAX_RETRIES = env.int("RAZORPAY_MAX_RETRIES", default=1)
 RAZORPAY_RETRY_BACKOFF_BASE = env.int("RAZORPAY_RETRY_BACKOFF_BASE", default=1)
+# Latency budget: create_order gives up on Razorpay (all attempts included) after this many seconds
+RAZORPAY_ORDER_LATENCY_BUDGET = env.float("RAZORPAY_ORDER_LATENCY_BUDGET", default=8.0)
+# Circuit breaker: open after N gateway failures within the window, trial call after the reset timeout
+RAZORPAY_BREAKER_FAILURE_THRESHOLD = env.int("RAZORPAY_BREAKER_FAILURE_THRESHOLD", default=5)
+RAZORPAY_BREAKER_FAILURE_WINDOW = env.int("RAZORPAY_BREAKER_FAILURE_WINDOW", default=30)
+RAZORPAY_BREAKER_RESET_TIMEOUT = env.int("RAZORPAY_BREAKER_RESET_TIMEOUT", default=30)
+# Razorpay API base URL override (e.g. a local stand-in server for tests); empty = live API
+RAZORPAY_API_BASE_URL = env("RAZORPAY_API_BASE_URL", default="")
+# Receipt PDFs: processes used by bulk receipt generation, and how long rendered PDFs
+# are cached by content hash (seconds)
+RECEIPT_RENDER_WORKERS = env.int("RECEIPT_RENDER_WORKERS", default=4)
+RECEIPT_PDF_CACHE_TIMEOUT = env.int("RECEIPT_PDF_CACHE_TIMEOUT", default=86400)
 # --------------------------------------------------
 # BUSINESS RULES
 # --------------------------------------------------
@@ -13,6 +13,11 @@ DB_ENGINE=sqlite
 # DB_PASSWORD=ev_password
 # DB_HOST=mysql
 # DB_PORT=3306
+# Optional read replica for reports/dashboards/exports (falls back to primary when lagging)
+# DB_REPLICA_HOST=mysql-replica
+# DB_REPLICA_MAX_LAG_SECONDS=30
+# Local stand-in: cp db.sqlite3 db_replica.sqlite3, then
+# DB_REPLICA_NAME=db_replica.sqlite3
 
 # Django Settings
 SECRET_KEY=$(python -c 'from django.core.management.utils import get_random_secret_key; print(get_random_secret_key())')